@@ -1,5 +1,29 @@
 """Claude agent for open-ended markdown cleanup."""
 
+from pdf2md.agent.backends import ScriptedBackend, use_backend
+from pdf2md.agent.budget import AgentBudget, AgentError
+from pdf2md.agent.cache import AgentCache
+from pdf2md.agent.chunked import run_chunked_cleanup_agent
 from pdf2md.agent.cleanup import run_cleanup_agent
+from pdf2md.agent.patches import replay_patches, run_patch_cleanup
+from pdf2md.agent.routing import RouteDecision, route_document
+from pdf2md.agent.scheduler import AgentOutcome, AgentScheduler
+from pdf2md.agent.telemetry import AgentTelemetry, collect_telemetry
 
-__all__ = ["run_cleanup_agent"]
+__all__ = [
+    "AgentBudget",
+    "AgentCache",
+    "AgentError",
+    "AgentOutcome",
+    "AgentScheduler",
+    "AgentTelemetry",
+    "RouteDecision",
+    "ScriptedBackend",
+    "collect_telemetry",
+    "use_backend",
+    "run_cleanup_agent",
+    "run_chunked_cleanup_agent",
+    "run_patch_cleanup",
+    "replay_patches",
+    "route_document",
+]
@@ -0,0 +1,581 @@
+"""Pluggable backends that run agent sessions.
+
+run_agent_session hands every session to the current AgentBackend:
+
+- ClaudeBackend talks to the Claude Agent SDK (the default).
+- ScriptedBackend runs locally without network: it applies a deterministic
+  edit to the session's markdown (or replays a recorded transcript), with
+  configurable latency and injected failures. Tests and load benchmarks use
+  it to exercise batching, timeouts, retries, caching and concurrency.
+- RecordingBackend wraps another backend and appends every successful
+  session to a transcript file that ScriptedBackend can replay.
+
+Backends report like the SDK does: turns and tokens go to the run's budget
+(agent.budget) and to the telemetry collector (agent.telemetry), a failure
+is recorded as the run's error and returns None, and going over budget
+raises BudgetExceededError.
+
+The backend is chosen with use_backend(), or for a whole process (e.g. a CI
+job running `pdf2md convert --agent`) with $PDF2MD_AGENT_BACKEND:
+
+    claude                                  Claude Agent SDK (default)
+    scripted                                Local backend, no edits
+    scripted:latency=0.5,failure_rate=0.1   ... with latency and failures
+    scripted:transcript=runs.jsonl          ... replaying a transcript
+    record:runs.jsonl                       Claude, recording a transcript
+"""
+
+from __future__ import annotations
+
+import asyncio
+import difflib
+import functools
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections.abc import Callable, Collection, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Protocol
+
+from pdf2md.agent.budget import (
+    TRANSIENT_API_STATUSES,
+    TRANSIENT_MESSAGE_ERRORS,
+    AgentError,
+    BudgetExceededError,
+    current_run,
+    usage_tokens,
+)
+from pdf2md.agent.telemetry import current_telemetry
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ENV = "PDF2MD_AGENT_BACKEND"
+
+# Injected failures: (message, transient)
+FAILURES = {
+    "rate_limit": ("Agent session failed: error_during_execution (HTTP 429)", True),
+    "server_error": ("Agent session failed: error_during_execution (HTTP 529)", True),
+    "disconnect": ("Agent error: connection to the CLI lost", True),
+    "error": ("Agent session failed: error_during_execution", False),
+    "hang": ("", False),  # Never answers; only a timeout or cancellation ends it
+}
+
+# Rough size of a token, for the usage of scripted sessions
+CHARS_PER_TOKEN = 4
+
+# "- **Markdown:** PATH" (or "Markdown (this section only)") in edit prompts
+PROMPT_MARKDOWN_PATTERN = re.compile(r"^- \*\*Markdown[^*]*:\*\* (.+)$", re.MULTILINE)
+
+# Numbered excerpt of patch prompts (see agent.patches.number_lines)
+PROMPT_NUMBERED_PATTERN = re.compile(r"<(document|section)>\n(.*?)\n</\1>", re.DOTALL)
+NUMBERED_LINE_PATTERN = re.compile(r"^\s*(\d+)\| ?(.*)$")
+
+_current: ContextVar[AgentBackend | None] = ContextVar("pdf2md_agent_backend", default=None)
+
+
+class AgentNotInstalledError(ImportError):
+    """Raised when Claude Agent SDK is not installed."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            "Claude Agent SDK is not installed. Install with: pip install pdf2md[agent]"
+        )
+
+
+class AgentBackend(Protocol):
+    """Runs one agent session; see run_agent_session for the contract."""
+
+    name: str  # Part of agent cache keys, so backends do not share results
+
+    async def run_session(
+        self,
+        prompt: str,
+        cwd: Path,
+        *,
+        allowed_tools: Sequence[str],
+        model: str | None,
+        verbose: bool,
+    ) -> str | None:
+        """Run the session; return the agent's final text, or None if it failed."""
+        ...
+
+
+class ClaudeBackend:
+    """Sessions of the Claude Agent SDK, which may read and edit files under cwd."""
+
+    name = "claude"
+
+    async def run_session(
+        self,
+        prompt: str,
+        cwd: Path,
+        *,
+        allowed_tools: Sequence[str],
+        model: str | None,
+        verbose: bool,
+    ) -> str | None:
+        """
+        Run one SDK session.
+
+        Raises:
+            AgentNotInstalledError: If Claude Agent SDK is not installed
+            BudgetExceededError: If the enclosing run goes over its turn or token budget
+        """
+        try:
+            from claude_agent_sdk import (
+                AssistantMessage,
+                ClaudeAgentOptions,
+                CLIConnectionError,
+                CLINotFoundError,
+                ResultMessage,
+                TextBlock,
+                ToolUseBlock,
+                query,
+            )
+        except ImportError as e:
+            raise AgentNotInstalledError() from e
+
+        run = current_run()
+        max_turns = run.remaining_turns() if run is not None else None
+        if max_turns == 0:
+            raise BudgetExceededError(f"Agent turn budget ({run.budget.max_turns}) used up")
+
+        options = ClaudeAgentOptions(
+            allowed_tools=list(allowed_tools),
+            permission_mode="acceptEdits",
+            cwd=str(cwd),
+            model=model,
+            max_turns=max_turns,
+        )
+
+        final_response: list[str] = []
+        result_text: str | None = None
+        telemetry = current_telemetry()
+        start = time.perf_counter()
+        error: AgentError | None = None
+        rate_limited = False  # An API call failed in a way worth retrying
+        # Token usage arrives with each API response; a response split over several
+        # messages repeats its usage under the same message id
+        counted_messages: set[str | None] = set()
+
+        try:
+            async for message in query(prompt=prompt, options=options):
+                if isinstance(message, AssistantMessage):
+                    for block in message.content:
+                        if isinstance(block, TextBlock):
+                            if verbose:
+                                print(block.text)
+                            final_response.append(block.text)
+                        elif isinstance(block, ToolUseBlock) and telemetry is not None:
+                            telemetry.record_tool_call(block.name)
+                    message_id = getattr(message, "message_id", None)
+                    usage = getattr(message, "usage", None)
+                    if run is not None and usage and message_id not in counted_messages:
+                        counted_messages.add(message_id)
+                        run.add_tokens(usage_tokens(usage))
+                    if getattr(message, "error", None) in TRANSIENT_MESSAGE_ERRORS:
+                        rate_limited = True
+                elif isinstance(message, ResultMessage):
+                    result_text = getattr(message, "result", None)
+                    if telemetry is not None:
+                        telemetry.record_result(message)
+                    if run is not None:
+                        if not counted_messages:
+                            run.add_tokens(usage_tokens(message.usage))
+                        run.add_turns(message.num_turns)
+                    if message.subtype == "error_max_turns":
+                        raise BudgetExceededError(
+                            f"Agent session stopped at its turn limit ({message.num_turns} turns)"
+                        )
+                    if message.is_error:
+                        status = getattr(message, "api_error_status", None)
+                        error = AgentError(
+                            f"Agent session failed: {message.subtype}"
+                            + (f" (HTTP {status})" if status else ""),
+                            transient=rate_limited or status in TRANSIENT_API_STATUSES,
+                        )
+        except BudgetExceededError:
+            if telemetry is not None:
+                telemetry.record_session(time.perf_counter() - start, failed=True)
+            raise
+        except Exception as e:
+            if verbose:
+                print(f"Agent error: {e}")
+            connection_lost = isinstance(e, (CLIConnectionError, OSError)) and not isinstance(
+                e, CLINotFoundError
+            )
+            error = AgentError(f"Agent error: {e}", transient=rate_limited or connection_lost)
+
+        if telemetry is not None:
+            telemetry.record_session(time.perf_counter() - start, failed=error is not None)
+        if error is not None:
+            if run is not None:
+                run.record_error(error)
+            return None
+        # A session whose last turn was only tool calls still succeeded
+        return "\n".join(final_response) if final_response else result_text or ""
+
+
+def _prompt_markdown_path(prompt: str) -> Path | None:
+    match = PROMPT_MARKDOWN_PATTERN.search(prompt)
+    return Path(match.group(1).strip()) if match else None
+
+
+def _numbered_excerpt(prompt: str) -> tuple[int, list[str]] | None:
+    """First line number and lines of a patch prompt's numbered excerpt."""
+    match = PROMPT_NUMBERED_PATTERN.search(prompt)
+    if match is None:
+        return None
+    rows = [NUMBERED_LINE_PATTERN.match(row) for row in match.group(2).split("\n")]
+    if not rows or not all(rows):
+        return None
+    return int(rows[0].group(1)), [row.group(2) for row in rows]
+
+
+def line_edits(old: Sequence[str], new: Sequence[str], first_line: int = 1) -> list[dict]:
+    """
+    Line-range replacements (in the patch answer format) that turn old into new.
+
+    Args:
+        old: Lines before the edit
+        new: Lines after the edit
+        first_line: Line number of old[0]
+
+    Returns:
+        Non-overlapping edits as dicts with start, end and replacement
+    """
+    edits = []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        replacement = list(new[j1:j2])
+        if i1 == i2:
+            # A pure insertion rides on the line before it (or after it, at the top)
+            if i1 > 0:
+                i1, replacement = i1 - 1, [old[i1 - 1], *replacement]
+            else:
+                i2, replacement = 1, [*replacement, old[0]]
+        edits.append(
+            {
+                "start": first_line + i1,
+                "end": first_line + i2 - 1,
+                "replacement": "\n".join(replacement),
+                "reason": "scripted edit",
+            }
+        )
+    return edits
+
+
+def transcript_key(prompt: str, cwd: Path) -> str:
+    """
+    Hash of a prompt that does not depend on where the document lives.
+
+    Paths under cwd are reduced to their file names, so a transcript recorded
+    in one output directory (or with one temporary chunk directory) replays
+    in another.
+    """
+    normalized = re.sub(
+        re.escape(str(cwd)) + r"[^\s`]*",
+        lambda m: "{cwd}/" + Path(m.group(0)).name,
+        prompt,
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def load_transcript(path: Path) -> dict[str, dict]:
+    """
+    Read a transcript written by RecordingBackend.
+
+    Args:
+        path: JSON Lines file, one session per line
+
+    Returns:
+        Sessions by transcript_key (the last one wins)
+    """
+    sessions = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            entry = json.loads(line)
+            sessions[entry["key"]] = entry
+    return sessions
+
+
+class ScriptedBackend:
+    """
+    Local sessions with deterministic results, latency and failure injection.
+
+    An edit session (with tools) applies transform to the markdown file named
+    in the prompt; a text-only patch session answers with the line edits that
+    transform makes to the prompt's numbered excerpt. With a transcript, the
+    recorded answer and file contents of the matching prompt are replayed
+    instead, and a prompt without a recording fails.
+    """
+
+    name = "scripted"
+
+    def __init__(
+        self,
+        *,
+        transform: Callable[[str], str] | None = None,
+        transcript: Path | None = None,
+        latency_seconds: float | tuple[float, float] = 0.0,
+        failure_rate: float = 0.0,
+        failure: str = "rate_limit",
+        fail_sessions: Collection[int] = (),
+        turns_per_session: int = 1,
+        seed: int | None = None,
+    ) -> None:
+        """
+        Args:
+            transform: Edit applied to the markdown (default: none)
+            transcript: JSON Lines file written by RecordingBackend to replay
+            latency_seconds: Duration of each session, or a (min, max) range
+            failure_rate: Share of sessions that fail at random
+            failure: Kind of injected failure (a key of FAILURES)
+            fail_sessions: Numbers of sessions (from 1, in start order) that fail
+            turns_per_session: Turns each session reports
+            seed: Seed of the latency and failure draws
+
+        Raises:
+            ValueError: If failure is unknown
+        """
+        if failure not in FAILURES:
+            raise ValueError(f"Unknown failure: {failure} (expected one of {', '.join(FAILURES)})")
+        self.transform = transform or (lambda text: text)
+        self.transcript = load_transcript(transcript) if transcript is not None else None
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.failure = failure
+        self.fail_sessions = frozenset(fail_sessions)
+        self.turns_per_session = turns_per_session
+        self.sessions = 0  # Sessions started
+        self._random = random.Random(seed)
+
+    def _latency(self) -> float:
+        if isinstance(self.latency_seconds, tuple):
+            return self._random.uniform(*self.latency_seconds)
+        return self.latency_seconds
+
+    def _respond(self, prompt: str, cwd: Path, allowed_tools: Sequence[str]) -> str | AgentError:
+        if self.transcript is not None:
+            entry = self.transcript.get(transcript_key(prompt, cwd))
+            if entry is None:
+                return AgentError("No recorded session for this prompt")
+            md_path = _prompt_markdown_path(prompt)
+            for name, text in entry.get("files", {}).items():
+                if md_path is not None and md_path.name == name:
+                    md_path.write_text(text, encoding="utf-8")
+            return entry["response"]
+
+        if allowed_tools:
+            md_path = _prompt_markdown_path(prompt)
+            if md_path is None or not md_path.is_file():
+                return AgentError("No markdown file named in the prompt")
+            content = md_path.read_text(encoding="utf-8")
+            edited = self.transform(content)
+            if edited != content:
+                md_path.write_text(edited, encoding="utf-8")
+            changed = len(line_edits(content.split("\n"), edited.split("\n")))
+            return f"Scripted cleanup: {changed} change(s)."
+
+        excerpt = _numbered_excerpt(prompt)
+        if excerpt is None:
+            return json.dumps({"edits": [], "summary": "Scripted cleanup: nothing to edit."})
+        first_line, lines = excerpt
+        edits = line_edits(lines, self.transform("\n".join(lines)).split("\n"), first_line)
+        summary = f"Scripted cleanup: {len(edits)} change(s)."
+        return json.dumps({"edits": edits, "summary": summary})
+
+    async def run_session(
+        self,
+        prompt: str,
+        cwd: Path,
+        *,
+        allowed_tools: Sequence[str],
+        model: str | None,
+        verbose: bool,
+    ) -> str | None:
+        """
+        Run one scripted session.
+
+        Raises:
+            BudgetExceededError: If the enclosing run goes over its turn or token budget
+        """
+        self.sessions += 1
+        number = self.sessions
+        run = current_run()
+        telemetry = current_telemetry()
+        if run is not None and run.remaining_turns() == 0:
+            raise BudgetExceededError(f"Agent turn budget ({run.budget.max_turns}) used up")
+
+        fails = number in self.fail_sessions or self._random.random() < self.failure_rate
+        latency = self._latency()
+        start = time.perf_counter()
+        if fails and self.failure == "hang":
+            await asyncio.Event().wait()
+        await asyncio.sleep(latency)
+
+        if fails:
+            message, transient = FAILURES[self.failure]
+            result: str | AgentError = AgentError(message, transient=transient)
+        else:
+            result = self._respond(prompt, cwd, allowed_tools)
+        if verbose:
+            print(result)
+
+        failed = isinstance(result, AgentError)
+        response = "" if failed else result
+        usage = {
+            "input_tokens": len(prompt) // CHARS_PER_TOKEN,
+            "output_tokens": len(response) // CHARS_PER_TOKEN,
+        }
+        if telemetry is not None:
+            for tool in ("Read", "Edit") if not failed else ():
+                if tool in allowed_tools:
+                    telemetry.record_tool_call(tool)
+            telemetry.record_result(
+                SimpleNamespace(
+                    num_turns=self.turns_per_session,
+                    duration_api_ms=latency * 1000,
+                    usage=usage,
+                )
+            )
+        try:
+            if run is not None:
+                run.add_tokens(usage_tokens(usage))
+                run.add_turns(self.turns_per_session)
+        except BudgetExceededError:
+            if telemetry is not None:
+                telemetry.record_session(time.perf_counter() - start, failed=True)
+            raise
+        if telemetry is not None:
+            telemetry.record_session(time.perf_counter() - start, failed=failed)
+
+        if failed:
+            if run is not None:
+                run.record_error(result)
+            return None
+        return response
+
+
+class RecordingBackend:
+    """Another backend whose successful sessions are appended to a transcript."""
+
+    def __init__(self, backend: AgentBackend, transcript: Path) -> None:
+        """
+        Args:
+            backend: Backend that runs the sessions
+            transcript: JSON Lines file to append to (created if missing)
+        """
+        self.backend = backend
+        self.transcript = transcript
+        self.name = backend.name
+
+    async def run_session(
+        self,
+        prompt: str,
+        cwd: Path,
+        *,
+        allowed_tools: Sequence[str],
+        model: str | None,
+        verbose: bool,
+    ) -> str | None:
+        """Run the session on the wrapped backend and record its answer and edits."""
+        response = await self.backend.run_session(
+            prompt, cwd, allowed_tools=allowed_tools, model=model, verbose=verbose
+        )
+        if response is None:
+            return None
+        entry = {"key": transcript_key(prompt, cwd), "response": response, "files": {}}
+        md_path = _prompt_markdown_path(prompt)
+        if allowed_tools and md_path is not None and md_path.is_file():
+            entry["files"][md_path.name] = md_path.read_text(encoding="utf-8")
+        self.transcript.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.transcript, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return response
+
+
+def _parse_options(text: str) -> dict:
+    options = {}
+    for item in filter(None, text.split(",")):
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Backend option needs a value: {item}")
+        options[name.strip()] = value.strip()
+    return options
+
+
+@functools.lru_cache(maxsize=None)
+def load_backend(spec: str) -> AgentBackend:
+    """
+    Backend described by a $PDF2MD_AGENT_BACKEND value.
+
+    The same spec gives the same instance, so a scripted backend's session
+    count and random draws carry over between the runs of a process.
+
+    Args:
+        spec: "claude", "scripted[:name=value,...]" or "record:PATH"
+            (see the module docstring)
+
+    Returns:
+        The backend
+
+    Raises:
+        ValueError: If the spec or one of its options is invalid
+    """
+    kind, _, rest = spec.strip().partition(":")
+    if kind in ("", "claude"):
+        return ClaudeBackend()
+    if kind == "record":
+        if not rest:
+            raise ValueError("record backend needs a transcript path (record:PATH)")
+        return RecordingBackend(ClaudeBackend(), Path(rest))
+    if kind != "scripted":
+        raise ValueError(f"Unknown agent backend: {spec} (expected claude, scripted or record)")
+
+    options = _parse_options(rest)
+    try:
+        latency = options.pop("latency", "0")
+        low, sep, high = latency.partition("-")
+        backend = ScriptedBackend(
+            transcript=Path(options.pop("transcript")) if "transcript" in options else None,
+            latency_seconds=(float(low), float(high)) if sep else float(latency),
+            failure_rate=float(options.pop("failure_rate", 0)),
+            failure=options.pop("failure", "rate_limit"),
+            fail_sessions=[int(n) for n in options.pop("fail_sessions", "").split("+") if n],
+            turns_per_session=int(options.pop("turns", 1)),
+            seed=int(options["seed"]) if "seed" in options else None,
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid agent backend {spec}: {e}") from e
+    options.pop("seed", None)
+    if options:
+        raise ValueError(f"Unknown scripted backend option(s): {', '.join(options)}")
+    return backend
+
+
+def current_backend() -> AgentBackend:
+    """Backend of the innermost use_backend block, else the one of $PDF2MD_AGENT_BACKEND."""
+    backend = _current.get()
+    if backend is None:
+        backend = load_backend(os.environ.get(BACKEND_ENV, "claude"))
+    return backend
+
+
+@contextmanager
+def use_backend(backend: AgentBackend) -> Iterator[AgentBackend]:
+    """Run the agent sessions started in the block (and its tasks) on backend."""
+    token = _current.set(backend)
+    try:
+        yield backend
+    finally:
+        _current.reset(token)
@@ -0,0 +1,194 @@
+"""Budgets, timeouts and failure handling of agent runs.
+
+An agent run on one document may be given an AgentBudget: a wall-clock
+timeout, and limits on turns and tokens summed over all of its sessions.
+run_guarded wraps the run: it snapshots the markdown (and patch record)
+first, and if the run fails, exceeds its budget, times out or is cancelled,
+it writes the snapshot back, so the document is left as it was before the
+agent started.
+
+Sessions find the budget of their run through current_run(), which also
+keeps the last session error. run_agent_session reports most failures as a
+None result, so that a chunked run can keep the sections that did succeed;
+if the whole run comes back empty, run_guarded raises (or logs) that error.
+AgentError.transient tells a retrying caller (agent.scheduler) whether a
+second attempt may succeed, e.g. after a rate limit or an overloaded API.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Mapping
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses of failed API calls worth retrying
+TRANSIENT_API_STATUSES = frozenset({408, 429, 500, 502, 503, 504, 529})
+
+# AssistantMessage.error values worth retrying
+TRANSIENT_MESSAGE_ERRORS = frozenset({"rate_limit", "server_error"})
+
+USAGE_TOKEN_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+
+class AgentError(RuntimeError):
+    """An agent run failed."""
+
+    def __init__(self, message: str, *, transient: bool = False) -> None:
+        super().__init__(message)
+        self.transient = transient  # A retry may succeed
+
+
+class AgentTimeoutError(AgentError):
+    """An agent run took longer than its budget allows."""
+
+
+class BudgetExceededError(AgentError):
+    """An agent run used more turns or tokens than its budget allows."""
+
+
+@dataclass(frozen=True)
+class AgentBudget:
+    """Limits of one document's agent run; None means unlimited."""
+
+    timeout_seconds: float | None = None  # Wall clock of the whole run
+    max_turns: int | None = None  # Summed over the run's sessions
+    max_tokens: int | None = None  # Input, output and prompt-cache tokens, summed
+
+
+def usage_tokens(usage: Mapping[str, Any] | None) -> int:
+    """Input, output and prompt-cache tokens of an SDK usage dict."""
+    if not usage:
+        return 0
+    return sum(usage.get(name, 0) or 0 for name in USAGE_TOKEN_FIELDS)
+
+
+class AgentRun:
+    """Spend and last error of one document's agent run, shared by its sessions."""
+
+    def __init__(self, budget: AgentBudget | None = None) -> None:
+        self.budget = budget or AgentBudget()
+        self.turns = 0
+        self.tokens = 0
+        self.error: AgentError | None = None
+
+    def remaining_turns(self) -> int | None:
+        """Turns a new session may take, or None if unlimited."""
+        if self.budget.max_turns is None:
+            return None
+        return max(self.budget.max_turns - self.turns, 0)
+
+    def add_turns(self, turns: int) -> None:
+        """
+        Count turns of a finished session.
+
+        Raises:
+            BudgetExceededError: If the run is now over its turn budget
+        """
+        self.turns += turns
+        if self.budget.max_turns is not None and self.turns > self.budget.max_turns:
+            raise BudgetExceededError(
+                f"Agent used {self.turns} turns (budget {self.budget.max_turns})"
+            )
+
+    def add_tokens(self, tokens: int) -> None:
+        """
+        Count tokens as sessions report them.
+
+        Raises:
+            BudgetExceededError: If the run is now over its token budget
+        """
+        self.tokens += tokens
+        if self.budget.max_tokens is not None and self.tokens > self.budget.max_tokens:
+            raise BudgetExceededError(
+                f"Agent used {self.tokens:,} tokens (budget {self.budget.max_tokens:,})"
+            )
+
+    def record_error(self, error: AgentError) -> None:
+        """Keep a session failure, reported if the run as a whole fails."""
+        logger.warning("Agent session failed: %s", error)
+        self.error = error
+
+
+_current: ContextVar[AgentRun | None] = ContextVar("pdf2md_agent_run", default=None)
+
+
+def current_run() -> AgentRun | None:
+    """Run of the enclosing run_guarded call, if any."""
+    return _current.get()
+
+
+async def run_guarded(
+    md_path: Path,
+    run: Callable[[], Awaitable[str | None]],
+    *,
+    budget: AgentBudget | None = None,
+    raise_on_error: bool = False,
+    patch_record: Path | None = None,
+) -> str | None:
+    """
+    Run an agent on a document within a budget, undoing it if it fails.
+
+    Args:
+        md_path: Markdown file the agent cleans in place
+        run: Starts the agent run and returns its summary
+        budget: Timeout and turn/token limits (default: unlimited)
+        raise_on_error: Raise AgentError on failure instead of returning None
+        patch_record: Patch record the run writes (patch mode), restored with the file
+
+    Returns:
+        Agent's summary of changes ("" if it gave none), or None if the agent failed
+
+    Raises:
+        AgentError: If the run failed and raise_on_error is set (AgentTimeoutError
+            and BudgetExceededError for a run over its budget)
+    """
+    content = md_path.read_text(encoding="utf-8")
+    record = None
+    if patch_record is not None and patch_record.exists():
+        record = patch_record.read_text(encoding="utf-8")
+
+    def restore() -> None:
+        md_path.write_text(content, encoding="utf-8")
+        if patch_record is not None:
+            if record is None:
+                patch_record.unlink(missing_ok=True)
+            else:
+                patch_record.write_text(record, encoding="utf-8")
+
+    agent_run = AgentRun(budget)
+    token = _current.set(agent_run)
+    try:
+        timeout = agent_run.budget.timeout_seconds
+        try:
+            summary = await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            raise AgentTimeoutError(f"Agent run timed out after {timeout:g}s") from None
+        if summary is None:
+            if agent_run.error is not None:
+                raise agent_run.error
+            # A session may end on a tool call without a closing message; its edits stand
+            summary = ""
+    except AgentError as e:
+        restore()
+        if raise_on_error:
+            raise
+        logger.warning("Agent failed on %s, markdown left unchanged: %s", md_path.name, e)
+        return None
+    except BaseException:
+        # Cancelled, interrupted or a bug: the file is never left half-cleaned
+        restore()
+        raise
+    finally:
+        _current.reset(token)
+    return summary
@@ -0,0 +1,214 @@
+"""Local cache of agent cleanup results.
+
+An agent run is costly, and its result depends only on the input markdown,
+the prompt, the model, the tools the agent may use and the mode (edit, patch,
+chunked). AgentCache stores the cleaned markdown, the agent summary and, in
+patch mode, the patch record, under a hash of those inputs. Re-running the
+agent on unchanged markdown, or resuming a batch after a crash, restores the
+result without starting a session.
+
+Entries live in ``$PDF2MD_CACHE_DIR`` (default ``$XDG_CACHE_HOME/pdf2md/agent``,
+i.e. ``~/.cache/pdf2md/agent``), one JSON file each. A hit refreshes the
+entry's modification time, and once the cache grows past max_bytes the least
+recently used entries are removed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from pdf2md.agent.telemetry import current_telemetry
+
+logger = logging.getLogger(__name__)
+
+# Bump when the entry layout or the meaning of a key changes
+CACHE_FORMAT = "1"
+
+CACHE_DIR_ENV = "PDF2MD_CACHE_DIR"
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir() -> Path:
+    """Cache directory from $PDF2MD_CACHE_DIR, else under $XDG_CACHE_HOME."""
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pdf2md" / "agent"
+
+
+def cache_key(
+    content: str,
+    prompt: str,
+    *,
+    model: str | None,
+    tools: Iterable[str],
+    mode: str,
+    backend: str = "claude",
+) -> str:
+    """
+    Hash everything an agent result depends on.
+
+    Args:
+        content: Input markdown
+        prompt: Prompt template(s) of the run, before the file paths are filled in
+        model: Model name (None for the SDK default)
+        tools: Tools the agent may use
+        mode: Run mode, including settings that change the output (e.g. chunking)
+        backend: Name of the agent backend (see agent.backends)
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    parts = [CACHE_FORMAT, mode, model or "default", ",".join(sorted(tools)), prompt, content]
+    if backend != "claude":
+        # Keeps the keys of Claude results as they were before backends existed
+        parts.append(backend)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedResult:
+    """What an agent run left behind."""
+
+    output: str  # Markdown after the run
+    summary: str
+    patches: str | None = None  # Patch record, in patch mode
+
+
+class AgentCache:
+    """Directory of cached agent results with size-based LRU eviction."""
+
+    def __init__(self, directory: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> CachedResult | None:
+        """
+        Look up a result.
+
+        Args:
+            key: Key from cache_key
+
+        Returns:
+            The cached result, or None on a miss or an unreadable entry
+        """
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            result = CachedResult(**data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Ignoring corrupt agent cache entry %s: %s", path, e)
+            path.unlink(missing_ok=True)
+            return None
+        # Mark as recently used
+        path.touch()
+        return result
+
+    def put(self, key: str, result: CachedResult) -> None:
+        """
+        Store a result, then evict old entries if the cache is over its size.
+
+        Args:
+            key: Key from cache_key
+            result: Result to store
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so a crash never leaves half an entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(asdict(result), f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Removed by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.debug("Evicted %d agent cache entries from %s", removed, self.directory)
+        return removed
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for path in self.directory.glob("*/*.json"):
+            path.unlink(missing_ok=True)
+
+
+async def run_cached(
+    cache: AgentCache,
+    key: str,
+    md_path: Path,
+    run: Callable[[], Awaitable[str | None]],
+    patch_record: Path | None = None,
+) -> str | None:
+    """
+    Restore a cached agent result, or run the agent and cache what it did.
+
+    Failed runs (a None summary) are not cached.
+
+    Args:
+        cache: Result cache
+        key: Key from cache_key
+        md_path: Markdown file the agent cleans in place
+        run: Starts the agent run and returns its summary
+        patch_record: Patch record the run writes (patch mode), cached with it
+
+    Returns:
+        Agent's summary of changes, or None if the agent failed
+    """
+    hit = cache.get(key)
+    if hit is not None:
+        logger.info("Agent cache hit for %s", md_path.name)
+        telemetry = current_telemetry()
+        if telemetry is not None:
+            telemetry.cache_hits += 1
+        md_path.write_text(hit.output, encoding="utf-8")
+        if patch_record is not None and hit.patches is not None:
+            patch_record.write_text(hit.patches, encoding="utf-8")
+        return hit.summary
+
+    summary = await run()
+    if summary is not None:
+        patches = None
+        if patch_record is not None and patch_record.exists():
+            patches = patch_record.read_text(encoding="utf-8")
+        cache.put(key, CachedResult(md_path.read_text(encoding="utf-8"), summary, patches))
+    return summary
@@ -0,0 +1,676 @@
+"""Section-chunked agent cleanup.
+
+run_cleanup_agent gives the whole paper to one session, which reads and edits
+it serially. run_chunked_cleanup_agent splits the paper at its top-level
+headers, cleans every section in its own session (concurrently, up to
+max_concurrency), and merges the edited sections back, so latency follows the
+largest section rather than the whole paper. Each session sees a few lines
+around its section as read-only context.
+
+Tasks that span sections (figure placement, the authors block) are left to a
+short final session over the merged file.
+
+With mode="patch", each session gets its section as a numbered excerpt and
+returns line-range replacements (see agent.patches). All section edits are
+validated and applied in one step, then the final session patches the result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import tempfile
+from collections.abc import Awaitable, Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar
+
+from pdf2md.agent.backends import current_backend
+from pdf2md.agent.budget import AgentBudget, run_guarded
+from pdf2md.agent.cache import AgentCache, cache_key, run_cached
+from pdf2md.agent.cleanup import (
+    EDIT_TOOLS,
+    build_cleanup_prompt,
+    insert_issue_report,
+    run_agent_session,
+    run_sync,
+)
+from pdf2md.agent.patches import (
+    PATCH_PROMPT_OUTPUT,
+    LineEdit,
+    RejectedEdit,
+    apply_and_record,
+    number_lines,
+    patch_record_path,
+    request_edits,
+    validate_edits,
+)
+from pdf2md.postprocess.issues import Issue, find_issues, format_issue_report
+
+# Lines shown around each section as read-only context
+CHUNK_OVERLAP_LINES = 5
+
+# Adjacent sections are merged until a chunk has at least this many characters
+MIN_CHUNK_CHARS = 2_000
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+\S")
+
+# Tasks each section session does, and tasks left to the final pass
+CHUNK_TASKS = ("section_headers", "ocr_artifacts", "split_paragraphs", "general")
+FINAL_TASKS = ("figure_placement", "authors")
+
+# Pre-computed issues given to the section sessions, and to the final pass
+CHUNK_ISSUE_KINDS = ("lettered_header", "ocr_fragment", "split_paragraph")
+FINAL_ISSUE_KINDS = ("figure",)
+
+CHUNK_PROMPT_INTRO = """You are reviewing and improving one section of an academic paper that was \
+extracted from PDF to markdown. Other sections are reviewed by other sessions at the same time.
+
+## Files
+- **Markdown (this section only):** {md_path}
+- **Images directory:** {img_dir}
+
+## Context (read-only)
+
+Text just before this section:
+```
+{context_before}
+```
+
+Text just after this section:
+```
+{context_after}
+```
+
+Use the context only to judge header levels and paragraph splits at the edges of
+the section. Do not copy it into the file. Do not move figures or reformat the
+authors block - a later pass handles those for the whole paper.
+
+## Your Goal
+
+Review the markdown file and fix extraction artifacts. This is an open-ended task - use your \
+judgment.
+
+"""
+
+FINAL_PROMPT_INTRO = """You are finishing the cleanup of an academic paper that was extracted from \
+PDF to markdown.
+
+## Files
+- **Markdown:** {md_path}
+- **Images directory:** {img_dir}
+
+## Your Goal
+
+Each section of this file has already been reviewed separately. Only the
+tasks below, which span sections, remain. Do not re-review the sections:
+use Grep to find figure images, captions and references, and read only the
+start of the file for the authors block.
+
+"""
+
+PATCH_CHUNK_PROMPT_INTRO = """You are reviewing and improving one section of an academic paper \
+that was extracted from PDF to markdown. Other sections are reviewed by other sessions at the same \
+time.
+
+## Section
+
+Below are lines {first_line}-{last_line} of the markdown, prefixed with their line
+numbers and "|". The prefixes are not part of the text. Only edit these lines.
+
+<section>
+{numbered}
+</section>
+
+- **Images directory:** {img_dir}
+
+## Context (read-only)
+
+Text just before this section:
+```
+{context_before}
+```
+
+Text just after this section:
+```
+{context_after}
+```
+
+Use the context only to judge header levels and paragraph splits at the edges of
+the section. Do not move figures or reformat the authors block - a later pass
+handles those for the whole paper.
+
+## Your Goal
+
+Find extraction artifacts in the section and return line-range replacements that fix them. This is \
+an open-ended task - use your judgment.
+
+"""
+
+PATCH_FINAL_PROMPT_INTRO = """You are finishing the cleanup of an academic paper that was \
+extracted from PDF to markdown.
+
+## Document
+
+Below is the markdown, one line per row, prefixed with its line number and "|".
+The prefixes are not part of the text.
+
+<document>
+{numbered}
+</document>
+
+- **Images directory:** {img_dir}
+
+## Your Goal
+
+Each section has already been reviewed separately. Only the tasks below, which
+span sections, remain. Do not re-review the sections.
+
+"""
+
+CHUNK_PROMPT = build_cleanup_prompt(CHUNK_TASKS, CHUNK_PROMPT_INTRO)
+FINAL_PROMPT = build_cleanup_prompt(FINAL_TASKS, FINAL_PROMPT_INTRO)
+PATCH_CHUNK_PROMPT = build_cleanup_prompt(
+    CHUNK_TASKS, PATCH_CHUNK_PROMPT_INTRO, PATCH_PROMPT_OUTPUT
+)
+PATCH_FINAL_PROMPT = build_cleanup_prompt(
+    FINAL_TASKS, PATCH_FINAL_PROMPT_INTRO, PATCH_PROMPT_OUTPUT
+)
+
+
+def chunk_prompts(mode: str, tasks: Sequence[str] | None = None) -> tuple[str, str | None]:
+    """
+    Section and final prompt templates of a chunked run.
+
+    Args:
+        mode: "edit" or "patch"
+        tasks: Routed prompt tasks (see agent.routing); sections always keep
+            general cleanup (default: all tasks)
+
+    Returns:
+        Tuple of (section template, final template); the final template is
+        None if none of its tasks apply
+    """
+    if tasks is None:
+        if mode == "patch":
+            return PATCH_CHUNK_PROMPT, PATCH_FINAL_PROMPT
+        return CHUNK_PROMPT, FINAL_PROMPT
+    chunk_tasks = [name for name in CHUNK_TASKS if name in tasks or name == "general"]
+    final_tasks = [name for name in FINAL_TASKS if name in tasks]
+    if mode == "patch":
+        chunk_prompt = build_cleanup_prompt(
+            chunk_tasks, PATCH_CHUNK_PROMPT_INTRO, PATCH_PROMPT_OUTPUT
+        )
+        final_prompt = build_cleanup_prompt(
+            final_tasks, PATCH_FINAL_PROMPT_INTRO, PATCH_PROMPT_OUTPUT
+        )
+    else:
+        chunk_prompt = build_cleanup_prompt(chunk_tasks, CHUNK_PROMPT_INTRO)
+        final_prompt = build_cleanup_prompt(final_tasks, FINAL_PROMPT_INTRO)
+    return chunk_prompt, final_prompt if final_tasks else None
+
+
+@dataclass
+class Chunk:
+    """A run of top-level sections cleaned by one agent session."""
+
+    index: int
+    start_line: int  # 0-based line of the chunk in the document
+    title: str
+    text: str
+    context_before: str
+    context_after: str
+
+
+def split_into_chunks(
+    content: str,
+    *,
+    overlap_lines: int = CHUNK_OVERLAP_LINES,
+    min_chunk_chars: int = MIN_CHUNK_CHARS,
+) -> list[Chunk]:
+    """
+    Split markdown at its top-level headers.
+
+    The top level is the shallowest heading level, ignoring a single ``#``
+    title. Text before the first section header (title, authors, abstract)
+    forms the first chunk. Short sections are merged with the next one.
+
+    Args:
+        content: Markdown content
+        overlap_lines: Lines of read-only context kept on each side of a chunk
+        min_chunk_chars: Merge sections until a chunk is at least this long
+
+    Returns:
+        Chunks in document order; joining their text with newlines gives content
+    """
+    lines = content.split("\n")
+    headings: list[tuple[int, int]] = []
+    in_code = False
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+            continue
+        match = None if in_code else HEADING_PATTERN.match(line)
+        if match:
+            headings.append((i, len(match.group(1))))
+
+    levels = [level for _, level in headings]
+    if levels.count(1) == 1:
+        levels = [level for level in levels if level > 1]
+    top = min(levels, default=None)
+
+    starts = [0] + [i for i, level in headings if level == top and i > 0]
+    bounds: list[tuple[int, int, int]] = []  # (start, end, characters)
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        size = sum(len(line) + 1 for line in lines[start:end])
+        if bounds and bounds[-1][2] < min_chunk_chars:
+            bounds[-1] = (bounds[-1][0], end, bounds[-1][2] + size)
+        else:
+            bounds.append((start, end, size))
+    # A short last chunk joins the one before it
+    if len(bounds) > 1 and bounds[-1][2] < min_chunk_chars:
+        last = bounds.pop()
+        bounds[-1] = (bounds[-1][0], last[1], bounds[-1][2] + last[2])
+
+    chunks = []
+    for index, (start, end, _) in enumerate(bounds):
+        title = next(
+            (ln.lstrip("#").strip() for ln in lines[start:end] if HEADING_PATTERN.match(ln)),
+            "Front matter",
+        )
+        chunks.append(
+            Chunk(
+                index=index,
+                start_line=start,
+                title=title,
+                text="\n".join(lines[start:end]),
+                context_before="\n".join(lines[max(start - overlap_lines, 0) : start]),
+                context_after="\n".join(lines[end : end + overlap_lines]),
+            )
+        )
+    return chunks
+
+
+def merge_chunks(chunks: list[Chunk], edited: list[str | None]) -> str:
+    """
+    Join edited chunks back into one document.
+
+    Args:
+        chunks: Chunks from split_into_chunks
+        edited: Edited text per chunk (None keeps the original)
+
+    Returns:
+        Merged markdown content
+    """
+    parts = []
+    for chunk, text in zip(chunks, edited):
+        if text is None:
+            parts.append(chunk.text)
+            continue
+        # Keep the blank lines that separated the chunk from the next one
+        trailing = len(chunk.text) - len(chunk.text.rstrip("\n"))
+        parts.append(text.rstrip("\n") + "\n" * trailing)
+    return "\n".join(parts)
+
+
+def _chunk_issue_report(issues: list[Issue], chunk: Chunk, line_offset: int) -> str:
+    """Report of the issues inside a chunk, numbered from line_offset + 1."""
+    last_line = chunk.start_line + chunk.text.count("\n") + 1
+    inside = [issue for issue in issues if chunk.start_line < issue.line <= last_line]
+    return format_issue_report(inside, line_offset)
+
+
+T = TypeVar("T")
+
+
+async def _gather(coros: Iterable[Awaitable[T]]) -> list[T]:
+    """Run coroutines concurrently; if one raises, cancel the others before re-raising."""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def run_chunked_cleanup_agent(
+    md_path: Path,
+    img_dir: Path | None = None,
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    overlap_lines: int = CHUNK_OVERLAP_LINES,
+    mode: str = "edit",
+    model: str | None = None,
+    cache: AgentCache | None = None,
+    issues: bool = True,
+    route: bool = False,
+    tier: str | None = None,
+    tasks: Sequence[str] | None = None,
+    budget: AgentBudget | None = None,
+    raise_on_error: bool = False,
+    verbose: bool = False,
+) -> str | None:
+    """
+    Run the cleanup agent section by section, then a short cross-section pass.
+
+    A section whose session fails is kept as it was. If the whole run fails,
+    exceeds its budget or is cancelled, the markdown (and patch record) are
+    restored to their state before the run.
+
+    With route, the model tier and prompt tasks are picked from the whole
+    document (see agent.routing); section prompts keep only the routed
+    section tasks, and the final pass is skipped if neither figure placement
+    nor the authors block needs work.
+
+    Args:
+        md_path: Path to the markdown file to clean
+        img_dir: Path to the images directory (optional)
+        max_concurrency: Most section sessions running at once
+        overlap_lines: Lines of read-only context shown around each section
+        mode: "edit" (sessions edit section files) or "patch" (sessions
+            return line-range replacements, see agent.patches)
+        model: Claude model (default: the SDK's default)
+        cache: Result cache; unchanged input is restored from it without a session
+        issues: Give each session the pre-computed issues (postprocess.issues)
+            of its section; the final pass gets the figure list
+        route: Pick the model tier and prompt tasks for the document
+        tier: Model tier to use instead of the routed one (implies route)
+        tasks: Prompt tasks instead of the routed ones (implies route)
+        budget: Wall-clock timeout and turn/token limits, summed over all sessions
+        raise_on_error: Raise AgentError on failure instead of returning None
+        verbose: Print agent progress (default: False)
+
+    Returns:
+        Combined summary of the sessions, or None if every session failed
+
+    Raises:
+        AgentNotInstalledError: If Claude Agent SDK is not installed
+        AgentError: If the run failed and raise_on_error is set
+        ValueError: If mode, tier or a task is unknown
+    """
+    if mode not in ("edit", "patch"):
+        raise ValueError(f"Unknown agent mode: {mode} (expected 'edit' or 'patch')")
+    if img_dir is None:
+        img_dir = md_path.parent / "img"
+
+    if route or tier is not None or tasks is not None:
+        from pdf2md.agent.routing import list_images, record_route, route_document
+
+        decision = route_document(
+            md_path.read_text(encoding="utf-8"),
+            list_images(img_dir),
+            tier=tier,
+            model=model,
+            tasks=tasks,
+        )
+        record_route(decision, md_path.name)
+        model, tasks = decision.model, decision.tasks
+
+    return await run_guarded(
+        md_path,
+        lambda: _run_chunked_cleanup_agent(
+            md_path,
+            img_dir,
+            max_concurrency=max_concurrency,
+            overlap_lines=overlap_lines,
+            mode=mode,
+            model=model,
+            cache=cache,
+            issues=issues,
+            tasks=tasks,
+            verbose=verbose,
+        ),
+        budget=budget,
+        raise_on_error=raise_on_error,
+        patch_record=patch_record_path(md_path) if mode == "patch" else None,
+    )
+
+
+async def _run_chunked_cleanup_agent(
+    md_path: Path,
+    img_dir: Path | None,
+    *,
+    max_concurrency: int,
+    overlap_lines: int,
+    mode: str,
+    model: str | None,
+    cache: AgentCache | None,
+    issues: bool,
+    tasks: Sequence[str] | None,
+    verbose: bool,
+) -> str | None:
+    content = md_path.read_text(encoding="utf-8")
+    chunk_prompt, final_prompt_template = chunk_prompts(mode, tasks)
+    if cache is not None:
+        prompt = chunk_prompt + (final_prompt_template or "")
+        tools = () if mode == "patch" else EDIT_TOOLS
+        # Chunk boundaries change what each session sees; concurrency does not
+        settings = f"chunked-{mode}-overlap{overlap_lines}-min{MIN_CHUNK_CHARS}"
+        if issues:
+            settings += "+issues"
+        key = cache_key(
+            content,
+            prompt,
+            model=model,
+            tools=tools,
+            mode=settings,
+            backend=current_backend().name,
+        )
+        return await run_cached(
+            cache,
+            key,
+            md_path,
+            lambda: _run_chunked_cleanup_agent(
+                md_path,
+                img_dir,
+                max_concurrency=max_concurrency,
+                overlap_lines=overlap_lines,
+                mode=mode,
+                model=model,
+                cache=None,
+                issues=issues,
+                tasks=tasks,
+                verbose=verbose,
+            ),
+            patch_record=patch_record_path(md_path) if mode == "patch" else None,
+        )
+
+    doc_dir = md_path.parent
+    if img_dir is None:
+        img_dir = doc_dir / "img"
+
+    chunks = split_into_chunks(content, overlap_lines=overlap_lines)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    section_issues = find_issues(content, CHUNK_ISSUE_KINDS) if issues else []
+
+    if mode == "patch":
+        return await _run_chunked_patches(
+            md_path,
+            img_dir,
+            content,
+            chunks,
+            semaphore,
+            section_issues,
+            issues,
+            model,
+            verbose,
+            chunk_prompt,
+            final_prompt_template,
+        )
+
+    with tempfile.TemporaryDirectory(prefix=".agent-chunks-", dir=doc_dir) as tmp:
+
+        async def clean(chunk: Chunk) -> tuple[str | None, str | None]:
+            chunk_path = Path(tmp) / f"section_{chunk.index + 1:02d}.md"
+            chunk_path.write_text(chunk.text, encoding="utf-8")
+            prompt = chunk_prompt.format(
+                md_path=chunk_path,
+                img_dir=img_dir,
+                context_before=chunk.context_before or "(start of paper)",
+                context_after=chunk.context_after or "(end of paper)",
+            )
+            # The section file starts at line 1
+            prompt = insert_issue_report(
+                prompt, _chunk_issue_report(section_issues, chunk, chunk.start_line)
+            )
+            async with semaphore:
+                summary = await run_agent_session(prompt, doc_dir, model=model, verbose=verbose)
+            if summary is None:
+                return None, None
+            return chunk_path.read_text(encoding="utf-8"), summary
+
+        results = await _gather(clean(chunk) for chunk in chunks)
+
+    edited = [text for text, _ in results]
+    md_path.write_text(merge_chunks(chunks, edited), encoding="utf-8")
+
+    final_summary = None
+    if final_prompt_template is not None:
+        final_prompt = final_prompt_template.format(md_path=md_path, img_dir=img_dir)
+        if issues:
+            merged = md_path.read_text(encoding="utf-8")
+            report = format_issue_report(find_issues(merged, FINAL_ISSUE_KINDS))
+            final_prompt = insert_issue_report(final_prompt, report)
+        final_summary = await run_agent_session(final_prompt, doc_dir, model=model, verbose=verbose)
+
+    summaries = [
+        f"## {chunk.title}\n\n{summary}"
+        for chunk, (_, summary) in zip(chunks, results)
+        if summary is not None
+    ]
+    if final_summary is not None:
+        summaries.append(f"## Figures and authors\n\n{final_summary}")
+    return "\n\n".join(summaries) if summaries else None
+
+
+async def _run_chunked_patches(
+    md_path: Path,
+    img_dir: Path,
+    content: str,
+    chunks: list[Chunk],
+    semaphore: asyncio.Semaphore,
+    section_issues: list[Issue],
+    issues: bool,
+    model: str | None,
+    verbose: bool,
+    chunk_prompt: str,
+    final_prompt_template: str | None,
+) -> str | None:
+    doc_dir = md_path.parent
+    lines = content.split("\n")
+
+    async def propose(chunk: Chunk) -> tuple[list[LineEdit], list[RejectedEdit], str | None]:
+        chunk_lines = chunk.text.split("\n")
+        first_line = chunk.start_line + 1
+        last_line = chunk.start_line + len(chunk_lines)
+        prompt = chunk_prompt.format(
+            first_line=first_line,
+            last_line=last_line,
+            numbered=number_lines(chunk_lines, first_line),
+            img_dir=img_dir,
+            context_before=chunk.context_before or "(start of paper)",
+            context_after=chunk.context_after or "(end of paper)",
+        )
+        # The excerpt keeps the document's line numbers
+        prompt = insert_issue_report(prompt, _chunk_issue_report(section_issues, chunk, 0))
+        async with semaphore:
+            response = await request_edits(prompt, doc_dir, model=model, verbose=verbose)
+        if response is None:
+            return [], [], None
+        edits, summary = response
+        # Checked per section, so a section can only touch its own lines
+        accepted, rejected = validate_edits(
+            lines, edits, first_line=first_line, last_line=last_line
+        )
+        return accepted, rejected, summary or "No summary."
+
+    results = await _gather(propose(chunk) for chunk in chunks)
+    edits = [edit for accepted, _, _ in results for edit in accepted]
+    rejected = [refused for _, refused_edits, _ in results for refused in refused_edits]
+    sections = apply_and_record(md_path, content, edits, None, rejected)
+
+    patched = md_path.read_text(encoding="utf-8")
+    response = None
+    if final_prompt_template is not None:
+        final_prompt = final_prompt_template.format(
+            numbered=number_lines(patched.split("\n")), img_dir=img_dir
+        )
+        if issues:
+            report = format_issue_report(find_issues(patched, FINAL_ISSUE_KINDS))
+            final_prompt = insert_issue_report(final_prompt, report)
+        response = await request_edits(final_prompt, doc_dir, model=model, verbose=verbose)
+
+    summaries = [
+        f"## {chunk.title}\n\n{summary}"
+        for chunk, (_, _, summary) in zip(chunks, results)
+        if summary is not None
+    ]
+    if summaries:
+        summaries.append(f"## Section edits\n\n{sections.describe()}")
+    if response is not None:
+        final_edits, summary = response
+        final = apply_and_record(md_path, patched, final_edits, summary, append=True)
+        summaries.append(f"## Figures and authors\n\n{final.describe()}")
+    return "\n\n".join(summaries) if summaries else None
+
+
+def run_chunked_cleanup_agent_sync(
+    md_path: Path,
+    img_dir: Path | None = None,
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    mode: str = "edit",
+    model: str | None = None,
+    cache: AgentCache | None = None,
+    issues: bool = True,
+    route: bool = False,
+    tier: str | None = None,
+    tasks: Sequence[str] | None = None,
+    budget: AgentBudget | None = None,
+    raise_on_error: bool = False,
+    verbose: bool = False,
+) -> str | None:
+    """
+    Synchronous wrapper for run_chunked_cleanup_agent.
+
+    Also works where an event loop is running (see run_sync).
+
+    Args:
+        md_path: Path to the markdown file to clean
+        img_dir: Path to the images directory (optional)
+        max_concurrency: Most section sessions running at once
+        mode: "edit" or "patch" (see run_chunked_cleanup_agent)
+        model: Claude model (default: the SDK's default)
+        cache: Result cache (see run_chunked_cleanup_agent)
+        issues: Put pre-computed issue lists in the prompts
+        route: Pick the model tier and prompt tasks (see run_chunked_cleanup_agent)
+        tier: Model tier override
+        tasks: Prompt task override
+        budget: Wall-clock timeout and turn/token limits of the run
+        raise_on_error: Raise AgentError on failure instead of returning None
+        verbose: Print agent progress (default: False)
+
+    Returns:
+        Combined summary of the sessions, or None if every session failed
+    """
+    return run_sync(
+        run_chunked_cleanup_agent(
+            md_path,
+            img_dir,
+            max_concurrency=max_concurrency,
+            mode=mode,
+            model=model,
+            cache=cache,
+            issues=issues,
+            route=route,
+            tier=tier,
+            tasks=tasks,
+            budget=budget,
+            raise_on_error=raise_on_error,
+            verbose=verbose,
+        )
+    )
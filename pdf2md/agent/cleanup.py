@@ -3,24 +3,24 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
+from collections.abc import Coroutine, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import Any, TypeVar
 
-if TYPE_CHECKING:
-    from collections.abc import AsyncIterator
+# AgentNotInstalledError is re-exported for callers that imported it from here
+from pdf2md.agent.backends import AgentNotInstalledError, current_backend  # noqa: F401
+from pdf2md.agent.budget import AgentBudget, run_guarded
+from pdf2md.agent.cache import AgentCache, cache_key, run_cached
+from pdf2md.postprocess.issues import find_issues, format_issue_report
 
 
-class AgentNotInstalledError(ImportError):
-    """Raised when Claude Agent SDK is not installed."""
-
-    def __init__(self) -> None:
-        super().__init__(
-            "Claude Agent SDK is not installed. Install with: pip install pdf2md[agent]"
-        )
-
-
-# Open-ended prompt with specific guidance for common PDF extraction issues
-CLEANUP_PROMPT = """You are reviewing and improving an academic paper that was extracted from PDF to markdown.
+# Open-ended prompt with specific guidance for common PDF extraction issues,
+# assembled from named task sections (agent.chunked gives each session a subset)
+PROMPT_INTRO = """You are reviewing and improving an academic paper that was extracted from PDF to \
+markdown.
 
 ## Files
 - **Markdown:** {md_path}
@@ -28,101 +28,68 @@ CLEANUP_PROMPT = """You are reviewing and improving an academic paper that was e
 
 ## Your Goal
 
-Review the markdown file and fix extraction artifacts. This is an open-ended task - use your judgment.
-
-## Priority Tasks
-
-### 1. Fix Section Headers (IMPORTANT - Requires Context)
-
-The regex-based preprocessor handles numbered sections (1.1, 3.1.2, etc.) but CANNOT reliably detect:
-
-**Lettered sections** - These need YOUR judgment because they can be:
-- Real section headers: "A. Background" or "B. Related Work"
-- Regular sentences: "A. We conducted an experiment..." (NOT a header!)
-
-**How to identify lettered section headers:**
-1. Look for patterns like `A.`, `B.`, `C.` at line start followed by a short title
-2. They should be followed by paragraph content (not be part of a sentence)
-3. The "title" should be 1-4 words, typically capitalized
-4. They usually appear WITHIN numbered sections as sub-items
-
-**Examples to FIX (convert to headers):**
-```
-A. RAM management.                    → ##### A. RAM management
-B. Metadata management:               → ##### B. Metadata management  
-C. Data placement                     → ##### C. Data placement
-```
-
-**Examples to LEAVE ALONE (not headers):**
-```
-A. We conducted experiments on...     (This is a sentence starting with "A.")
-B. In our evaluation, we found...     (This is a continuation)
-```
-
-**Header level guidance:**
-- Lettered sections are typically sub-items, use level 5 (#####)
-- Or match the level of surrounding numbered sections + 1
-
-Also check for:
-- Roman numeral sections (I., II., III.) that weren't converted
-- Mixed numbering (1.A, 2.B) patterns
-- Sections with unusual formatting
-
-### 2. Relocate Misplaced Figures (Image + Caption Together)
-
-PDF extraction places figures where they appear in the LaTeX layout (often at page tops), NOT where they're referenced. A figure consists of THREE parts that must be moved TOGETHER:
-
-1. `![Figure N](./img/figureN.png)` - the image embed
-2. `Fig. N. Caption text here` - the caption line
-3. `<!-- image -->` - a placeholder comment (delete this)
-
-**How to fix:**
-- Search for figure references in the text like "Fig. 1", "Figure 2", "as shown in Fig. 3"
-- Find the FIRST section/subsection (any heading with #) that references each figure
-- Move BOTH the image embed AND its caption to the START of that section (right after the heading)
-- DELETE the `<!-- image -->` placeholder entirely
-
-**IMPORTANT:** The image and caption are often separated in the original. You need to:
-1. Find `![Figure N]` - this is the image
-2. Find `Fig. N. ...` (the caption) - this may be elsewhere in the document
-3. Move them BOTH together to the new location
-4. Remove any leftover `<!-- image -->` placeholders
-
-Example BEFORE:
-```
-![Figure 2](./img/figure2.png)    <- Image here at top of page
-
-## III. METHODOLOGY
-
-Text that says "as shown in Fig. 2"...
-
-Fig. 2. Architecture overview    <- Caption is separate!
-
-<!-- image -->                   <- Delete this
-```
+Review the markdown file and fix extraction artifacts. This is an open-ended task - use your \
+judgment.
 
-Example AFTER:
-```
-## III. METHODOLOGY
-
-![Figure 2](./img/figure2.png)
-*Fig. 2. Architecture overview*
-
-Text that says "as shown in Fig. 2"...
-```
+"""
 
-### 3. Remove OCR Artifacts Above Captions
 
+@dataclass(frozen=True)
+class PromptTask:
+    """One numbered task of the cleanup prompt."""
+
+    title: str
+    body: str
+    summary: str  # What the agent reports about this task when done
+
+
+PROMPT_TASKS: dict[str, PromptTask] = {
+    "section_headers": PromptTask(
+        "Review Section Headers",
+        """The preprocessor already converts numbered sections (1.1, 3.1.2, etc.) and
+lettered (A., B.), Roman (I., II.) and mixed (1.A) sections when they form a
+consistent sequence (A→B→C within a section, I→II→III across the paper), and
+assigns their levels from the parent section.
+
+Only fix what it left behind:
+- A lettered/Roman header that stands alone (e.g. an "A." with no "B.") but is
+  clearly a title followed by paragraph content - match the level of its
+  siblings, or the surrounding numbered section + 1
+- A sentence wrongly turned into a header (e.g. `### A. We conducted experiments...`)
+- Sections with unusual formatting the preprocessor could not recognize""",
+        "How many section headers still needed fixing",
+    ),
+    "figure_placement": PromptTask(
+        "Check Figure Placement",
+        """The preprocessor has already moved each figure (`![Figure N](...)` plus its
+`Fig. N. ...` caption) to the start of the first section that references it,
+and removed the `<!-- image -->` placeholders. Only fix what it could not:
+
+- An image whose caption is still elsewhere in the document - move the caption
+  directly below the image
+- A figure referenced only in ways the preprocessor did not recognize
+  (e.g. "the diagram in the next section") - move image + caption together
+- Leftover `<!-- image -->` placeholders - delete them
+
+Do not move figures that already sit at the start of a section referencing them.""",
+        "How many figures still needed relocation (with their captions)",
+    ),
+    "ocr_artifacts": PromptTask(
+        "Remove OCR Artifacts Above Captions",
+        """Extraction already drops text whose PDF position lies inside a figure, so only
+leftovers remain (e.g. from figures that were filtered out or had no bounding box).
 Docling sometimes extracts garbage text from figure images via OCR. These appear as:
 - Short random text sequences (single words, fragments)
 - Appear directly ABOVE figure captions
 - Often look like axis labels, legend text, or garbled characters
 
-Remove these artifacts. The caption itself (starting with "Fig." or "Figure") should remain.
-
-### 4. Format Authors Section
-
-Academic papers often have messy author formatting after PDF extraction. Create a clean **Authors** section right after the title.
+Remove these artifacts. The caption itself (starting with "Fig." or "Figure") should remain.""",
+        "What OCR artifacts were removed",
+    ),
+    "authors": PromptTask(
+        "Format Authors Section",
+        """Academic papers often have messy author formatting after PDF extraction. Create a clean \
+**Authors** section right after the title.
 
 **Target format:**
 ```markdown
@@ -139,7 +106,8 @@ Academic papers often have messy author formatting after PDF extraction. Create
 4. ACM/IEEE papers often have superscript numbers mapping authors to institutions
 
 **Common patterns to handle:**
-- Authors listed with superscript numbers: John Smith1, Jane Doe2 with institutions listed separately below
+- Authors listed with superscript numbers: John Smith1, Jane Doe2 with institutions listed \
+separately below
 - Authors with inline affiliations: John Smith (MIT), Jane Doe (Stanford)
 - Email addresses in footnotes or at the end of author block
 - Multiple authors from same institution - list each author separately with the same institution
@@ -147,11 +115,15 @@ Academic papers often have messy author formatting after PDF extraction. Create
 **If information is missing:**
 - If email is not found, omit it: - **Author Name**, Institution Name
 - If institution is unclear, use what's available
-- Never invent information - only use what's actually in the document
-
-### 5. Merge Split Paragraphs
-
-PDF extraction often splits paragraphs at page boundaries, creating awkward line breaks mid-sentence.
+- Never invent information - only use what's actually in the document""",
+        "How the authors section was formatted",
+    ),
+    "split_paragraphs": PromptTask(
+        "Merge Split Paragraphs",
+        """PDF extraction often splits paragraphs at page boundaries, creating awkward line breaks \
+mid-sentence.
+The preprocessor already rejoins paragraphs split at page breaks; look for the remaining
+cases (typically column breaks, or splits with unusual punctuation).
 
 **Pattern to detect:**
 - A line that ends WITHOUT sentence termination (no `.` `!` `?` `:`)
@@ -160,60 +132,147 @@ PDF extraction often splits paragraphs at page boundaries, creating awkward line
 
 **Example BEFORE:**
 ```
-Data is written into the log in indivisible entries, rather than individual bytes. More importantly, a log
+Data is written into the log in indivisible entries, rather than individual bytes. More \
+importantly, a log
 
-entry is the smallest unit of addressing: a reader always starts reading from a particular entry (or from the next
+entry is the smallest unit of addressing: a reader always starts reading from a particular entry \
+(or from the next
 ```
 
 **Example AFTER:**
 ```
-Data is written into the log in indivisible entries, rather than individual bytes. More importantly, a log entry is the smallest unit of addressing: a reader always starts reading from a particular entry (or from the next
+Data is written into the log in indivisible entries, rather than individual bytes. More \
+importantly, a log entry is the smallest unit of addressing: a reader always starts reading from a \
+particular entry (or from the next
 ```
 
 **How to fix:**
 - Find lines ending mid-sentence (no terminal punctuation)
 - If followed by blank line + continuation text, merge them into one paragraph
-- Be careful NOT to merge intentionally separate paragraphs or list items
-
-### 6. General Cleanup
-
-- Fix section headers not properly detected
+- Be careful NOT to merge intentionally separate paragraphs or list items""",
+        "How many split paragraphs were merged",
+    ),
+    "general": PromptTask(
+        "General Cleanup",
+        """- Fix section headers not properly detected
 - Remove broken/garbled text
 - Fix table formatting issues
 - Clean up list formatting
-- Any other obvious extraction problems
+- Any other obvious extraction problems""",
+        "Any other changes made",
+    ),
+}
 
-## Guidelines
+PROMPT_GUIDELINES = """## Guidelines
 
 1. **Read the file first** - understand its structure before making changes
 2. **Be conservative** - only fix clear problems, don't rewrite content
 3. **Preserve meaning** - never change the academic content
 4. **Work systematically** - handle figures by number (Fig 1, Fig 2, etc.)
 
-## Output
-
-Edit the markdown file in place. When done, briefly summarize:
-- How many section headers were fixed (especially lettered sections like A., B.)
-- How many figures were relocated (with their captions)
-- What OCR artifacts were removed
-- How the authors section was formatted
-- How many split paragraphs were merged
-- Any other changes made
 """
 
+TASKS_HEADING = "## Priority Tasks\n\n"
+
+PROMPT_OUTPUT = "## Output\n\nEdit the markdown file in place. When done, briefly summarize:\n"
+
+# Tools of a session that edits the markdown file itself
+EDIT_TOOLS = ("Read", "Edit", "Glob", "Grep")
+
+
+def build_cleanup_prompt(
+    tasks: Iterable[str] = tuple(PROMPT_TASKS),
+    intro: str = PROMPT_INTRO,
+    output: str = PROMPT_OUTPUT,
+) -> str:
+    """
+    Assemble a cleanup prompt template from named tasks.
+
+    Args:
+        tasks: Names from PROMPT_TASKS, in the order they should be numbered
+        intro: Text before the task list ({md_path} and {img_dir} are filled in later)
+        output: Output instructions, followed by the per-task summary bullets
+
+    Returns:
+        Prompt template for str.format
+    """
+    tasks = list(tasks)
+    parts = [intro, TASKS_HEADING]
+    summaries = []
+    for number, name in enumerate(tasks, start=1):
+        task = PROMPT_TASKS[name]
+        parts.append(f"### {number}. {task.title}\n\n{task.body}\n\n")
+        summaries.append(f"- {task.summary}\n")
+    if "general" not in tasks:
+        summaries.append(f"- {PROMPT_TASKS['general'].summary}\n")
+    parts.append(PROMPT_GUIDELINES)
+    parts.append(output)
+    parts.extend(summaries)
+    return "".join(parts)
+
+
+CLEANUP_PROMPT = build_cleanup_prompt()
+
+
+def insert_issue_report(prompt: str, report: str) -> str:
+    """
+    Insert a pre-computed issue report before the task list of a prompt.
+
+    Args:
+        prompt: Formatted prompt from a build_cleanup_prompt template
+        report: Section from postprocess.issues.format_issue_report (may be empty)
+
+    Returns:
+        Prompt with the report
+    """
+    if not report:
+        return prompt
+    # The last occurrence, as a document quoted in the prompt may contain the heading
+    head, heading, tail = prompt.rpartition(TASKS_HEADING)
+    return head + report + heading + tail
+
 
 async def run_cleanup_agent(
     md_path: Path,
     img_dir: Path | None = None,
     *,
+    mode: str = "edit",
+    model: str | None = None,
+    cache: AgentCache | None = None,
+    issues: bool = True,
+    route: bool = False,
+    tier: str | None = None,
+    tasks: Sequence[str] | None = None,
+    budget: AgentBudget | None = None,
+    raise_on_error: bool = False,
     verbose: bool = False,
 ) -> str | None:
     """
     Run Claude agent for open-ended markdown cleanup.
 
+    If the run fails, exceeds its budget or is cancelled, the markdown (and
+    patch record) are restored to their state before the run.
+
+    With route, the model tier and the prompt tasks are picked from the
+    document's size and defects (see agent.routing); model, tier and tasks
+    override parts of that decision.
+
     Args:
         md_path: Path to the markdown file to clean
         img_dir: Path to the images directory (optional)
+        mode: "edit" (the agent edits the file with tools) or "patch" (the
+            agent returns line-range replacements that are validated and
+            applied in one step, see agent.patches)
+        model: Claude model (default: the SDK's default)
+        issues: Put a pre-computed issue list (postprocess.issues) in the
+            prompt, so the agent goes straight to the candidate lines
+        cache: Result cache; unchanged input is restored from it without a session
+        route: Pick the model tier and prompt tasks for the document
+        tier: Model tier to use instead of the routed one (implies route)
+        tasks: Prompt tasks (names from PROMPT_TASKS) instead of the routed
+            ones (implies route)
+        budget: Wall-clock timeout and turn/token limits of the run (default: none)
+        raise_on_error: Raise AgentError on failure instead of returning None
         verbose: Print agent progress (default: False)
 
     Returns:
@@ -221,60 +280,227 @@ async def run_cleanup_agent(
 
     Raises:
         AgentNotInstalledError: If Claude Agent SDK is not installed
+        AgentError: If the run failed and raise_on_error is set
+        ValueError: If mode, tier or a task is unknown
     """
-    try:
-        from claude_agent_sdk import query, ClaudeAgentOptions, AssistantMessage, TextBlock
-    except ImportError as e:
-        raise AgentNotInstalledError() from e
-
-    doc_dir = md_path.parent
+    if mode not in ("edit", "patch"):
+        raise ValueError(f"Unknown agent mode: {mode} (expected 'edit' or 'patch')")
     if img_dir is None:
-        img_dir = doc_dir / "img"
+        img_dir = md_path.parent / "img"
+
+    from pdf2md.agent.patches import patch_record_path
+
+    if route or tier is not None or tasks is not None:
+        from pdf2md.agent.routing import list_images, record_route, route_document
+
+        decision = route_document(
+            md_path.read_text(encoding="utf-8"),
+            list_images(img_dir),
+            tier=tier,
+            model=model,
+            tasks=tasks,
+        )
+        record_route(decision, md_path.name)
+        model, tasks = decision.model, decision.tasks
+
+    return await run_guarded(
+        md_path,
+        lambda: _run_cleanup_agent(
+            md_path,
+            img_dir,
+            mode=mode,
+            model=model,
+            cache=cache,
+            issues=issues,
+            tasks=tasks,
+            verbose=verbose,
+        ),
+        budget=budget,
+        raise_on_error=raise_on_error,
+        patch_record=patch_record_path(md_path) if mode == "patch" else None,
+    )
+
+
+async def _run_cleanup_agent(
+    md_path: Path,
+    img_dir: Path | None,
+    *,
+    mode: str,
+    model: str | None,
+    cache: AgentCache | None,
+    issues: bool,
+    tasks: Sequence[str] | None,
+    verbose: bool,
+) -> str | None:
+    if cache is not None:
+        from pdf2md.agent.patches import PATCH_PROMPT, build_patch_prompt, patch_record_path
+
+        if mode == "patch":
+            prompt = PATCH_PROMPT if tasks is None else build_patch_prompt(tasks)
+            tools: tuple[str, ...] = ()
+        else:
+            prompt = CLEANUP_PROMPT if tasks is None else build_cleanup_prompt(tasks)
+            tools = EDIT_TOOLS
+        key = cache_key(
+            md_path.read_text(encoding="utf-8"),
+            prompt,
+            model=model,
+            tools=tools,
+            mode=f"{mode}+issues" if issues else mode,
+            backend=current_backend().name,
+        )
+        return await run_cached(
+            cache,
+            key,
+            md_path,
+            lambda: _run_cleanup_agent(
+                md_path,
+                img_dir,
+                mode=mode,
+                model=model,
+                cache=None,
+                issues=issues,
+                tasks=tasks,
+                verbose=verbose,
+            ),
+            patch_record=patch_record_path(md_path) if mode == "patch" else None,
+        )
 
-    prompt = CLEANUP_PROMPT.format(
+    if mode == "patch":
+        from pdf2md.agent.patches import run_patch_cleanup
+
+        return await run_patch_cleanup(
+            md_path, img_dir, model=model, issues=issues, tasks=tasks, verbose=verbose
+        )
+
+    doc_dir = md_path.parent
+    template = CLEANUP_PROMPT if tasks is None else build_cleanup_prompt(tasks)
+    prompt = template.format(
         md_path=md_path,
         img_dir=img_dir,
     )
+    if issues:
+        report = format_issue_report(find_issues(md_path.read_text(encoding="utf-8")))
+        prompt = insert_issue_report(prompt, report)
+    return await run_agent_session(prompt, doc_dir, model=model, verbose=verbose)
+
 
-    options = ClaudeAgentOptions(
-        allowed_tools=["Read", "Edit", "Glob", "Grep"],
-        permission_mode="acceptEdits",
-        cwd=str(doc_dir),
+async def run_agent_session(
+    prompt: str,
+    cwd: Path,
+    *,
+    allowed_tools: Iterable[str] = EDIT_TOOLS,
+    model: str | None = None,
+    verbose: bool = False,
+) -> str | None:
+    """
+    Run one agent session that may read and edit files under cwd.
+
+    The session runs on the current backend (see agent.backends): the Claude
+    Agent SDK unless another one is selected. Turns, tool calls, token usage
+    and time are added to the collector of an enclosing
+    agent.telemetry.collect_telemetry block, if any. Inside
+    run_cleanup_agent, turns and tokens count against the run's budget, and
+    a failure is kept as the run's error (see agent.budget).
+
+    Args:
+        prompt: Full prompt
+        cwd: Working directory of the session
+        allowed_tools: Tools the agent may use (empty for a text-only answer)
+        model: Claude model (default: the SDK's default)
+        verbose: Print agent progress (default: False)
+
+    Returns:
+        Agent's final text, or None if the agent failed
+
+    Raises:
+        AgentNotInstalledError: If Claude Agent SDK is not installed
+        BudgetExceededError: If the enclosing run goes over its turn or token budget
+    """
+    return await current_backend().run_session(
+        prompt, cwd, allowed_tools=tuple(allowed_tools), model=model, verbose=verbose
     )
 
-    final_response: list[str] = []
 
-    try:
-        async for message in query(prompt=prompt, options=options):
-            if isinstance(message, AssistantMessage):
-                for block in message.content:
-                    if isinstance(block, TextBlock):
-                        if verbose:
-                            print(block.text)
-                        final_response.append(block.text)
-    except Exception as e:
-        if verbose:
-            print(f"Agent error: {e}")
-        return None
+T = TypeVar("T")
+
 
-    return "\n".join(final_response) if final_response else None
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    asyncio.run fails in a thread whose event loop is already running (a
+    notebook, or a handler of an async web framework). There the coroutine
+    runs on its own loop in a worker thread, with the caller's context
+    variables (telemetry collector, agent backend). The calling loop is
+    blocked until it finishes, so async code should await the coroutine
+    instead (see pdf2md.api.convert_async).
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf2md-agent") as pool:
+        return pool.submit(context.run, asyncio.run, coro).result()
 
 
 def run_cleanup_agent_sync(
     md_path: Path,
     img_dir: Path | None = None,
     *,
+    mode: str = "edit",
+    model: str | None = None,
+    cache: AgentCache | None = None,
+    issues: bool = True,
+    route: bool = False,
+    tier: str | None = None,
+    tasks: Sequence[str] | None = None,
+    budget: AgentBudget | None = None,
+    raise_on_error: bool = False,
     verbose: bool = False,
 ) -> str | None:
     """
     Synchronous wrapper for run_cleanup_agent.
 
+    Also works where an event loop is running (see run_sync).
+
     Args:
         md_path: Path to the markdown file to clean
         img_dir: Path to the images directory (optional)
+        mode: "edit" or "patch" (see run_cleanup_agent)
+        model: Claude model (default: the SDK's default)
+        cache: Result cache (see run_cleanup_agent)
+        issues: Put a pre-computed issue list in the prompt
+        route: Pick the model tier and prompt tasks (see run_cleanup_agent)
+        tier: Model tier override
+        tasks: Prompt task override
+        budget: Wall-clock timeout and turn/token limits of the run
+        raise_on_error: Raise AgentError on failure instead of returning None
         verbose: Print agent progress (default: False)
 
     Returns:
         Agent's summary of changes, or None if agent failed
     """
-    return asyncio.run(run_cleanup_agent(md_path, img_dir, verbose=verbose))
+    return run_sync(
+        run_cleanup_agent(
+            md_path,
+            img_dir,
+            mode=mode,
+            model=model,
+            cache=cache,
+            issues=issues,
+            route=route,
+            tier=tier,
+            tasks=tasks,
+            budget=budget,
+            raise_on_error=raise_on_error,
+            verbose=verbose,
+        )
+    )
@@ -0,0 +1,533 @@
+"""Patch-returning agent mode.
+
+In the default mode the agent edits the markdown file with tools, one tool
+round trip per fix. In patch mode the agent is given the document with line
+numbers and no tools, and answers with a JSON list of line-range
+replacements:
+
+    {"edits": [{"start": 12, "end": 13, "replacement": "...", "reason": "..."}],
+     "summary": "..."}
+
+pdf2md validates the edits and applies them in one step. An edit is refused
+if its range is out of bounds or overlaps another edit, or if it drops a
+citation or a number that no other edit puts back (so moving a figure as a
+delete plus an insert is fine). Deleting short stray lines, such as OCR
+fragments of axis labels, may drop numbers but never citations.
+
+Every run records the input hash and the accepted and refused edits in a
+sidecar (``.paper.md.patches.json``), one round per set of edits applied at
+once, which replay_patches re-applies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from pdf2md.agent.budget import AgentError, current_run
+from pdf2md.agent.cleanup import (
+    build_cleanup_prompt,
+    insert_issue_report,
+    run_agent_session,
+    run_sync,
+)
+from pdf2md.postprocess.issues import find_issues, format_issue_report
+
+logger = logging.getLogger(__name__)
+
+# Citation numbers, in [7] as well as in the linked [[7]](#ref-7) form
+CITATION_PATTERN = re.compile(r"\[\[?(\d+)\]")
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+# Deleted lines up to this long may lose numbers (OCR fragments, axis labels)
+MAX_ARTIFACT_LINE_CHARS = 60
+
+# Lines that are never treated as stray fragments
+PROTECTED_LINE_PATTERN = re.compile(r"^\s*(?:#|!\[|\||<a id=|Fig(?:ure)?\.?\s*\d|Table\s)", re.I)
+
+FENCED_JSON_PATTERN = re.compile(r"```(?:json)?\s*\n(.*?)\n```", re.DOTALL)
+
+PATCH_PROMPT_INTRO = """You are reviewing and improving an academic paper that was extracted from \
+PDF to markdown.
+
+## Document
+
+Below is the markdown, one line per row, prefixed with its line number and "|".
+The prefixes are not part of the text.
+
+<document>
+{numbered}
+</document>
+
+- **Images directory:** {img_dir}
+
+## Your Goal
+
+Find extraction artifacts and return line-range replacements that fix them. This is an open-ended \
+task - use your judgment.
+
+"""
+
+PATCH_PROMPT_OUTPUT = """## Output
+
+Do not use any tools and do not rewrite the whole document. Reply with only a JSON object:
+
+```json
+{{"edits": [{{"start": 12, "end": 13, "replacement": "text that replaces lines 12-13", "reason": \
+"merge split paragraph"}}],
+ "summary": "..."}}
+```
+
+- `start` and `end` are inclusive line numbers from the listing; ranges must not overlap
+- `replacement` may span several lines; an empty string deletes the lines
+- To move text, delete it in one edit and include it in the replacement of another
+- Keep every citation and number; edits that drop them are refused
+
+In `summary`, briefly report:
+"""
+
+
+def build_patch_prompt(tasks: Sequence[str]) -> str:
+    """Patch prompt template with only the given tasks (names from PROMPT_TASKS)."""
+    return build_cleanup_prompt(tasks, intro=PATCH_PROMPT_INTRO, output=PATCH_PROMPT_OUTPUT)
+
+
+PATCH_PROMPT = build_cleanup_prompt(intro=PATCH_PROMPT_INTRO, output=PATCH_PROMPT_OUTPUT)
+
+
+@dataclass
+class LineEdit:
+    """Replacement of an inclusive, 1-based range of lines."""
+
+    start: int
+    end: int
+    replacement: str
+    reason: str = ""
+
+
+@dataclass
+class RejectedEdit:
+    """An edit that failed validation, with the reason."""
+
+    edit: LineEdit
+    reason: str
+
+
+@dataclass
+class PatchResult:
+    """Outcome of validating and applying the edits of one session."""
+
+    applied: list[LineEdit] = field(default_factory=list)
+    rejected: list[RejectedEdit] = field(default_factory=list)
+    summary: str | None = None
+
+    def describe(self) -> str:
+        """Summary followed by the edit counts and refusal reasons."""
+        parts = [self.summary] if self.summary else []
+        parts.append(f"Applied {len(self.applied)} edits, refused {len(self.rejected)}.")
+        parts.extend(
+            f"- refused lines {r.edit.start}-{r.edit.end}: {r.reason}" for r in self.rejected
+        )
+        return "\n".join(parts)
+
+
+def number_lines(lines: Sequence[str], start: int = 1) -> str:
+    """
+    Prefix lines with their line numbers for a patch prompt.
+
+    Args:
+        lines: Lines of the document or of an excerpt
+        start: Number of the first line
+
+    Returns:
+        Numbered text, one "N| line" row per line
+    """
+    width = len(str(start + len(lines) - 1))
+    return "\n".join(f"{n:>{width}}| {line}" for n, line in enumerate(lines, start))
+
+
+def _extract_json(text: str) -> str:
+    fenced = FENCED_JSON_PATTERN.search(text)
+    if fenced:
+        return fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in agent response")
+    return text[start : end + 1]
+
+
+def parse_patch_response(text: str) -> tuple[list[LineEdit], str | None]:
+    """
+    Parse the JSON answer of a patch session.
+
+    Args:
+        text: Agent response, optionally with the JSON in a code fence
+
+    Returns:
+        Tuple of (edits, summary)
+
+    Raises:
+        ValueError: If the response has no well-formed edit list
+    """
+    try:
+        data = json.loads(_extract_json(text))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Agent response is not valid JSON: {e}") from e
+    if not isinstance(data, dict) or not isinstance(data.get("edits"), list):
+        raise ValueError("Agent response needs an 'edits' list")
+
+    edits = []
+    for i, entry in enumerate(data["edits"]):
+        try:
+            edits.append(
+                LineEdit(
+                    start=int(entry["start"]),
+                    end=int(entry["end"]),
+                    replacement=str(entry.get("replacement") or ""),
+                    reason=str(entry.get("reason") or ""),
+                )
+            )
+        except (TypeError, KeyError, ValueError) as e:
+            raise ValueError(f"Edit {i} is malformed: {entry!r}") from e
+    summary = data.get("summary")
+    return edits, str(summary) if summary else None
+
+
+def _old_text(lines: Sequence[str], edit: LineEdit) -> str:
+    return "\n".join(lines[edit.start - 1 : edit.end])
+
+
+def _is_artifact_deletion(lines: Sequence[str], edit: LineEdit) -> bool:
+    """A deletion of short stray lines, which may drop numbers."""
+    if edit.replacement.strip():
+        return False
+    return all(
+        len(line.strip()) <= MAX_ARTIFACT_LINE_CHARS and not PROTECTED_LINE_PATTERN.match(line)
+        for line in lines[edit.start - 1 : edit.end]
+    )
+
+
+def _lost_tokens(lines: Sequence[str], edits: list[LineEdit]) -> tuple[Counter[str], Counter[str]]:
+    """Citations and numbers removed by the edits and not added back by any of them."""
+    removed_citations: Counter[str] = Counter()
+    added_citations: Counter[str] = Counter()
+    removed_numbers: Counter[str] = Counter()
+    added_numbers: Counter[str] = Counter()
+    for edit in edits:
+        old = _old_text(lines, edit)
+        removed_citations.update(CITATION_PATTERN.findall(old))
+        added_citations.update(CITATION_PATTERN.findall(edit.replacement))
+        if not _is_artifact_deletion(lines, edit):
+            removed_numbers.update(NUMBER_PATTERN.findall(old))
+        added_numbers.update(NUMBER_PATTERN.findall(edit.replacement))
+    return removed_citations - added_citations, removed_numbers - added_numbers
+
+
+def validate_edits(
+    lines: Sequence[str],
+    edits: Sequence[LineEdit],
+    *,
+    first_line: int = 1,
+    last_line: int | None = None,
+) -> tuple[list[LineEdit], list[RejectedEdit]]:
+    """
+    Check edits against the document before applying them.
+
+    Args:
+        lines: Document lines the edits refer to
+        edits: Proposed edits
+        first_line: First line the edits may touch (1-based)
+        last_line: Last line the edits may touch (default: end of document)
+
+    Returns:
+        Tuple of (accepted edits in line order, rejected edits)
+    """
+    if last_line is None:
+        last_line = len(lines)
+    accepted: list[LineEdit] = []
+    rejected: list[RejectedEdit] = []
+
+    for edit in sorted(edits, key=lambda e: (e.start, e.end)):
+        if not first_line <= edit.start <= edit.end <= last_line:
+            rejected.append(RejectedEdit(edit, f"outside lines {first_line}-{last_line}"))
+        elif accepted and edit.start <= accepted[-1].end:
+            previous = accepted[-1]
+            rejected.append(RejectedEdit(edit, f"overlaps lines {previous.start}-{previous.end}"))
+        elif edit.replacement == _old_text(lines, edit):
+            rejected.append(RejectedEdit(edit, "no change"))
+        else:
+            accepted.append(edit)
+
+    # Refusing one edit can unbalance a move it was part of, so repeat until stable
+    while True:
+        lost_citations, lost_numbers = _lost_tokens(lines, accepted)
+        if not lost_citations and not lost_numbers:
+            break
+        keep = []
+        for edit in accepted:
+            # Only edits that themselves lose a missing token are to blame
+            own_citations, own_numbers = _lost_tokens(lines, [edit])
+            citations = sorted(own_citations.keys() & lost_citations.keys())
+            numbers = sorted(own_numbers.keys() & lost_numbers.keys())
+            if citations:
+                rejected.append(RejectedEdit(edit, f"drops citations {', '.join(citations)}"))
+            elif numbers:
+                rejected.append(RejectedEdit(edit, f"drops numbers {', '.join(numbers)}"))
+            else:
+                keep.append(edit)
+        accepted = keep
+
+    for refused in rejected:
+        logger.debug("Refused edit %d-%d: %s", refused.edit.start, refused.edit.end, refused.reason)
+    return accepted, rejected
+
+
+def apply_edits(lines: Sequence[str], edits: Sequence[LineEdit]) -> list[str]:
+    """
+    Apply non-overlapping edits in one step.
+
+    Args:
+        lines: Document lines
+        edits: Validated edits (line numbers refer to the original lines)
+
+    Returns:
+        New list of lines
+    """
+    result = list(lines)
+    # Bottom-up, so earlier line numbers stay valid
+    for edit in sorted(edits, key=lambda e: e.start, reverse=True):
+        result[edit.start - 1 : edit.end] = edit.replacement.split("\n") if edit.replacement else []
+    return result
+
+
+def patch_record_path(md_path: Path) -> Path:
+    """Path of the sidecar recording the patches applied to md_path."""
+    return md_path.with_name(f".{md_path.name}.patches.json")
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def save_patch_record(
+    md_path: Path,
+    before: str,
+    after: str,
+    result: PatchResult,
+    *,
+    append: bool = False,
+) -> Path:
+    """
+    Record a round of edits next to the markdown file.
+
+    Args:
+        md_path: Markdown file the edits were applied to
+        before: Content the edits refer to
+        after: Content after applying them
+        result: Accepted and refused edits
+        append: Add the round to the existing record instead of replacing it
+
+    Returns:
+        Path of the record
+    """
+    path = patch_record_path(md_path)
+    rounds = []
+    if append and path.exists():
+        rounds = json.loads(path.read_text(encoding="utf-8"))["rounds"]
+    rounds.append(
+        {
+            "input_sha256": _sha256(before),
+            "output_sha256": _sha256(after),
+            "summary": result.summary,
+            "edits": [asdict(edit) for edit in result.applied],
+            "rejected": [{**asdict(r.edit), "rejected": r.reason} for r in result.rejected],
+        }
+    )
+    path.write_text(json.dumps({"rounds": rounds}, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def replay_patches(md_path: Path, record_path: Path | None = None) -> int:
+    """
+    Re-apply recorded edits to the file they were recorded for.
+
+    Rounds the file already went through are skipped, so replaying onto the
+    original, a partly patched or a fully patched file all end in the same
+    content.
+
+    Args:
+        md_path: Markdown file
+        record_path: Patch record (default: the sidecar next to md_path)
+
+    Returns:
+        Number of rounds applied (0 if the file already has every edit)
+
+    Raises:
+        ValueError: If the file matches none of the recorded rounds
+    """
+    if record_path is None:
+        record_path = patch_record_path(md_path)
+    rounds = json.loads(record_path.read_text(encoding="utf-8"))["rounds"]
+    content = md_path.read_text(encoding="utf-8")
+    digest = _sha256(content)
+
+    hashes = [r["input_sha256"] for r in rounds] + [rounds[-1]["output_sha256"]]
+    if digest not in hashes:
+        raise ValueError(f"{md_path} has changed since {record_path} was recorded")
+
+    pending = rounds[hashes.index(digest) :]
+    for round_ in pending:
+        edits = [LineEdit(**edit) for edit in round_["edits"]]
+        content = "\n".join(apply_edits(content.split("\n"), edits))
+    if pending:
+        md_path.write_text(content, encoding="utf-8")
+    return len(pending)
+
+
+async def request_edits(
+    prompt: str, cwd: Path, *, model: str | None = None, verbose: bool = False
+) -> tuple[list[LineEdit], str | None] | None:
+    """
+    Run a tool-less session and parse its edits.
+
+    Args:
+        prompt: Full patch prompt
+        cwd: Working directory of the session
+        model: Claude model (default: the SDK's default)
+        verbose: Print agent progress (default: False)
+
+    Returns:
+        Tuple of (edits, summary), or None if the session failed or its
+        answer could not be parsed
+
+    Raises:
+        AgentNotInstalledError: If Claude Agent SDK is not installed
+    """
+    response = await run_agent_session(prompt, cwd, allowed_tools=(), model=model, verbose=verbose)
+    if response is None:
+        return None
+    try:
+        return parse_patch_response(response)
+    except ValueError as e:
+        logger.warning("Ignoring agent patch response: %s", e)
+        run = current_run()
+        if run is not None:
+            # A new attempt may well answer in the right format
+            run.record_error(AgentError(f"Unusable patch response: {e}", transient=True))
+        return None
+
+
+def apply_and_record(
+    md_path: Path,
+    content: str,
+    edits: Sequence[LineEdit],
+    summary: str | None,
+    rejected: Sequence[RejectedEdit] = (),
+    *,
+    append: bool = False,
+) -> PatchResult:
+    """
+    Validate edits, write the patched file and its record.
+
+    Args:
+        md_path: Markdown file to patch
+        content: Content the edits refer to
+        edits: Edits to validate (and those accepted, apply)
+        summary: Agent summary to keep in the record
+        rejected: Edits already refused by the caller
+        append: Record the edits as a further round (see save_patch_record)
+
+    Returns:
+        PatchResult of the run
+    """
+    lines = content.split("\n")
+    accepted, refused = validate_edits(lines, edits)
+    result = PatchResult(accepted, [*rejected, *refused], summary)
+    patched = "\n".join(apply_edits(lines, accepted))
+    if patched != content:
+        md_path.write_text(patched, encoding="utf-8")
+    save_patch_record(md_path, content, patched, result, append=append)
+    logger.info(
+        "Applied %d agent edits to %s (%d refused)",
+        len(accepted),
+        md_path.name,
+        len(result.rejected),
+    )
+    return result
+
+
+async def run_patch_cleanup(
+    md_path: Path,
+    img_dir: Path | None = None,
+    *,
+    model: str | None = None,
+    issues: bool = True,
+    tasks: Sequence[str] | None = None,
+    verbose: bool = False,
+) -> str | None:
+    """
+    Run the cleanup agent in patch mode.
+
+    Args:
+        md_path: Path to the markdown file to clean
+        img_dir: Path to the images directory (optional)
+        model: Claude model (default: the SDK's default)
+        issues: Put a pre-computed issue list (postprocess.issues) in the prompt
+        tasks: Prompt tasks (names from PROMPT_TASKS; default: all)
+        verbose: Print agent progress (default: False)
+
+    Returns:
+        Agent's summary with the applied and refused edit counts, or None if
+        the agent failed
+
+    Raises:
+        AgentNotInstalledError: If Claude Agent SDK is not installed
+    """
+    doc_dir = md_path.parent
+    if img_dir is None:
+        img_dir = doc_dir / "img"
+
+    content = md_path.read_text(encoding="utf-8")
+    template = PATCH_PROMPT if tasks is None else build_patch_prompt(tasks)
+    prompt = template.format(numbered=number_lines(content.split("\n")), img_dir=img_dir)
+    if issues:
+        prompt = insert_issue_report(prompt, format_issue_report(find_issues(content)))
+    response = await request_edits(prompt, doc_dir, model=model, verbose=verbose)
+    if response is None:
+        return None
+    edits, summary = response
+    return apply_and_record(md_path, content, edits, summary).describe()
+
+
+def run_patch_cleanup_sync(
+    md_path: Path,
+    img_dir: Path | None = None,
+    *,
+    model: str | None = None,
+    issues: bool = True,
+    verbose: bool = False,
+) -> str | None:
+    """
+    Synchronous wrapper for run_patch_cleanup.
+
+    Also works where an event loop is running (see run_sync).
+
+    Args:
+        md_path: Path to the markdown file to clean
+        img_dir: Path to the images directory (optional)
+        model: Claude model (default: the SDK's default)
+        issues: Put a pre-computed issue list in the prompt
+        verbose: Print agent progress (default: False)
+
+    Returns:
+        Agent's summary with the edit counts, or None if the agent failed
+    """
+    return run_sync(
+        run_patch_cleanup(md_path, img_dir, model=model, issues=issues, verbose=verbose)
+    )
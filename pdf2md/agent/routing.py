@@ -0,0 +1,196 @@
+"""Model and prompt routing by document size and defect profile.
+
+By default every agent run uses the SDK's default model and the full
+cleanup prompt. With routing, run_cleanup_agent first measures the
+document and picks:
+
+- a model tier: "small" for short papers with few defects, "large" for
+  long papers or many defects, "medium" otherwise (MODEL_TIERS maps tiers
+  to model names)
+- the prompt tasks that apply: a task from PROMPT_TASKS is kept only if a
+  defect it fixes was found (TASK_TRIGGERS), the authors task only if the
+  paper has no Authors section yet, and general cleanup always
+
+The defects are those of postprocess.issues and postprocess.quality. Every
+decision, with its reasons and overrides, is logged and kept in the run's
+telemetry, so it ends up in metrics.json next to the usage it caused.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from pdf2md.agent.cleanup import PROMPT_TASKS
+from pdf2md.agent.telemetry import current_telemetry
+from pdf2md.postprocess.issues import find_issues
+from pdf2md.postprocess.quality import score_markdown
+
+logger = logging.getLogger(__name__)
+
+# Model of each tier, as accepted by the SDK's model option
+MODEL_TIERS = {"small": "haiku", "medium": "sonnet", "large": "opus"}
+
+# Up to this size (about 8 pages) with few defects, the small tier suffices
+SMALL_DOC_CHARS = 40_000
+SMALL_DOC_MAX_SCORE = 10.0
+
+# From this size (about 30 pages) or this many defects, use the large tier
+LARGE_DOC_CHARS = 150_000
+LARGE_DOC_MIN_SCORE = 40.0
+
+# Defects (issue kinds and quality defect kinds) that call for each task
+TASK_TRIGGERS = {
+    "section_headers": ("lettered_header", "header_gaps"),
+    "figure_placement": ("figure", "unembedded_figures"),
+    "ocr_artifacts": ("ocr_fragment", "junk_lines"),
+    "split_paragraphs": ("split_paragraph", "split_paragraphs"),
+}
+
+# Tasks in every routed prompt
+ALWAYS_TASKS = ("general",)
+
+AUTHORS_HEADING_PATTERN = re.compile(r"^#{1,6}\s+Authors\s*$", re.MULTILINE | re.IGNORECASE)
+
+
+@dataclass
+class RouteDecision:
+    """Model tier and prompt tasks picked for one document, and why."""
+
+    tier: str
+    model: str | None
+    tasks: tuple[str, ...]
+    chars: int
+    score: float
+    defects: dict[str, int] = field(default_factory=dict)
+    reasons: list[str] = field(default_factory=list)
+    overrides: list[str] = field(default_factory=list)  # Settings given by the caller
+
+    def to_dict(self) -> dict:
+        """JSON-ready dict."""
+        data = asdict(self)
+        data["tasks"] = list(self.tasks)
+        return data
+
+    def describe(self) -> str:
+        """One-line summary for the console."""
+        text = (
+            f"tier {self.tier} ({self.model or 'default model'}), "
+            f"tasks: {', '.join(self.tasks)} ({self.chars:,} chars, score {self.score:g})"
+        )
+        if self.overrides:
+            text += f" [overridden: {', '.join(self.overrides)}]"
+        return text
+
+
+def _pick_tier(chars: int, score: float) -> tuple[str, str]:
+    if chars >= LARGE_DOC_CHARS:
+        return "large", f"{chars:,} chars is at least {LARGE_DOC_CHARS:,}"
+    if score >= LARGE_DOC_MIN_SCORE:
+        return "large", f"score {score:g} is at least {LARGE_DOC_MIN_SCORE:g}"
+    if chars <= SMALL_DOC_CHARS and score < SMALL_DOC_MAX_SCORE:
+        return "small", f"{chars:,} chars and score {score:g} are below the small-tier limits"
+    return "medium", f"{chars:,} chars, score {score:g}"
+
+
+def _pick_tasks(content: str, defects: Mapping[str, int]) -> tuple[tuple[str, ...], list[str]]:
+    picked = set(ALWAYS_TASKS)
+    reasons = []
+    for task, triggers in TASK_TRIGGERS.items():
+        found = {kind: defects[kind] for kind in triggers if defects.get(kind)}
+        if found:
+            picked.add(task)
+            counts = ", ".join(f"{count} {kind.replace('_', ' ')}" for kind, count in found.items())
+            reasons.append(f"{task}: {counts}")
+    if AUTHORS_HEADING_PATTERN.search(content):
+        reasons.append("authors: skipped, the paper has an Authors section")
+    else:
+        picked.add("authors")
+    return tuple(name for name in PROMPT_TASKS if name in picked), reasons
+
+
+def route_document(
+    content: str,
+    images: Sequence[str] = (),
+    *,
+    tier: str | None = None,
+    model: str | None = None,
+    tasks: Iterable[str] | None = None,
+    tier_models: Mapping[str, str] | None = None,
+) -> RouteDecision:
+    """
+    Pick the model tier and prompt tasks for a document.
+
+    Args:
+        content: Markdown the agent will clean
+        images: Image filenames of the document (for unembedded figures)
+        tier: Tier to use instead of the routed one
+        model: Model to use instead of the tier's
+        tasks: Prompt tasks (names from PROMPT_TASKS) to use instead of the routed ones
+        tier_models: Model of each tier (default: MODEL_TIERS)
+
+    Returns:
+        The decision
+
+    Raises:
+        ValueError: If tier or a task name is unknown
+    """
+    tier_models = tier_models or MODEL_TIERS
+    if tier is not None and tier not in tier_models:
+        raise ValueError(f"Unknown model tier: {tier} (expected one of {', '.join(tier_models)})")
+    if tasks is not None:
+        tasks = tuple(tasks)
+        unknown = [name for name in tasks if name not in PROMPT_TASKS]
+        if unknown:
+            raise ValueError(
+                f"Unknown prompt task(s): {', '.join(unknown)} "
+                f"(expected some of {', '.join(PROMPT_TASKS)})"
+            )
+
+    quality = score_markdown(content, images)
+    issue_counts = Counter(
+        issue.kind for issue in find_issues(content, ("lettered_header", "figure"))
+    )
+    defects = {**issue_counts, **{kind: n for kind, n in quality.defects.items() if n}}
+
+    routed_tier, tier_reason = _pick_tier(len(content), quality.score)
+    routed_tasks, task_reasons = _pick_tasks(content, defects)
+    decision = RouteDecision(
+        tier=tier or routed_tier,
+        model=None,
+        tasks=routed_tasks if tasks is None else tasks,
+        chars=len(content),
+        score=quality.score,
+        defects=defects,
+        reasons=[f"tier {routed_tier}: {tier_reason}", *task_reasons],
+    )
+    decision.model = model or tier_models.get(decision.tier)
+    for name, value in (("tier", tier), ("model", model), ("tasks", tasks)):
+        if value is not None:
+            decision.overrides.append(name)
+    return decision
+
+
+def list_images(img_dir: Path) -> list[str]:
+    """Image filenames of a document, or [] if it has no images directory."""
+    if not img_dir.is_dir():
+        return []
+    return sorted(path.name for path in img_dir.iterdir() if path.is_file())
+
+
+def record_route(decision: RouteDecision, name: str) -> None:
+    """
+    Log a decision and keep it in the telemetry of the enclosing collect_telemetry block.
+
+    Args:
+        decision: The routing decision
+        name: Document name for the log
+    """
+    logger.info("Agent routing for %s: %s", name, decision.describe())
+    telemetry = current_telemetry()
+    if telemetry is not None:
+        telemetry.route = decision.to_dict()
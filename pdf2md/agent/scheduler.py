@@ -0,0 +1,193 @@
+"""Concurrent agent cleanup of many documents.
+
+AgentScheduler runs the cleanup agent on documents as they are submitted,
+at most max_concurrency at a time, on the caller's event loop. A batch can
+therefore keep extracting the next PDFs while earlier ones are cleaned.
+
+Each document runs with its AgentBudget and raise_on_error, so a failure
+leaves its markdown as it was before the agent. Transient failures (rate
+limits, overloaded API, lost connection) are retried with exponential
+backoff; other failures, timeouts and budget overruns are not. Cancelling
+the scheduler cancels the running sessions, and their documents are
+restored too.
+
+Every document's telemetry, attempt count and error are written to its
+metrics.json (see agent.telemetry).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from pdf2md.agent.backends import AgentNotInstalledError
+from pdf2md.agent.budget import AgentError
+from pdf2md.agent.chunked import run_chunked_cleanup_agent
+from pdf2md.agent.cleanup import run_cleanup_agent
+from pdf2md.agent.telemetry import AgentTelemetry, collect_telemetry, write_agent_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+DEFAULT_RETRIES = 2
+
+# First retry delay; doubled for every further attempt, up to MAX_BACKOFF_SECONDS
+DEFAULT_BACKOFF_SECONDS = 10.0
+
+MAX_BACKOFF_SECONDS = 120.0
+
+
+@dataclass
+class AgentOutcome:
+    """Result of the agent on one document."""
+
+    md_path: Path
+    summary: str | None
+    error: str | None = None
+    attempts: int = 0
+    telemetry: AgentTelemetry = field(default_factory=AgentTelemetry)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the agent cleaned the document."""
+        return self.error is None
+
+
+class AgentScheduler:
+    """
+    Run the cleanup agent on submitted documents with bounded concurrency.
+
+    Use as an async context manager; leaving the block waits for all
+    documents, or cancels them if the block raised:
+
+        async with AgentScheduler(max_concurrency=4, budget=budget) as scheduler:
+            for md_path in paths:
+                scheduler.submit(md_path)
+        outcomes = scheduler.outcomes
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        retries: int = DEFAULT_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        chunked: bool = False,
+        write_metrics: bool = True,
+        **options: Any,
+    ) -> None:
+        """
+        Args:
+            max_concurrency: Most documents cleaned at once
+            retries: Further attempts after a transient failure
+            backoff_seconds: Delay before the first retry (doubled per retry)
+            chunked: Use run_chunked_cleanup_agent instead of run_cleanup_agent
+            write_metrics: Write each document's agent telemetry to its metrics.json
+            **options: Keyword arguments of the agent function (mode, model,
+                cache, issues, budget, verbose, ...)
+        """
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.chunked = chunked
+        self.write_metrics = write_metrics
+        self.options = options
+        self.outcomes: list[AgentOutcome] = []  # Finished documents, in completion order
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: list[asyncio.Task[AgentOutcome]] = []
+
+    async def __aenter__(self) -> AgentScheduler:
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            await self.cancel()
+        else:
+            await self.join()
+
+    def submit(self, md_path: Path, img_dir: Path | None = None) -> asyncio.Task[AgentOutcome]:
+        """
+        Queue a document; it starts once fewer than max_concurrency are running.
+
+        Must be called from a running event loop.
+
+        Args:
+            md_path: Markdown file to clean in place
+            img_dir: Images directory (default: img/ next to the file)
+
+        Returns:
+            Task resolving to the document's AgentOutcome
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        task = asyncio.ensure_future(self._run(md_path, img_dir))
+        task.add_done_callback(self._record)
+        self._tasks.append(task)
+        return task
+
+    def _record(self, task: asyncio.Task[AgentOutcome]) -> None:
+        if not task.cancelled() and task.exception() is None:
+            self.outcomes.append(task.result())
+
+    async def join(self) -> list[AgentOutcome]:
+        """
+        Wait for every submitted document.
+
+        Returns:
+            Outcomes in submission order
+        """
+        return list(await asyncio.gather(*self._tasks))
+
+    async def cancel(self) -> None:
+        """Cancel all documents; those in progress are restored to their pre-agent state."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _delay(self, attempt: int) -> float:
+        delay = min(self.backoff_seconds * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS)
+        # Jitter, so documents that failed together do not retry together
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run(self, md_path: Path, img_dir: Path | None) -> AgentOutcome:
+        agent = run_chunked_cleanup_agent if self.chunked else run_cleanup_agent
+        assert self._semaphore is not None
+        async with self._semaphore:
+            with collect_telemetry() as telemetry:
+                outcome = AgentOutcome(md_path, None, telemetry=telemetry)
+                while True:
+                    outcome.attempts += 1
+                    try:
+                        outcome.summary = await agent(
+                            md_path, img_dir, raise_on_error=True, **self.options
+                        )
+                        break
+                    except AgentNotInstalledError as e:
+                        outcome.error = str(e)
+                        break
+                    except AgentError as e:
+                        if not e.transient or outcome.attempts > self.retries:
+                            outcome.error = str(e)
+                            break
+                        delay = self._delay(outcome.attempts)
+                        logger.warning(
+                            "Agent attempt %d on %s failed (%s), retrying in %.0fs",
+                            outcome.attempts,
+                            md_path.name,
+                            e,
+                            delay,
+                        )
+                        await asyncio.sleep(delay)
+
+        if outcome.error is not None:
+            logger.warning("Agent failed on %s: %s", md_path.name, outcome.error)
+        if self.write_metrics:
+            write_agent_metrics(
+                md_path.parent, telemetry, attempts=outcome.attempts, error=outcome.error
+            )
+        return outcome
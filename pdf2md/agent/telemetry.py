@@ -0,0 +1,157 @@
+"""Usage telemetry of agent runs.
+
+The Claude backend of run_agent_session (see agent.backends) reads the
+SDK's message stream: tool calls from the assistant messages, and turns,
+token usage, cost and API time from the result message that ends each
+session. The numbers are added to the
+AgentTelemetry collected by the innermost collect_telemetry block, so one
+document's single, chunked or patch run, including parallel section
+sessions, adds up in one place without threading a collector through every
+call. Cache hits are counted too, since they start no session.
+
+write_agent_metrics adds the collected numbers to the document's
+metrics.json under "agent"; scripts/batch_convert.py aggregates them over a
+batch.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[AgentTelemetry | None] = ContextVar("pdf2md_agent_telemetry", default=None)
+
+
+@dataclass
+class AgentTelemetry:
+    """Turns, tool calls, tokens and time of the agent sessions for one document."""
+
+    sessions: int = 0
+    failed_sessions: int = 0
+    cache_hits: int = 0
+    turns: int = 0
+    tool_calls: dict[str, int] = field(default_factory=dict)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    cost_usd: float = 0.0
+    api_seconds: float = 0.0  # Time spent waiting on the API, per the SDK
+    session_seconds: float = 0.0  # Summed over sessions, which may run in parallel
+    wall_seconds: float = 0.0  # Elapsed time of the collect_telemetry block
+    route: dict[str, Any] = field(default_factory=dict)  # Routing decision (agent.routing)
+
+    @property
+    def total_tokens(self) -> int:
+        """Input, output and prompt-cache tokens."""
+        return (
+            self.input_tokens
+            + self.output_tokens
+            + self.cache_read_tokens
+            + self.cache_creation_tokens
+        )
+
+    def record_tool_call(self, name: str) -> None:
+        """Count one tool call by tool name."""
+        self.tool_calls[name] = self.tool_calls.get(name, 0) + 1
+
+    def record_result(self, message: Any) -> None:
+        """
+        Add the usage reported by a session's result message.
+
+        Args:
+            message: claude_agent_sdk ResultMessage (read by attribute; missing
+                or None fields count as zero)
+        """
+        self.turns += getattr(message, "num_turns", 0) or 0
+        self.cost_usd += getattr(message, "total_cost_usd", None) or 0.0
+        self.api_seconds += (getattr(message, "duration_api_ms", 0) or 0) / 1000
+        usage = getattr(message, "usage", None) or {}
+        self.input_tokens += usage.get("input_tokens", 0) or 0
+        self.output_tokens += usage.get("output_tokens", 0) or 0
+        self.cache_read_tokens += usage.get("cache_read_input_tokens", 0) or 0
+        self.cache_creation_tokens += usage.get("cache_creation_input_tokens", 0) or 0
+
+    def record_session(self, seconds: float, *, failed: bool = False) -> None:
+        """Count one finished session and its elapsed time."""
+        self.sessions += 1
+        self.failed_sessions += int(failed)
+        self.session_seconds += seconds
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-ready dict, with tool calls sorted by count and a token total."""
+        data = asdict(self)
+        data["tool_calls"] = dict(Counter(self.tool_calls).most_common())
+        data["total_tokens"] = self.total_tokens
+        for name in ("cost_usd", "api_seconds", "session_seconds", "wall_seconds"):
+            data[name] = round(data[name], 4 if name == "cost_usd" else 2)
+        return data
+
+    def describe(self) -> str:
+        """One-line summary for the console."""
+        calls = sum(self.tool_calls.values())
+        text = (
+            f"{self.sessions} session(s), {self.turns} turns, {calls} tool calls, "
+            f"{self.input_tokens:,} in / {self.output_tokens:,} out / "
+            f"{self.cache_read_tokens:,} cached tokens, {self.wall_seconds:.1f}s"
+        )
+        if self.cost_usd:
+            text += f", ${self.cost_usd:.2f}"
+        if self.cache_hits:
+            text += f", {self.cache_hits} cache hit(s)"
+        return text
+
+
+def current_telemetry() -> AgentTelemetry | None:
+    """Collector of the enclosing collect_telemetry block, if any."""
+    return _current.get()
+
+
+@contextmanager
+def collect_telemetry() -> Iterator[AgentTelemetry]:
+    """
+    Collect the telemetry of every agent session started inside the block.
+
+    Tasks and asyncio.run started inside the block inherit the collector.
+
+    Yields:
+        The collector; wall_seconds is set when the block exits
+    """
+    telemetry = AgentTelemetry()
+    token = _current.set(telemetry)
+    start = time.perf_counter()
+    try:
+        yield telemetry
+    finally:
+        telemetry.wall_seconds = time.perf_counter() - start
+        _current.reset(token)
+
+
+def write_agent_metrics(doc_dir: Path, telemetry: AgentTelemetry, **extra: Any) -> None:
+    """
+    Add agent telemetry to a document's metrics.json, keeping its other entries.
+
+    Args:
+        doc_dir: Document directory
+        telemetry: Collected telemetry
+        **extra: Further fields of the "agent" entry (e.g. attempts, error)
+    """
+    metrics_path = doc_dir / "metrics.json"
+    metrics = {}
+    if metrics_path.exists():
+        try:
+            metrics = json.loads(metrics_path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            logger.warning("Replacing unreadable %s: %s", metrics_path, e)
+    metrics["agent"] = {**telemetry.to_dict(), **extra}
+    metrics_path.write_text(json.dumps(metrics, indent=2), encoding="utf-8")
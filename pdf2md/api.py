@@ -0,0 +1,199 @@
+"""Async library API for embedding pdf2md in services.
+
+convert_async runs the same steps as `pdf2md convert` without blocking the
+event loop: Docling extraction and post-processing are CPU-bound and run on
+an executor (the loop's default thread pool, or a process pool given by the
+caller), and the agent is awaited natively. Many conversions can therefore
+run concurrently in one service:
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    pool = ProcessPoolExecutor(max_workers=4)
+    result = await convert_async(pdf_path, output_dir, executor=pool, agent=True)
+
+Cancelling the awaiting task stops the conversion: an agent run in
+progress is cancelled and its markdown restored (see agent.budget). Work
+already handed to the executor cannot be interrupted; it finishes in the
+background and its output is left in output_dir.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import time
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from pdf2md.agent.backends import AgentNotInstalledError
+from pdf2md.agent.budget import AgentError
+from pdf2md.agent.chunked import run_chunked_cleanup_agent
+from pdf2md.agent.cleanup import run_cleanup_agent
+from pdf2md.agent.telemetry import AgentTelemetry, collect_telemetry, write_agent_metrics
+from pdf2md.extraction.docling import extract_with_docling
+from pdf2md.postprocess import process_markdown
+from pdf2md.postprocess.paragraphs import strip_page_break_markers
+from pdf2md.postprocess.quality import DEFAULT_AGENT_THRESHOLD, QualityScore, score_markdown
+from pdf2md.postprocess.registry import PassMetrics
+from pdf2md.postprocess.rules import RulePack
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConversionResult:
+    """Outputs of one PDF conversion."""
+
+    md_path: Path
+    images: list[Path]
+    passes: list[PassMetrics] = field(default_factory=list)  # Empty if not post-processed
+    quality: QualityScore | None = None  # Score after post-processing
+    agent_ran: bool = False
+    agent_summary: str | None = None
+    agent_error: str | None = None
+    agent_telemetry: AgentTelemetry | None = None
+    seconds: float = 0.0
+
+
+def postprocess_document(
+    md_path: Path,
+    images: Sequence[str],
+    rule_packs: Iterable[RulePack] = (),
+    disabled: Iterable[str] = (),
+) -> tuple[list[PassMetrics], QualityScore]:
+    """
+    Post-process an extracted markdown file in place and write its metrics.json.
+
+    metrics.json gets per-pass timing and change counts under "postprocess"
+    and the quality score (see postprocess.quality) under "quality".
+
+    Args:
+        md_path: Markdown written by extract_with_docling
+        images: Image filenames of the document
+        rule_packs: Venue-specific rule packs
+        disabled: Names of passes to skip (see postprocess.registry.disabled_passes)
+
+    Returns:
+        Tuple of (pass metrics, quality score)
+    """
+    content = md_path.read_text(encoding="utf-8")
+    pass_metrics: list[PassMetrics] = []
+    processed = process_markdown(
+        content, list(images), disabled=disabled, metrics=pass_metrics, rule_packs=rule_packs
+    )
+    md_path.write_text(processed, encoding="utf-8")
+    quality = score_markdown(processed, images)
+
+    metrics = {
+        "postprocess": {m.name: m.to_dict() for m in pass_metrics},
+        "quality": quality.to_dict(),
+    }
+    (md_path.parent / "metrics.json").write_text(json.dumps(metrics, indent=2), encoding="utf-8")
+    return pass_metrics, quality
+
+
+async def convert_async(
+    pdf_path: Path,
+    output_dir: Path,
+    *,
+    postprocess: bool = True,
+    rule_packs: Iterable[RulePack] = (),
+    disabled: Iterable[str] = (),
+    keep_raw: bool = False,
+    agent: bool = False,
+    agent_auto: bool = False,
+    agent_threshold: float = DEFAULT_AGENT_THRESHOLD,
+    chunked: bool = False,
+    agent_options: Mapping[str, Any] | None = None,
+    extraction_options: Mapping[str, Any] | None = None,
+    executor: Executor | None = None,
+) -> ConversionResult:
+    """
+    Convert a PDF to markdown without blocking the event loop.
+
+    Args:
+        pdf_path: Path to the PDF file
+        output_dir: Output directory (the document goes to output_dir/pdf_stem/)
+        postprocess: Run the deterministic post-processing passes
+        rule_packs: Venue-specific rule packs (see postprocess.rules.load_rule_pack)
+        disabled: Names of passes to skip (see postprocess.registry.disabled_passes)
+        keep_raw: Save the raw extraction as pdf_stem_raw.md
+        agent: Run the cleanup agent after post-processing
+        agent_auto: Run the agent only if the quality score reaches agent_threshold
+        agent_threshold: Score that calls for the agent with agent_auto
+        chunked: Use run_chunked_cleanup_agent instead of run_cleanup_agent
+        agent_options: Keyword arguments of the agent function (mode, model,
+            cache, issues, route, budget, ...)
+        extraction_options: Keyword arguments of extract_with_docling
+            (images_scale, min_image_width, drop_figure_text, ...)
+        executor: Executor of extraction and post-processing (default: the
+            loop's default thread pool); a ProcessPoolExecutor keeps Docling
+            from competing with the loop for the GIL
+
+    Returns:
+        ConversionResult; a failed agent run is reported in agent_error and
+        leaves the markdown as post-processed
+
+    Raises:
+        DoclingNotInstalledError: If Docling is not installed
+        RuntimeError: If extraction fails
+        asyncio.CancelledError: If the conversion is cancelled
+    """
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+
+    md_path, images = await loop.run_in_executor(
+        executor,
+        functools.partial(extract_with_docling, pdf_path, output_dir, **(extraction_options or {})),
+    )
+    result = ConversionResult(md_path=md_path, images=images)
+    if keep_raw or not postprocess:
+        raw_content = strip_page_break_markers(md_path.read_text(encoding="utf-8"))
+        if keep_raw:
+            md_path.with_name(f"{md_path.stem}_raw.md").write_text(raw_content, encoding="utf-8")
+        if not postprocess:
+            md_path.write_text(raw_content, encoding="utf-8")
+
+    if postprocess:
+        result.passes, result.quality = await loop.run_in_executor(
+            executor,
+            functools.partial(
+                postprocess_document,
+                md_path,
+                [img.name for img in images],
+                list(rule_packs),
+                tuple(disabled),
+            ),
+        )
+        if agent_auto and not agent:
+            agent = result.quality.needs_agent(agent_threshold)
+            if not agent:
+                logger.info(
+                    "Skipping agent on %s: score %g is below %g",
+                    md_path.name,
+                    result.quality.score,
+                    agent_threshold,
+                )
+
+    if agent and postprocess:
+        run = run_chunked_cleanup_agent if chunked else run_cleanup_agent
+        options = {**(agent_options or {}), "raise_on_error": True}
+        result.agent_ran = True
+        with collect_telemetry() as telemetry:
+            try:
+                result.agent_summary = await run(md_path, **options)
+            except (AgentError, AgentNotInstalledError) as e:
+                result.agent_error = str(e)
+                logger.warning(
+                    "Agent failed on %s, markdown left as post-processed: %s", md_path.name, e
+                )
+        result.agent_telemetry = telemetry
+        write_agent_metrics(md_path.parent, telemetry, error=result.agent_error)
+
+    result.seconds = time.perf_counter() - start
+    return result
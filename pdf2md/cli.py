@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-import shutil
+import json
+import os
 from pathlib import Path
 
 import typer
 from rich.console import Console
+from rich.markup import escape
 
 app = typer.Typer(
     name="pdf2md",
@@ -40,6 +42,73 @@ def convert(
         "--agent",
         help="Run Claude agent for additional cleanup",
     ),
+    agent_auto: bool = typer.Option(
+        False,
+        "--agent-auto",
+        help="Run the agent only if the quality score reaches --agent-threshold",
+    ),
+    agent_threshold: float = typer.Option(
+        None,
+        "--agent-threshold",
+        help="With --agent-auto: quality score (weighted defect count) that calls for the agent "
+        "(default: 5)",
+    ),
+    chunked: bool = typer.Option(
+        False,
+        "--chunked",
+        help="With --agent: clean each top-level section in its own parallel session",
+    ),
+    patch: bool = typer.Option(
+        False,
+        "--patch",
+        help="With --agent: the agent returns line edits that are checked and applied at once",
+    ),
+    model: str = typer.Option(
+        None,
+        "--model",
+        help="With --agent: Claude model to use (default: the SDK's default)",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="With --agent: always run the agent, even if a cached result exists",
+    ),
+    no_issues: bool = typer.Option(
+        False,
+        "--no-issues",
+        help="With --agent: do not give the agent the pre-computed issue list",
+    ),
+    route: bool = typer.Option(
+        False,
+        "--route",
+        help="With --agent: pick the model tier and prompt tasks from the paper's size and defects",
+    ),
+    tier: str = typer.Option(
+        None,
+        "--tier",
+        help="With --agent: model tier (small, medium, large) instead of the routed one",
+    ),
+    tasks: str = typer.Option(
+        None,
+        "--tasks",
+        help="With --agent: comma-separated prompt tasks instead of the routed ones "
+        "(section_headers, figure_placement, ocr_artifacts, authors, split_paragraphs, general)",
+    ),
+    timeout: float = typer.Option(
+        None,
+        "--timeout",
+        help="With --agent: give up on the agent after this many seconds",
+    ),
+    max_turns: int = typer.Option(
+        None,
+        "--max-turns",
+        help="With --agent: most agent turns, summed over sessions",
+    ),
+    max_tokens: int = typer.Option(
+        None,
+        "--max-tokens",
+        help="With --agent: most tokens (input, output and prompt cache), summed over sessions",
+    ),
     keep_raw: bool = typer.Option(
         False,
         "--keep-raw",
@@ -75,6 +144,44 @@ def convert(
         "--min-image-area",
         help="Minimum image area (width*height) in pixels to keep",
     ),
+    keep_figure_text: bool = typer.Option(
+        False,
+        "--keep-figure-text",
+        help="Keep OCR text found inside figure regions (dropped by default)",
+    ),
+    keep_running_text: bool = typer.Option(
+        False,
+        "--keep-running-text",
+        help="Keep running headers/footers repeated across pages (dropped by default)",
+    ),
+    rules: list[Path] = typer.Option(
+        [],
+        "--rules",
+        help="Rule pack (TOML/YAML) of venue-specific regex fixes (repeatable)",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    disable: list[str] = typer.Option(
+        [],
+        "--disable",
+        "-d",
+        help="Skip a post-processing pass by name (repeatable, see 'pdf2md passes')",
+    ),
+    enable: list[str] = typer.Option(
+        [],
+        "--enable",
+        "-e",
+        help="Run a pass the config or --disable turned off (repeatable)",
+    ),
+    config: Path = typer.Option(
+        None,
+        "--config",
+        help="TOML config with \\[postprocess] disable = [...] and enable = [...]",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
 ) -> None:
     """
     Convert an academic PDF paper to clean markdown.
@@ -89,11 +196,20 @@ def convert(
             img/
                 figure1.png, figure2.png, ...
             enrichments.json      (if --enrich)
+            metrics.json          (per-pass metrics and quality score; agent usage with --agent)
     """
     from pdf2md.extraction.docling import extract_with_docling, DoclingNotInstalledError
-    from pdf2md.postprocess import process_markdown
-    from pdf2md.agent.cleanup import run_cleanup_agent_sync, AgentNotInstalledError
+    from pdf2md.api import postprocess_document
+    from pdf2md.postprocess.quality import DEFAULT_AGENT_THRESHOLD
+    from pdf2md.agent.cache import AgentCache
+    from pdf2md.agent.chunked import run_chunked_cleanup_agent_sync
+    from pdf2md.agent.budget import AgentBudget, AgentError
+    from pdf2md.agent.backends import AgentNotInstalledError
+    from pdf2md.agent.cleanup import run_cleanup_agent_sync
+    from pdf2md.agent.telemetry import collect_telemetry, write_agent_metrics
 
+    routing = _routing_options(route, tier, tasks)
+    disabled = _disabled_passes(disable, enable, config)
     pdf_stem = pdf_path.stem
     doc_dir = output_dir / pdf_stem
 
@@ -110,6 +226,8 @@ def convert(
             min_image_width=min_image_width,
             min_image_height=min_image_height,
             min_image_area=min_image_area,
+            drop_figure_text=not keep_figure_text,
+            drop_running_text=not keep_running_text,
         )
     except DoclingNotInstalledError as e:
         console.print(f"[red]ERROR:[/red] {e}")
@@ -118,12 +236,17 @@ def convert(
         console.print(f"[red]ERROR:[/red] {e}")
         raise typer.Exit(1)
 
-    console.print(f"    Extracted {len(images)} figures")
+    console.print(f"    Extracted {len(images)} images (figures and tables)")
 
-    # Step 2: Save raw if requested
+    # Step 2: Save raw if requested (page-break markers are internal to post-processing)
     if keep_raw or raw:
+        from pdf2md.postprocess.paragraphs import strip_page_break_markers
+
+        raw_content = strip_page_break_markers(md_path.read_text(encoding="utf-8"))
         raw_path = doc_dir / f"{pdf_stem}_raw.md"
-        shutil.copy(md_path, raw_path)
+        raw_path.write_text(raw_content, encoding="utf-8")
+        if raw:
+            md_path.write_text(raw_content, encoding="utf-8")
         console.print(f"    Saved raw extraction: {raw_path.name}")
 
     # Step 3: Extract enrichments for RAG (if --enrich)
@@ -132,7 +255,15 @@ def convert(
         try:
             from pdf2md.extraction.enrichments import extract_enrichments
 
-            enrichments = extract_enrichments(pdf_path, output_dir, images_scale=images_scale, enable_picture_description=describe)
+            enrichments = extract_enrichments(
+                pdf_path,
+                output_dir,
+                images_scale=images_scale,
+                enable_picture_description=describe,
+                min_image_width=min_image_width,
+                min_image_height=min_image_height,
+                min_image_area=min_image_area,
+            )
             console.print(
                 f"    Extracted: {enrichments.metadata['num_code_blocks']} code blocks, "
                 f"{enrichments.metadata['num_equations']} equations, "
@@ -144,21 +275,60 @@ def convert(
     # Step 4: Post-processing (unless --raw)
     if not raw:
         console.print("[*] Running post-processing...")
-        content = md_path.read_text(encoding="utf-8")
-        image_files = [img.name for img in images]
-        processed = process_markdown(content, image_files)
-        md_path.write_text(processed, encoding="utf-8")
-        console.print("    Applied: citations, sections, figures, bibliography, cleanup")
+        # Writes per-pass metrics and the quality score to metrics.json
+        pass_metrics, quality = postprocess_document(
+            md_path, [img.name for img in images], _load_rule_packs(rules), disabled
+        )
+        fired = [m.name for m in pass_metrics if m.changed_lines]
+        console.print(f"    Applied: {', '.join(fired) or 'no changes'}")
+        for m in pass_metrics:
+            for note in m.notes:
+                console.print(f"      {escape(note)}")
+        console.print(f"    Quality: {quality.describe()}")
+
+        if agent_auto and not agent:
+            if agent_threshold is None:
+                agent_threshold = DEFAULT_AGENT_THRESHOLD
+            agent = quality.needs_agent(agent_threshold)
+            if not agent:
+                console.print(
+                    f"    Skipping agent: score {quality.score:g} is below {agent_threshold:g}"
+                )
 
-    # Step 5: Agent cleanup (if --agent)
+    # Step 5: Agent cleanup (if --agent, or --agent-auto above the threshold)
     if agent and not raw:
         console.print("[*] Running Claude agent cleanup...")
         try:
-            result = run_cleanup_agent_sync(md_path, verbose=False)
-            if result:
+            options = dict(
+                mode="patch" if patch else "edit",
+                model=model,
+                cache=None if no_cache else AgentCache(),
+                issues=not no_issues,
+                **routing,
+                budget=AgentBudget(timeout, max_turns, max_tokens),
+                raise_on_error=True,
+                verbose=False,
+            )
+            error = None
+            with collect_telemetry() as telemetry:
+                try:
+                    if chunked:
+                        run_chunked_cleanup_agent_sync(md_path, **options)
+                    else:
+                        run_cleanup_agent_sync(md_path, **options)
+                except AgentError as e:
+                    error = str(e)
+            if telemetry.route:
+                console.print(f"    Routing: {_describe_route(telemetry.route)}")
+            if error is None:
                 console.print("    Agent completed cleanup")
             else:
-                console.print("[yellow]    Agent returned no changes[/yellow]")
+                console.print(
+                    f"[yellow]Warning:[/yellow] Agent failed, markdown left as "
+                    f"post-processed: {error}"
+                )
+            console.print(f"    Agent usage: {telemetry.describe()}")
+            write_agent_metrics(doc_dir, telemetry, error=error)
         except AgentNotInstalledError as e:
             console.print(f"[yellow]Warning:[/yellow] {e}")
 
@@ -168,19 +338,67 @@ def convert(
 
     console.print(f"\n[bold green]Done![/bold green]")
     console.print(f"  Markdown: {md_path} ({line_count} lines)")
-    console.print(f"  Images:   {doc_dir / 'img'} ({len(images)} figures)")
+    console.print(f"  Images:   {doc_dir / 'img'} ({len(images)} images)")
     if enrich:
         console.print(f"  Enrichments: {doc_dir / 'enrichments.json'}")
 
 
+def _routing_options(route: bool, tier: str | None, tasks: str | None) -> dict:
+    """Routing keyword arguments of the agent, exiting with an error message if invalid."""
+    from pdf2md.agent.cleanup import PROMPT_TASKS
+    from pdf2md.agent.routing import MODEL_TIERS
+
+    if tier is not None and tier not in MODEL_TIERS:
+        console.print(f"[red]ERROR:[/red] Unknown tier: {tier} (expected {', '.join(MODEL_TIERS)})")
+        raise typer.Exit(1)
+    task_names = None
+    if tasks is not None:
+        task_names = [name.strip() for name in tasks.split(",") if name.strip()]
+        unknown = [name for name in task_names if name not in PROMPT_TASKS]
+        if unknown:
+            console.print(
+                f"[red]ERROR:[/red] Unknown task(s): {', '.join(unknown)} "
+                f"(expected some of {', '.join(PROMPT_TASKS)})"
+            )
+            raise typer.Exit(1)
+    return {"route": route, "tier": tier, "tasks": task_names}
+
+
+def _describe_route(route: dict) -> str:
+    """One-line summary of a routing decision kept in telemetry."""
+    return (
+        f"tier {route['tier']} ({route['model'] or 'default model'}), "
+        f"tasks: {', '.join(route['tasks'])}"
+    )
+
+
+def _load_rule_packs(paths: list[Path]) -> list:
+    """Load rule packs, exiting with an error message if one is invalid."""
+    from pdf2md.postprocess.rules import load_rule_pack
+
+    try:
+        return [load_rule_pack(path) for path in paths]
+    except (ImportError, ValueError) as e:
+        console.print(f"[red]ERROR:[/red] {e}")
+        raise typer.Exit(1)
+
+
+def _disabled_passes(disable: list[str], enable: list[str], config: Path | None) -> tuple:
+    """Passes to skip from --disable, --enable and --config, exiting if a name is unknown."""
+    from pdf2md.postprocess.registry import disabled_passes
+
+    try:
+        return disabled_passes(disable, enable, config)
+    except (ImportError, ValueError) as e:
+        console.print(f"[red]ERROR:[/red] {e}")
+        raise typer.Exit(1)
+
+
 @app.command()
 def postprocess(
-    md_path: Path = typer.Argument(
+    paths: list[Path] = typer.Argument(
         ...,
-        help="Path to the markdown file to process",
-        exists=True,
-        dir_okay=False,
-        resolve_path=True,
+        help="Markdown files, output directories, or glob patterns to process",
     ),
     images_dir: Path = typer.Option(
         None,
@@ -194,39 +412,173 @@ def postprocess(
         "-o",
         help="Output path (default: overwrite input file)",
     ),
+    pdf_path: Path = typer.Option(
+        None,
+        "--pdf",
+        help="Source PDF: strip running headers/footers found in its text layer",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Process line by line with flat memory (for very large inputs)",
+    ),
+    jobs: int = typer.Option(
+        os.cpu_count() or 1,
+        "--jobs",
+        "-j",
+        help="Number of worker processes for multiple files",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        help="Process files even if unchanged since the last run",
+    ),
+    disable: list[str] = typer.Option(
+        [],
+        "--disable",
+        "-d",
+        help="Skip a post-processing pass by name (repeatable, see 'pdf2md passes')",
+    ),
+    enable: list[str] = typer.Option(
+        [],
+        "--enable",
+        "-e",
+        help="Run a pass the config or --disable turned off (repeatable)",
+    ),
+    config: Path = typer.Option(
+        None,
+        "--config",
+        help="TOML config with \\[postprocess] disable = [...] and enable = [...]",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    report_path: Path = typer.Option(
+        None,
+        "--report",
+        help="Write a JSON report with per-document and per-pass timing",
+    ),
+    rules: list[Path] = typer.Option(
+        [],
+        "--rules",
+        help="Rule pack (TOML/YAML) of venue-specific regex fixes (repeatable)",
+        exists=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
 ) -> None:
     """
-    Run post-processing on an existing markdown file.
+    Run post-processing on existing markdown files.
 
     Useful for re-processing or processing markdown from other sources.
-    
+    Accepts files, output directories and glob patterns; each document uses
+    the img/ folder next to it. Files whose content and post-processing rules
+    are unchanged since the last run are skipped.
+
     Note: Logo/badge filtering is done during extraction (pdf2md convert),
     not during postprocessing. Existing extractions with logos will retain them.
     """
-    from pdf2md.postprocess import process_markdown
+    import time
 
-    # Determine images directory
-    if images_dir is None:
-        images_dir = md_path.parent / "img"
+    from pdf2md.corpus import find_markdown_files
+    from pdf2md.postprocess.batch import (
+        BatchResult,
+        build_report,
+        postprocess_file,
+        postprocess_files,
+    )
 
-    # Get list of image files
-    image_files = []
-    if images_dir.exists():
-        image_files = [f.name for f in images_dir.glob("*.png")]
-        image_files.extend(f.name for f in images_dir.glob("*.jpg"))
-        image_files.extend(f.name for f in images_dir.glob("*.jpeg"))
+    md_files = find_markdown_files(paths)
+    if not md_files:
+        console.print("[red]ERROR:[/red] No markdown files found")
+        raise typer.Exit(1)
+    if len(md_files) > 1 and (images_dir or output or pdf_path):
+        console.print("[red]ERROR:[/red] --images, --output and --pdf apply to a single file")
+        raise typer.Exit(1)
+    if stream and pdf_path is not None:
+        console.print("[red]ERROR:[/red] --pdf cannot be combined with --stream")
+        raise typer.Exit(1)
 
-    console.print(f"[*] Processing: {md_path.name}")
-    console.print(f"    Found {len(image_files)} images")
+    disabled = _disabled_passes(disable, enable, config)
+    if stream and disabled:
+        console.print("[red]ERROR:[/red] Passes cannot be disabled with --stream")
+        raise typer.Exit(1)
+    # Validate the packs here; workers load them again from the per-process cache
+    rule_packs = _load_rule_packs(rules)
+    if stream and any(pack.document_rules for pack in rule_packs):
+        console.print("[red]ERROR:[/red] --stream supports line-scoped rules only")
+        raise typer.Exit(1)
 
-    content = md_path.read_text(encoding="utf-8")
-    processed = process_markdown(content, image_files)
+    def report(result: BatchResult) -> None:
+        if result.status == "failed":
+            console.print(f"  [red]failed[/red]  {result.path} - {result.error}")
+        else:
+            console.print(
+                f"  {result.status:9} {result.path} ({result.images} images, {result.seconds:.2f}s)"
+            )
 
-    # Write output
-    output_path = output or md_path
-    output_path.write_text(processed, encoding="utf-8")
+    start = time.perf_counter()
+    if len(md_files) == 1:
+        console.print(f"[*] Processing: {md_files[0].name}")
+        result = postprocess_file(
+            md_files[0],
+            images_dir=images_dir,
+            output_path=output,
+            pdf_path=pdf_path,
+            stream=stream,
+            force=force,
+            disabled=disabled,
+            rule_files=tuple(rules),
+        )
+        report(result)
+        results = [result]
+    else:
+        console.print(f"[*] Processing {len(md_files)} files ({jobs} jobs)")
+        results = postprocess_files(
+            md_files,
+            jobs=jobs,
+            stream=stream,
+            force=force,
+            disabled=disabled,
+            rule_files=tuple(rules),
+            on_result=report,
+        )
+    elapsed = time.perf_counter() - start
+
+    counts = {
+        status: sum(r.status == status for r in results)
+        for status in ("processed", "skipped", "failed")
+    }
+    cpu_seconds = sum(r.seconds for r in results)
+    console.print(
+        f"\n[bold green]Done![/bold green] {counts['processed']} processed, "
+        f"{counts['skipped']} skipped, {counts['failed']} failed "
+        f"in {elapsed:.2f}s ({cpu_seconds:.2f}s total per-file time)"
+    )
+    if report_path is not None:
+        report_path.write_text(
+            json.dumps(build_report(results, elapsed), indent=2), encoding="utf-8"
+        )
+        console.print(f"  Report: {report_path}")
+    if counts["failed"]:
+        raise typer.Exit(1)
+
+
+@app.command()
+def passes() -> None:
+    """
+    List the post-processing passes in execution order.
+
+    Names can be passed to 'postprocess --disable' or listed in a config file.
+    """
+    from pdf2md.postprocess.registry import resolve_passes
 
-    console.print(f"[bold green]Done![/bold green] Output: {output_path}")
+    for pass_ in resolve_passes():
+        after = f" (after {', '.join(pass_.after)})" if pass_.after else ""
+        console.print(f"  [bold]{pass_.name:20}[/bold] {pass_.description}{after}")
 
 
 @app.command()
@@ -250,31 +602,189 @@ def agent(
         "-v",
         help="Show agent progress",
     ),
+    chunked: bool = typer.Option(
+        False,
+        "--chunked",
+        help="Clean each top-level section in its own session, in parallel",
+    ),
+    max_concurrency: int = typer.Option(
+        8,
+        "--max-concurrency",
+        help="With --chunked: most sessions running at once",
+    ),
+    patch: bool = typer.Option(
+        False,
+        "--patch",
+        help="Have the agent return line edits that are checked and applied at once",
+    ),
+    replay: bool = typer.Option(
+        False,
+        "--replay",
+        help="Re-apply the edits recorded by an earlier --patch run instead of running the agent",
+    ),
+    model: str = typer.Option(
+        None,
+        "--model",
+        help="Claude model to use (default: the SDK's default)",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Always run the agent, even if a cached result exists",
+    ),
+    no_issues: bool = typer.Option(
+        False,
+        "--no-issues",
+        help="Do not give the agent the pre-computed issue list",
+    ),
+    route: bool = typer.Option(
+        False,
+        "--route",
+        help="Pick the model tier and prompt tasks from the paper's size and defects",
+    ),
+    tier: str = typer.Option(
+        None,
+        "--tier",
+        help="Model tier (small, medium, large) instead of the routed one",
+    ),
+    tasks: str = typer.Option(
+        None,
+        "--tasks",
+        help="Comma-separated prompt tasks instead of the routed ones "
+        "(section_headers, figure_placement, ocr_artifacts, authors, split_paragraphs, general)",
+    ),
+    timeout: float = typer.Option(
+        None,
+        "--timeout",
+        help="Give up after this many seconds",
+    ),
+    max_turns: int = typer.Option(
+        None,
+        "--max-turns",
+        help="Most agent turns, summed over sessions",
+    ),
+    max_tokens: int = typer.Option(
+        None,
+        "--max-tokens",
+        help="Most tokens (input, output and prompt cache), summed over sessions",
+    ),
+    auto: bool = typer.Option(
+        False,
+        "--auto",
+        help="Run only if the quality score reaches --threshold",
+    ),
+    threshold: float = typer.Option(
+        None,
+        "--threshold",
+        help="With --auto: quality score (weighted defect count) that calls for the agent "
+        "(default: 5)",
+    ),
 ) -> None:
     """
     Run Claude agent cleanup on an existing markdown file.
 
     The agent performs open-ended review and fixes extraction artifacts.
+    With --chunked, sections are cleaned concurrently and figure placement and
+    the authors block are fixed in a final pass. With --patch, the agent sees
+    the numbered lines and answers with line-range replacements; edits that
+    drop citations or numbers are refused, and the rest are applied in one
+    step and recorded in .NAME.md.patches.json for --replay.
+
+    Results are cached (in $PDF2MD_CACHE_DIR, default ~/.cache/pdf2md/agent)
+    by input, prompt, model and tools, so re-running on unchanged markdown
+    restores the previous result at once.
+
+    --timeout, --max-turns and --max-tokens bound the run; if it fails or
+    goes over budget, the markdown is left as it was.
+
+    With --auto, the markdown is scored first (unlinked citations, unembedded
+    figures, header gaps, split paragraphs, junk lines) and the agent only
+    runs if the score reaches --threshold.
+
+    With --route, the model tier (small, medium or large) and the prompt
+    tasks are picked from the paper's length and the defects found in it;
+    --model, --tier and --tasks override parts of the decision.
+
+    Turns, tool calls, tokens and time of the run, and the routing decision,
+    are printed and written to metrics.json next to the markdown file, under
+    "agent".
     """
-    from pdf2md.agent.cleanup import run_cleanup_agent_sync, AgentNotInstalledError
+    from pdf2md.agent.cache import AgentCache
+    from pdf2md.agent.chunked import run_chunked_cleanup_agent_sync
+    from pdf2md.agent.budget import AgentBudget, AgentError
+    from pdf2md.agent.backends import AgentNotInstalledError
+    from pdf2md.agent.cleanup import run_cleanup_agent_sync
+    from pdf2md.agent.patches import patch_record_path, replay_patches
+    from pdf2md.agent.telemetry import collect_telemetry, write_agent_metrics
+    from pdf2md.agent.routing import list_images
+    from pdf2md.postprocess.quality import DEFAULT_AGENT_THRESHOLD, score_markdown
+
+    routing = _routing_options(route, tier, tasks)
+    if replay:
+        record = patch_record_path(md_path)
+        if not record.exists():
+            console.print(f"[red]ERROR:[/red] No patch record: {record}")
+            raise typer.Exit(1)
+        try:
+            rounds = replay_patches(md_path, record)
+        except ValueError as e:
+            console.print(f"[red]ERROR:[/red] {e}")
+            raise typer.Exit(1)
+        console.print(f"[*] Replayed {rounds} round(s) of edits from {record.name}")
+        return
 
     if images_dir is None:
         images_dir = md_path.parent / "img"
 
+    if auto:
+        if threshold is None:
+            threshold = DEFAULT_AGENT_THRESHOLD
+        quality = score_markdown(md_path.read_text(encoding="utf-8"), list_images(images_dir))
+        console.print(f"[*] Quality: {quality.describe()}")
+        if not quality.needs_agent(threshold):
+            console.print(f"    Skipping agent: score {quality.score:g} is below {threshold:g}")
+            return
+
     console.print(f"[*] Running agent on: {md_path.name}")
 
+    options = dict(
+        mode="patch" if patch else "edit",
+        model=model,
+        cache=None if no_cache else AgentCache(),
+        issues=not no_issues,
+        **routing,
+        budget=AgentBudget(timeout, max_turns, max_tokens),
+        raise_on_error=True,
+        verbose=verbose,
+    )
+    error = None
     try:
-        result = run_cleanup_agent_sync(md_path, images_dir, verbose=verbose)
-        if result:
-            console.print(f"\n[bold green]Agent completed![/bold green]")
-            if not verbose:
-                console.print(f"\n{result}")
-        else:
-            console.print("[yellow]Agent returned no changes[/yellow]")
+        with collect_telemetry() as telemetry:
+            try:
+                if chunked:
+                    result = run_chunked_cleanup_agent_sync(
+                        md_path, images_dir, max_concurrency=max_concurrency, **options
+                    )
+                else:
+                    result = run_cleanup_agent_sync(md_path, images_dir, **options)
+            except AgentError as e:
+                error = str(e)
     except AgentNotInstalledError as e:
         console.print(f"[red]ERROR:[/red] {e}")
         raise typer.Exit(1)
 
+    write_agent_metrics(md_path.parent, telemetry, error=error)
+    if telemetry.route:
+        console.print(f"[*] Routing: {_describe_route(telemetry.route)}")
+    if error is not None:
+        console.print(f"[red]ERROR:[/red] Agent failed, markdown left unchanged: {error}")
+        console.print(f"\nUsage: {telemetry.describe()}")
+        raise typer.Exit(1)
+    console.print(f"\n[bold green]Agent completed![/bold green]")
+    if not verbose:
+        console.print(f"\n{result}")
+    console.print(f"\nUsage: {telemetry.describe()}")
+
 
 @app.command()
 def enrich(
@@ -362,5 +872,161 @@ def enrich(
     console.print(f"  Output:      {doc_dir / 'enrichments.json'}")
 
 
+@app.command("match-refs")
+def match_refs(
+    paths: list[Path] = typer.Argument(
+        ...,
+        help="Markdown files, output directories, or glob patterns to match",
+    ),
+    bib_dir: Path = typer.Option(
+        ...,
+        "--bib",
+        "-b",
+        help="Directory of BibTeX files (e.g. citations/ from iowarp_publications)",
+        exists=True,
+        file_okay=False,
+        resolve_path=True,
+    ),
+    min_score: float = typer.Option(
+        0.85,
+        "--min-score",
+        help="Minimum title similarity (0-1) to accept a match",
+    ),
+) -> None:
+    """
+    Match extracted references against a local BibTeX store.
+
+    Writes references.json next to each markdown file, attaching the
+    canonical BibTeX key and DOI to every reference that resolves.
+    """
+    import time
+    from dataclasses import asdict
+
+    from pdf2md.corpus import find_markdown_files
+    from pdf2md.postprocess.bibliography import extract_reference_entries
+    from pdf2md.references import BibIndex, match_references
+
+    md_files = find_markdown_files(paths)
+    if not md_files:
+        console.print("[red]ERROR:[/red] No markdown files found")
+        raise typer.Exit(1)
+
+    start = time.perf_counter()
+    index = BibIndex.from_directory(bib_dir)
+    console.print(f"[*] Indexed {len(index)} BibTeX entries in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    total_refs = 0
+    total_matched = 0
+    for md_path in md_files:
+        entries = extract_reference_entries(md_path.read_text(encoding="utf-8"))
+        matches = match_references(entries, index, min_score=min_score)
+        total_refs += len(entries)
+        total_matched += len(matches)
+
+        out_path = md_path.parent / "references.json"
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(m) for m in matches], f, indent=2, ensure_ascii=False)
+        console.print(f"    {md_path.name}: {len(matches)}/{len(entries)} references matched")
+
+    console.print("\n[bold green]Done![/bold green]")
+    console.print(f"  Documents:  {len(md_files)}")
+    console.print(f"  Matched:    {total_matched}/{total_refs} references")
+    console.print(f"  Match time: {time.perf_counter() - start:.2f}s")
+
+
+graph_app = typer.Typer(
+    help="Build and query a cross-paper citation graph of a converted corpus.",
+    no_args_is_help=True,
+)
+app.add_typer(graph_app, name="graph")
+
+DEFAULT_GRAPH_DB = Path("citation_graph.sqlite")
+
+
+@graph_app.command("build")
+def graph_build(
+    paths: list[Path] = typer.Argument(
+        ...,
+        help="Converted output directories, markdown files, or glob patterns",
+    ),
+    db_path: Path = typer.Option(
+        DEFAULT_GRAPH_DB,
+        "--db",
+        help="SQLite database holding the graph (created if missing)",
+    ),
+    prune: bool = typer.Option(
+        False,
+        "--prune",
+        help="Drop papers from the graph that are no longer in PATHS",
+    ),
+) -> None:
+    """
+    Build or incrementally update the citation graph.
+
+    Only new or modified papers are read; unchanged papers are skipped.
+    """
+    import time
+
+    from pdf2md.corpus import find_markdown_files
+    from pdf2md.references.graph import CitationGraph
+
+    md_files = find_markdown_files(paths)
+    start = time.perf_counter()
+    with CitationGraph(db_path) as graph:
+        stats = graph.update(md_files, prune=prune)
+        papers, works = graph.paper_count(), graph.work_count()
+
+    console.print(f"[bold green]Done![/bold green] {db_path}")
+    console.print(
+        f"  Papers:    {stats.added} added, {stats.updated} updated, "
+        f"{stats.unchanged} unchanged, {stats.removed} removed"
+    )
+    console.print(f"  Citations: {stats.citations} indexed")
+    if stats.orphaned_works:
+        console.print(f"  Dropped:   {stats.orphaned_works} works no longer cited")
+    console.print(f"  Graph:     {papers} papers, {works} cited works")
+    console.print(f"  Time:      {time.perf_counter() - start:.2f}s")
+
+
+@graph_app.command("top")
+def graph_top(
+    db_path: Path = typer.Option(DEFAULT_GRAPH_DB, "--db", exists=True, dir_okay=False),
+    limit: int = typer.Option(20, "--limit", "-n", help="Number of works to show"),
+) -> None:
+    """Show the most-cited works in the corpus."""
+    from pdf2md.references.graph import CitationGraph
+
+    with CitationGraph(db_path) as graph:
+        works = graph.most_cited(limit)
+
+    for work in works:
+        doi = f"  doi:{work.doi}" if work.doi else ""
+        corpus = f"  [dim]{work.corpus_path}[/dim]" if work.corpus_path else ""
+        console.print(f"{work.cited_by:5d}  {work.title}{doi}{corpus}")
+
+
+@graph_app.command("cites")
+def graph_cites(
+    query: str = typer.Argument(..., help="Title (or part of it), DOI, or fingerprint"),
+    db_path: Path = typer.Option(DEFAULT_GRAPH_DB, "--db", exists=True, dir_okay=False),
+) -> None:
+    """Show which corpus papers cite a work."""
+    from pdf2md.references.graph import CitationGraph
+
+    with CitationGraph(db_path) as graph:
+        works = graph.find_works(query)
+        if not works:
+            console.print(f"[yellow]No cited work matches:[/yellow] {query}")
+            raise typer.Exit(1)
+
+        for work in works:
+            console.print(f"\n[bold]{work.title}[/bold] ({work.cited_by} citing papers)")
+            if work.corpus_path:
+                console.print(f"  In corpus: [dim]{work.corpus_path}[/dim]")
+            for path, title in graph.cited_by(work.fingerprint):
+                console.print(f"  - {title or Path(path).stem}  [dim]{path}[/dim]")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,38 @@
+"""Discovery of converted markdown documents in an output corpus."""
+
+from __future__ import annotations
+
+import glob
+from collections.abc import Iterable
+from pathlib import Path
+
+
+def find_markdown_files(paths: Iterable[Path | str]) -> list[Path]:
+    """
+    Resolve files, directories and glob patterns to converted markdown files.
+
+    Directories are searched recursively. Raw Docling extractions
+    (``*_raw.md``) are skipped unless passed explicitly as files.
+
+    Args:
+        paths: Markdown files, directories, or glob patterns (e.g. "out/*/*.md")
+
+    Returns:
+        Sorted, de-duplicated list of markdown file paths
+    """
+    found: set[Path] = set()
+
+    for path in paths:
+        path = Path(path)
+        if path.is_file():
+            found.add(path.resolve())
+        elif path.is_dir():
+            found.update(p.resolve() for p in path.rglob("*.md") if not p.name.endswith("_raw.md"))
+        else:
+            found.update(
+                Path(p).resolve()
+                for p in glob.glob(str(path), recursive=True)
+                if p.endswith(".md") and not p.endswith("_raw.md") and Path(p).is_file()
+            )
+
+    return sorted(found)
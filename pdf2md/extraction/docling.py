@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
+
+from pdf2md.extraction.furniture import find_running_items
+from pdf2md.extraction.provenance import find_text_inside_pictures, remove_items
+from pdf2md.postprocess.figures import parse_caption
+from pdf2md.postprocess.paragraphs import PAGE_BREAK_MARKER
 
 if TYPE_CHECKING:
     from PIL.Image import Image as PILImage
 
+logger = logging.getLogger(__name__)
+
 # Default minimum dimensions to filter out logos/badges (in pixels)
 # Images smaller than this are likely logos, badges, or artifacts
 DEFAULT_MIN_IMAGE_WIDTH = 200
@@ -32,21 +40,33 @@ def extract_with_docling(
     *,
     images_scale: float = 2.0,
     generate_pictures: bool = True,
+    generate_tables: bool = True,
     min_image_width: int = DEFAULT_MIN_IMAGE_WIDTH,
     min_image_height: int = DEFAULT_MIN_IMAGE_HEIGHT,
     min_image_area: int = DEFAULT_MIN_IMAGE_AREA,
+    drop_figure_text: bool = True,
+    drop_running_text: bool = True,
 ) -> tuple[Path, list[Path]]:
     """
     Extract markdown and images from a PDF using Docling.
 
+    Images are named after their own caption number (figure3.png for
+    "Fig. 3", table2.png for "TABLE II"), so names are stable when the logo
+    filter or Docling's item order changes.
+
     Args:
         pdf_path: Path to the PDF file
         output_dir: Directory to save output (creates pdf_stem/ subdirectory)
         images_scale: Resolution multiplier for extracted images (default: 2.0)
         generate_pictures: Whether to extract figure images (default: True)
+        generate_tables: Whether to save table images as tableN.png (default: True)
         min_image_width: Minimum image width in pixels to keep (default: 200)
         min_image_height: Minimum image height in pixels to keep (default: 150)
         min_image_area: Minimum image area in pixels to keep (default: 40000)
+        drop_figure_text: Drop OCR text whose provenance lies inside a kept
+            figure's region (default: True)
+        drop_running_text: Drop running headers/footers that repeat in the
+            page margins across most pages (default: True)
 
     Returns:
         Tuple of (markdown_path, list_of_image_paths)
@@ -72,6 +92,7 @@ def extract_with_docling(
     pipeline_options = PdfPipelineOptions()
     pipeline_options.images_scale = images_scale
     pipeline_options.generate_picture_images = generate_pictures
+    pipeline_options.generate_table_images = generate_tables
 
     converter = DocumentConverter(
         format_options={
@@ -86,34 +107,160 @@ def extract_with_docling(
         raise RuntimeError(f"Docling conversion failed ({result.status}): {error_msg}")
 
     # Extract and save images (filtering out small logos/badges)
-    images: list[Path] = []
-    figure_num = 1  # Track actual figure numbers after filtering
-    if hasattr(result.document, "pictures"):
-        for picture in result.document.pictures:
+    selected = select_pictures(
+        result.document,
+        min_image_width=min_image_width,
+        min_image_height=min_image_height,
+        min_image_area=min_image_area,
+    )
+    kept_pictures = [picture for _, picture, _ in selected]
+    picture_images = [pil_image for _, _, pil_image in selected]
+    images = _save_assets(img_dir, "figure", kept_pictures, picture_images, result.document)
+
+    # Table images, embedded only where the table did not come out as markdown
+    if generate_tables and hasattr(result.document, "tables"):
+        tables = []
+        table_images = []
+        for table in result.document.tables:
             try:
-                pil_image: PILImage | None = picture.get_image(result.document)
-                if pil_image is not None:
-                    # Filter out small images (likely logos, badges, artifacts)
-                    width, height = pil_image.size
-                    area = width * height
-                    
-                    if (width < min_image_width or 
-                        height < min_image_height or 
-                        area < min_image_area):
-                        # Skip small images - likely logos/badges
-                        continue
-                    
-                    img_path = img_dir / f"figure{figure_num}.png"
-                    pil_image.save(str(img_path), "PNG")
-                    images.append(img_path)
-                    figure_num += 1
+                pil_image = table.get_image(result.document)
             except Exception:
-                # Skip images that fail to extract
-                pass
+                continue
+            if pil_image is not None:
+                tables.append(table)
+                table_images.append(pil_image)
+        images += _save_assets(img_dir, "table", tables, table_images, result.document)
+
+    # Drop OCR text extracted from inside figures (axis labels, legends, etc.)
+    if drop_figure_text and kept_pictures:
+        figure_text = find_text_inside_pictures(result.document, kept_pictures)
+        remove_items(result.document, figure_text)
+
+    # Drop running headers/footers (venue line, author names, page numbers)
+    if drop_running_text:
+        remove_items(result.document, find_running_items(result.document))
 
     # Export markdown
     md_path = doc_dir / f"{pdf_stem}.md"
-    md_content = result.document.export_to_markdown()
+    # Page-break markers let post-processing rejoin paragraphs split across pages
+    md_content = result.document.export_to_markdown(page_break_placeholder=PAGE_BREAK_MARKER)
     md_path.write_text(md_content, encoding="utf-8")
 
     return md_path, images
+
+
+def select_pictures(
+    document,
+    *,
+    min_image_width: int = DEFAULT_MIN_IMAGE_WIDTH,
+    min_image_height: int = DEFAULT_MIN_IMAGE_HEIGHT,
+    min_image_area: int = DEFAULT_MIN_IMAGE_AREA,
+) -> list[tuple[int, Any, PILImage]]:
+    """
+    Pictures that pass the size filter (small images are likely logos or badges).
+
+    Args:
+        document: Docling document
+        min_image_width: Minimum image width in pixels to keep
+        min_image_height: Minimum image height in pixels to keep
+        min_image_area: Minimum image area in pixels to keep
+
+    Returns:
+        (index in document.pictures, picture, image) per kept picture
+    """
+    selected = []
+    for idx, picture in enumerate(getattr(document, "pictures", None) or []):
+        try:
+            pil_image: PILImage | None = picture.get_image(document)
+        except Exception:
+            # Skip images that fail to extract
+            continue
+        if pil_image is None:
+            continue
+        width, height = pil_image.size
+        if width < min_image_width or height < min_image_height or width * height < min_image_area:
+            continue
+        selected.append((idx, picture, pil_image))
+    return selected
+
+
+def picture_numbers(document, **limits: int) -> dict[int, int]:
+    """
+    File number of each picture extraction saves, as in img/figure<number>.png.
+
+    Uses the same size filter (select_pictures) and numbering
+    (assign_asset_numbers) as extract_with_docling, so other passes over
+    the same PDF can point at the right image file.
+
+    Args:
+        document: Docling document
+        **limits: Size limits of select_pictures
+
+    Returns:
+        Mapping of index in document.pictures to file number; filtered
+        pictures are missing
+    """
+    selected = select_pictures(document, **limits)
+    numbers = assign_asset_numbers(
+        [_caption_number(picture, "figure", document) for _, picture, _ in selected]
+    )
+    return {idx: number for (idx, _, _), number in zip(selected, numbers)}
+
+
+def assign_asset_numbers(caption_numbers: list[int | None]) -> list[int]:
+    """
+    Choose the file number of each extracted figure or table.
+
+    An item keeps the number of its own caption unless an earlier item
+    already took it. Items without a usable caption number get the lowest
+    numbers no caption claims, in document order.
+
+    Args:
+        caption_numbers: Caption number per item (None if it has none)
+
+    Returns:
+        File number per item
+    """
+    claimed = {n for n in caption_numbers if n is not None}
+    taken: set[int] = set()
+    numbers: list[int] = []
+    next_free = 1
+
+    for caption_number in caption_numbers:
+        if caption_number is not None and caption_number not in taken:
+            number = caption_number
+        else:
+            while next_free in claimed or next_free in taken:
+                next_free += 1
+            number = next_free
+        taken.add(number)
+        numbers.append(number)
+    return numbers
+
+
+def _caption_number(item, kind: str, document) -> int | None:
+    """Number in an item's own caption, if it is a caption of this kind."""
+    try:
+        caption = item.caption_text(document)
+    except Exception:
+        return None
+    parsed = parse_caption(caption or "")
+    return parsed[1] if parsed is not None and parsed[0] == kind else None
+
+
+def _save_assets(
+    img_dir: Path, kind: str, items: list, pil_images: list[PILImage], document
+) -> list[Path]:
+    """Save item images as <kind><number>.png, numbered by assign_asset_numbers."""
+    numbers = assign_asset_numbers([_caption_number(item, kind, document) for item in items])
+    paths: list[Path] = []
+    for number, pil_image in zip(numbers, pil_images):
+        path = img_dir / f"{kind}{number}.png"
+        try:
+            pil_image.save(str(path), "PNG")
+        except Exception as e:
+            # One unsavable image must not abort the extraction
+            logger.warning("Skipping %s: could not save image: %s", path.name, e)
+            continue
+        paths.append(path)
+    return paths
@@ -7,6 +7,13 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from pdf2md.extraction.docling import (
+    DEFAULT_MIN_IMAGE_AREA,
+    DEFAULT_MIN_IMAGE_HEIGHT,
+    DEFAULT_MIN_IMAGE_WIDTH,
+    picture_numbers,
+)
+
 if TYPE_CHECKING:
     from docling.datamodel.document import ConversionResult
 
@@ -62,6 +69,9 @@ def extract_enrichments(
     enable_picture_classification: bool = True,
     enable_picture_description: bool = False,  # Requires VLM, disabled by default
     images_scale: float = 2.0,
+    min_image_width: int = DEFAULT_MIN_IMAGE_WIDTH,
+    min_image_height: int = DEFAULT_MIN_IMAGE_HEIGHT,
+    min_image_area: int = DEFAULT_MIN_IMAGE_AREA,
 ) -> Enrichments:
     """
     Extract enrichments from a PDF using Docling with enrichment options enabled.
@@ -77,6 +87,9 @@ def extract_enrichments(
         enable_picture_classification: Classify figure types
         enable_picture_description: Generate VLM descriptions (slow, requires model)
         images_scale: Image resolution multiplier
+        min_image_width: Minimum image width in pixels (as given to extract_with_docling)
+        min_image_height: Minimum image height in pixels (as given to extract_with_docling)
+        min_image_area: Minimum image area in pixels (as given to extract_with_docling)
 
     Returns:
         Enrichments object containing all extracted data
@@ -133,7 +146,13 @@ def extract_enrichments(
         raise RuntimeError(f"Docling conversion failed: {result.status}")
 
     # Extract enrichments from the document
-    enrichments = _extract_from_document(result, pdf_path)
+    enrichments = _extract_from_document(
+        result,
+        pdf_path,
+        min_image_width=min_image_width,
+        min_image_height=min_image_height,
+        min_image_area=min_image_area,
+    )
 
     # Save enrichments to JSON files
     _save_enrichments(enrichments, doc_dir)
@@ -141,8 +160,15 @@ def extract_enrichments(
     return enrichments
 
 
-def _extract_from_document(result: "ConversionResult", pdf_path: Path) -> Enrichments:
-    """Extract enrichments from a converted Docling document."""
+def _extract_from_document(
+    result: "ConversionResult",
+    pdf_path: Path,
+    *,
+    min_image_width: int = DEFAULT_MIN_IMAGE_WIDTH,
+    min_image_height: int = DEFAULT_MIN_IMAGE_HEIGHT,
+    min_image_area: int = DEFAULT_MIN_IMAGE_AREA,
+) -> Enrichments:
+    """Extract enrichments from a converted Docling document (image limits as in extraction)."""
     doc = result.document
     code_blocks: list[CodeBlock] = []
     equations: list[Equation] = []
@@ -183,7 +209,18 @@ def _extract_from_document(result: "ConversionResult", pdf_path: Path) -> Enrich
 
     # Extract figure information
     if hasattr(doc, "pictures"):
+        # Number figures the way extraction named their image files; pictures
+        # the size filter dropped (logos, badges) have no file and are skipped
+        numbers = picture_numbers(
+            doc,
+            min_image_width=min_image_width,
+            min_image_height=min_image_height,
+            min_image_area=min_image_area,
+        )
         for idx, picture in enumerate(doc.pictures):
+            figure_id = numbers.get(idx)
+            if figure_id is None:
+                continue
             # Get caption text
             caption = ""
             if hasattr(picture, "caption_text") and picture.caption_text:
@@ -225,12 +262,12 @@ def _extract_from_document(result: "ConversionResult", pdf_path: Path) -> Enrich
 
             figures.append(
                 FigureInfo(
-                    figure_id=idx + 1,
+                    figure_id=figure_id,
                     caption=caption,
                     classification=f"{classification} ({confidence:.2f})" if classification and confidence else classification,
                     description=description,
                     page=_get_page_number(picture),
-                    image_path=f"./img/figure{idx + 1}.png",
+                    image_path=f"./img/figure{figure_id}.png",
                 )
             )
 
@@ -0,0 +1,228 @@
+"""Running header/footer detection by cross-page repetition.
+
+Conference templates repeat the same lines at the top or bottom of every page
+("Proceedings of SC'24", author names, page numbers). A line is a running
+line when its normalized text (lowercased, digits collapsed so "Page 3" and
+"Page 4" agree) appears in the same page band on most pages. Detection is a
+single counting pass over the text lines, so it is linear in document size.
+
+Two sources are supported: Docling provenance (used during extraction, the
+matching items are removed before export) and the PyMuPDF text layer (fast
+enough for very long documents, matched against existing markdown).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pdf2md.extraction.provenance import item_boxes, page_heights
+
+if TYPE_CHECKING:
+    from docling_core.types.doc import DoclingDocument
+
+logger = logging.getLogger(__name__)
+
+# Fraction of the page height at the top and bottom where running lines live
+DEFAULT_BAND_FRACTION = 0.1
+
+# Fraction of pages a line must repeat on (running titles often alternate
+# between odd and even pages, so each appears on about half of them)
+DEFAULT_MIN_PAGE_RATIO = 0.4
+
+# A line must repeat on at least this many pages, whatever the ratio
+MIN_REPEATED_PAGES = 3
+
+# Docling labels that are never treated as running lines (the paper title on
+# page 1 is often identical to the running title on later pages)
+PROTECTED_LABELS = frozenset({"title", "section_header", "caption"})
+
+DIGITS_PATTERN = re.compile(r"\d+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_line(text: str) -> str:
+    """Normalize a line for repetition matching: lowercase, digits → '#'."""
+    text = DIGITS_PATTERN.sub("#", text.lower())
+    return WHITESPACE_PATTERN.sub(" ", text).strip(" \t|*_")
+
+
+def page_band(top: float, bottom: float, height: float, band: float) -> str | None:
+    """Return "top" or "bottom" if a box lies in a page margin band, else None."""
+    if height <= 0:
+        return None
+    if bottom <= height * band:
+        return "top"
+    if top >= height * (1 - band):
+        return "bottom"
+    return None
+
+
+def find_running_lines(
+    lines: Iterable[tuple[int, str, str]],
+    page_count: int,
+    *,
+    min_page_ratio: float = DEFAULT_MIN_PAGE_RATIO,
+    allow_numbers: bool = False,
+) -> set[tuple[str, str]]:
+    """
+    Find lines that repeat in the same page band across most pages.
+
+    Lines without letters (page numbers normalize to "#") would match any
+    number in the body text, so they only count when the caller matches
+    by position as well as text.
+
+    Args:
+        lines: (page, band, normalized text) for every line in a margin band
+        page_count: Number of pages in the document
+        min_page_ratio: Fraction of pages a line must appear on
+        allow_numbers: Keep lines without letters (for items matched by position)
+
+    Returns:
+        Set of (band, normalized text) keys of running lines
+    """
+    pages_by_key: dict[tuple[str, str], set[int]] = {}
+    for page, band, text in lines:
+        if text and (allow_numbers or any(char.isalpha() for char in text)):
+            pages_by_key.setdefault((band, text), set()).add(page)
+
+    threshold = max(MIN_REPEATED_PAGES, min_page_ratio * page_count)
+    return {key for key, pages in pages_by_key.items() if len(pages) >= threshold}
+
+
+def find_running_items(
+    document: "DoclingDocument",
+    *,
+    band: float = DEFAULT_BAND_FRACTION,
+    min_page_ratio: float = DEFAULT_MIN_PAGE_RATIO,
+) -> list[Any]:
+    """
+    Find text items of a Docling document that are running headers or footers.
+
+    Args:
+        document: The converted DoclingDocument
+        band: Fraction of the page height checked at the top and bottom
+        min_page_ratio: Fraction of pages a line must repeat on
+
+    Returns:
+        Text items to remove before export
+    """
+    heights = page_heights(document)
+    if not heights:
+        return []
+
+    candidates: list[tuple[Any, int, str, str]] = []
+    for item in getattr(document, "texts", []):
+        text = normalize_line(getattr(item, "text", "") or "")
+        if not text:
+            continue
+        for box in item_boxes(item, heights):
+            position = page_band(box.top, box.bottom, heights.get(box.page, 0.0), band)
+            if position is not None:
+                candidates.append((item, box.page, position, text))
+
+    running = find_running_lines(
+        ((page, position, text) for _, page, position, text in candidates),
+        len(heights),
+        min_page_ratio=min_page_ratio,
+        allow_numbers=True,  # Only items inside the margin bands are removed
+    )
+
+    items: list[Any] = []
+    seen: set[int] = set()
+    for item, _, position, text in candidates:
+        if (position, text) not in running or id(item) in seen:
+            continue
+        label = str(getattr(item, "label", "")).lower().rsplit(".", 1)[-1]
+        if label in PROTECTED_LABELS:
+            continue
+        seen.add(id(item))
+        items.append(item)
+
+    if items:
+        logger.info("Found %d running header/footer items", len(items))
+    return items
+
+
+def detect_running_lines_from_pdf(
+    pdf_path: Path,
+    *,
+    band: float = DEFAULT_BAND_FRACTION,
+    min_page_ratio: float = DEFAULT_MIN_PAGE_RATIO,
+) -> set[str]:
+    """
+    Detect running lines from the PDF text layer with PyMuPDF.
+
+    Reads only text positions, no layout analysis, so it handles documents of
+    hundreds of pages in about a second.
+
+    Args:
+        pdf_path: Path to the PDF file
+        band: Fraction of the page height checked at the top and bottom
+        min_page_ratio: Fraction of pages a line must repeat on
+
+    Returns:
+        Normalized text of the running lines
+    """
+    import pymupdf
+
+    lines: list[tuple[int, str, str]] = []
+    with pymupdf.open(str(pdf_path)) as pdf:
+        page_count = pdf.page_count
+        for page in pdf:
+            height = page.rect.height
+            for x0, y0, x1, y1, text, *_ in page.get_text("blocks"):
+                position = page_band(y0, y1, height, band)
+                if position is None:
+                    continue
+                for line in text.splitlines():
+                    lines.append((page.number, position, normalize_line(line)))
+
+    running = find_running_lines(lines, page_count, min_page_ratio=min_page_ratio)
+    return {text for _, text in running}
+
+
+def strip_running_lines(content: str, running_lines: set[str]) -> tuple[str, int]:
+    """
+    Remove running header/footer lines from markdown.
+
+    Headers are never removed, since the paper title and section names can
+    match a running title. Code blocks and table rows are left alone.
+
+    Args:
+        content: Markdown content
+        running_lines: Normalized running lines (see detect_running_lines_from_pdf)
+
+    Returns:
+        Tuple of (content without running lines, number of lines removed)
+    """
+    if not running_lines:
+        return content, 0
+
+    result: list[str] = []
+    removed = 0
+    skip_blank = False
+    in_code = False
+    for line in content.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code = not in_code
+        if skip_blank and not stripped:
+            skip_blank = False
+            continue
+        skip_blank = False
+        if (
+            stripped
+            and not in_code
+            and not stripped.startswith(("#", "|", "```"))
+            and normalize_line(stripped) in running_lines
+        ):
+            removed += 1
+            skip_blank = True
+            continue
+        result.append(line)
+
+    return "\n".join(result), removed
@@ -0,0 +1,213 @@
+"""Provenance helpers: page/bbox lookups and a per-page spatial index.
+
+Docling records a provenance (page number and bounding box) for every
+document item. These helpers normalize boxes to a top-left origin and index
+them per page on a uniform grid, so "which pictures overlap this text item"
+is answered from a few grid cells instead of an all-pairs comparison.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from docling_core.types.doc import DoclingDocument
+
+logger = logging.getLogger(__name__)
+
+# Grid cell size in PDF points (~1/12 of a letter page width)
+GRID_CELL_SIZE = 50.0
+
+# Fraction of a text item's area that must lie inside a picture to count as figure text
+DEFAULT_MIN_OVERLAP = 0.8
+
+
+@dataclass(frozen=True)
+class Box:
+    """An axis-aligned box on a page, top-left origin (top < bottom)."""
+
+    page: int
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+    @property
+    def area(self) -> float:
+        return max(0.0, self.right - self.left) * max(0.0, self.bottom - self.top)
+
+    def intersection_area(self, other: "Box") -> float:
+        if self.page != other.page:
+            return 0.0
+        width = min(self.right, other.right) - max(self.left, other.left)
+        height = min(self.bottom, other.bottom) - max(self.top, other.top)
+        return width * height if width > 0 and height > 0 else 0.0
+
+
+class PageIndex:
+    """Uniform-grid spatial index of boxes, bucketed per page."""
+
+    def __init__(self, cell_size: float = GRID_CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int, int], list[int]] = {}
+        self._items: list[tuple[Box, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _cell_keys(self, box: Box) -> Iterable[tuple[int, int, int]]:
+        x0, x1 = int(box.left // self.cell_size), int(box.right // self.cell_size)
+        y0, y1 = int(box.top // self.cell_size), int(box.bottom // self.cell_size)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield (box.page, x, y)
+
+    def insert(self, box: Box, value: Any) -> None:
+        idx = len(self._items)
+        self._items.append((box, value))
+        for key in self._cell_keys(box):
+            self._cells.setdefault(key, []).append(idx)
+
+    def query(self, box: Box) -> list[tuple[Box, Any]]:
+        """Return indexed (box, value) pairs whose cells overlap ``box``."""
+        seen: set[int] = set()
+        found = []
+        for key in self._cell_keys(box):
+            for idx in self._cells.get(key, ()):
+                if idx not in seen:
+                    seen.add(idx)
+                    found.append(self._items[idx])
+        return found
+
+
+def page_heights(document: "DoclingDocument") -> dict[int, float]:
+    """Map page number to page height, for converting bottom-left boxes."""
+    heights: dict[int, float] = {}
+    for page_no, page in getattr(document, "pages", {}).items():
+        size = getattr(page, "size", None)
+        if size is not None:
+            heights[page_no] = float(size.height)
+    return heights
+
+
+def item_boxes(item: Any, heights: dict[int, float]) -> list[Box]:
+    """
+    Return the top-left-origin boxes of all provenance entries of an item.
+
+    Items spanning a page or column break have one provenance entry per part.
+    """
+    boxes = []
+    for prov in getattr(item, "prov", None) or []:
+        bbox = getattr(prov, "bbox", None)
+        if bbox is None:
+            continue
+        top, bottom = float(bbox.t), float(bbox.b)
+        origin = getattr(getattr(bbox, "coord_origin", None), "name", "TOPLEFT")
+        if origin == "BOTTOMLEFT":
+            height = heights.get(prov.page_no)
+            if height is None:
+                continue
+            top, bottom = height - top, height - bottom
+        boxes.append(
+            Box(
+                page=prov.page_no,
+                left=float(min(bbox.l, bbox.r)),
+                top=min(top, bottom),
+                right=float(max(bbox.l, bbox.r)),
+                bottom=max(top, bottom),
+            )
+        )
+    return boxes
+
+
+def find_text_inside_pictures(
+    document: "DoclingDocument",
+    pictures: Iterable[Any],
+    *,
+    min_overlap: float = DEFAULT_MIN_OVERLAP,
+) -> list[Any]:
+    """
+    Find text items whose provenance lies inside one of the given pictures.
+
+    These are almost always OCR output from inside the figure (axis labels,
+    legends, diagram text) that Docling emits as body text above the caption.
+    Captions, and text already nested under a picture, are never returned.
+
+    Args:
+        document: The converted DoclingDocument
+        pictures: Picture items whose regions should be checked (e.g. kept figures)
+        min_overlap: Fraction of a text item's area that must lie inside a picture
+
+    Returns:
+        Text items that fall inside the picture regions
+    """
+    heights = page_heights(document)
+    index = PageIndex()
+    captions: set[str] = set()
+
+    for picture in pictures:
+        for box in item_boxes(picture, heights):
+            index.insert(box, picture)
+        for caption_ref in getattr(picture, "captions", None) or []:
+            captions.add(getattr(caption_ref, "cref", ""))
+
+    if not len(index):
+        return []
+
+    inside = []
+    for item in getattr(document, "texts", []):
+        if getattr(item, "self_ref", None) in captions:
+            continue
+        if str(getattr(item, "label", "")).lower().endswith("caption"):
+            continue
+        parent = getattr(getattr(item, "parent", None), "cref", "") or ""
+        if parent.startswith("#/pictures"):
+            continue
+
+        boxes = item_boxes(item, heights)
+        if not boxes:
+            continue
+        text_area = sum(box.area for box in boxes)
+        covered = sum(
+            box.intersection_area(picture_box)
+            for box in boxes
+            for picture_box, _ in index.query(box)
+        )
+        if text_area > 0 and covered / text_area >= min_overlap:
+            inside.append(item)
+
+    return inside
+
+
+def remove_items(document: "DoclingDocument", items: list[Any]) -> int:
+    """
+    Remove items from the markdown export of a document.
+
+    Deletes the items when the installed docling-core supports it; otherwise
+    moves them to the furniture content layer, which the markdown export skips.
+
+    Returns:
+        Number of items removed or tagged
+    """
+    if not items:
+        return 0
+
+    delete_items = getattr(document, "delete_items", None)
+    if delete_items is not None:
+        try:
+            delete_items(node_items=items)
+            return len(items)
+        except Exception as e:
+            logger.debug("delete_items failed, tagging as furniture instead: %s", e)
+
+    try:
+        from docling_core.types.doc import ContentLayer
+    except ImportError:
+        return 0
+
+    for item in items:
+        item.content_layer = ContentLayer.FURNITURE
+    return len(items)
@@ -1,29 +1,53 @@
 """Deterministic post-processing for extracted markdown."""
 
+from collections.abc import Iterable
+
 from pdf2md.postprocess.citations import process_citations
 from pdf2md.postprocess.sections import process_sections
-from pdf2md.postprocess.figures import process_figures
+from pdf2md.postprocess.figures import process_figures, relocate_figures
 from pdf2md.postprocess.bibliography import process_bibliography
 from pdf2md.postprocess.cleanup import cleanup_text
+from pdf2md.postprocess.paragraphs import merge_page_break_paragraphs
+from pdf2md.postprocess.hyphenation import repair_hyphenation
+from pdf2md.postprocess.registry import PassContext, PassMetrics, run_passes
+from pdf2md.postprocess.rules import Rule, RulePack, load_rule_pack
 
 
-def process_markdown(content: str, images: list[str] | None = None) -> str:
+def process_markdown(
+    content: str,
+    images: list[str] | None = None,
+    *,
+    normalize_quotes: bool = False,
+    disabled: Iterable[str] = (),
+    metrics: list[PassMetrics] | None = None,
+    rule_packs: Iterable[RulePack] = (),
+) -> str:
     """
     Apply all deterministic post-processing steps to markdown content.
 
+    Passes run in dependency order from the pass registry (see
+    postprocess.registry): user rule packs, page breaks and hyphenation
+    first, then sections, citations, figures, bibliography and cleanup.
+
     Args:
         content: Raw markdown content from extraction
         images: List of available image filenames (e.g., ["figure1.png", "figure2.png"])
+        normalize_quotes: Replace smart quotes with ASCII quotes (default: False)
+        disabled: Names of passes to skip (e.g. ["bullet_subsections"])
+        metrics: If given, per-pass timing and change counts are appended to it
+        rule_packs: Venue-specific rule packs (see postprocess.rules.load_rule_pack)
 
     Returns:
         Processed markdown content
     """
-    # Order matters: sections first, then citations, then figures, then bibliography
-    content = process_sections(content)
-    content = process_citations(content)
-    content = process_figures(content, images or [])
-    content = process_bibliography(content)
-    content = cleanup_text(content)
+    context = PassContext(
+        images=images or [],
+        normalize_quotes=normalize_quotes,
+        rule_packs=list(rule_packs),
+    )
+    content, pass_metrics = run_passes(content, context, disabled=disabled)
+    if metrics is not None:
+        metrics.extend(pass_metrics)
     return content
 
 
@@ -32,6 +56,14 @@ __all__ = [
     "process_citations",
     "process_sections",
     "process_figures",
+    "relocate_figures",
     "process_bibliography",
     "cleanup_text",
+    "merge_page_break_paragraphs",
+    "repair_hyphenation",
+    "run_passes",
+    "PassMetrics",
+    "Rule",
+    "RulePack",
+    "load_rule_pack",
 ]
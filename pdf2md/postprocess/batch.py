@@ -0,0 +1,294 @@
+"""Batch post-processing of converted documents on a process pool.
+
+Each document is processed with its own ``img/`` folder. A sidecar file
+(``.<name>.postprocess.json``) records the hash of the input, the output and
+the rules version, so re-running after an unrelated change skips documents
+whose content and post-processing rules are unchanged.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from pdf2md.postprocess.registry import PassMetrics
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg")
+
+
+@dataclass
+class BatchResult:
+    """Outcome of post-processing one document."""
+
+    path: Path
+    status: str  # "processed", "skipped" or "failed"
+    seconds: float
+    images: int = 0
+    error: str | None = None
+    passes: list[PassMetrics] = field(default_factory=list)
+
+
+@lru_cache(maxsize=1)
+def rules_version() -> str:
+    """
+    Fingerprint of the post-processing rules.
+
+    Hashes the source of every post-processing module, of the running
+    header detection used with a source PDF (extraction/furniture.py) and
+    the packaged lexicon, so any rule change invalidates the sidecars
+    without a manual version bump.
+    """
+    digest = hashlib.sha256()
+    for path in rule_sources():
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def rule_sources() -> list[Path]:
+    """Files whose content determines post-processing output (see rules_version)."""
+    package_dir = Path(__file__).resolve().parent.parent
+    sources = sorted((package_dir / "postprocess").glob("*.py"))
+    sources.append(package_dir / "extraction" / "furniture.py")
+    lexicon = package_dir / "data" / "english_words.txt.gz"
+    if lexicon.exists():
+        sources.append(lexicon)
+    return sources
+
+
+def sidecar_path(output_path: Path) -> Path:
+    """Path of the sidecar recording how an output file was produced."""
+    return output_path.with_name(f".{output_path.name}.postprocess.json")
+
+
+def find_image_files(images_dir: Path) -> list[str]:
+    """List the image filenames of a document's img/ folder."""
+    if not images_dir.is_dir():
+        return []
+    return sorted(p.name for p in images_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _is_up_to_date(input_hash: str, output_path: Path, rules: str) -> bool:
+    """Whether the sidecar shows the output already reflects this input and rule set."""
+    try:
+        record = json.loads(sidecar_path(output_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if record.get("rules") != rules or not output_path.exists():
+        return False
+    output_hash = _sha256(output_path.read_bytes())
+    # In-place runs leave the previous output as the next input
+    return output_hash == record.get("output") and input_hash in (
+        record.get("input"),
+        record.get("output"),
+    )
+
+
+def postprocess_file(
+    md_path: Path,
+    *,
+    images_dir: Path | None = None,
+    output_path: Path | None = None,
+    pdf_path: Path | None = None,
+    stream: bool = False,
+    force: bool = False,
+    disabled: tuple[str, ...] = (),
+    rule_files: tuple[Path, ...] = (),
+) -> BatchResult:
+    """
+    Post-process one markdown file, skipping it if unchanged since the last run.
+
+    Args:
+        md_path: Markdown file to process
+        images_dir: Images directory (default: img/ next to the markdown)
+        output_path: Output path (default: overwrite the input)
+        pdf_path: Source PDF whose running headers/footers are stripped first
+        stream: Use the streaming pipeline (flat memory, see postprocess.stream)
+        force: Process even if the sidecar says the output is up to date
+        disabled: Names of passes to skip (see postprocess.registry)
+        rule_files: Rule pack files (see postprocess.rules)
+
+    Returns:
+        BatchResult with status, elapsed time and per-pass metrics
+
+    Raises:
+        ValueError: If pdf_path or disabled is combined with stream
+    """
+    if stream and (pdf_path is not None or disabled):
+        raise ValueError("Running header stripping and pass selection need the full pipeline")
+
+    from pdf2md.postprocess import process_markdown
+    from pdf2md.postprocess.rules import load_rule_pack
+    from pdf2md.postprocess.stream import process_markdown_stream
+
+    start = time.perf_counter()
+    output_path = output_path or md_path
+    image_files = find_image_files(images_dir or md_path.parent / "img")
+    rules = rules_version()
+    if disabled:
+        rules = f"{rules}-{','.join(sorted(disabled))}"
+    # Loaded once per process and reused for every file of the batch
+    rule_packs = [load_rule_pack(path) for path in rule_files]
+    if rule_files:
+        rules = f"{rules}-{_sha256(b''.join(p.read_bytes() for p in rule_files))[:16]}"
+    if pdf_path is not None:
+        # Running headers come from the PDF, so another or a modified PDF is a new rule set
+        pdf_key = f"{pdf_path.resolve()}:{pdf_path.stat().st_mtime_ns}"
+        rules = f"{rules}-pdf{_sha256(pdf_key.encode())[:16]}"
+
+    raw = md_path.read_bytes()
+    input_hash = _sha256(raw)
+    if not force and _is_up_to_date(input_hash, output_path, rules):
+        return BatchResult(md_path, "skipped", time.perf_counter() - start, len(image_files))
+
+    metrics: list[PassMetrics] = []
+    if stream:
+        # Write next to the output and rename, so the input can be overwritten in place
+        tmp_path = output_path.with_name(f"{output_path.name}.tmp")
+        with md_path.open(encoding="utf-8") as src, tmp_path.open("w", encoding="utf-8") as dst:
+            for line in process_markdown_stream(src, image_files, rule_packs=rule_packs):
+                dst.write(line)
+                dst.write("\n")
+        tmp_path.replace(output_path)
+    else:
+        content = raw.decode("utf-8")
+        if pdf_path is not None:
+            from pdf2md.extraction.furniture import (
+                detect_running_lines_from_pdf,
+                strip_running_lines,
+            )
+
+            content, _ = strip_running_lines(content, detect_running_lines_from_pdf(pdf_path))
+        processed = process_markdown(
+            content, image_files, disabled=disabled, metrics=metrics, rule_packs=rule_packs
+        )
+        output_path.write_text(processed, encoding="utf-8")
+
+    record = {"input": input_hash, "output": _sha256(output_path.read_bytes()), "rules": rules}
+    sidecar_path(output_path).write_text(json.dumps(record), encoding="utf-8")
+    elapsed = time.perf_counter() - start
+    return BatchResult(md_path, "processed", elapsed, len(image_files), passes=metrics)
+
+
+def _postprocess_safely(
+    md_path: Path,
+    stream: bool,
+    force: bool,
+    disabled: tuple[str, ...],
+    rule_files: tuple[Path, ...],
+) -> BatchResult:
+    """Pool worker: never raise, so one bad file does not stop the batch."""
+    start = time.perf_counter()
+    try:
+        return postprocess_file(
+            md_path, stream=stream, force=force, disabled=disabled, rule_files=rule_files
+        )
+    except Exception as e:
+        return BatchResult(md_path, "failed", time.perf_counter() - start, error=str(e))
+
+
+def postprocess_files(
+    md_files: list[Path],
+    *,
+    jobs: int = 1,
+    stream: bool = False,
+    force: bool = False,
+    disabled: tuple[str, ...] = (),
+    rule_files: tuple[Path, ...] = (),
+    on_result: Callable[[BatchResult], None] | None = None,
+) -> list[BatchResult]:
+    """
+    Post-process many markdown files in place, on a process pool.
+
+    Args:
+        md_files: Markdown files (each uses the img/ folder next to it)
+        jobs: Number of worker processes (1 = run in this process)
+        stream: Use the streaming pipeline
+        force: Ignore sidecars and process every file
+        disabled: Names of passes to skip
+        rule_files: Rule pack files (compiled once per worker process)
+        on_result: Called with each result as it completes (e.g. for progress)
+
+    Returns:
+        Results in completion order
+    """
+    results: list[BatchResult] = []
+    for result in _iter_results(md_files, jobs, stream, force, disabled, rule_files):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
+
+
+def _iter_results(
+    md_files: list[Path],
+    jobs: int,
+    stream: bool,
+    force: bool,
+    disabled: tuple[str, ...],
+    rule_files: tuple[Path, ...],
+) -> Iterator[BatchResult]:
+    args = (stream, force, disabled, rule_files)
+    if jobs <= 1 or len(md_files) <= 1:
+        for md_path in md_files:
+            yield _postprocess_safely(md_path, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_postprocess_safely, p, *args) for p in md_files]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def build_report(results: list[BatchResult], elapsed: float) -> dict:
+    """
+    Build a machine-readable report of a batch run.
+
+    Per document: status, time and per-pass metrics. Per pass: total time,
+    total changed lines and the number of documents where it changed anything.
+
+    Args:
+        results: Results of postprocess_file / postprocess_files
+        elapsed: Wall-clock time of the whole run in seconds
+
+    Returns:
+        JSON-serializable report
+    """
+    totals: dict[str, dict[str, float]] = {}
+    for result in results:
+        for metric in result.passes:
+            entry = totals.setdefault(
+                metric.name, {"seconds": 0.0, "changed_lines": 0, "documents_changed": 0}
+            )
+            entry["seconds"] += metric.seconds
+            entry["changed_lines"] += metric.changed_lines
+            entry["documents_changed"] += metric.changed_lines > 0
+
+    return {
+        "rules_version": rules_version(),
+        "elapsed_seconds": elapsed,
+        "documents": [
+            {
+                "path": str(result.path),
+                "status": result.status,
+                "seconds": result.seconds,
+                "error": result.error,
+                "passes": {
+                    m.name: {"seconds": m.seconds, "changed_lines": m.changed_lines}
+                    for m in result.passes
+                },
+            }
+            for result in results
+        ],
+        "passes": totals,
+    }
@@ -4,6 +4,9 @@ from __future__ import annotations
 
 import re
 
+# Start of a reference entry: "[N]", "<a id=...></a>[N]" or "- [N]"
+REFERENCE_ENTRY_PATTERN = re.compile(r"^\s*(?:<a[^>]*></a>)?(?:-\s*)?\[(\d{1,3})\]")
+
 
 def process_bibliography(content: str) -> str:
     """
@@ -52,9 +55,7 @@ def _format_reference_entries(references_text: str) -> str:
     for line in lines:
         # Check if this line starts a new reference entry
         # Match: [N], <a...></a>[N], or - [N]
-        is_reference_start = bool(
-            re.match(r"^\s*(?:<a[^>]*></a>)?(?:-\s*)?\[(\d{1,3})\]", line)
-        )
+        is_reference_start = bool(REFERENCE_ENTRY_PATTERN.match(line))
 
         # Add blank line before new reference if previous line wasn't blank
         if is_reference_start and prev_was_reference:
@@ -83,3 +84,56 @@ def extract_reference_count(content: str) -> int:
     # (at start of line, after anchor, or after blank line)
     matches = re.findall(r"^\s*(?:<a[^>]*></a>)?\[(\d+)\]", content, re.MULTILINE)
     return len(matches)
+
+
+def extract_reference_entries(content: str) -> list[tuple[int, str]]:
+    """
+    Extract numbered reference entries from the bibliography.
+
+    Continuation lines are joined onto their entry, and anchor tags and
+    bullet prefixes are stripped.
+
+    Args:
+        content: Markdown content
+
+    Returns:
+        List of (reference_number, reference_text) tuples in document order
+    """
+    references_patterns = [
+        r"^## References\s*$",
+        r"^## REFERENCES\s*$",
+        r"^# References\s*$",
+        r"^References\s*$",
+    ]
+
+    references_text = ""
+    for pattern in references_patterns:
+        match = re.search(pattern, content, re.MULTILINE)
+        if match:
+            references_text = content[match.end() :]
+            break
+
+    entries: list[tuple[int, str]] = []
+    current_num: int | None = None
+    current_parts: list[str] = []
+
+    for line in references_text.split("\n"):
+        entry_match = re.match(r"^\s*(?:<a[^>]*></a>)?(?:-\s*)?\[(\d{1,3})\]\s*(.*)$", line)
+        if entry_match or line.lstrip().startswith("#") or not line.strip():
+            if current_num is not None:
+                entries.append((current_num, " ".join(current_parts)))
+            current_num = None
+            current_parts = []
+        if line.lstrip().startswith("#") and entries:
+            # A new section after the bibliography (e.g. an appendix)
+            break
+        if entry_match:
+            current_num = int(entry_match.group(1))
+            current_parts = [entry_match.group(2).strip()]
+        elif current_num is not None and line.strip():
+            current_parts.append(line.strip())
+
+    if current_num is not None:
+        entries.append((current_num, " ".join(current_parts)))
+
+    return entries
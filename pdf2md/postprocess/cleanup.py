@@ -2,91 +2,131 @@
 
 from __future__ import annotations
 
-import re
-
-
-def cleanup_text(content: str) -> str:
+import unicodedata
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+
+from pdf2md.postprocess.hyphenation import repair_hyphenation
+
+LIGATURES = {
+    "ﬁ": "fi",
+    "ﬂ": "fl",
+    "ﬀ": "ff",
+    "ﬃ": "ffi",
+    "ﬄ": "ffl",
+    "ﬅ": "ft",
+    "ﬆ": "st",
+}
+
+# Hyphen-like dashes become "-" (em-dash is kept for intentional use)
+DASHES = {
+    "\u2010": "-",  # hyphen
+    "\u2011": "-",  # non-breaking hyphen
+    "\u2012": "-",  # figure dash
+    "\u2013": "-",  # en-dash
+}
+
+# Non-breaking and fixed-width spaces become a plain space
+SPACES = dict.fromkeys(
+    "\u00a0\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u202f\u205f\u3000", " "
+)
+
+# Invisible characters (zero-width spaces/joiners, BOM, soft hyphen) are dropped
+INVISIBLE = dict.fromkeys("\u200b\u200c\u200d\u2060\ufeff\u00ad", "")
+
+# Smart quotes, only replaced when normalize_quotes=True
+SMART_QUOTES = {
+    "\u2018": "'",
+    "\u2019": "'",
+    "\u201a": "'",
+    "\u201b": "'",
+    "\u201c": '"',
+    "\u201d": '"',
+    "\u201e": '"',
+    "\u201f": '"',
+}
+
+# Mathematical Alphanumeric Symbols block (𝐀, 𝑥, 𝟏, ...) emitted by some PDF fonts
+MATH_ALPHANUMERIC_RANGE = range(0x1D400, 0x1D800)
+
+# Maximum consecutive blank lines kept
+MAX_BLANK_LINES = 1
+
+
+def cleanup_text(content: str, *, normalize_quotes: bool = False) -> str:
     """
     Apply general text cleanup to markdown content.
 
     Handles:
-    - Ligature replacement (ﬁ→fi, ﬂ→fl, ﬀ→ff, etc.)
-    - Excessive blank lines (max 2 consecutive)
-    - Trailing whitespace
+    - Ligatures (ﬁ→fi, ﬂ→fl, ﬀ→ff, etc.), hyphen-like dashes, non-breaking
+      and zero-width spaces, math-alphanumeric glyphs (𝑥→x) in one
+      ``str.translate`` pass
+    - Excessive blank lines (max 1 between blocks) and trailing whitespace,
+      in one pass over the lines
 
     Args:
         content: Markdown content
+        normalize_quotes: Also replace smart quotes with ASCII quotes (default: False)
 
     Returns:
         Cleaned content
     """
-    content = _fix_ligatures(content)
-    content = _fix_excessive_blank_lines(content)
-    content = _fix_trailing_whitespace(content)
-    return content
+    content = content.translate(_translation_table(normalize_quotes))
+    return "\n".join(_collapse_blank_lines(content.split("\n")))
 
 
-def _fix_ligatures(content: str) -> str:
-    """
-    Replace common ligature characters with their ASCII equivalents.
+def cleanup_lines(lines: Iterable[str], *, normalize_quotes: bool = False) -> Iterator[str]:
     """
-    ligatures = {
-        "ﬁ": "fi",
-        "ﬂ": "fl",
-        "ﬀ": "ff",
-        "ﬃ": "ffi",
-        "ﬄ": "ffl",
-        "ﬅ": "ft",
-        "ﬆ": "st",
-        # Common dash variants
-        "–": "-",  # en-dash to hyphen (keep em-dash for intentional use)
-        # Quotes (optional - some may want to keep smart quotes)
-        # """: "\"",
-        # """: "\"",
-        # "'": "'",
-        # "'": "'",
-    }
-
-    for ligature, replacement in ligatures.items():
-        content = content.replace(ligature, replacement)
-
-    return content
-
-
-def _fix_excessive_blank_lines(content: str) -> str:
-    """
-    Reduce multiple consecutive blank lines to maximum of 2.
-    """
-    # Replace 3+ consecutive newlines with 2
-    return re.sub(r"\n{3,}", "\n\n", content)
+    Streaming variant of cleanup_text: clean lines one at a time.
 
+    Args:
+        lines: Markdown lines (without trailing newlines)
+        normalize_quotes: Also replace smart quotes with ASCII quotes (default: False)
 
-def _fix_trailing_whitespace(content: str) -> str:
-    """
-    Remove trailing whitespace from each line.
+    Yields:
+        Cleaned lines
     """
-    lines = content.split("\n")
-    return "\n".join(line.rstrip() for line in lines)
+    table = _translation_table(normalize_quotes)
+    return _collapse_blank_lines(line.translate(table) for line in lines)
+
+
+def _collapse_blank_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Strip trailing whitespace and keep at most MAX_BLANK_LINES in a row."""
+    blank_run = 0
+    for line in lines:
+        line = line.rstrip()
+        if line:
+            blank_run = 0
+        else:
+            blank_run += 1
+            if blank_run > MAX_BLANK_LINES:
+                continue
+        yield line
+
+
+@lru_cache(maxsize=2)
+def _translation_table(normalize_quotes: bool) -> dict[int, str]:
+    """Build the character translation table (cached per configuration)."""
+    mapping: dict[str, str] = {**LIGATURES, **DASHES, **SPACES, **INVISIBLE}
+    if normalize_quotes:
+        mapping.update(SMART_QUOTES)
+
+    table = {ord(char): replacement for char, replacement in mapping.items()}
+    for codepoint in MATH_ALPHANUMERIC_RANGE:
+        normalized = unicodedata.normalize("NFKC", chr(codepoint))
+        if normalized != chr(codepoint) and normalized.isascii():
+            table[codepoint] = normalized
+    return table
 
 
 def fix_hyphenated_words(content: str) -> str:
     """
     Fix words broken by hyphenation at line endings.
 
-    Note: This is aggressive and may have false positives.
-    Use with caution or as part of agent review.
+    Decides between the joined word and a hyphenated compound using the
+    document's vocabulary and an English lexicon (see postprocess.hyphenation).
 
-    Example: "docu-\\nment" → "document"
+    Example: "docu- ment" → "document", "energy- efficient" → "energy-efficient"
     """
-    # Pattern: word-\nword where the hyphen is at end of line
-    # Only fix if the combined word is likely correct (lowercase continuation)
-    pattern = r"(\w+)-\n(\s*)([a-z]\w*)"
-
-    def fix_hyphen(match: re.Match) -> str:
-        word1 = match.group(1)
-        indent = match.group(2)
-        word2 = match.group(3)
-        # Join the words, preserve any indentation for the rest of the line
-        return f"{word1}{word2}"
-
-    return re.sub(pattern, fix_hyphen, content)
+    content, _ = repair_hyphenation(content)
+    return content
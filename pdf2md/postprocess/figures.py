@@ -1,5 +1,10 @@
 """Figure processing: embed images at their captions.
 
+Figures, tables, algorithms and listings share one caption index, built in a
+single scan with one pattern, so embedding costs O(lines + captions). Images
+are matched by name: figureN.png, tableN.png, algorithmN.png, listingN.png
+(extraction names them after their own caption number).
+
 Note: Logo/badge filtering is now handled during extraction in docling.py
 using PIL to check image dimensions before saving. This ensures figures
 are numbered correctly from the start.
@@ -7,36 +12,157 @@ are numbered correctly from the start.
 
 from __future__ import annotations
 
+import logging
 import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from pdf2md.postprocess.guards import is_oversized
+from pdf2md.postprocess.sections import roman_to_int
+
+logger = logging.getLogger(__name__)
+
+# Embedded image line produced by _embed_figures_at_captions
+IMAGE_EMBED_PATTERN = re.compile(r"^!\[Figure (\d+)\]\(")
+
+# Caption line: "Fig. 2. ...", "Figure 2: ...", optionally emphasized
+CAPTION_LINE_PATTERN = re.compile(r"^\*{0,2}Fig(?:ure)?\.?\s*(\d+)\s*[.:]", re.IGNORECASE)
+
+# In-text reference: "Fig. 2", "Figure 2", "Figs. 2"
+FIGURE_REFERENCE_PATTERN = re.compile(r"\bFig(?:ure)?s?\.?\s*(\d+)", re.IGNORECASE)
+
+IMAGE_PLACEHOLDER = "<!-- image -->"
+
+# Caption mention used to place images, one pattern for every kind:
+# - figures anywhere after whitespace: "Fig. 1.", "Figure 1:", "Fig 1 "
+# - tables, algorithms and listings at the line start, Arabic or Roman, ending
+#   in "." / ":" or the line end: "Table 2.", "TABLE II", "**Algorithm 1:**"
+CAPTION_EMBED_PATTERN = re.compile(
+    r"(?:^|\s)Fig(?:ure)?\.?\s*(?P<figure>\d+)[.:\s]"
+    r"|^\*{0,2}(?P<kind>Table|Algorithm|Listing)\s+(?P<number>\d+|(?-i:[IVXL]+))"
+    r"\*{0,2}(?:[.:]|$)",
+    re.IGNORECASE,
+)
+
+# Image filenames: figure1.png, fig_2.png, table3.png, algorithm1.png
+ASSET_NAME_PATTERN = re.compile(r"(fig(?:ure)?|table|algorithm|listing)[_-]?(\d+)", re.IGNORECASE)
+
+# Alt text (and markdown label) per kind
+ASSET_LABELS = {
+    "figure": "Figure",
+    "table": "Table",
+    "algorithm": "Algorithm",
+    "listing": "Listing",
+}
+
+# Lines around a table caption searched for a markdown table
+TABLE_CONTEXT_LINES = 3
+
+
+@dataclass
+class Caption:
+    """A caption found by index_captions."""
+
+    kind: str  # "figure", "table", "algorithm" or "listing"
+    number: int
+    line: int  # 0-based line index
+
+
+@dataclass
+class FigureMove:
+    """A figure block moved by relocate_figures."""
+
+    figure: int
+    from_line: int  # 1-based line of the image embed before moving
+    section: str  # heading the figure was moved under
+
+
+def parse_caption(line: str) -> tuple[str, int] | None:
+    """
+    Kind and number of the caption mentioned in a line.
+
+    Args:
+        line: A markdown line or an extracted caption text
+
+    Returns:
+        Tuple of (kind, number), e.g. ("table", 2) for "TABLE II: ...", or None
+    """
+    if is_oversized(line, "figures"):
+        return None
+    match = CAPTION_EMBED_PATTERN.search(line)
+    if not match:
+        return None
+    if match.group("figure"):
+        return "figure", int(match.group("figure"))
+    number = match.group("number")
+    value = int(number) if number.isdigit() else roman_to_int(number)
+    if value is None:
+        return None
+    return match.group("kind").lower(), value
+
+
+def index_captions(lines: Sequence[str]) -> list[Caption]:
+    """
+    Index the first caption of every figure, table, algorithm and listing.
+
+    Args:
+        lines: Markdown lines
+
+    Returns:
+        Captions in document order (one per kind and number)
+    """
+    captions: list[Caption] = []
+    seen: set[tuple[str, int]] = set()
+    for i, line in enumerate(lines):
+        parsed = parse_caption(line)
+        if parsed is not None and parsed not in seen:
+            seen.add(parsed)
+            captions.append(Caption(parsed[0], parsed[1], i))
+    return captions
 
 
 def process_figures(content: str, image_files: list[str]) -> str:
     """
-    Embed figure images at their captions in markdown content.
+    Embed figure, table, algorithm and listing images at their captions.
 
-    Finds captions like "Fig. 1." or "Figure 1:" and inserts the corresponding
-    image above the caption.
+    Finds captions like "Fig. 1.", "Figure 1:" or "TABLE II" and inserts the
+    corresponding image above the caption. A table image is only embedded
+    when no markdown table sits next to its caption.
 
     Args:
         content: Markdown content
-        image_files: List of available image filenames (e.g., ["figure1.png", "figure2.png"])
+        image_files: List of available image filenames (e.g., ["figure1.png", "table1.png"])
 
     Returns:
-        Content with embedded figure images
+        Content with embedded images
     """
     if not image_files:
         return content
 
-    # Build mapping of figure number to image file
-    figure_map = _build_figure_map(image_files)
+    # Build mapping of (kind, number) to image file
+    asset_map = _build_asset_map(image_files)
 
-    if not figure_map:
+    if not asset_map:
         return content
 
-    # Find and process figure captions
-    content = _embed_figures_at_captions(content, figure_map)
+    return _embed_at_captions(content, asset_map)
 
-    return content
+
+def _build_asset_map(image_files: list[str]) -> dict[tuple[str, int], str]:
+    """
+    Build a mapping of (kind, number) to image filenames.
+
+    Handles patterns like figure1.png, fig_2.png, Figure-3.png, table1.png,
+    algorithm2.png and listing1.png.
+    """
+    asset_map: dict[tuple[str, int], str] = {}
+    for filename in image_files:
+        match = ASSET_NAME_PATTERN.search(filename)
+        if match:
+            prefix = match.group(1).lower()
+            kind = "figure" if prefix.startswith("fig") else prefix
+            asset_map[(kind, int(match.group(2)))] = filename
+    return asset_map
 
 
 def _build_figure_map(image_files: list[str]) -> dict[int, str]:
@@ -48,56 +174,84 @@ def _build_figure_map(image_files: list[str]) -> dict[int, str]:
     - fig1.png, fig2.png
     - Figure_1.png
     """
-    figure_map: dict[int, str] = {}
+    return {
+        number: filename
+        for (kind, number), filename in _build_asset_map(image_files).items()
+        if kind == "figure"
+    }
 
-    for filename in image_files:
-        # Extract number from filename
-        match = re.search(r"(?:figure|fig)[_-]?(\d+)", filename, re.IGNORECASE)
-        if match:
-            num = int(match.group(1))
-            figure_map[num] = filename
 
-    return figure_map
+def _embed_figures_at_captions(content: str, figure_map: dict[int, str]) -> str:
+    """Embed figure images above their captions (figure_map: number → filename)."""
+    return _embed_at_captions(content, {("figure", n): f for n, f in figure_map.items()})
 
 
-def _embed_figures_at_captions(content: str, figure_map: dict[int, str]) -> str:
+def _embed_at_captions(content: str, asset_map: dict[tuple[str, int], str]) -> str:
     """
-    Find figure captions and embed images above them.
+    Find captions and embed images above them.
 
     Handles patterns like:
     - "Fig. 1." or "Fig. 1:"
     - "Figure 1." or "Figure 1:"
     - "Fig 1" (no punctuation)
+    - "Table 1.", "TABLE I", "Algorithm 2:", "Listing 1"
     """
     lines = content.split("\n")
-    result = []
-    embedded_figures: set[int] = set()
+    inserts: dict[int, list[str]] = {}
 
-    for i, line in enumerate(lines):
-        # Check if this line contains a figure caption
-        # Pattern: "Fig." or "Figure" followed by number
-        caption_match = re.search(
-            r"(?:^|\s)(Fig(?:ure)?\.?\s*(\d+))[.:\s]",
-            line,
-            re.IGNORECASE,
-        )
-
-        if caption_match:
-            fig_num = int(caption_match.group(2))
+    for caption in index_captions(lines):
+        nearby = lines[max(caption.line - TABLE_CONTEXT_LINES, 0) : caption.line]
+        nearby += lines[caption.line + 1 : caption.line + 1 + TABLE_CONTEXT_LINES]
+        embed = _caption_embed(caption.kind, caption.number, asset_map, nearby)
+        if embed:
+            inserts[caption.line] = embed
 
-            # Only embed if we have the image and haven't embedded it yet
-            if fig_num in figure_map and fig_num not in embedded_figures:
-                img_file = figure_map[fig_num]
-                # Insert image before the caption line
-                result.append(f"![Figure {fig_num}](./img/{img_file})")
-                result.append("")  # Blank line between image and caption
-                embedded_figures.add(fig_num)
+    if not inserts:
+        return content
 
+    result: list[str] = []
+    for i, line in enumerate(lines):
+        result.extend(inserts.get(i, ()))
         result.append(line)
-
     return "\n".join(result)
 
 
+def _caption_embed(
+    kind: str, number: int, asset_map: dict[tuple[str, int], str], nearby: Sequence[str]
+) -> list[str]:
+    """Image lines to insert above a caption (empty if there is no image to embed)."""
+    filename = asset_map.get((kind, number))
+    if filename is None:
+        return []
+    if kind == "table" and any(line.lstrip().startswith("|") for line in nearby):
+        # The table was extracted as markdown; the image would duplicate it
+        return []
+    # Insert image before the caption line, blank line between image and caption
+    return [f"![{ASSET_LABELS[kind]} {number}](./img/{filename})", ""]
+
+
+def _embed_caption_line(
+    line: str,
+    nearby: Sequence[str],
+    asset_map: dict[tuple[str, int], str],
+    embedded: set[tuple[str, int]],
+) -> list[str]:
+    """
+    Return the image lines to insert before a line (empty if it is not a caption).
+
+    Args:
+        line: The candidate caption line
+        nearby: Lines around it (only checked for markdown tables)
+        asset_map: (kind, number) → image filename
+        embedded: Captions already seen (updated in place)
+    """
+    parsed = parse_caption(line)
+    if parsed is None or parsed in embedded:
+        return []
+    embedded.add(parsed)
+    return _caption_embed(parsed[0], parsed[1], asset_map, nearby)
+
+
 def find_unembedded_figures(content: str, image_files: list[str]) -> list[str]:
     """
     Find images that weren't embedded (no matching caption found).
@@ -125,3 +279,114 @@ def find_unembedded_figures(content: str, image_files: list[str]) -> list[str]:
             unembedded.append(filename)
 
     return unembedded
+
+
+def relocate_figures(content: str) -> tuple[str, list[FigureMove]]:
+    """
+    Move each figure to the first section that references it.
+
+    PDF extraction places figures where LaTeX floated them (often page tops),
+    not where the text discusses them. In a single scan this pass indexes, per
+    section, the image embeds, caption lines and in-text references
+    ("as shown in Fig. 3"). Each image and its caption are then moved together
+    to the start of the first section (any heading level) that references the
+    figure. ``<!-- image -->`` placeholders are dropped.
+
+    Figures that are never referenced, or whose first reference is in the
+    section they already sit in, are left in place.
+
+    Args:
+        content: Markdown content with embedded figures
+
+    Returns:
+        Tuple of (relocated content, list of moves made)
+    """
+    lines = content.split("\n")
+
+    # Section 0 is the text before the first heading
+    section_of_line: list[int] = []
+    headers: list[int] = [-1]
+    image_lines: dict[int, int] = {}
+    caption_lines: dict[int, int] = {}
+    first_reference: dict[int, int] = {}
+    placeholders: set[int] = set()
+    in_code = False
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("```") or in_code:
+            # Code listings ("# comment", "Fig. 3" in strings) are left alone
+            if stripped.startswith("```"):
+                in_code = not in_code
+            section_of_line.append(len(headers) - 1)
+            continue
+        if stripped.startswith("#"):
+            headers.append(i)
+            section_of_line.append(len(headers) - 1)
+            continue
+        section = len(headers) - 1
+        section_of_line.append(section)
+
+        if stripped == IMAGE_PLACEHOLDER:
+            placeholders.add(i)
+            continue
+        image_match = IMAGE_EMBED_PATTERN.match(stripped)
+        if image_match:
+            image_lines.setdefault(int(image_match.group(1)), i)
+            continue
+        caption_match = CAPTION_LINE_PATTERN.match(stripped)
+        if caption_match:
+            caption_lines.setdefault(int(caption_match.group(1)), i)
+            continue
+        for ref in FIGURE_REFERENCE_PATTERN.finditer(stripped):
+            first_reference.setdefault(int(ref.group(1)), section)
+
+    # Decide which figure blocks move, grouped by target section
+    moves: list[FigureMove] = []
+    moved_lines: set[int] = set()
+    blocks_by_section: dict[int, list[list[str]]] = {}
+
+    for fig_num in sorted(image_lines):
+        target = first_reference.get(fig_num)
+        image_line = image_lines[fig_num]
+        if not target or section_of_line[image_line] == target:
+            continue
+
+        block = [lines[image_line]]
+        moved_lines.add(image_line)
+        caption_line = caption_lines.get(fig_num)
+        if caption_line is not None:
+            block.extend(["", lines[caption_line]])
+            moved_lines.add(caption_line)
+
+        blocks_by_section.setdefault(target, []).append(block)
+        heading = lines[headers[target]].strip().lstrip("#").strip()
+        moves.append(FigureMove(figure=fig_num, from_line=image_line + 1, section=heading))
+        logger.info("Moved Figure %d (line %d) to section '%s'", fig_num, image_line + 1, heading)
+
+    if not moves and not placeholders:
+        return content, moves
+
+    header_to_section = {line: idx for idx, line in enumerate(headers) if line >= 0}
+    result: list[str] = []
+    skip_blank = False
+
+    for i, line in enumerate(lines):
+        if i in moved_lines or i in placeholders:
+            # Drop the blank line that separated the removed line from the next block
+            skip_blank = True
+            continue
+        if skip_blank and not line.strip():
+            continue
+        skip_blank = False
+        result.append(line)
+
+        section = header_to_section.get(i)
+        if section in blocks_by_section:
+            result.append("")
+            for block in blocks_by_section[section]:
+                result.extend(block)
+                result.append("")
+            skip_blank = True
+
+    return "\n".join(result), moves
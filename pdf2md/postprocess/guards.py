@@ -0,0 +1,30 @@
+"""Runtime guard against pathological input lines.
+
+Docling sometimes emits a whole table or a figure's OCR text as a single
+line of tens of kilobytes. Header and caption rules only ever match short
+lines, so line-level rules skip anything longer than MAX_RULE_LINE_LENGTH
+instead of running their patterns over it.
+"""
+
+from __future__ import annotations
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest line a line-level rule is applied to (a long paragraph is ~2-3 KB)
+MAX_RULE_LINE_LENGTH = 10_000
+
+
+def is_oversized(line: str, rule: str) -> bool:
+    """
+    Whether a line is too long for a line-level rule (logged at debug level).
+
+    Args:
+        line: The candidate line
+        rule: Name of the rule, for the log message
+    """
+    if len(line) <= MAX_RULE_LINE_LENGTH:
+        return False
+    logger.debug("Skipping %s on a %d-character line", rule, len(line))
+    return True
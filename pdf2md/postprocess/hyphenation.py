@@ -0,0 +1,121 @@
+"""Dictionary-backed repair of words hyphenated at line breaks.
+
+PDF text keeps the hyphen of a word broken at the end of a line, so the
+extracted markdown contains "docu- ment" (Docling joins the lines with a
+space) or "docu-\\nment". Not every such hyphen is a line-break artifact:
+"energy- efficient" is a compound that must keep its hyphen.
+
+Each candidate is decided from, in order:
+1. The document's own vocabulary: whichever of "document" / "docu-ment"
+   occurs more often elsewhere in the text wins
+2. The English lexicon: if the joined form is a known word, join
+3. Compound check: if both halves are known words, keep "energy-efficient"
+4. Otherwise join, since an unknown fragment ("sched- uling") is the common case
+
+The lexicon (``pdf2md/data/english_words.txt.gz``) holds the 60k most
+frequent lowercase words of the pyspellchecker English frequency list (MIT
+licensed) plus common systems/HPC terms. It is loaded lazily, once per process.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib import resources
+
+logger = logging.getLogger(__name__)
+
+LEXICON_RESOURCE = ("data", "english_words.txt.gz")
+
+# A word broken by a hyphen followed by a space or a single line break.
+# The first half must not itself follow a hyphen ("state-of- the" is left alone).
+BROKEN_WORD_PATTERN = re.compile(r"(?<![\w-])([A-Za-z]+)-(?:[ \t]+|[ \t]*\n[ \t]*)([a-z]+)\b")
+
+WORD_PATTERN = re.compile(r"[A-Za-z]+(?:-[A-Za-z]+)*")
+
+# Second halves that signal a suspended hyphen ("pre- and post-processing")
+SUSPENDED_HYPHEN_WORDS = frozenset({"and", "or", "nor", "to", "vs"})
+
+
+@dataclass
+class HyphenFix:
+    """A hyphenated line-break decision."""
+
+    original: str  # e.g. "docu- ment"
+    replacement: str  # "document" or "energy-efficient"
+
+
+@lru_cache(maxsize=1)
+def load_lexicon() -> frozenset[str]:
+    """Load the packaged English lexicon (cached for the process lifetime)."""
+    data = resources.files("pdf2md").joinpath(*LEXICON_RESOURCE).read_bytes()
+    return frozenset(gzip.decompress(data).decode("utf-8").split())
+
+
+def build_vocabulary(content: str) -> Counter[str]:
+    """
+    Count the lowercase words and hyphenated compounds of a document.
+
+    Broken words are excluded, so "docu- ment" does not count as "docu".
+    """
+    return Counter(
+        word.lower() for word in WORD_PATTERN.findall(BROKEN_WORD_PATTERN.sub(" ", content))
+    )
+
+
+def repair_hyphenation(
+    content: str,
+    lexicon: frozenset[str] | None = None,
+) -> tuple[str, list[HyphenFix]]:
+    """
+    Rejoin words broken by hyphenation at line ends, keeping real compounds.
+
+    Suspended hyphens ("pre- and post-") and fenced code blocks are left
+    untouched.
+
+    Args:
+        content: Markdown content
+        lexicon: Set of known lowercase words (default: the packaged lexicon)
+
+    Returns:
+        Tuple of (content with hyphenation repaired, decisions made)
+    """
+    if "-" not in content or not BROKEN_WORD_PATTERN.search(content):
+        return content, []
+
+    if lexicon is None:
+        lexicon = load_lexicon()
+    vocabulary = build_vocabulary(content)
+    fixes: list[HyphenFix] = []
+
+    def decide(match: re.Match) -> str:
+        first, second = match.group(1), match.group(2)
+        lower_first = first.lower()
+        joined = lower_first + second
+        compound = f"{lower_first}-{second}"
+
+        joined_count, compound_count = vocabulary[joined], vocabulary[compound]
+        if joined_count or compound_count:
+            keep_hyphen = compound_count > joined_count
+        elif joined in lexicon:
+            keep_hyphen = False
+        elif second in SUSPENDED_HYPHEN_WORDS:
+            return match.group(0)
+        else:
+            keep_hyphen = lower_first in lexicon and second in lexicon
+
+        replacement = f"{first}-{second}" if keep_hyphen else f"{first}{second}"
+        fixes.append(HyphenFix(original=match.group(0), replacement=replacement))
+        return replacement
+
+    parts = re.split(r"(^```.*?^```[^\n]*$)", content, flags=re.MULTILINE | re.DOTALL)
+    for i in range(0, len(parts), 2):
+        parts[i] = BROKEN_WORD_PATTERN.sub(decide, parts[i])
+
+    if fixes:
+        logger.info("Repaired %d hyphenated line breaks", len(fixes))
+    return "".join(parts), fixes
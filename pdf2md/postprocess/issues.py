@@ -0,0 +1,273 @@
+"""Deterministic issue report for the cleanup agent.
+
+The agent otherwise starts cold and has to read and grep the whole file to
+find what the passes left behind. find_issues scans the post-processed
+markdown once and lists candidates, with 1-based line numbers:
+
+- lettered/Roman headers the section pass did not convert, and headers that
+  look like sentences
+- every figure with its image, caption and first reference, flagging figures
+  whose caption is missing or detached or whose image sits outside the
+  section that first references it
+- short lines just above captions (likely OCR text from the figure)
+- paragraphs that end mid-sentence and continue after a blank line
+
+format_issue_report renders the list compactly for the agent prompt. Every
+entry is a candidate, not a verdict: the checks reuse the heuristics of the
+passes, minus the context that made the passes reject the line.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from pdf2md.postprocess.figures import (
+    CAPTION_LINE_PATTERN,
+    FIGURE_REFERENCE_PATTERN,
+    IMAGE_EMBED_PATTERN,
+    IMAGE_PLACEHOLDER,
+)
+from pdf2md.postprocess.guards import is_oversized
+from pdf2md.postprocess.paragraphs import _find_continuation, _is_paragraph, _should_merge
+from pdf2md.postprocess.sections import (
+    MIXED_HEADER_PATTERN,
+    SEQUENCE_HEADER_PATTERN,
+    _is_sequence_title,
+    _split_run_in_title,
+)
+
+ISSUE_KINDS = ("lettered_header", "figure", "ocr_fragment", "split_paragraph")
+
+ISSUE_HEADINGS = {
+    "lettered_header": "Section headers",
+    "figure": "Figures",
+    "ocr_fragment": "Short lines above captions (possible OCR text)",
+    "split_paragraph": "Paragraphs ending mid-sentence",
+}
+
+# Lines up to this long directly above a caption are reported as fragments
+MAX_FRAGMENT_CHARS = 40
+
+# Non-blank lines above a caption searched for fragments
+FRAGMENT_LOOKBACK = 6
+
+# A caption more than this many lines below its image is reported as detached
+MAX_CAPTION_DISTANCE = 3
+
+# Entries listed per kind before the rest are summarized as a count
+MAX_ISSUES_PER_KIND = 40
+
+REFERENCES_HEADING_PATTERN = re.compile(r"^#*\s*(?:References|Bibliography)\s*$", re.IGNORECASE)
+
+# Structural lines that are never OCR fragments
+STRUCTURAL_LINE_PATTERN = re.compile(r"^(?:#|!\[|\||<|```|[-*+•]\s|\d+[.)]\s)")
+
+
+@dataclass
+class Issue:
+    """A candidate problem for the agent to check."""
+
+    kind: str  # One of ISSUE_KINDS
+    line: int  # 1-based
+    detail: str
+
+
+@dataclass
+class _Figure:
+    image: int | None = None
+    caption: int | None = None
+    reference: int | None = None
+    image_section: int = 0
+    reference_section: int = 0
+
+
+def _excerpt(text: str, limit: int = 50) -> str:
+    text = text.strip()
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _header_issue(stripped: str, line: int) -> Issue | None:
+    match = SEQUENCE_HEADER_PATTERN.match(stripped) or MIXED_HEADER_PATTERN.match(stripped)
+    if not match:
+        return None
+    is_header = match.group("hashes") is not None
+    title, body = _split_run_in_title(match.group("rest"))
+    if is_header:
+        if not _is_sequence_title(match.group("rest").strip().rstrip(".:")):
+            detail = f'header looks like a sentence: "{_excerpt(stripped)}"'
+            return Issue("lettered_header", line, detail)
+        return None
+    if _is_sequence_title(title):
+        form = "run-in title" if body is not None else "not a header"
+        return Issue("lettered_header", line, f'"{_excerpt(stripped)}" ({form})')
+    return None
+
+
+def _figure_issues(figures: dict[int, _Figure], headings: list[str]) -> list[Issue]:
+    issues = []
+    for number in sorted(figures):
+        figure = figures[number]
+        parts = []
+        problems = []
+        if figure.image is not None:
+            parts.append(f"image L{figure.image}")
+        else:
+            problems.append("no image")
+        if figure.caption is not None:
+            parts.append(f"caption L{figure.caption}")
+            if figure.image is not None and not (
+                0 < figure.caption - figure.image <= MAX_CAPTION_DISTANCE
+            ):
+                problems.append("caption not below image")
+        else:
+            problems.append("no caption")
+        if figure.reference is not None:
+            section = headings[figure.reference_section]
+            parts.append(f'first reference L{figure.reference} (in "{_excerpt(section, 40)}")')
+            if figure.image is not None and figure.image_section != figure.reference_section:
+                problems.append("image outside the first referencing section")
+        else:
+            problems.append("never referenced")
+        detail = f"Figure {number}: " + ", ".join(parts)
+        if problems:
+            detail += " - " + "; ".join(problems)
+        line = next(n for n in (figure.image, figure.caption, figure.reference) if n is not None)
+        issues.append(Issue("figure", line, detail))
+    return issues
+
+
+def _fragment_issues(lines: Sequence[str], caption_line: int) -> list[Issue]:
+    """Short non-structural lines above a caption and its image (0-based caption_line)."""
+    issues = []
+    seen = 0
+    for j in range(caption_line - 1, -1, -1):
+        stripped = lines[j].strip()
+        # OCR text of a figure ends up above its embedded image
+        if not stripped or IMAGE_EMBED_PATTERN.match(stripped) or stripped == IMAGE_PLACEHOLDER:
+            continue
+        seen += 1
+        if (
+            seen > FRAGMENT_LOOKBACK
+            or len(stripped) > MAX_FRAGMENT_CHARS
+            or STRUCTURAL_LINE_PATTERN.match(stripped)
+            or CAPTION_LINE_PATTERN.match(stripped)
+        ):
+            break
+        detail = f'"{_excerpt(stripped)}" above caption L{caption_line + 1}'
+        issues.append(Issue("ocr_fragment", j + 1, detail))
+    return issues[::-1]
+
+
+def find_issues(content: str, kinds: Iterable[str] = ISSUE_KINDS) -> list[Issue]:
+    """
+    Find candidate problems left after post-processing.
+
+    Args:
+        content: Post-processed markdown
+        kinds: Kinds of issues to report (see ISSUE_KINDS)
+
+    Returns:
+        Issues ordered by kind, then line
+    """
+    kinds = set(kinds)
+    lines = content.split("\n")
+    found: dict[str, list[Issue]] = {kind: [] for kind in ISSUE_KINDS}
+    figures: dict[int, _Figure] = {}
+    headings = ["(before the first heading)"]
+    in_code = False
+    in_references = False
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or not stripped or is_oversized(stripped, "issues"):
+            continue
+        if REFERENCES_HEADING_PATTERN.match(stripped):
+            # Author initials in reference entries look like lettered sections
+            in_references = True
+        if stripped.startswith("#"):
+            headings.append(stripped.lstrip("#").strip())
+        section = len(headings) - 1
+
+        if not in_references:
+            header_issue = _header_issue(stripped, i + 1)
+            if header_issue is not None:
+                found["lettered_header"].append(header_issue)
+
+        image_match = IMAGE_EMBED_PATTERN.match(stripped)
+        caption_match = CAPTION_LINE_PATTERN.match(stripped)
+        if image_match:
+            figure = figures.setdefault(int(image_match.group(1)), _Figure())
+            if figure.image is None:
+                figure.image, figure.image_section = i + 1, section
+        elif caption_match:
+            figure = figures.setdefault(int(caption_match.group(1)), _Figure())
+            if figure.caption is None:
+                figure.caption = i + 1
+            found["ocr_fragment"].extend(_fragment_issues(lines, i))
+        else:
+            for ref in FIGURE_REFERENCE_PATTERN.finditer(stripped):
+                figure = figures.setdefault(int(ref.group(1)), _Figure())
+                if figure.reference is None:
+                    figure.reference, figure.reference_section = i + 1, section
+
+        if (
+            not in_references
+            and i + 1 < len(lines)
+            and not lines[i + 1].strip()
+            and _is_paragraph(stripped)
+        ):
+            j = _find_continuation(lines, i + 1)
+            if j is not None and _should_merge(stripped, lines[j].strip()):
+                found["split_paragraph"].append(
+                    Issue(
+                        "split_paragraph",
+                        i + 1,
+                        f'"…{stripped[-30:]}" continues at L{j + 1}: "{_excerpt(lines[j], 30)}"',
+                    )
+                )
+
+    found["figure"] = _figure_issues(figures, headings)
+    return [issue for kind in ISSUE_KINDS if kind in kinds for issue in found[kind]]
+
+
+def format_issue_report(issues: Sequence[Issue], line_offset: int = 0) -> str:
+    """
+    Render issues as a prompt section.
+
+    Args:
+        issues: Issues from find_issues
+        line_offset: Subtracted from every line number, so that numbers are
+            relative to an excerpt starting at line line_offset + 1
+
+    Returns:
+        Markdown section, or "" if there are no issues
+    """
+    if not issues:
+        return ""
+    parts = [
+        "## Pre-computed Issues\n\n"
+        "A deterministic scan found these candidates (L = line number). Start with\n"
+        "them instead of reading the whole file, but check each one: some are false\n"
+        "positives, and other problems may exist.\n"
+    ]
+    for kind in ISSUE_KINDS:
+        entries = [issue for issue in issues if issue.kind == kind]
+        if not entries:
+            continue
+        parts.append(f"\n### {ISSUE_HEADINGS[kind]}\n\n")
+        for issue in entries[:MAX_ISSUES_PER_KIND]:
+            detail = issue.detail
+            if line_offset:
+                detail = re.sub(r"\bL(\d+)", lambda m: f"L{int(m.group(1)) - line_offset}", detail)
+            # Figure entries list their own line numbers
+            prefix = "" if kind == "figure" else f"L{issue.line - line_offset}: "
+            parts.append(f"- {prefix}{detail}\n")
+        if len(entries) > MAX_ISSUES_PER_KIND:
+            parts.append(f"- … and {len(entries) - MAX_ISSUES_PER_KIND} more\n")
+    parts.append("\n")
+    return "".join(parts)
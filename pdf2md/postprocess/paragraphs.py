@@ -0,0 +1,203 @@
+"""Paragraph repair: merge paragraphs split at page boundaries.
+
+Extraction inserts a ``<!-- page-break -->`` marker wherever Docling's
+provenance moves to a new page. A paragraph that runs over the page end is
+exported as two paragraphs around that marker, often with a figure or
+caption floated in between. This pass merges them back deterministically.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+
+from pdf2md.postprocess.sections import (
+    MIXED_HEADER_PATTERN,
+    NUMBERED_TITLE_PATTERN,
+    SEQUENCE_HEADER_PATTERN,
+)
+
+logger = logging.getLogger(__name__)
+
+# Marker inserted by extraction between content from different pages
+PAGE_BREAK_MARKER = "<!-- page-break -->"
+
+# Sentence-ending punctuation (optionally followed by closing quotes/brackets)
+TERMINAL_PUNCTUATION = re.compile(r"[.!?:;][\"'”’)\]]*$")
+
+# Words that cannot end a sentence: a paragraph ending with one continues
+CONTINUATION_WORDS = frozenset(
+    "a an and are as at be by for from in into is of on or that the to was were which with".split()
+)
+
+# Floats that may sit between the two halves of a split paragraph
+FLOAT_LINE = re.compile(
+    r"^(?:<!-- image -->|!\[[^\]]*\]\([^)]*\)|\*{0,2}(?:Fig(?:ure)?|Table)\.?\s*\d+\s*[.:])",
+    re.IGNORECASE,
+)
+
+# Maximum number of lines searched past a page break for the continuation
+MAX_LOOKAHEAD = 12
+
+
+@dataclass
+class ParagraphMerge:
+    """A paragraph rejoined across a page break."""
+
+    line: int  # 1-based line of the first half in the input
+    end: str  # last words of the first half
+    start: str  # first words of the continuation
+
+
+def merge_page_break_paragraphs(content: str) -> tuple[str, list[ParagraphMerge]]:
+    """
+    Merge paragraphs split at page breaks and remove the page-break markers.
+
+    A paragraph is merged with the next one when:
+    - It ends without terminal punctuation (``. ! ? : ;``)
+    - The continuation starts lowercase, with a digit, bracket or
+      parenthesis, or the first half ends with a comma or a word that
+      cannot end a sentence ("of", "the", "and", ...)
+    - Neither half is a header (including unconverted plain-text ones such
+      as "II. DESIGN"), list item, table row, code or HTML
+
+    Figures, captions and image placeholders between the two halves are
+    kept, after the merged paragraph.
+
+    Args:
+        content: Markdown content containing page-break markers
+
+    Returns:
+        Tuple of (content with merged paragraphs and markers removed, merges made)
+    """
+    if PAGE_BREAK_MARKER not in content:
+        return content, []
+
+    lines = content.split("\n")
+    result: list[str] = []
+    merges: list[ParagraphMerge] = []
+    # Output index and input line of the last paragraph line emitted
+    last_paragraph: tuple[int, int] | None = None
+    in_code = False
+    skip_until = -1
+    consumed: set[int] = set()
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if i in consumed:
+            continue
+
+        if stripped.startswith("```"):
+            in_code = not in_code
+            last_paragraph = None
+            result.append(line)
+            continue
+
+        if stripped == PAGE_BREAK_MARKER and not in_code:
+            # Drop the marker and the blank line following it
+            skip_until = i + 1
+            continuation = _find_continuation(lines, i + 1)
+            if last_paragraph is not None and continuation is not None:
+                out_idx, src_line = last_paragraph
+                first_half = result[out_idx]
+                second_half = lines[continuation].strip()
+                if _should_merge(first_half.rstrip(), second_half):
+                    result[out_idx] = f"{first_half.rstrip()} {second_half}"
+                    consumed.add(continuation)
+                    if continuation + 1 < len(lines) and not lines[continuation + 1].strip():
+                        consumed.add(continuation + 1)
+                    merge = ParagraphMerge(
+                        line=src_line + 1,
+                        end=" ".join(first_half.split()[-4:]),
+                        start=" ".join(second_half.split()[:4]),
+                    )
+                    merges.append(merge)
+                    logger.info(
+                        "Merged paragraph across page break at line %d: '...%s' + '%s...'",
+                        merge.line,
+                        merge.end,
+                        merge.start,
+                    )
+            continue
+
+        if i <= skip_until and not stripped:
+            continue
+
+        result.append(line)
+        if stripped and not in_code:
+            last_paragraph = (len(result) - 1, i) if _is_paragraph(stripped) else None
+
+    return "\n".join(result), merges
+
+
+def strip_page_break_markers(content: str) -> str:
+    """
+    Remove page-break markers without merging anything.
+
+    Used for raw extraction copies and when the page_breaks pass is
+    disabled, so the marker never reaches the output.
+
+    Args:
+        content: Markdown content that may contain page-break markers
+
+    Returns:
+        Content without the markers and the blank line following each one
+    """
+    if PAGE_BREAK_MARKER not in content:
+        return content
+
+    result: list[str] = []
+    in_code = False
+    skip_blank = False
+    for line in content.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code = not in_code
+        if stripped == PAGE_BREAK_MARKER and not in_code:
+            skip_blank = True
+            continue
+        if skip_blank and not stripped:
+            skip_blank = False
+            continue
+        skip_blank = False
+        result.append(line)
+    return "\n".join(result)
+
+
+def _find_continuation(lines: list[str], start: int) -> int | None:
+    """Find the first paragraph line after a page break, skipping floats."""
+    for j in range(start, min(len(lines), start + MAX_LOOKAHEAD)):
+        stripped = lines[j].strip()
+        if not stripped or stripped == PAGE_BREAK_MARKER or FLOAT_LINE.match(stripped):
+            continue
+        return j if _is_paragraph(stripped) else None
+    return None
+
+
+def _is_paragraph(stripped: str) -> bool:
+    """Whether a non-empty line is plain paragraph text."""
+    if stripped.startswith(("#", "|", "```", "<", ">", "$$", "![")):
+        return False
+    if re.match(r"^(?:[-*+•]\s|\d+[.)]\s)", stripped):
+        return False
+    if FLOAT_LINE.match(stripped):
+        return False
+    # Plain-text headers ("II. DESIGN", "A. Overview", "3.1 System Design") run
+    # before the section pass converts them, and must not absorb the next page
+    if any(
+        pattern.match(stripped)
+        for pattern in (SEQUENCE_HEADER_PATTERN, MIXED_HEADER_PATTERN, NUMBERED_TITLE_PATTERN)
+    ):
+        return False
+    return True
+
+
+def _should_merge(first: str, second: str) -> bool:
+    """Whether ``second`` continues the sentence left open by ``first``."""
+    if TERMINAL_PUNCTUATION.search(first):
+        return False
+    if second[0].islower() or second[0].isdigit() or second[0] in "([":
+        return True
+    last_word = first.split()[-1].lower() if first.split() else ""
+    return first.endswith(",") or last_word in CONTINUATION_WORDS
@@ -0,0 +1,162 @@
+"""Quality score of post-processed markdown.
+
+Many papers come out of process_markdown clean enough that the cleanup
+agent has nothing left to do. score_markdown counts measurable defects in
+one pass over the processed markdown, plus the figure check:
+
+- unlinked citations: bare ``[7]`` or ``[3, 5]`` in the body, and links to
+  ``#ref-N`` anchors that do not exist
+- unembedded figures: figure images without an embed (find_unembedded_figures)
+- header gaps: headings more than one level below the previous heading
+- split paragraphs: paragraphs ending mid-sentence and continuing after a
+  blank line (the check of postprocess.issues)
+- junk lines: short lines of mostly non-letters, and short lines above
+  captions, as left by OCR of figures
+
+The weighted sum of the counts is the score; `pdf2md convert --agent-auto`
+only runs the agent when it reaches a threshold.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from pdf2md.postprocess.figures import CAPTION_LINE_PATTERN, find_unembedded_figures
+from pdf2md.postprocess.guards import is_oversized
+from pdf2md.postprocess.issues import (
+    MAX_FRAGMENT_CHARS,
+    REFERENCES_HEADING_PATTERN,
+    STRUCTURAL_LINE_PATTERN,
+    find_issues,
+)
+
+DEFECT_KINDS = (
+    "unlinked_citations",
+    "unembedded_figures",
+    "header_gaps",
+    "split_paragraphs",
+    "junk_lines",
+)
+
+# Score per defect: roughly how much agent work one defect is worth
+DEFECT_WEIGHTS = {
+    "unlinked_citations": 0.5,
+    "unembedded_figures": 2.0,
+    "header_gaps": 1.0,
+    "split_paragraphs": 1.0,
+    "junk_lines": 0.5,
+}
+
+# Scores at or above this are worth an agent run
+DEFAULT_AGENT_THRESHOLD = 5.0
+
+# Share of letters below which a short line counts as junk
+MIN_JUNK_LETTER_RATIO = 0.5
+
+# Bare citations: [7], [3, 5], [3-5]; not [[7]](#ref-7), links or footnote marks
+BARE_CITATION_PATTERN = re.compile(r"(?<![\[\]\w!])\[\d{1,3}(?:\s*[,–-]\s*\d{1,3})*\](?![(\]])")
+
+CITATION_LINK_PATTERN = re.compile(r"\]\(#ref-(\d+)\)")
+
+REFERENCE_ANCHOR_PATTERN = re.compile(r'id="ref-(\d+)"')
+
+HEADING_LEVEL_PATTERN = re.compile(r"^(#{1,6})\s")
+
+
+@dataclass
+class QualityScore:
+    """Defect counts of a document and their weighted score."""
+
+    defects: dict[str, int] = field(default_factory=lambda: dict.fromkeys(DEFECT_KINDS, 0))
+    lines: int = 0
+
+    @property
+    def score(self) -> float:
+        """Weighted sum of the defect counts."""
+        return sum(DEFECT_WEIGHTS[kind] * count for kind, count in self.defects.items())
+
+    def needs_agent(self, threshold: float = DEFAULT_AGENT_THRESHOLD) -> bool:
+        """Whether the score reaches the threshold for an agent run."""
+        return self.score >= threshold
+
+    def to_dict(self) -> dict:
+        """JSON-ready dict with the score, defect counts and line count."""
+        return {"score": round(self.score, 2), "lines": self.lines, **self.defects}
+
+    def describe(self) -> str:
+        """One-line summary for the console."""
+        counts = ", ".join(
+            f"{count} {kind.replace('_', ' ')}" for kind, count in self.defects.items()
+        )
+        return f"score {self.score:g} ({counts})"
+
+
+def _is_junk_line(stripped: str) -> bool:
+    if len(stripped) > MAX_FRAGMENT_CHARS or STRUCTURAL_LINE_PATTERN.match(stripped):
+        return False
+    if stripped.startswith("$") or CAPTION_LINE_PATTERN.match(stripped):
+        return False
+    letters = sum(c.isalpha() for c in stripped)
+    return letters < MIN_JUNK_LETTER_RATIO * len(stripped.replace(" ", ""))
+
+
+def score_markdown(content: str, images: Sequence[str] = ()) -> QualityScore:
+    """
+    Count the defects left in post-processed markdown.
+
+    Args:
+        content: Post-processed markdown
+        images: Image filenames of the document (for unembedded figures)
+
+    Returns:
+        QualityScore of the document
+    """
+    lines = content.split("\n")
+    result = QualityScore(lines=len(lines))
+    defects = result.defects
+    anchors = set(REFERENCE_ANCHOR_PATTERN.findall(content))
+    junk: set[int] = set()
+    previous_level = None
+    in_code = False
+    in_references = False
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or not stripped or is_oversized(stripped, "quality"):
+            continue
+        if REFERENCES_HEADING_PATTERN.match(stripped):
+            in_references = True
+
+        heading = HEADING_LEVEL_PATTERN.match(stripped)
+        if heading:
+            level = len(heading.group(1))
+            if previous_level is not None and level > previous_level + 1:
+                defects["header_gaps"] += 1
+            previous_level = level
+            continue
+
+        if in_references:
+            continue
+        defects["unlinked_citations"] += len(BARE_CITATION_PATTERN.findall(stripped))
+        if anchors:
+            # Without any anchors the bibliography was not recognized at all
+            defects["unlinked_citations"] += sum(
+                number not in anchors for number in CITATION_LINK_PATTERN.findall(stripped)
+            )
+        if _is_junk_line(stripped):
+            junk.add(i + 1)
+
+    for issue in find_issues(content, ("ocr_fragment", "split_paragraph")):
+        if issue.kind == "ocr_fragment":
+            junk.add(issue.line)
+        else:
+            defects["split_paragraphs"] += 1
+    defects["junk_lines"] = len(junk)
+    if images:
+        defects["unembedded_figures"] = len(find_unembedded_figures(content, list(images)))
+    return result
@@ -0,0 +1,355 @@
+"""Registry of named post-processing passes.
+
+Every deterministic pass is registered under a name with the passes it must
+run after. process_markdown runs them in dependency order (registration
+order breaks ties), so a single pass can be disabled for a venue that breaks
+it without touching the others. Each run records per-pass elapsed time and
+the number of lines the pass changed.
+
+Passes can be disabled from the CLI (``--disable NAME``) or a TOML config,
+and re-enabled with ``--enable NAME`` or an ``enable`` list, which wins over
+any ``disable``:
+
+    [postprocess]
+    disable = ["bullet_subsections", "figure_relocation"]
+    enable = ["figure_relocation"]
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from pdf2md.postprocess.bibliography import process_bibliography
+from pdf2md.postprocess.citations import process_citations
+from pdf2md.postprocess.cleanup import cleanup_text
+from pdf2md.postprocess.figures import process_figures, relocate_figures
+from pdf2md.postprocess.hyphenation import repair_hyphenation
+from pdf2md.postprocess.paragraphs import merge_page_break_paragraphs, strip_page_break_markers
+from pdf2md.postprocess.rules import RulePack, apply_rule_pack
+from pdf2md.postprocess.sections import (
+    _fix_abstract_header,
+    _fix_hierarchical_sections,
+    _fix_index_terms_header,
+    _fix_numbered_bullet_subsections,
+    _fix_section_hierarchy,
+)
+
+
+@dataclass
+class PassContext:
+    """Per-document inputs shared by all passes."""
+
+    images: list[str] = field(default_factory=list)
+    normalize_quotes: bool = False
+    rule_packs: list[RulePack] = field(default_factory=list)
+    # What the running pass did, beyond its change count (moved to its PassMetrics)
+    notes: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class Pass:
+    """A named post-processing pass."""
+
+    name: str
+    func: Callable[[str, PassContext], str]
+    after: tuple[str, ...] = ()
+    description: str = ""
+    # Runs in place of the pass when it is disabled, to remove markup only it handles
+    fallback: Callable[[str, PassContext], str] | None = None
+
+
+@dataclass
+class PassMetrics:
+    """Elapsed time, change count and notes of one pass on one document."""
+
+    name: str
+    seconds: float
+    changed_lines: int
+    notes: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """JSON-ready dict with the timing, change count and any notes."""
+        result = {"seconds": self.seconds, "changed_lines": self.changed_lines}
+        if self.notes:
+            result["notes"] = self.notes
+        return result
+
+
+PASSES: dict[str, Pass] = {}
+
+
+def register_pass(
+    name: str,
+    *,
+    after: Iterable[str] = (),
+    description: str = "",
+    fallback: Callable[[str, PassContext], str] | None = None,
+) -> Callable[[Callable[[str, PassContext], str]], Callable[[str, PassContext], str]]:
+    """
+    Register a pass function under a name.
+
+    Args:
+        name: Unique pass name (used by --disable and config files)
+        after: Passes this one must run after, when they are enabled
+        description: One-line summary shown by ``pdf2md passes``
+        fallback: Cleanup run instead of the pass when it is disabled (e.g. to
+            remove internal markers that only this pass consumes)
+    """
+
+    def decorator(func: Callable[[str, PassContext], str]) -> Callable[[str, PassContext], str]:
+        if name in PASSES:
+            raise ValueError(f"Pass already registered: {name}")
+        PASSES[name] = Pass(name, func, tuple(after), description, fallback)
+        return func
+
+    return decorator
+
+
+def resolve_passes(disabled: Iterable[str] = ()) -> list[Pass]:
+    """
+    Return the enabled passes in dependency order.
+
+    A disabled pass with a fallback is replaced by the fallback, named
+    ``<name>:fallback``, in the same position.
+
+    Args:
+        disabled: Names of passes to skip
+
+    Returns:
+        Passes in execution order
+
+    Raises:
+        ValueError: If a name is unknown or the dependencies form a cycle
+    """
+    disabled = set(disabled)
+    unknown = disabled - PASSES.keys()
+    if unknown:
+        raise ValueError(
+            f"Unknown pass(es): {', '.join(sorted(unknown))}. Available: {', '.join(PASSES)}"
+        )
+
+    enabled = [p for p in PASSES.values() if p.name not in disabled or p.fallback is not None]
+    names = {p.name for p in enabled}
+    pending = {p.name: {dep for dep in p.after if dep in names} for p in enabled}
+    ordered: list[Pass] = []
+
+    while pending:
+        # Registration order breaks ties, so the default order is stable
+        ready = next((p for p in enabled if p.name in pending and not pending[p.name]), None)
+        if ready is None:
+            raise ValueError(f"Pass dependency cycle among: {', '.join(pending)}")
+        ordered.append(ready)
+        del pending[ready.name]
+        for deps in pending.values():
+            deps.discard(ready.name)
+
+    return [
+        replace(p, name=f"{p.name}:fallback", func=p.fallback) if p.name in disabled else p
+        for p in ordered
+    ]
+
+
+def count_changed_lines(before: str, after: str) -> int:
+    """
+    Number of lines a pass changed, from a multiset diff of the two versions.
+
+    An edited line counts once (one removed, one added); moved lines do not count.
+    """
+    if before == after:
+        return 0
+    old, new = Counter(before.split("\n")), Counter(after.split("\n"))
+    return max(sum((old - new).values()), sum((new - old).values()))
+
+
+def run_passes(
+    content: str,
+    context: PassContext | None = None,
+    *,
+    disabled: Iterable[str] = (),
+) -> tuple[str, list[PassMetrics]]:
+    """
+    Run the enabled passes over a document, measuring each one.
+
+    Args:
+        content: Markdown content
+        context: Per-document inputs (images, options)
+        disabled: Names of passes to skip
+
+    Returns:
+        Tuple of (processed content, metrics per pass in execution order)
+    """
+    context = context or PassContext()
+    metrics: list[PassMetrics] = []
+    for pass_ in resolve_passes(disabled):
+        context.notes = []
+        start = time.perf_counter()
+        result = pass_.func(content, context)
+        elapsed = time.perf_counter() - start
+        changed = count_changed_lines(content, result)
+        metrics.append(PassMetrics(pass_.name, elapsed, changed, notes=context.notes))
+        content = result
+    return content, metrics
+
+
+def disabled_passes(
+    disable: Iterable[str] = (),
+    enable: Iterable[str] = (),
+    config: Path | None = None,
+) -> tuple[str, ...]:
+    """
+    Combine pass toggles from the CLI and a config file.
+
+    A pass is disabled if the CLI or the config disables it, unless the CLI
+    or the config enables it.
+
+    Args:
+        disable: Passes disabled on the command line
+        enable: Passes enabled on the command line
+        config: TOML file with a ``[postprocess]`` table (``disable`` and ``enable`` lists)
+
+    Returns:
+        Sorted names of the passes to disable
+
+    Raises:
+        ValueError: If a name is unknown
+    """
+    disable, enable = set(disable), set(enable)
+    if config is not None:
+        table = _read_pass_config(config)
+        disable.update(table.get("disable", []))
+        enable.update(table.get("enable", []))
+    unknown = enable - PASSES.keys()
+    if unknown:
+        raise ValueError(
+            f"Unknown pass(es): {', '.join(sorted(unknown))}. Available: {', '.join(PASSES)}"
+        )
+    disabled = tuple(sorted(disable - enable))
+    resolve_passes(disabled)
+    return disabled
+
+
+def _read_pass_config(path: Path) -> dict:
+    try:
+        import tomllib
+    except ImportError:  # Python 3.10
+        import tomli as tomllib
+
+    with path.open("rb") as f:
+        config = tomllib.load(f)
+    return config.get("postprocess", {})
+
+
+# Built-in passes, in the default order
+
+
+@register_pass("rules", description="User rule packs (--rules), before the built-in passes")
+def _rules(content: str, context: PassContext) -> str:
+    for pack in context.rule_packs:
+        content = apply_rule_pack(content, pack)[0]
+    return content
+
+
+@register_pass(
+    "page_breaks",
+    after=["rules"],
+    description="Merge paragraphs split at page breaks",
+    fallback=lambda content, context: strip_page_break_markers(content),
+)
+def _page_breaks(content: str, context: PassContext) -> str:
+    return merge_page_break_paragraphs(content)[0]
+
+
+@register_pass("hyphenation", after=["page_breaks"], description="Repair line-break hyphenation")
+def _hyphenation(content: str, context: PassContext) -> str:
+    return repair_hyphenation(content)[0]
+
+
+@register_pass("abstract_header", description="Split 'Abstract -text' into a header")
+def _abstract_header(content: str, context: PassContext) -> str:
+    return _fix_abstract_header(content)
+
+
+@register_pass("index_terms_header", description="Split 'Index Terms -text' into a header")
+def _index_terms_header(content: str, context: PassContext) -> str:
+    return _fix_index_terms_header(content)
+
+
+@register_pass(
+    "numbered_sections",
+    after=["hyphenation"],
+    description="Headers for numbered sections (3.1, 3.1.1)",
+)
+def _numbered_sections(content: str, context: PassContext) -> str:
+    return _fix_hierarchical_sections(content)
+
+
+@register_pass(
+    "bullet_subsections",
+    after=["numbered_sections"],
+    description="Headers for '- 1) Title:' bullets",
+)
+def _bullet_subsections(content: str, context: PassContext) -> str:
+    return _fix_numbered_bullet_subsections(content)
+
+
+@register_pass(
+    "section_hierarchy",
+    after=["numbered_sections", "bullet_subsections"],
+    description="Lettered, Roman and mixed section sequences",
+)
+def _section_hierarchy(content: str, context: PassContext) -> str:
+    return _fix_section_hierarchy(content)
+
+
+@register_pass(
+    "citations",
+    after=["section_hierarchy"],
+    description="Link [N] citations and expand ranges",
+)
+def _citations(content: str, context: PassContext) -> str:
+    return process_citations(content)
+
+
+@register_pass(
+    "figures",
+    after=["citations"],
+    description="Embed figure, table and algorithm images above their captions",
+)
+def _figures(content: str, context: PassContext) -> str:
+    return process_figures(content, context.images)
+
+
+@register_pass(
+    "figure_relocation",
+    after=["figures"],
+    description="Move figures to their first referencing section",
+)
+def _figure_relocation(content: str, context: PassContext) -> str:
+    content, moves = relocate_figures(content)
+    context.notes.extend(
+        f"Moved Figure {move.figure} (line {move.from_line}) to section '{move.section}'"
+        for move in moves
+    )
+    return content
+
+
+@register_pass(
+    "bibliography",
+    after=["citations"],
+    description="Blank lines between reference entries",
+)
+def _bibliography(content: str, context: PassContext) -> str:
+    return process_bibliography(content)
+
+
+@register_pass(
+    "cleanup",
+    after=["bibliography", "figure_relocation"],
+    description="Character normalization and whitespace",
+)
+def _cleanup(content: str, context: PassContext) -> str:
+    return cleanup_text(content, normalize_quotes=context.normalize_quotes)
@@ -0,0 +1,311 @@
+"""User-defined rule packs for venue-specific fixes.
+
+A rule pack is a TOML or YAML file of regex rules, e.g. for ACM copyright
+blocks or arXiv watermarks:
+
+    [[rules]]
+    name = "arxiv-watermark"
+    pattern = '^arXiv:\\d{4}\\.\\d{4,5}v\\d+ \\[[\\w.-]+\\] \\d{1,2} \\w{3} \\d{4}$'
+    replacement = ""
+
+    [[rules]]
+    name = "acm-copyright"
+    pattern = '(?s)^Permission to make digital or hard copies.*?\\n\\n'
+    replacement = ""
+    scope = "document"
+
+Line rules (the default scope) are compiled into one alternation, so a pack
+of N rules costs one scan per line instead of N: the alternation locates a
+match and the first rule (in pack order) that matches there replaces it.
+Capturing groups are rewritten as non-capturing in the alternation, which
+keeps the regex engine's first-character skip; case-insensitive rules get a
+second alternation of their own for the same reason. Rules in one scan see
+the line as it was before the scan, not each other's output. Use
+scope = "document" for rules that must see earlier replacements or span
+lines; those run one after another over the whole document (MULTILINE).
+
+Compiled packs are cached by path and modification time, so a batch loads
+each pack once per process.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from pdf2md.postprocess.guards import is_oversized
+
+logger = logging.getLogger(__name__)
+
+RULE_SCOPES = ("line", "document")
+
+# Group references only work in the rule's own pattern, so such rules
+# (backreferences, named references, conditionals) are matched on their own
+GROUP_REFERENCE_PATTERN = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+class YamlNotInstalledError(ImportError):
+    """Raised when a YAML rule pack is loaded without PyYAML."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            "PyYAML is not installed. Install with: pip install pdf2md[rules] "
+            "(or write the rule pack in TOML)"
+        )
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A regex replacement applied to each line or to the whole document."""
+
+    name: str
+    pattern: str
+    replacement: str = ""
+    scope: str = "line"
+    ignore_case: bool = False
+
+    def compile(self) -> re.Pattern[str]:
+        flags = re.IGNORECASE if self.ignore_case else 0
+        if self.scope == "document":
+            flags |= re.MULTILINE
+        return re.compile(self.pattern, flags)
+
+
+@dataclass
+class LineScanner:
+    """One alternation over several line rules."""
+
+    pattern: re.Pattern[str]
+    rules: list[tuple[Rule, re.Pattern[str]]]
+
+
+@dataclass
+class RulePack:
+    """Compiled rules of one pack file."""
+
+    name: str
+    rules: list[Rule]
+    scanners: list[LineScanner] = field(default_factory=list)
+    fallback_rules: list[tuple[Rule, re.Pattern[str]]] = field(default_factory=list)
+    document_rules: list[tuple[Rule, re.Pattern[str]]] = field(default_factory=list)
+
+    @property
+    def has_line_rules(self) -> bool:
+        return bool(self.scanners or self.fallback_rules)
+
+
+def _without_captures(pattern: str) -> str:
+    """Rewrite capturing groups as non-capturing ones (the scanner only locates matches)."""
+    out: list[str] = []
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            out.append(pattern[i : i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            # A "]" right after "[" or "[^" is a literal
+            j = i + 1 + pattern.startswith("^", i + 1)
+            j += pattern.startswith("]", j)
+            out.append(pattern[i:j])
+            i = j
+            in_class = True
+            continue
+        elif pattern.startswith("(?P<", i):
+            out.append("(?:")
+            i = pattern.index(">", i) + 1
+            continue
+        elif char == "(" and not pattern.startswith("(?", i):
+            out.append("(?:")
+            i += 1
+            continue
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def _build_scanner(rules: list[tuple[Rule, re.Pattern[str]]], flags: int) -> LineScanner | None:
+    alternation = "|".join(f"(?:{_without_captures(rule.pattern)})" for rule, _ in rules)
+    try:
+        return LineScanner(re.compile(alternation, flags), rules)
+    except re.error as e:
+        logger.debug("Cannot combine line rules, matching one at a time (%s)", e)
+        return None
+
+
+def compile_rule_pack(rules: list[Rule], name: str = "rules") -> RulePack:
+    """
+    Compile rules into a pack with combined scanners for the line rules.
+
+    Line rules that refer to their own groups in the pattern, or a set whose
+    combined pattern does not compile (e.g. an inline global flag), are
+    matched one rule at a time instead.
+
+    Args:
+        rules: Rules in application order
+        name: Pack name for log messages
+
+    Returns:
+        Compiled RulePack
+
+    Raises:
+        ValueError: If a rule has an unknown scope or an invalid pattern
+    """
+    pack = RulePack(name, rules)
+    combinable: dict[bool, list[tuple[Rule, re.Pattern[str]]]] = {False: [], True: []}
+
+    for rule in rules:
+        if rule.scope not in RULE_SCOPES:
+            raise ValueError(f"Rule {rule.name!r}: scope must be one of {RULE_SCOPES}")
+        try:
+            regex = rule.compile()
+        except re.error as e:
+            raise ValueError(f"Rule {rule.name!r}: invalid pattern: {e}") from e
+
+        if rule.scope == "document":
+            pack.document_rules.append((rule, regex))
+        elif GROUP_REFERENCE_PATTERN.search(rule.pattern):
+            pack.fallback_rules.append((rule, regex))
+        else:
+            combinable[rule.ignore_case].append((rule, regex))
+
+    for ignore_case, group in combinable.items():
+        if not group:
+            continue
+        scanner = _build_scanner(group, re.IGNORECASE if ignore_case else 0)
+        if scanner is None:
+            pack.fallback_rules.extend(group)
+        else:
+            pack.scanners.append(scanner)
+
+    return pack
+
+
+def _scan(line: str, scanner: LineScanner) -> str:
+    def replace(match: re.Match[str]) -> str:
+        # The first rule matching here is the alternative the scanner took;
+        # re-matching with its own pattern makes its group numbers apply
+        for rule, regex in scanner.rules:
+            own = regex.match(line, match.start())
+            if own is not None:
+                return own.expand(rule.replacement)
+        return match.group()
+
+    return scanner.pattern.sub(replace, line)
+
+
+def apply_line_rules(line: str, pack: RulePack) -> str:
+    """
+    Apply a pack's line rules to one line.
+
+    Args:
+        line: Line without its trailing newline
+        pack: Compiled rule pack
+
+    Returns:
+        The line after replacements (may contain newlines or be empty)
+    """
+    if is_oversized(line, f"rule pack {pack.name}"):
+        return line
+    for scanner in pack.scanners:
+        line = _scan(line, scanner)
+    for rule, regex in pack.fallback_rules:
+        line = regex.sub(rule.replacement, line)
+    return line
+
+
+def apply_rule_pack(content: str, pack: RulePack) -> tuple[str, int]:
+    """
+    Apply a rule pack to a document.
+
+    Args:
+        content: Markdown content
+        pack: Compiled rule pack
+
+    Returns:
+        Tuple of (processed content, number of lines or matches changed)
+    """
+    changed = 0
+    if pack.has_line_rules:
+        lines = content.split("\n")
+        for i, line in enumerate(lines):
+            new_line = apply_line_rules(line, pack)
+            if new_line != line:
+                lines[i] = new_line
+                changed += 1
+        content = "\n".join(lines)
+
+    for rule, regex in pack.document_rules:
+        content, count = regex.subn(rule.replacement, content)
+        changed += count
+    return content, changed
+
+
+def _parse_rules(data: object, path: Path) -> list[Rule]:
+    entries = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a top-level 'rules' list")
+
+    rules = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or "pattern" not in entry:
+            raise ValueError(f"{path}: rule {i} needs a 'pattern'")
+        unknown = entry.keys() - {"name", "pattern", "replacement", "scope", "ignore_case"}
+        if unknown:
+            raise ValueError(f"{path}: rule {i} has unknown keys: {', '.join(sorted(unknown))}")
+        rules.append(
+            Rule(
+                name=str(entry.get("name", f"rule{i}")),
+                pattern=str(entry["pattern"]),
+                replacement=str(entry.get("replacement") or ""),
+                scope=str(entry.get("scope", "line")),
+                ignore_case=bool(entry.get("ignore_case", False)),
+            )
+        )
+    return rules
+
+
+@lru_cache(maxsize=32)
+def _load_rule_pack(path: Path, mtime_ns: int) -> RulePack:
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise YamlNotInstalledError() from e
+        data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    else:
+        try:
+            import tomllib
+        except ImportError:  # Python 3.10
+            import tomli as tomllib
+        with path.open("rb") as f:
+            data = tomllib.load(f)
+
+    pack = compile_rule_pack(_parse_rules(data, path), name=path.stem)
+    logger.debug("Loaded rule pack %s (%d rules)", path, len(pack.rules))
+    return pack
+
+
+def load_rule_pack(path: Path) -> RulePack:
+    """
+    Load and compile a rule pack from a TOML or YAML file.
+
+    Args:
+        path: .toml, .yaml or .yml file with a top-level ``rules`` list
+
+    Returns:
+        Compiled RulePack (cached until the file changes)
+
+    Raises:
+        YamlNotInstalledError: If a YAML pack is given and PyYAML is not installed
+        ValueError: If the file does not describe valid rules
+    """
+    path = path.resolve()
+    return _load_rule_pack(path, path.stat().st_mtime_ns)
@@ -6,19 +6,70 @@ Handles hierarchical section numbering in academic papers:
 - Subsubsection: #### 1.1.1 Details
 - Paragraph: ##### 1.1.1.1 Fine details
 
-Note: Lettered sections (A., B., etc.) are handled by the Claude agent
-in cleanup.py since they require context to distinguish from sentences
-starting with letters (e.g., "A. We conducted..." vs "A. Background").
+Lettered (A., B.), Roman (I., II.) and mixed (1.A) sections cannot be told
+apart from sentences by a single-line regex ("A. We conducted..." vs
+"A. Background"). They are resolved by the section hierarchy engine
+(_fix_section_hierarchy), which uses whole-document evidence: a candidate is
+only accepted as part of a consistent sequence (A→B→C within the same parent
+section, I→II→III across the document) or when Docling already marked it as
+a heading.
 """
 
 from __future__ import annotations
 
 import re
+from itertools import islice
 
+from pdf2md.postprocess.guards import is_oversized
 
 # Maximum title length for a section header (longer text is likely a paragraph)
 MAX_TITLE_LENGTH = 120
 
+# Sequence headers are shorter than dotted-number titles (IEEE/ACM/LNCS style guides)
+MAX_SEQUENCE_TITLE_LENGTH = 80
+MAX_SEQUENCE_TITLE_WORDS = 12
+
+# Candidate sequence header: "I. INTRODUCTION", "B) Metadata", "## C. Data placement"
+SEQUENCE_HEADER_PATTERN = re.compile(
+    r"^(?P<hashes>#{1,6})?\s*(?P<num>[IVXLC]+|[A-Z])(?P<sep>[.)])\s+(?P<rest>\S.*)$"
+)
+
+# Mixed numbering: "1.A Title", "2.B. Title"
+MIXED_HEADER_PATTERN = re.compile(
+    r"^(?P<hashes>#{1,6})?\s*(?P<num>\d{1,2}\.[A-Z])(?P<sep>[.)]?)\s+(?P<rest>\S.*)$"
+)
+
+# Numbered subsection headers produced by _fix_numbered_bullet_subsections or Docling
+PAREN_HEADER_PATTERN = re.compile(r"^#{1,6}\s+(\d+\))\s+(.+)$")
+
+# Abstract / Index Terms run into their text: "Abstract -Modern HPC..."
+ABSTRACT_PATTERN = re.compile(r"^(#+\s*)?Abstract\s*[-–—]\s*", re.MULTILINE | re.IGNORECASE)
+INDEX_TERMS_PATTERN = re.compile(r"^(#+\s*)?Index Terms\s*[-–—]\s*", re.MULTILINE | re.IGNORECASE)
+
+# Numbered section on its own line: "3.1.1 Design overview."
+# (greedy title ending in a non-space: linear time even on long whitespace runs)
+NUMBERED_TITLE_PATTERN = re.compile(r"^(\d+(?:\.\d+)+)\s+([A-Z][^.]*[^.\s])\s*\.?$")
+
+# Numbered section run into its body: "3.1.1 Design overview. Hermes is..."
+NUMBERED_RUN_IN_PATTERN = re.compile(r"^(\d+(?:\.\d+)+)\s+([A-Z][^.]{2,50})\.\s+(.+)$")
+
+# "- 1) Title:" bullets that may be subsection headers
+BULLET_SUBSECTION_PATTERN = re.compile(r"^-\s*(\d+[).])\s*(.+):\s*$")
+BULLET_ITEM_PATTERN = re.compile(r"^-\s*(\d+)\)\s*(.+)$")
+
+# Lines following a header that look like list items rather than paragraphs
+LIST_ITEM_PATTERN = re.compile(r"^(?:[-*•]|\d+[).])\s")
+
+# Lines of context _is_section_title looks at after a candidate header
+SECTION_TITLE_LOOKAHEAD = 4
+
+ROMAN_NUMERALS = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+# First words that mark a sentence rather than a title ("A. We conducted...")
+SENTENCE_STARTERS = frozenset(
+    "As For If In It Its Our Since That The These They This To We When While".split()
+)
+
 
 def process_sections(content: str) -> str:
     """
@@ -30,8 +81,8 @@ def process_sections(content: str) -> str:
     - Numbered sections: "3.1.1 Design overview." → "#### 3.1.1 Design overview"
     - Bullet subsections: "- 1) Title:" → "### 1) Title"
 
-    Note: Lettered sections (A., B.) are delegated to the Claude agent
-    for better context-aware detection.
+    - Lettered/Roman/mixed sections: "A. Background" → "### A. Background"
+      (only when part of a consistent sequence, see _fix_section_hierarchy)
 
     Args:
         content: Markdown content
@@ -42,9 +93,8 @@ def process_sections(content: str) -> str:
     content = _fix_abstract_header(content)
     content = _fix_index_terms_header(content)
     content = _fix_hierarchical_sections(content)
-    # Lettered sections removed - handled by agent (see cleanup.py)
     content = _fix_numbered_bullet_subsections(content)
-    return content
+    content = _fix_section_hierarchy(content)
     return content
 
 
@@ -55,10 +105,7 @@ def _fix_abstract_header(content: str) -> str:
     "Abstract -Modern HPC..." → "## Abstract\\n\\nModern HPC..."
     "Abstract-Modern HPC..." → "## Abstract\\n\\nModern HPC..."
     """
-    # Pattern: Abstract followed by dash (with optional spaces) then text
-    pattern = r"^(#+\s*)?Abstract\s*[-–—]\s*"
-    replacement = "## Abstract\n\n"
-    return re.sub(pattern, replacement, content, count=1, flags=re.MULTILINE | re.IGNORECASE)
+    return ABSTRACT_PATTERN.sub("## Abstract\n\n", content, count=1)
 
 
 def _fix_index_terms_header(content: str) -> str:
@@ -67,9 +114,7 @@ def _fix_index_terms_header(content: str) -> str:
 
     "Index Terms -keywords" → "## Index Terms\\n\\nkeywords"
     """
-    pattern = r"^(#+\s*)?Index Terms\s*[-–—]\s*"
-    replacement = "## Index Terms\n\n"
-    return re.sub(pattern, replacement, content, count=1, flags=re.MULTILINE | re.IGNORECASE)
+    return INDEX_TERMS_PATTERN.sub("## Index Terms\n\n", content, count=1)
 
 
 def _determine_header_level(numbering: str) -> int:
@@ -153,69 +198,61 @@ def _fix_hierarchical_sections(content: str) -> str:
     """
     lines = content.split("\n")
     result = []
-    i = 0
 
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
+    for i, line in enumerate(lines):
+        following = lines[i + 1 : i + 1 + SECTION_TITLE_LOOKAHEAD]
+        result.extend(_convert_hierarchical_line(line, following) or [line])
 
-        # Skip if already a header
-        if stripped.startswith("#"):
-            result.append(line)
-            i += 1
-            continue
+    return "\n".join(result)
 
-        # Pattern 1: N.N.N Title on its own line (title ends with period or nothing)
-        # e.g., "3.1.1 Design overview." or "3.1.1 Design overview"
-        section_match = re.match(
-            r"^(\d+(?:\.\d+)+)\s+([A-Z][^.]+?)\.?\s*$",
-            stripped
-        )
-
-        if section_match:
-            numbering = section_match.group(1)
-            title = section_match.group(2).strip()
-
-            # Get following lines for context
-            following = lines[i + 1 : i + 5] if i + 1 < len(lines) else []
-
-            if _is_section_title(title, following):
-                level = _determine_header_level(numbering)
-                header_prefix = "#" * level
-                result.append(f"{header_prefix} {numbering} {title}")
-                # Add blank line after header if not already there
-                if i + 1 < len(lines) and lines[i + 1].strip():
-                    result.append("")
-                i += 1
-                continue
-
-        # Pattern 2: N.N.N Title. Body text on same line
-        # e.g., "3.1.1 Design overview. Hermes is designed as a middleware..."
-        # Split into header and body paragraph
-        inline_match = re.match(
-            r"^(\d+(?:\.\d+)+)\s+([A-Z][^.]{2,50})\.\s+(.+)$",
-            stripped
-        )
-
-        if inline_match:
-            numbering = inline_match.group(1)
-            title = inline_match.group(2).strip()
-            body = inline_match.group(3).strip()
-
-            # Validate this looks like a section title (short, capitalized)
-            if len(title) <= 60:  # Title should be reasonably short
-                level = _determine_header_level(numbering)
-                header_prefix = "#" * level
-                result.append(f"{header_prefix} {numbering} {title}")
-                result.append("")  # Blank line after header
-                result.append(body)  # Body text as new paragraph
-                i += 1
-                continue
 
-        result.append(line)
-        i += 1
+def _convert_hierarchical_line(line: str, following: list[str]) -> list[str] | None:
+    """
+    Convert one numbered-section line to header lines.
 
-    return "\n".join(result)
+    Args:
+        line: The candidate line
+        following: Up to SECTION_TITLE_LOOKAHEAD lines after it
+
+    Returns:
+        Replacement lines, or None if the line is not a numbered section
+    """
+    stripped = line.strip()
+
+    # Skip if already a header
+    if stripped.startswith("#") or is_oversized(stripped, "numbered_sections"):
+        return None
+
+    # Pattern 1: N.N.N Title on its own line (title ends with period or nothing)
+    # e.g., "3.1.1 Design overview." or "3.1.1 Design overview"
+    section_match = NUMBERED_TITLE_PATTERN.match(stripped)
+    if section_match:
+        numbering = section_match.group(1)
+        title = section_match.group(2).strip()
+
+        if _is_section_title(title, following):
+            level = _determine_header_level(numbering)
+            converted = [f"{'#' * level} {numbering} {title}"]
+            # Add blank line after header if not already there
+            if following and following[0].strip():
+                converted.append("")
+            return converted
+
+    # Pattern 2: N.N.N Title. Body text on same line
+    # e.g., "3.1.1 Design overview. Hermes is designed as a middleware..."
+    # Split into header and body paragraph
+    inline_match = NUMBERED_RUN_IN_PATTERN.match(stripped)
+    if inline_match:
+        numbering = inline_match.group(1)
+        title = inline_match.group(2).strip()
+        body = inline_match.group(3).strip()
+
+        # Validate this looks like a section title (short, capitalized)
+        if len(title) <= 60:  # Title should be reasonably short
+            level = _determine_header_level(numbering)
+            return [f"{'#' * level} {numbering} {title}", "", body]
+
+    return None
 
 
 def _fix_numbered_bullet_subsections(content: str) -> str:
@@ -231,47 +268,246 @@ def _fix_numbered_bullet_subsections(content: str) -> str:
     """
     lines = content.split("\n")
     result = []
-    i = 0
-
-    while i < len(lines):
-        line = lines[i]
 
-        # Check for pattern: "- N) Title:" (with colon - likely subsection)
-        subsection_match = re.match(r"^-\s*(\d+[).])\s*(.+):\s*$", line)
-        if subsection_match:
+    for i, line in enumerate(lines):
+        next_line = None
+        if BULLET_SUBSECTION_PATTERN.match(line):
             # Look ahead to see if this is followed by paragraph text
-            j = i + 1
-            while j < len(lines) and lines[j].strip() == "":
-                j += 1
-
-            has_following_paragraphs = False
-            if j < len(lines):
-                next_line = lines[j].strip()
-                # Check it's not another list item
-                if next_line and not re.match(r"^[-*•]\s", next_line) and not re.match(
-                    r"^\d+[).]\s", next_line
-                ):
-                    has_following_paragraphs = True
-
-            if has_following_paragraphs:
-                # Convert to subsection header
-                num = subsection_match.group(1)
-                title = subsection_match.group(2)
-                result.append(f"### {num} {title}")
-                result.append("")  # Blank line after header
-                i += 1
-                continue
-
-        # Check for standalone "- N)" bullet patterns that should be numbered lists
-        bullet_match = re.match(r"^-\s*(\d+)\)\s*(.+)$", line)
-        if bullet_match:
-            # Convert "- 1) item" to "1. item"
-            num = bullet_match.group(1)
-            text = bullet_match.group(2)
-            result.append(f"{num}. {text}")
+            next_line = next((ln for ln in islice(lines, i + 1, None) if ln.strip()), None)
+        result.extend(_convert_bullet_line(line, next_line))
+
+    return "\n".join(result)
+
+
+def _convert_bullet_line(line: str, next_line: str | None) -> list[str]:
+    """
+    Convert one "- N)" bullet to a subsection header or numbered list item.
+
+    Args:
+        line: The candidate line
+        next_line: The next non-empty line (only needed for "- N) Title:" bullets)
+
+    Returns:
+        Replacement lines (the line itself if unchanged)
+    """
+    # Check for pattern: "- N) Title:" (with colon - likely subsection)
+    if is_oversized(line, "bullet_subsections"):
+        return [line]
+
+    subsection_match = BULLET_SUBSECTION_PATTERN.match(line)
+    if subsection_match and next_line is not None:
+        # Check it's not another list item
+        if not LIST_ITEM_PATTERN.match(next_line.strip()):
+            num = subsection_match.group(1)
+            title = subsection_match.group(2)
+            return [f"### {num} {title}", ""]  # Blank line after header
+
+    # Check for standalone "- N)" bullet patterns that should be numbered lists
+    bullet_match = BULLET_ITEM_PATTERN.match(line)
+    if bullet_match:
+        # Convert "- 1) item" to "1. item"
+        return [f"{bullet_match.group(1)}. {bullet_match.group(2)}"]
+
+    return [line]
+
+
+def roman_to_int(numeral: str) -> int | None:
+    """
+    Convert a Roman numeral to an integer, or None if it is not canonical.
+
+    Non-canonical forms ("IIII", "VX") are rejected so that only real
+    section numbers are treated as Roman.
+    """
+    total = 0
+    for i, char in enumerate(numeral):
+        value = ROMAN_NUMERALS[char]
+        if i + 1 < len(numeral) and ROMAN_NUMERALS[numeral[i + 1]] > value:
+            total -= value
         else:
-            result.append(line)
+            total += value
+    return total if total > 0 and _int_to_roman(total) == numeral else None
+
+
+def _int_to_roman(value: int) -> str:
+    numerals = [
+        (100, "C"),
+        (90, "XC"),
+        (50, "L"),
+        (40, "XL"),
+        (10, "X"),
+        (9, "IX"),
+        (5, "V"),
+        (4, "IV"),
+        (1, "I"),
+    ]
+    result = []
+    for amount, numeral in numerals:
+        while value >= amount:
+            result.append(numeral)
+            value -= amount
+    return "".join(result)
+
+
+def _split_run_in_title(rest: str) -> tuple[str, str | None]:
+    """
+    Split a run-in heading into title and body.
+
+    "RAM management. The runtime keeps..." → ("RAM management", "The runtime keeps...")
+    "Data placement" → ("Data placement", None)
+    """
+    run_in = re.match(r"^([^.:]{2,60}?)[.:]\s+(\S.*)$", rest)
+    if run_in and len(run_in.group(1).split()) <= 8:
+        return run_in.group(1).strip(), run_in.group(2).strip()
+    return rest.strip().rstrip(".:").strip(), None
+
+
+def _is_sequence_title(title: str) -> bool:
+    """Title heuristics for lettered/Roman headers (stricter than _is_section_title)."""
+    if not title or len(title) > MAX_SEQUENCE_TITLE_LENGTH:
+        return False
+    if len(title.split()) > MAX_SEQUENCE_TITLE_WORDS:
+        return False
+    if not (title[0].isupper() or title[0].isdigit()):
+        return False
+    # Sentences contain inner sentence breaks or end mid-clause
+    if ". " in title or title.endswith(","):
+        return False
+    first_word = title.split()[0]
+    if first_word in SENTENCE_STARTERS and len(title.split()) > 3:
+        return False
+    return True
+
 
-        i += 1
+def _fix_section_hierarchy(content: str) -> str:
+    """
+    Detect lettered, Roman and mixed-numbered sections and assign levels.
+
+    Works on the whole document in three steps:
+
+    1. Collect candidate lines ("A. Title", "II. TITLE", "1.B Title", with or
+       without a Docling heading marker) and split run-in titles from body
+       text ("A. RAM management. The runtime...").
+    2. Accept candidates by sequence continuity. Roman numerals must form a
+       document-wide run I, II, III...; letters must form a run A, B, C...
+       inside one parent section (the run restarts after every other
+       heading). A run of one is only accepted if Docling already marked
+       the line as a heading. This rejects sentences such as
+       "A. We conducted experiments..." that are not followed by a "B.".
+    3. Assign levels from the parent: Roman sections are level 2, letters
+       are one level below the heading that opened their parent section,
+       and "1) Title" headings inside a lettered section one level below that.
+
+    This gives consistent levels for IEEE (I. / A. / 1)), ACM and LNCS
+    (1 / 1.1 with lettered paragraphs) papers.
+    """
+    lines = content.split("\n")
+
+    # Step 1: candidates
+    candidates: dict[int, dict] = {}
+    in_code = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or not stripped or is_oversized(stripped, "section_hierarchy"):
+            continue
+        if re.match(r"^#*\s*(?:References|Bibliography)\s*$", stripped, re.IGNORECASE):
+            break  # Author initials in reference entries look like lettered sections
+        match = SEQUENCE_HEADER_PATTERN.match(stripped) or MIXED_HEADER_PATTERN.match(stripped)
+        if not match:
+            continue
+        title, body = _split_run_in_title(match.group("rest"))
+        is_header = match.group("hashes") is not None
+        if body is not None and is_header:
+            title, body = match.group("rest").strip().rstrip(".:"), None
+        if not _is_sequence_title(title):
+            continue
+        if body is None and not is_header and not any(ln.strip() for ln in lines[i + 1 : i + 4]):
+            continue  # A title must be followed by content
+        num = match.group("num")
+        candidates[i] = {
+            "num": num,
+            "sep": match.group("sep"),
+            "title": title,
+            "body": body,
+            "is_header": is_header,
+            "roman": roman_to_int(num) if re.fullmatch(r"[IVXLC]+", num) else None,
+            "letter": ord(num[-1]) - ord("A") + 1 if num[-1].isalpha() else None,
+            "mixed": "." in num,
+        }
+
+    if not candidates:
+        return content
+
+    # Step 2a: document-wide Roman run
+    roman_lines: list[int] = []
+    expected = 1
+    for i in sorted(candidates):
+        if candidates[i]["roman"] == expected:
+            roman_lines.append(i)
+            expected += 1
+    if len(roman_lines) < 2 and not all(candidates[i]["is_header"] for i in roman_lines):
+        roman_lines = []
+    accepted: dict[int, int] = {i: 2 for i in roman_lines}
+
+    # Step 2b: lettered runs inside each parent section
+    def header_level(line: str) -> int:
+        return len(line) - len(line.lstrip("#"))
+
+    scope_level = 1
+    run: list[int] = []
+    mixed_run: list[int] = []
+
+    def close_runs() -> None:
+        for current in (run, mixed_run):
+            if len(current) >= 2 or any(candidates[i]["is_header"] for i in current):
+                for i in current:
+                    accepted[i] = min(scope_level + 1, 6)
+            current.clear()
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        candidate = candidates.get(i)
+        if i in roman_lines or (stripped.startswith("#") and candidate is None):
+            if PAREN_HEADER_PATTERN.match(stripped):
+                continue  # "1) Title" headings nest inside lettered sections
+            close_runs()
+            scope_level = 2 if i in roman_lines else header_level(stripped)
+            continue
+        if candidate is None or candidate["letter"] is None:
+            continue
+        current = mixed_run if candidate["mixed"] else run
+        if candidate["letter"] == len(current) + 1:
+            current.append(i)
+    close_runs()
+
+    # Step 3: rewrite accepted headers and nest "1)" headings below letters
+    result: list[str] = []
+    letter_level: int | None = None
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if i in accepted:
+            candidate = candidates[i]
+            level = accepted[i]
+            letter_level = level if i not in roman_lines else None
+            sep = candidate["sep"] or "."
+            result.append(f"{'#' * level} {candidate['num']}{sep} {candidate['title']}")
+            if candidate["body"]:
+                result.append("")
+                result.append(candidate["body"])
+            if i + 1 < len(lines) and lines[i + 1].strip():
+                result.append("")
+            continue
+
+        paren_match = PAREN_HEADER_PATTERN.match(stripped)
+        if paren_match and letter_level is not None:
+            level = min(letter_level + 1, 6)
+            result.append(f"{'#' * level} {paren_match.group(1)} {paren_match.group(2)}")
+            continue
+        if stripped.startswith("#"):
+            letter_level = None
+
+        result.append(line)
 
     return "\n".join(result)
@@ -0,0 +1,268 @@
+"""Streaming post-processing for very large inputs.
+
+process_markdown needs the whole document as one string and makes a copy per
+pass. process_markdown_stream runs the same passes as a chain of generators
+over lines, so memory stays flat for multi-hundred-MB inputs such as
+concatenated proceedings:
+
+- Page-break merging holds only the last paragraph line plus MAX_LOOKAHEAD
+  lines after a page-break marker
+- Hyphenation repair works per paragraph block, with the block's own
+  vocabulary instead of the whole document's
+- Section headers use a bounded look-ahead window (SECTION_TITLE_LOOKAHEAD
+  lines for numbered titles, STREAM_LOOKAHEAD for the next non-empty line
+  after a "- N) Title:" bullet)
+- Citations and bibliography run in two phases: body mode until the first
+  references heading, reference mode after it
+- Rule packs apply their line rules only (document rules are rejected)
+
+Passes that need the whole document are skipped: the lettered/Roman section
+hierarchy engine (it needs every candidate of a sequence) and figure
+relocation (it needs every reference to a figure). Run process_markdown on
+documents that fit in memory to get those.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from pdf2md.postprocess.bibliography import REFERENCE_ENTRY_PATTERN
+from pdf2md.postprocess.citations import (
+    _add_reference_anchors,
+    _expand_citation_ranges,
+    _link_single_citations,
+)
+from pdf2md.postprocess.cleanup import cleanup_lines
+from pdf2md.postprocess.figures import (
+    TABLE_CONTEXT_LINES,
+    _build_asset_map,
+    _embed_caption_line,
+)
+from pdf2md.postprocess.hyphenation import load_lexicon, repair_hyphenation
+from pdf2md.postprocess.paragraphs import (
+    MAX_LOOKAHEAD,
+    PAGE_BREAK_MARKER,
+    merge_page_break_paragraphs,
+)
+from pdf2md.postprocess.rules import RulePack, apply_line_rules
+from pdf2md.postprocess.sections import (
+    ABSTRACT_PATTERN,
+    BULLET_SUBSECTION_PATTERN,
+    INDEX_TERMS_PATTERN,
+    SECTION_TITLE_LOOKAHEAD,
+    _convert_bullet_line,
+    _convert_hierarchical_line,
+)
+
+# Start of the references section (first match switches to reference mode)
+REFERENCES_HEADING_PATTERN = re.compile(r"^(?:#{1,2} )?(?:References|REFERENCES)\s*$")
+
+# Lines searched for the next non-empty line after a bullet subsection
+STREAM_LOOKAHEAD = 16
+
+# Lines held while page-break markers keep arriving before flushing anyway
+MAX_PENDING_LINES = 1000
+
+# Paragraph blocks longer than this are split for hyphenation repair
+MAX_BLOCK_LINES = 200
+
+
+def process_markdown_stream(
+    lines: Iterable[str],
+    images: list[str] | None = None,
+    *,
+    normalize_quotes: bool = False,
+    rule_packs: Iterable[RulePack] = (),
+) -> Iterator[str]:
+    """
+    Apply the deterministic post-processing steps to a stream of lines.
+
+    Args:
+        lines: Markdown lines, e.g. an open text file (trailing newlines are stripped)
+        images: List of available image filenames (e.g., ["figure1.png", "figure2.png"])
+        normalize_quotes: Replace smart quotes with ASCII quotes (default: False)
+        rule_packs: Rule packs with line-scoped rules only
+
+    Yields:
+        Processed lines, without trailing newlines
+
+    Raises:
+        ValueError: If a rule pack has document-scoped rules
+    """
+    rule_packs = list(rule_packs)
+    for pack in rule_packs:
+        if pack.document_rules:
+            raise ValueError(f"Rule pack {pack.name} has document-scoped rules")
+
+    stream: Iterable[str] = (line.rstrip("\r\n") for line in lines)
+    # Same order as process_markdown
+    if rule_packs:
+        stream = _apply_rules(stream, rule_packs)
+    stream = _merge_page_breaks(stream)
+    stream = _repair_hyphenation(stream)
+    stream = _fix_section_headers(stream)
+    stream = _link_citations(stream)
+    stream = _embed_figures(stream, images or [])
+    stream = _format_bibliography(stream)
+    return cleanup_lines(stream, normalize_quotes=normalize_quotes)
+
+
+def _lookahead(lines: Iterable[str], size: int) -> Iterator[tuple[str, deque[str]]]:
+    """Yield each line with a window of (up to) the next ``size`` lines."""
+    iterator = iter(lines)
+    window: deque[str] = deque(islice(iterator, size + 1))
+    while window:
+        current = window.popleft()
+        yield current, window
+        window.extend(islice(iterator, 1))
+
+
+def _apply_rules(lines: Iterable[str], packs: list[RulePack]) -> Iterator[str]:
+    """Apply the line rules of each pack (a replacement may add lines)."""
+    for line in lines:
+        for pack in packs:
+            line = apply_line_rules(line, pack)
+        yield from line.split("\n")
+
+
+def _merge_page_breaks(lines: Iterable[str]) -> Iterator[str]:
+    """Streaming merge_page_break_paragraphs with a bounded buffer."""
+    buffer: list[str] = []
+    lines_since_marker: int | None = None
+
+    for line in lines:
+        buffer.append(line)
+        if line.strip() == PAGE_BREAK_MARKER:
+            lines_since_marker = 0
+            continue
+        if lines_since_marker is not None:
+            lines_since_marker += 1
+            if lines_since_marker <= MAX_LOOKAHEAD and len(buffer) < MAX_PENDING_LINES:
+                continue
+            merged, _ = merge_page_break_paragraphs("\n".join(buffer))
+            buffer = merged.split("\n")
+            lines_since_marker = None
+
+        # Hold back only the last non-empty line: it may be the first half
+        # of a paragraph continued after the next page break
+        keep = len(buffer)
+        while keep > 0 and not buffer[keep - 1].strip():
+            keep -= 1
+        keep = max(keep - 1, 0)
+        yield from buffer[:keep]
+        del buffer[:keep]
+
+    if lines_since_marker is not None:
+        merged, _ = merge_page_break_paragraphs("\n".join(buffer))
+        buffer = merged.split("\n")
+    yield from buffer
+
+
+def _repair_hyphenation(lines: Iterable[str]) -> Iterator[str]:
+    """Streaming repair_hyphenation, one paragraph block at a time."""
+    lexicon = load_lexicon()
+    block: list[str] = []
+    in_code = False
+
+    def flush() -> Iterator[str]:
+        if block:
+            repaired, _ = repair_hyphenation("\n".join(block), lexicon)
+            yield from repaired.split("\n")
+            block.clear()
+
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            yield from flush()
+            in_code = not in_code
+            yield line
+        elif in_code:
+            yield line
+        elif not stripped:
+            yield from flush()
+            yield line
+        else:
+            if len(block) >= MAX_BLOCK_LINES:
+                yield from flush()
+            block.append(line)
+
+    yield from flush()
+
+
+def _fix_section_headers(lines: Iterable[str]) -> Iterator[str]:
+    """Streaming process_sections, without the whole-document hierarchy engine."""
+    abstract_done = index_terms_done = False
+
+    def fix_run_in_headers(stream: Iterable[str]) -> Iterator[str]:
+        nonlocal abstract_done, index_terms_done
+        for line in stream:
+            if not abstract_done:
+                line, count = ABSTRACT_PATTERN.subn("## Abstract\n\n", line, count=1)
+                abstract_done = bool(count)
+            if not index_terms_done:
+                line, count = INDEX_TERMS_PATTERN.subn("## Index Terms\n\n", line, count=1)
+                index_terms_done = bool(count)
+            yield from line.split("\n")
+
+    for line, window in _lookahead(fix_run_in_headers(lines), STREAM_LOOKAHEAD):
+        following = list(islice(window, SECTION_TITLE_LOOKAHEAD))
+        converted = _convert_hierarchical_line(line, following)
+        if converted is not None:
+            yield from converted
+            continue
+        next_line = None
+        if BULLET_SUBSECTION_PATTERN.match(line):
+            next_line = next((ln for ln in window if ln.strip()), None)
+        yield from _convert_bullet_line(line, next_line)
+
+
+def _link_citations(lines: Iterable[str]) -> Iterator[str]:
+    """Streaming process_citations: link in the body, anchor in the references."""
+    in_references = False
+    for line in lines:
+        if not in_references and REFERENCES_HEADING_PATTERN.match(line):
+            in_references = True
+        if in_references:
+            yield _add_reference_anchors(line)
+        else:
+            yield _link_single_citations(_expand_citation_ranges(line))
+
+
+def _embed_figures(lines: Iterable[str], images: list[str]) -> Iterator[str]:
+    """Streaming process_figures: embed images above their captions."""
+    asset_map = _build_asset_map(images)
+    if not asset_map:
+        yield from lines
+        return
+
+    embedded: set[tuple[str, int]] = set()
+    previous: deque[str] = deque(maxlen=TABLE_CONTEXT_LINES)
+    for line, window in _lookahead(lines, TABLE_CONTEXT_LINES):
+        nearby = [*previous, *window]
+        yield from _embed_caption_line(line, nearby, asset_map, embedded)
+        yield line
+        previous.append(line)
+
+
+def _format_bibliography(lines: Iterable[str]) -> Iterator[str]:
+    """Streaming process_bibliography: blank line between reference entries."""
+    in_references = False
+    prev_was_reference = False
+    previous = ""
+
+    for line in lines:
+        if not in_references:
+            in_references = bool(REFERENCES_HEADING_PATTERN.match(line))
+            previous = line
+            yield line
+            continue
+
+        is_reference_start = bool(REFERENCE_ENTRY_PATTERN.match(line))
+        if is_reference_start and prev_was_reference and previous.strip():
+            yield ""
+        yield line
+        previous = line
+        prev_was_reference = is_reference_start or (prev_was_reference and bool(line.strip()))
@@ -0,0 +1,13 @@
+"""Reference resolution against local bibliographic stores."""
+
+from pdf2md.references.bibtex import BibEntry, load_bibtex_dir, parse_bibtex
+from pdf2md.references.matching import BibIndex, ReferenceMatch, match_references
+
+__all__ = [
+    "BibEntry",
+    "BibIndex",
+    "ReferenceMatch",
+    "load_bibtex_dir",
+    "match_references",
+    "parse_bibtex",
+]
@@ -0,0 +1,185 @@
+"""Minimal BibTeX reader for local citation stores.
+
+Parses the subset of BibTeX produced by publishers and citation managers:
+``@type{key, field = {value}, field = "value", year = 2024}``. String
+macros, ``@comment`` and ``@preamble`` blocks are skipped.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Entry types that carry no bibliographic record
+SKIPPED_ENTRY_TYPES = {"comment", "preamble", "string"}
+
+ENTRY_HEADER_PATTERN = re.compile(r"@\s*(\w+)\s*([{(])")
+FIELD_NAME_PATTERN = re.compile(r"\s*,?\s*([\w\-:]+)\s*=\s*")
+BARE_VALUE_PATTERN = re.compile(r"[^,]*")
+
+
+@dataclass
+class BibEntry:
+    """A single BibTeX record."""
+
+    key: str
+    entry_type: str
+    fields: dict[str, str] = field(default_factory=dict)
+    source: str | None = None  # .bib file the entry came from
+
+    @property
+    def title(self) -> str:
+        return self.fields.get("title", "")
+
+    @property
+    def doi(self) -> str | None:
+        doi = self.fields.get("doi")
+        return normalize_doi(doi) if doi else None
+
+    @property
+    def year(self) -> str | None:
+        return self.fields.get("year")
+
+
+def normalize_doi(doi: str) -> str:
+    """
+    Normalize a DOI to its bare lowercase form.
+
+    "https://doi.org/10.1145/ABC.123" → "10.1145/abc.123"
+    """
+    doi = doi.strip().lower()
+    doi = re.sub(r"^(?:https?://)?(?:dx\.)?doi\.org/", "", doi)
+    doi = re.sub(r"^doi:\s*", "", doi)
+    return doi.rstrip(".,;")
+
+
+def parse_bibtex(text: str, source: str | None = None) -> list[BibEntry]:
+    """
+    Parse BibTeX text into entries.
+
+    Args:
+        text: Contents of a .bib file
+        source: Optional source label stored on each entry
+
+    Returns:
+        List of parsed entries (malformed entries are skipped)
+    """
+    entries: list[BibEntry] = []
+    pos = 0
+
+    while True:
+        at = text.find("@", pos)
+        if at == -1:
+            break
+
+        header = ENTRY_HEADER_PATTERN.match(text, at)
+        if not header:
+            pos = at + 1
+            continue
+
+        entry_type = header.group(1).lower()
+        body_start = header.end()
+        body_end = _find_closing(text, body_start, header.group(2))
+        if body_end == -1:
+            break
+        pos = body_end + 1
+
+        if entry_type in SKIPPED_ENTRY_TYPES:
+            continue
+
+        body = text[body_start:body_end]
+        comma = body.find(",")
+        if comma == -1:
+            continue
+
+        key = body[:comma].strip()
+        fields = _parse_fields(body[comma + 1 :])
+        if key:
+            entries.append(BibEntry(key=key, entry_type=entry_type, fields=fields, source=source))
+
+    return entries
+
+
+def load_bibtex_dir(bib_dir: Path) -> list[BibEntry]:
+    """
+    Load every ``*.bib`` file under a directory (recursively).
+
+    Args:
+        bib_dir: Directory containing BibTeX files (e.g. ``citations/``)
+
+    Returns:
+        All entries from all files, in file-name order
+    """
+    entries: list[BibEntry] = []
+    for bib_path in sorted(bib_dir.rglob("*.bib")):
+        text = bib_path.read_text(encoding="utf-8", errors="replace")
+        entries.extend(parse_bibtex(text, source=bib_path.name))
+    return entries
+
+
+def _find_closing(text: str, start: int, opener: str) -> int:
+    """Find the delimiter closing an entry body, honouring nested braces."""
+    closer = "}" if opener == "{" else ")"
+    depth = 0
+    for i in range(start, len(text)):
+        char = text[i]
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            if depth == 0 and closer == "}":
+                return i
+            depth -= 1
+        elif char == closer and depth == 0:
+            return i
+    return -1
+
+
+def _parse_fields(body: str) -> dict[str, str]:
+    """Parse ``name = value`` pairs from an entry body."""
+    fields: dict[str, str] = {}
+    pos = 0
+    length = len(body)
+
+    while pos < length:
+        name_match = FIELD_NAME_PATTERN.match(body, pos)
+        if not name_match:
+            break
+        name = name_match.group(1).lower()
+        pos = name_match.end()
+        if pos >= length:
+            break
+
+        if body[pos] == "{":
+            depth = 0
+            end = pos
+            while end < length:
+                if body[end] == "{":
+                    depth += 1
+                elif body[end] == "}":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            value = body[pos + 1 : end]
+            pos = end + 1
+        elif body[pos] == '"':
+            end = body.find('"', pos + 1)
+            if end == -1:
+                end = length
+            value = body[pos + 1 : end]
+            pos = end + 1
+        else:
+            bare = BARE_VALUE_PATTERN.match(body, pos)
+            value = bare.group(0) if bare else ""
+            pos += len(value)
+
+        fields[name] = _clean_value(value)
+
+    return fields
+
+
+def _clean_value(value: str) -> str:
+    """Strip protective braces and collapse whitespace in a field value."""
+    value = value.replace("{", "").replace("}", "")
+    return re.sub(r"\s+", " ", value).strip()
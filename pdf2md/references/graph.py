@@ -0,0 +1,285 @@
+"""Cross-paper citation graph over a converted corpus.
+
+Every reference entry of every converted paper is reduced to a fingerprint
+of the cited work (see ``normalize.fingerprint``), so the same work cited in
+different styles by different papers becomes a single node. The graph is
+stored in SQLite as a compact adjacency table::
+
+    papers(id, path, mtime_ns, size, content_hash, title, fingerprint)
+    works(id, fingerprint, title, doi)
+    citations(paper_id, work_id, ref_number)   -- indexed both ways
+
+Builds are incremental: papers whose size and mtime are unchanged are not
+re-read, and changed papers only replace their own citation rows. Works no
+paper cites any more are dropped.
+
+A paper's fingerprint is that of its own title, so a cited work that is
+itself in the corpus links to its converted markdown (``CitedWork.corpus_path``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from pdf2md.postprocess.bibliography import extract_reference_entries
+from pdf2md.references.normalize import (
+    extract_doi,
+    fingerprint,
+    guess_title,
+    title_fingerprint,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    title TEXT,
+    fingerprint TEXT
+);
+CREATE TABLE IF NOT EXISTS works (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    doi TEXT
+);
+CREATE TABLE IF NOT EXISTS citations (
+    paper_id INTEGER NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    work_id INTEGER NOT NULL REFERENCES works(id),
+    ref_number INTEGER,
+    PRIMARY KEY (paper_id, work_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS citations_by_work ON citations(work_id, paper_id);
+CREATE INDEX IF NOT EXISTS papers_by_fingerprint ON papers(fingerprint);
+"""
+
+# Path of the corpus paper whose title fingerprint is the work's (via papers_by_fingerprint)
+CORPUS_PATH_SQL = (
+    "(SELECT p.path FROM papers p WHERE p.fingerprint = w.fingerprint ORDER BY p.path LIMIT 1)"
+)
+
+
+@dataclass
+class BuildStats:
+    """Summary of an incremental graph build."""
+
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    citations: int = 0
+    orphaned_works: int = 0  # Works dropped because no paper cites them any more
+
+
+@dataclass
+class CitedWork:
+    """A cited work and how many corpus papers cite it."""
+
+    fingerprint: str
+    title: str
+    doi: str | None
+    cited_by: int
+    corpus_path: str | None = None  # Converted markdown of the work, if in the corpus
+
+
+class CitationGraph:
+    """SQLite-backed citation graph for a corpus of converted papers."""
+
+    def __init__(self, db_path: Path | str) -> None:
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "CitationGraph":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def update(self, md_files: Iterable[Path], *, prune: bool = False) -> BuildStats:
+        """
+        Add or refresh papers in the graph.
+
+        Args:
+            md_files: Converted markdown files to index
+            prune: Remove papers from the graph that are no longer in ``md_files``
+
+        Returns:
+            Counts of added, updated, unchanged and removed papers
+        """
+        stats = BuildStats()
+        seen: set[str] = set()
+
+        with self.conn:
+            for md_path in md_files:
+                md_path = Path(md_path).resolve()
+                key = str(md_path)
+                seen.add(key)
+                stat = md_path.stat()
+
+                row = self.conn.execute(
+                    "SELECT id, mtime_ns, size, content_hash FROM papers WHERE path = ?", (key,)
+                ).fetchone()
+                if row and row[1] == stat.st_mtime_ns and row[2] == stat.st_size:
+                    stats.unchanged += 1
+                    continue
+
+                content = md_path.read_text(encoding="utf-8")
+                content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+                if row and row[3] == content_hash:
+                    # Touched but not modified - remember the new stat and move on
+                    self.conn.execute(
+                        "UPDATE papers SET mtime_ns = ?, size = ? WHERE id = ?",
+                        (stat.st_mtime_ns, stat.st_size, row[0]),
+                    )
+                    stats.unchanged += 1
+                    continue
+
+                title = _document_title(content)
+                values = (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    content_hash,
+                    title,
+                    title_fingerprint(title) if title else None,
+                )
+                if row:
+                    paper_id = row[0]
+                    self.conn.execute("DELETE FROM citations WHERE paper_id = ?", (paper_id,))
+                    self.conn.execute(
+                        "UPDATE papers SET mtime_ns = ?, size = ?, content_hash = ?, "
+                        "title = ?, fingerprint = ? WHERE id = ?",
+                        (*values, paper_id),
+                    )
+                    stats.updated += 1
+                else:
+                    paper_id = self.conn.execute(
+                        "INSERT INTO papers (path, mtime_ns, size, content_hash, title, "
+                        "fingerprint) VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, *values),
+                    ).lastrowid
+                    stats.added += 1
+
+                stats.citations += self._insert_citations(paper_id, content)
+
+            if prune:
+                for paper_id, path in self.conn.execute("SELECT id, path FROM papers").fetchall():
+                    if path not in seen:
+                        self.conn.execute("DELETE FROM papers WHERE id = ?", (paper_id,))
+                        stats.removed += 1
+
+            if stats.updated or stats.removed:
+                stats.orphaned_works = self.conn.execute(
+                    "DELETE FROM works WHERE id NOT IN (SELECT work_id FROM citations)"
+                ).rowcount
+
+        return stats
+
+    def _insert_citations(self, paper_id: int, content: str) -> int:
+        """
+        Insert one paper's references, creating work nodes as needed.
+
+        Returns the number of citation rows inserted; a work cited twice by the
+        same paper counts once.
+        """
+        rows = []
+        for number, text in extract_reference_entries(content):
+            work_print = fingerprint(text)
+            doi = extract_doi(text)
+            self.conn.execute(
+                "INSERT OR IGNORE INTO works (fingerprint, title, doi) VALUES (?, ?, ?)",
+                (work_print, guess_title(text), doi),
+            )
+            if doi:
+                self.conn.execute(
+                    "UPDATE works SET doi = ? WHERE fingerprint = ? AND doi IS NULL",
+                    (doi, work_print),
+                )
+            work_id = self.conn.execute(
+                "SELECT id FROM works WHERE fingerprint = ?", (work_print,)
+            ).fetchone()[0]
+            rows.append((paper_id, work_id, number))
+
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO citations (paper_id, work_id, ref_number) VALUES (?, ?, ?)",
+            rows,
+        )
+        return self.conn.total_changes - before
+
+    def most_cited(self, limit: int = 20) -> list[CitedWork]:
+        """Return the works cited by the most corpus papers."""
+        rows = self.conn.execute(
+            f"SELECT w.fingerprint, w.title, w.doi, COUNT(*) AS n, {CORPUS_PATH_SQL} "
+            "FROM citations c JOIN works w ON w.id = c.work_id "
+            "GROUP BY c.work_id ORDER BY n DESC, w.title LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [CitedWork(*row) for row in rows]
+
+    def find_works(self, query: str, limit: int = 10) -> list[CitedWork]:
+        """
+        Find cited works by title, DOI or fingerprint.
+
+        An exact title (any citation style) resolves through its fingerprint;
+        otherwise the query is matched as a case-insensitive title substring.
+        """
+        query_print = title_fingerprint(query) or query
+        doi = extract_doi(query)
+        rows = self.conn.execute(
+            "SELECT w.fingerprint, w.title, w.doi, "
+            f"(SELECT COUNT(*) FROM citations c WHERE c.work_id = w.id) AS n, {CORPUS_PATH_SQL} "
+            "FROM works w WHERE w.fingerprint IN (?, ?) OR (? IS NOT NULL AND w.doi = ?) "
+            "ORDER BY n DESC LIMIT ?",
+            (query, query_print, doi, doi, limit),
+        ).fetchall()
+        if not rows:
+            rows = self.conn.execute(
+                "SELECT w.fingerprint, w.title, w.doi, "
+                "(SELECT COUNT(*) FROM citations c WHERE c.work_id = w.id) AS n, "
+                f"{CORPUS_PATH_SQL} "
+                "FROM works w WHERE w.title LIKE ? ORDER BY n DESC LIMIT ?",
+                (f"%{query}%", limit),
+            ).fetchall()
+        return [CitedWork(*row) for row in rows]
+
+    def cited_by(self, work_fingerprint: str) -> list[tuple[str, str | None]]:
+        """
+        Return the corpus papers citing a work.
+
+        Args:
+            work_fingerprint: Fingerprint of the cited work
+
+        Returns:
+            List of (markdown_path, paper_title) tuples
+        """
+        return self.conn.execute(
+            "SELECT p.path, p.title FROM citations c "
+            "JOIN works w ON w.id = c.work_id JOIN papers p ON p.id = c.paper_id "
+            "WHERE w.fingerprint = ? ORDER BY p.path",
+            (work_fingerprint,),
+        ).fetchall()
+
+    def paper_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def work_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+
+def _document_title(content: str) -> str | None:
+    """Return the first top-level heading of a document, if any."""
+    match = re.search(r"^#{1,2}\s+(.+?)\s*$", content, re.MULTILINE)
+    return match.group(1) if match else None
@@ -0,0 +1,177 @@
+"""Match extracted reference entries against a local BibTeX store.
+
+The index avoids comparing every reference with every record:
+
+1. **DOI lookup** - a DOI in the reference text is an exact match.
+2. **Blocking** - an inverted index from informative title words to records
+   selects the few candidates that share most of their title words with the
+   reference. Words that occur in too many titles are not used for blocking.
+3. **Scoring** - candidates are scored by the fraction of their title's
+   character trigrams that appear in the reference text (containment), which
+   tolerates OCR noise, hyphenation splits and the surrounding author/venue text.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from pdf2md.references.bibtex import BibEntry, load_bibtex_dir
+from pdf2md.references.normalize import char_ngrams, extract_doi, title_tokens
+
+# Minimum trigram containment for a title match
+DEFAULT_MIN_SCORE = 0.85
+
+# Fraction of a record's title words a reference must share to become a candidate
+MIN_SHARED_TOKEN_RATIO = 0.6
+
+# Title words present in more than this fraction of records are not used for blocking
+MAX_TOKEN_DOCUMENT_RATIO = 0.05
+
+# Records whose title has fewer informative words than this can only match by DOI
+MIN_TITLE_TOKENS = 2
+
+
+@dataclass
+class ReferenceMatch:
+    """A reference entry resolved to a BibTeX record."""
+
+    number: int
+    text: str
+    key: str
+    doi: str | None
+    title: str
+    score: float
+    method: str  # "doi" or "title"
+    source: str | None  # .bib file of the matched record
+
+
+class BibIndex:
+    """Fuzzy title index over a collection of BibTeX entries."""
+
+    def __init__(self, entries: Iterable[BibEntry]) -> None:
+        self.entries: list[BibEntry] = []
+        self._by_doi: dict[str, int] = {}
+        self._postings: dict[str, list[int]] = {}
+        self._token_counts: list[int] = []
+        self._ngrams: list[frozenset[str]] = []
+
+        for entry in entries:
+            self._add(entry)
+
+        self._max_postings = max(50, int(len(self.entries) * MAX_TOKEN_DOCUMENT_RATIO))
+
+    @classmethod
+    def from_directory(cls, bib_dir: Path) -> "BibIndex":
+        """Build an index from every ``*.bib`` file under a directory."""
+        return cls(load_bibtex_dir(bib_dir))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _add(self, entry: BibEntry) -> None:
+        idx = len(self.entries)
+        self.entries.append(entry)
+
+        if entry.doi:
+            self._by_doi.setdefault(entry.doi, idx)
+
+        tokens = set(title_tokens(entry.title))
+        self._token_counts.append(len(tokens))
+        self._ngrams.append(char_ngrams(entry.title))
+        for token in tokens:
+            self._postings.setdefault(token, []).append(idx)
+
+    def _candidates(self, tokens: set[str]) -> list[int]:
+        """Blocking step: records sharing enough informative title words."""
+        shared: Counter[int] = Counter()
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None or len(posting) > self._max_postings:
+                continue
+            shared.update(posting)
+
+        return [
+            idx
+            for idx, count in shared.items()
+            if self._token_counts[idx] >= MIN_TITLE_TOKENS
+            and count >= MIN_SHARED_TOKEN_RATIO * self._token_counts[idx]
+        ]
+
+    def lookup(
+        self, reference_text: str, *, min_score: float = DEFAULT_MIN_SCORE
+    ) -> tuple[BibEntry, float, str] | None:
+        """
+        Find the record a free-text reference cites.
+
+        Args:
+            reference_text: The reference entry text
+            min_score: Minimum title trigram containment to accept a match
+
+        Returns:
+            Tuple of (entry, score, method), or None if nothing matched
+        """
+        doi = extract_doi(reference_text)
+        if doi and doi in self._by_doi:
+            return self.entries[self._by_doi[doi]], 1.0, "doi"
+
+        candidates = self._candidates(set(title_tokens(reference_text)))
+        if not candidates:
+            return None
+
+        reference_ngrams = char_ngrams(reference_text)
+        best_idx: int | None = None
+        best_rank: tuple[float, int] = (0.0, 0)
+        for idx in candidates:
+            title_ngrams = self._ngrams[idx]
+            if not title_ngrams:
+                continue
+            score = len(title_ngrams & reference_ngrams) / len(title_ngrams)
+            # Prefer higher scores, then longer (more specific) titles
+            rank = (score, len(title_ngrams))
+            if rank > best_rank:
+                best_idx, best_rank = idx, rank
+
+        if best_idx is None or best_rank[0] < min_score:
+            return None
+        return self.entries[best_idx], best_rank[0], "title"
+
+
+def match_references(
+    entries: Iterable[tuple[int, str]],
+    index: BibIndex,
+    *,
+    min_score: float = DEFAULT_MIN_SCORE,
+) -> list[ReferenceMatch]:
+    """
+    Match extracted reference entries against a BibTeX index.
+
+    Args:
+        entries: (number, text) pairs, e.g. from ``extract_reference_entries``
+        index: Index over the local BibTeX store
+        min_score: Minimum title trigram containment to accept a match
+
+    Returns:
+        Matches for the entries that resolved to a record, in input order
+    """
+    matches: list[ReferenceMatch] = []
+    for number, text in entries:
+        found = index.lookup(text, min_score=min_score)
+        if found is None:
+            continue
+        entry, score, method = found
+        matches.append(
+            ReferenceMatch(
+                number=number,
+                text=text,
+                key=entry.key,
+                doi=entry.doi,
+                title=entry.title,
+                score=round(score, 3),
+                method=method,
+                source=entry.source,
+            )
+        )
+    return matches
@@ -0,0 +1,123 @@
+"""Text normalization and fingerprinting for cited works."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+
+# Words too common in titles to help with candidate blocking
+STOPWORDS = frozenset(
+    "a an and are as at by for from in into is of on or over the to towards under using "
+    "via with without its their this that".split()
+)
+
+# Titles shorter than this (normalized, without spaces) are too ambiguous to fingerprint
+MIN_FINGERPRINT_TITLE_LENGTH = 12
+
+DOI_PATTERN = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>\]\[]+)", re.IGNORECASE)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for comparison.
+
+    Removes LaTeX commands and accents, lowercases, and replaces any
+    non-alphanumeric run with a single space.
+
+    "{\\em Hermes}: A Multi-Tiered I/O Buffering" → "hermes a multi tiered i o buffering"
+    """
+    text = re.sub(r"\\[a-zA-Z]+", " ", text)
+    text = re.sub(r"\\[\"'^`~=.]", "", text)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^0-9a-z]+", " ", text.lower())
+    return text.strip()
+
+
+def title_tokens(text: str) -> list[str]:
+    """Return the informative words of a normalized title (no stopwords, len >= 3)."""
+    return [t for t in normalize_text(text).split() if len(t) >= 3 and t not in STOPWORDS]
+
+
+def char_ngrams(text: str, n: int = 3) -> frozenset[str]:
+    """
+    Return the set of character n-grams of normalized text, ignoring spaces.
+
+    Dropping spaces makes the n-grams robust to words split by extraction
+    ("multi- tiered" and "multitiered" share all their n-grams).
+    """
+    compact = normalize_text(text).replace(" ", "")
+    if len(compact) <= n:
+        return frozenset([compact]) if compact else frozenset()
+    return frozenset(compact[i : i + n] for i in range(len(compact) - n + 1))
+
+
+def extract_doi(text: str) -> str | None:
+    """Find a DOI in free text, returned in normalized lowercase form."""
+    match = DOI_PATTERN.search(text)
+    if not match:
+        return None
+    return match.group(1).lower().rstrip(".,;)")
+
+
+def guess_title(reference_text: str) -> str:
+    """
+    Guess the title of a free-text reference entry.
+
+    Handles the common styles:
+    - IEEE: A. Author and B. Author, "Title," in Proc. ...
+    - ACM: A. Author and B. Author. 2020. Title. In Proc. ...
+    - LNCS/Springer: Author, A., Author, B.: Title. In: Proc. ...
+
+    Falls back to the second sentence-like segment of the entry.
+    """
+    quoted = re.search(r"[\"“”]([^\"“”]{8,})[\"“”]", reference_text)
+    if quoted:
+        return quoted.group(1).strip(" ,.")
+
+    acm = re.search(r"\.\s+(?:19|20)\d{2}[a-z]?\.\s+([^.?!]{8,}[.?!]?)", reference_text)
+    if acm:
+        return acm.group(1).strip(" ,.")
+
+    lncs = re.search(r"[A-Z]\.(?:,\s*[A-Z]\.)*:\s+([^.?!]{8,})", reference_text)
+    if lncs:
+        return lncs.group(1).strip(" ,.")
+
+    segments = [s.strip() for s in re.split(r"(?<=[a-z\d)])\.\s+", reference_text) if s.strip()]
+    if len(segments) >= 2:
+        return segments[1].strip(" ,.")
+    return reference_text.strip(" ,.")
+
+
+def fingerprint(reference_text: str) -> str:
+    """
+    Compute a stable fingerprint identifying the work a reference cites.
+
+    Uses the normalized guessed title, so the same work cited in different
+    styles across papers maps to the same fingerprint. Falls back to the DOI,
+    then to the whole entry, when no usable title can be found.
+    """
+    title_print = title_fingerprint(guess_title(reference_text))
+    if title_print is not None:
+        return title_print
+    doi = extract_doi(reference_text)
+    key = "d:" + doi if doi else "r:" + normalize_text(reference_text).replace(" ", "")
+    return _digest(key)
+
+
+def title_fingerprint(title: str) -> str | None:
+    """
+    Fingerprint a known title, or None if it is too short to be distinctive.
+
+    Matches ``fingerprint`` for references whose guessed title is ``title``,
+    so a converted paper can be looked up among the works cited by others.
+    """
+    compact = normalize_text(title).replace(" ", "")
+    if len(compact) < MIN_FINGERPRINT_TITLE_LENGTH:
+        return None
+    return _digest("t:" + compact)
+
+
+def _digest(key: str) -> str:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
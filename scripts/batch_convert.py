@@ -1,6 +1,17 @@
 #!/usr/bin/env python3
 """Batch convert PDFs to markdown using pdf2md.
 
+PDFs are extracted one at a time by `pdf2md convert`. With agent cleanup,
+each converted document is handed to an agent scheduler that cleans up to
+--agent-concurrency documents at once while the next PDFs are extracted.
+Every agent run is bounded by --agent-timeout (and optionally turn and
+token budgets), retried on transient API failures, and leaves its markdown
+as post-processed if it fails or the batch is interrupted.
+
+With --agent-auto, documents whose quality score after post-processing
+(written to metrics.json by `pdf2md convert`) is below --agent-threshold
+are not sent to the agent.
+
 Usage:
     uv run python scripts/batch_convert.py INPUT_FOLDER OUTPUT_FOLDER [OPTIONS]
 
@@ -11,19 +22,26 @@ Example:
 from __future__ import annotations
 
 import argparse
-import subprocess
+import asyncio
+import json
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
 
+from pdf2md.postprocess.quality import DEFAULT_AGENT_THRESHOLD
+
 
 def get_pdf_files(input_dir: Path) -> list[Path]:
     """Get all PDF files in directory, sorted alphabetically."""
     return sorted(input_dir.glob("*.pdf"))
 
 
-def convert_pdf(
+# Default wall-clock limit of one document's agent cleanup
+DEFAULT_AGENT_TIMEOUT = 30 * 60
+
+
+async def convert_pdf(
     pdf_path: Path,
     output_dir: Path,
     log_file: Path | None = None,
@@ -31,10 +49,11 @@ def convert_pdf(
     keep_raw: bool = True,
     enrich: bool = True,
     describe: bool = True,
-    agent: bool = True,
 ) -> tuple[bool, float, str]:
     """
-    Convert a single PDF using pdf2md CLI.
+    Convert a single PDF using pdf2md CLI, without agent cleanup.
+
+    Runs as a subprocess, so agent sessions keep running meanwhile.
 
     Returns:
         Tuple of (success: bool, duration_seconds: float, output: str)
@@ -47,8 +66,6 @@ def convert_pdf(
         cmd.append("--enrich")
     if describe:
         cmd.append("--describe")
-    if agent:
-        cmd.append("--agent")
 
     start_time = time.time()
     start_timestamp = datetime.now().isoformat()
@@ -63,21 +80,20 @@ def convert_pdf(
             f.write("=" * 60 + "\n\n")
 
     try:
+        stdout = b""
         # Stream output to log file in real-time
         if log_file:
             with open(log_file, "a", encoding="utf-8") as f:
-                result = subprocess.run(
-                    cmd,
-                    stdout=f,
-                    stderr=subprocess.STDOUT,
-                    text=True,
+                process = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=f, stderr=asyncio.subprocess.STDOUT
                 )
+                returncode = await process.wait()
         else:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
             )
+            stdout, _ = await process.communicate()
+            returncode = process.returncode
 
         duration = time.time() - start_time
 
@@ -87,14 +103,11 @@ def convert_pdf(
                 f.write("\n\n" + "=" * 60 + "\n")
                 f.write(f"# Completed: {datetime.now().isoformat()}\n")
                 f.write(f"# Duration: {duration:.1f}s\n")
-                f.write(f"# Exit code: {result.returncode}\n")
-                f.write(f"# Status: {'SUCCESS' if result.returncode == 0 else 'FAILED'}\n")
-
-        output = ""
-        if not log_file and result.stdout:
-            output = result.stdout
+                f.write(f"# Exit code: {returncode}\n")
+                f.write(f"# Status: {'SUCCESS' if returncode == 0 else 'FAILED'}\n")
 
-        return result.returncode == 0, duration, output
+        output = stdout.decode("utf-8", errors="replace")
+        return returncode == 0, duration, output
     except Exception as e:
         duration = time.time() - start_time
         error_msg = f"Error: {e}"
@@ -105,6 +118,87 @@ def convert_pdf(
         return False, duration, error_msg
 
 
+# PDFs listed per outlier ranking in the summary
+AGENT_OUTLIERS = 5
+
+
+def load_metrics(output_dir: Path, name: str) -> dict:
+    """A converted PDF's metrics.json, or {} if there is none."""
+    metrics_path = output_dir / Path(name).stem / "metrics.json"
+    try:
+        return json.loads(metrics_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def load_agent_metrics(output_dir: Path, name: str) -> dict | None:
+    """Agent telemetry written by `pdf2md convert --agent`, or None if there is none."""
+    return load_metrics(output_dir, name).get("agent")
+
+
+def agent_skipped(args, quality: dict | None) -> bool:
+    """Whether --agent-auto leaves out a document with this quality score."""
+    return args.agent_auto and quality is not None and quality["score"] < args.agent_threshold
+
+
+def write_agent_usage(f, usage: list[tuple[str, dict]]) -> None:
+    """Write totals, per-PDF means and outliers of agent telemetry."""
+    keys = (
+        "sessions",
+        "failed_sessions",
+        "cache_hits",
+        "turns",
+        "input_tokens",
+        "output_tokens",
+        "cache_read_tokens",
+        "cache_creation_tokens",
+        "total_tokens",
+        "cost_usd",
+        "wall_seconds",
+    )
+    totals = {key: sum(m.get(key, 0) for _, m in usage) for key in keys}
+    tool_calls: dict[str, int] = {}
+    for _, m in usage:
+        for tool, count in m.get("tool_calls", {}).items():
+            tool_calls[tool] = tool_calls.get(tool, 0) + count
+
+    f.write("\n" + "-" * 60 + "\n")
+    f.write(f"AGENT USAGE ({len(usage)} PDFs with agent metrics)\n")
+    f.write("-" * 60 + "\n\n")
+    f.write(f"{'':24s} {'total':>14s} {'per PDF':>12s}\n")
+    for key in keys:
+        total = totals[key]
+        mean = total / len(usage)
+        if key == "cost_usd":
+            f.write(f"  {key:22s} {total:14.2f} {mean:12.3f}\n")
+        elif key == "wall_seconds":
+            f.write(f"  {key:22s} {total:14.1f} {mean:12.1f}\n")
+        else:
+            f.write(f"  {key:22s} {total:14,d} {mean:12,.0f}\n")
+    if tool_calls:
+        calls = ", ".join(
+            f"{tool} {count}" for tool, count in sorted(tool_calls.items(), key=lambda t: -t[1])
+        )
+        f.write(f"\n  Tool calls: {calls}\n")
+    tiers: dict[str, int] = {}
+    for _, m in usage:
+        if m.get("route"):
+            tiers[m["route"]["tier"]] = tiers.get(m["route"]["tier"], 0) + 1
+    if tiers:
+        routed = ", ".join(f"{tier} {count}" for tier, count in sorted(tiers.items()))
+        f.write(f"  Model tiers: {routed}\n")
+
+    for title, key, fmt in (
+        ("Most tokens", "total_tokens", "{:,d} tokens"),
+        ("Longest agent time", "wall_seconds", "{:.1f}s"),
+    ):
+        f.write(f"\n  {title}:\n")
+        ranked = sorted(usage, key=lambda item: item[1].get(key, 0), reverse=True)
+        for name, m in ranked[:AGENT_OUTLIERS]:
+            value = fmt.format(m.get(key, 0))
+            f.write(f"    {value:>16s}  {m.get('turns', 0):4d} turns  {name}\n")
+
+
 def write_summary_log(
     log_file: Path,
     results: list[tuple[str, bool, float]],
@@ -114,6 +208,17 @@ def write_summary_log(
     """Write a summary log of the batch conversion."""
     successful = sum(1 for _, success, _ in results if success)
     failed = len(results) - successful
+    # Quality scores, agent telemetry and errors from each converted PDF's metrics.json
+    metrics = {name: load_metrics(args.output_dir, name) for name, success, _ in results if success}
+    quality = {name: m["quality"] for name, m in metrics.items() if "quality" in m}
+    agent = {
+        name: m.get("agent")
+        for name, m in metrics.items()
+        if not args.no_agent and not agent_skipped(args, quality.get(name))
+    }
+    agent_skipped_count = len(metrics) - len(agent) if not args.no_agent else 0
+    agent_failed = [name for name, m in agent.items() if m is not None and m.get("error")]
+    agent_pending = sum(1 for m in agent.values() if m is None)
 
     with open(log_file, "w", encoding="utf-8") as f:
         f.write("=" * 60 + "\n")
@@ -127,13 +232,30 @@ def write_summary_log(
         f.write(f"Successful: {successful}\n")
         f.write(f"Failed:     {failed}\n")
         f.write(f"Duration:   {total_duration/60:.1f} minutes ({total_duration:.1f}s)\n")
-        f.write(f"Average:    {total_duration/len(results):.1f}s per PDF\n\n")
+        f.write(f"Average:    {total_duration / len(results):.1f}s per PDF\n")
+        if quality:
+            mean_score = sum(q["score"] for q in quality.values()) / len(quality)
+            f.write(f"Quality:    mean score {mean_score:.1f} after post-processing\n")
+        if agent or agent_skipped_count:
+            cleaned = len(agent) - len(agent_failed) - agent_pending
+            f.write(
+                f"Agent:      {cleaned} cleaned, {len(agent_failed)} failed, "
+                f"{agent_pending} pending, {agent_skipped_count} skipped\n"
+            )
+        f.write("\n")
 
         f.write("Options:\n")
         f.write(f"  - Keep raw:      {not args.no_raw}\n")
         f.write(f"  - Enrich:        {not args.no_enrich}\n")
         f.write(f"  - VLM describe:  {not args.no_describe}\n")
-        f.write(f"  - Agent cleanup: {not args.no_agent}\n\n")
+        f.write(f"  - Agent cleanup: {not args.no_agent}\n")
+        if not args.no_agent:
+            f.write(f"  - Agent concurrency: {args.agent_concurrency}\n")
+            f.write(f"  - Agent timeout:     {args.agent_timeout:g}s\n")
+            if args.agent_auto:
+                f.write(f"  - Agent threshold:   {args.agent_threshold:g}\n")
+            f.write(f"  - Agent routing:     {args.agent_route}\n")
+        f.write("\n")
 
         # Results table
         f.write("-" * 60 + "\n")
@@ -142,7 +264,25 @@ def write_summary_log(
 
         for name, success, duration in results:
             status = "OK" if success else "FAILED"
-            f.write(f"[{status:6s}] {duration:7.1f}s  {name}\n")
+            note = ""
+            if name in agent_failed:
+                note = "  (agent failed)"
+            elif name in agent and agent[name] is None:
+                note = "  (agent pending)"
+            elif name in metrics and name not in agent and not args.no_agent:
+                note = f"  (agent skipped, score {quality[name]['score']:g})"
+            f.write(f"[{status:6s}] {duration:7.1f}s  {name}{note}\n")
+
+        usage = [(name, m) for name, m in agent.items() if m is not None]
+        if usage:
+            write_agent_usage(f, usage)
+
+        if agent_failed:
+            f.write("\n" + "-" * 60 + "\n")
+            f.write("AGENT FAILURES (markdown left as post-processed)\n")
+            f.write("-" * 60 + "\n\n")
+            for name in agent_failed:
+                f.write(f"  - {name}: {agent[name]['error']}\n")
 
         if failed > 0:
             f.write("\n" + "-" * 60 + "\n")
@@ -176,11 +316,12 @@ Output structure:
   │   ├── paper-name-1.log
   │   ├── paper-name-2.log
   │   └── ...
-  ├── batch_summary.log        # Overall summary with success/fail
+  ├── batch_summary.log        # Overall summary with success/fail and agent usage
   ├── paper-name-1/            # Converted paper 1
   │   ├── paper-name-1.md
   │   ├── paper-name-1_raw.md
   │   ├── enrichments.json
+  │   ├── metrics.json         # Pass metrics and agent usage (in the summary)
   │   └── img/
   └── paper-name-2/            # Converted paper 2
       └── ...
@@ -216,6 +357,54 @@ Output structure:
         action="store_true",
         help="Don't run Claude agent cleanup (faster)",
     )
+    parser.add_argument(
+        "--agent-concurrency",
+        type=int,
+        default=4,
+        help="Documents cleaned by the agent at once, while extraction continues (default: 4)",
+    )
+    parser.add_argument(
+        "--agent-timeout",
+        type=float,
+        default=DEFAULT_AGENT_TIMEOUT,
+        help=f"Seconds before one document's agent cleanup is abandoned "
+        f"(default: {DEFAULT_AGENT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--agent-max-turns",
+        type=int,
+        default=None,
+        help="Most agent turns per document",
+    )
+    parser.add_argument(
+        "--agent-max-tokens",
+        type=int,
+        default=None,
+        help="Most agent tokens (input, output and prompt cache) per document",
+    )
+    parser.add_argument(
+        "--agent-auto",
+        action="store_true",
+        help="Run the agent only on documents whose quality score reaches --agent-threshold",
+    )
+    parser.add_argument(
+        "--agent-threshold",
+        type=float,
+        default=DEFAULT_AGENT_THRESHOLD,
+        help="With --agent-auto: quality score (weighted defect count) that calls for the agent "
+        f"(default: {DEFAULT_AGENT_THRESHOLD:g})",
+    )
+    parser.add_argument(
+        "--agent-route",
+        action="store_true",
+        help="Pick each document's model tier and prompt tasks from its size and defects",
+    )
+    parser.add_argument(
+        "--agent-retries",
+        type=int,
+        default=2,
+        help="Retries of an agent run after a transient API failure (default: 2)",
+    )
     parser.add_argument(
         "--skip",
         type=int,
@@ -289,54 +478,98 @@ Output structure:
     print(f"\nLogs directory: {logs_dir.absolute()}")
     print(f"Summary log:    {args.output_dir.absolute() / 'batch_summary.log'}")
 
+    return asyncio.run(run_batch(args, pdf_files, logs_dir))
+
+
+async def run_batch(args, pdf_files: list[Path], logs_dir: Path) -> int:
+    """Convert the PDFs one by one, cleaning converted ones with the agent meanwhile."""
+    total_pdfs = len(pdf_files)
+    summary_log = args.output_dir / "batch_summary.log"
+
+    scheduler = None
+    if not args.no_agent:
+        from pdf2md.agent import AgentBudget, AgentCache, AgentScheduler
+
+        scheduler = AgentScheduler(
+            max_concurrency=args.agent_concurrency,
+            retries=args.agent_retries,
+            budget=AgentBudget(args.agent_timeout, args.agent_max_turns, args.agent_max_tokens),
+            cache=AgentCache(),
+            route=args.agent_route,
+        )
+
+    def agent_done(name: str, log_file: Path, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        outcome = task.result()
+        status = "SUCCESS" if outcome.ok else f"FAILED ({outcome.error})"
+        print(f"    Agent {status} after {outcome.attempts} attempt(s): {name}")
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(f"# Agent: {status}, {outcome.attempts} attempt(s)\n")
+            f.write(f"# Agent usage: {outcome.telemetry.describe()}\n")
+
     # Track results
     results: list[tuple[str, bool, float]] = []
     total_start = time.time()
 
-    for i, pdf_path in enumerate(pdf_files, 1):
-        print(f"\n[{i}/{total_pdfs}] Processing: {pdf_path.name}")
-        print(f"    Log: logs/{pdf_path.stem}.log")
-        print("-" * 60)
-
-        # Individual log file for this PDF
-        log_file = logs_dir / f"{pdf_path.stem}.log"
-
-        success, duration, output = convert_pdf(
-            pdf_path,
-            args.output_dir,
-            log_file=log_file,
-            keep_raw=not args.no_raw,
-            enrich=not args.no_enrich,
-            describe=not args.no_describe,
-            agent=not args.no_agent,
-        )
+    try:
+        for i, pdf_path in enumerate(pdf_files, 1):
+            print(f"\n[{i}/{total_pdfs}] Processing: {pdf_path.name}")
+            print(f"    Log: logs/{pdf_path.stem}.log")
+            print("-" * 60)
+
+            # Individual log file for this PDF
+            log_file = logs_dir / f"{pdf_path.stem}.log"
+
+            success, duration, output = await convert_pdf(
+                pdf_path,
+                args.output_dir,
+                log_file=log_file,
+                keep_raw=not args.no_raw,
+                enrich=not args.no_enrich,
+                describe=not args.no_describe,
+            )
 
-        results.append((pdf_path.name, success, duration))
+            results.append((pdf_path.name, success, duration))
+
+            status = "SUCCESS" if success else "FAILED"
+            print(f"\n[{i}/{total_pdfs}] {status} in {duration:.1f}s: {pdf_path.name}")
+
+            md_path = args.output_dir / pdf_path.stem / f"{pdf_path.stem}.md"
+            quality = load_metrics(args.output_dir, pdf_path.name).get("quality")
+            if quality is not None:
+                print(f"    Quality score: {quality['score']:g}")
+            if scheduler is not None and success and agent_skipped(args, quality):
+                print(f"    Agent skipped: score below {args.agent_threshold:g}")
+                with open(log_file, "a", encoding="utf-8") as f:
+                    f.write(f"# Agent: skipped, quality score {quality['score']:g}\n")
+            elif scheduler is not None and success and md_path.exists():
+                task = scheduler.submit(md_path)
+                task.add_done_callback(
+                    lambda t, name=pdf_path.name, log=log_file: agent_done(name, log, t)
+                )
+                print("    Queued for agent cleanup")
 
-        status = "SUCCESS" if success else "FAILED"
-        print(f"\n[{i}/{total_pdfs}] {status} in {duration:.1f}s: {pdf_path.name}")
+            # Update summary log after each PDF (for monitoring progress)
+            write_summary_log(summary_log, results, time.time() - total_start, args)
 
-        # Update summary log after each PDF (for monitoring progress)
-        total_duration_so_far = time.time() - total_start
-        write_summary_log(
-            args.output_dir / "batch_summary.log",
-            results,
-            total_duration_so_far,
-            args,
-        )
+        if scheduler is not None:
+            print("\nWaiting for agent cleanup to finish...")
+            await scheduler.join()
+    except BaseException:
+        # Interrupted: stop the agent runs, which restores their documents
+        if scheduler is not None:
+            await scheduler.cancel()
+        raise
 
     # Final summary
     total_duration = time.time() - total_start
     successful = sum(1 for _, success, _ in results if success)
     failed = total_pdfs - successful
+    agent_failed = [o for o in scheduler.outcomes if not o.ok] if scheduler is not None else []
 
     # Write final summary log
-    write_summary_log(
-        args.output_dir / "batch_summary.log",
-        results,
-        total_duration,
-        args,
-    )
+    write_summary_log(summary_log, results, total_duration, args)
 
     print(f"\n{'=' * 60}")
     print("BATCH CONVERSION COMPLETE")
@@ -344,10 +577,15 @@ Output structure:
     print(f"Total:      {total_pdfs} PDFs")
     print(f"Successful: {successful}")
     print(f"Failed:     {failed}")
+    if scheduler is not None:
+        print(
+            f"Agent:      {len(scheduler.outcomes) - len(agent_failed)} cleaned, "
+            f"{len(agent_failed)} failed"
+        )
     print(f"Duration:   {total_duration/60:.1f} minutes ({total_duration:.1f}s)")
     print(f"Average:    {total_duration/total_pdfs:.1f}s per PDF")
     print(f"Output:     {args.output_dir.absolute()}")
-    print(f"Summary:    {args.output_dir.absolute() / 'batch_summary.log'}")
+    print(f"Summary:    {summary_log.absolute()}")
     print(f"Logs:       {logs_dir.absolute()}")
 
     if failed > 0:
@@ -357,7 +595,12 @@ Output structure:
                 print(f"  - {name}")
                 print(f"    Log: logs/{Path(name).stem}.log")
 
-    return 0 if failed == 0 else 1
+    if agent_failed:
+        print("\nAgent cleanup failed (markdown left as post-processed):")
+        for outcome in agent_failed:
+            print(f"  - {outcome.md_path.name}: {outcome.error}")
+
+    return 0 if failed == 0 and not agent_failed else 1
 
 
 if __name__ == "__main__":
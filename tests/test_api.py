@@ -0,0 +1,126 @@
+"""Unit tests for the async library API, with a fake extraction and the scripted backend."""
+
+import asyncio
+import json
+
+import pytest
+
+from pdf2md import api
+from pdf2md.agent.backends import ScriptedBackend, use_backend
+from pdf2md.agent.cleanup import run_cleanup_agent_sync
+from pdf2md.api import convert_async
+from pdf2md.postprocess.paragraphs import PAGE_BREAK_MARKER
+
+RAW = "# Paper\n\nBroken  text here.\n\nMore  text."
+
+
+def _squeeze(text):
+    return text.replace("  ", " ")
+
+
+@pytest.fixture
+def fake_extraction(monkeypatch):
+    """Replace Docling with a function that writes RAW as the extracted markdown."""
+
+    def extract(pdf_path, output_dir, **options):
+        doc_dir = output_dir / pdf_path.stem
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        md_path = doc_dir / f"{pdf_path.stem}.md"
+        md_path.write_text(RAW, encoding="utf-8")
+        return md_path, []
+
+    monkeypatch.setattr(api, "extract_with_docling", extract)
+
+
+class TestConvertAsync:
+    """Tests for convert_async."""
+
+    def test_postprocess_and_agent(self, tmp_path, fake_extraction):
+        """Extraction, post-processing and the agent all run, and metrics.json has each step."""
+        backend = ScriptedBackend(transform=_squeeze)
+        with use_backend(backend):
+            result = asyncio.run(convert_async(tmp_path / "paper.pdf", tmp_path, agent=True))
+        assert result.md_path.read_text(encoding="utf-8") == _squeeze(RAW)
+        assert result.agent_ran and result.agent_error is None
+        assert result.quality is not None and result.passes
+        assert result.agent_telemetry.sessions == 1
+        metrics = json.loads((result.md_path.parent / "metrics.json").read_text(encoding="utf-8"))
+        assert {"postprocess", "quality", "agent"} <= set(metrics)
+
+    def test_raw_copy_without_markers(self, tmp_path, monkeypatch):
+        """The raw copy and unprocessed output carry no page-break markers."""
+
+        def extract(pdf_path, output_dir, **options):
+            md_path = output_dir / "paper" / "paper.md"
+            md_path.parent.mkdir(parents=True)
+            md_path.write_text(f"Text  one\n\n{PAGE_BREAK_MARKER}\n\nmore.", encoding="utf-8")
+            return md_path, []
+
+        monkeypatch.setattr(api, "extract_with_docling", extract)
+        result = asyncio.run(
+            convert_async(tmp_path / "paper.pdf", tmp_path, postprocess=False, keep_raw=True)
+        )
+        expected = "Text  one\n\nmore."
+        assert result.md_path.read_text(encoding="utf-8") == expected
+        raw_path = result.md_path.with_name("paper_raw.md")
+        assert raw_path.read_text(encoding="utf-8") == expected
+
+    def test_agent_auto_skips(self, tmp_path, fake_extraction):
+        """With agent_auto, a score below the threshold skips the agent."""
+        backend = ScriptedBackend(transform=_squeeze)
+        with use_backend(backend):
+            result = asyncio.run(
+                convert_async(
+                    tmp_path / "paper.pdf", tmp_path, agent_auto=True, agent_threshold=1000
+                )
+            )
+        assert not result.agent_ran
+        assert backend.sessions == 0
+
+    def test_concurrent_conversions(self, tmp_path, fake_extraction):
+        """Conversions awaited together share the loop without blocking each other."""
+
+        async def run():
+            return await asyncio.gather(
+                *(convert_async(tmp_path / f"paper{i}.pdf", tmp_path) for i in range(3))
+            )
+
+        results = asyncio.run(run())
+        assert [r.md_path.parent.name for r in results] == ["paper0", "paper1", "paper2"]
+
+    def test_cancel_restores_markdown(self, tmp_path, fake_extraction):
+        """Cancelling during the agent run stops it and leaves the post-processed markdown."""
+        backend = ScriptedBackend(transform=lambda text: "garbage", latency_seconds=5)
+
+        async def run():
+            task = asyncio.create_task(convert_async(tmp_path / "paper.pdf", tmp_path, agent=True))
+            while backend.sessions == 0:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with use_backend(backend):
+            asyncio.run(run())
+        content = (tmp_path / "paper" / "paper.md").read_text(encoding="utf-8")
+        assert content != "garbage"
+        assert "Broken" in content
+
+
+class TestSyncWrappers:
+    """Tests for the sync agent wrappers inside a running event loop."""
+
+    def test_sync_wrapper_in_running_loop(self, tmp_path):
+        """run_cleanup_agent_sync works from a coroutine, keeping the selected backend."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(RAW, encoding="utf-8")
+        backend = ScriptedBackend(transform=_squeeze)
+
+        async def handler():
+            return run_cleanup_agent_sync(md_path, raise_on_error=True)
+
+        with use_backend(backend):
+            summary = asyncio.run(handler())
+        assert summary
+        assert backend.sessions == 1
+        assert md_path.read_text(encoding="utf-8") == _squeeze(RAW)
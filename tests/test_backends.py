@@ -0,0 +1,150 @@
+"""Unit tests for the pluggable agent backends, run offline with the scripted backend."""
+
+import asyncio
+
+import pytest
+
+from pdf2md.agent.backends import (
+    ClaudeBackend,
+    RecordingBackend,
+    ScriptedBackend,
+    line_edits,
+    load_backend,
+    use_backend,
+)
+from pdf2md.agent.budget import AgentBudget, AgentTimeoutError
+from pdf2md.agent.cache import AgentCache
+from pdf2md.agent.chunked import run_chunked_cleanup_agent
+from pdf2md.agent.cleanup import run_cleanup_agent
+from pdf2md.agent.scheduler import AgentScheduler
+from pdf2md.agent.telemetry import collect_telemetry
+
+DOC = "# Paper\n\nBroken  text here.\n\nMore  text."
+CLEANED = "# Paper\n\nBroken text here.\n\nMore text."
+
+
+def _squeeze(text):
+    return text.replace("  ", " ")
+
+
+def _paper(tmp_path, content=DOC):
+    md_path = tmp_path / "paper.md"
+    md_path.write_text(content, encoding="utf-8")
+    return md_path
+
+
+class TestScriptedBackend:
+    """Tests for the offline stand-in of the Claude SDK."""
+
+    @pytest.mark.parametrize("mode", ["edit", "patch"])
+    def test_deterministic_edit(self, tmp_path, mode):
+        """Edit sessions edit the file; patch sessions answer with line edits that apply."""
+        md_path = _paper(tmp_path)
+        backend = ScriptedBackend(transform=_squeeze)
+        with use_backend(backend), collect_telemetry() as telemetry:
+            summary = asyncio.run(run_cleanup_agent(md_path, mode=mode, raise_on_error=True))
+        assert md_path.read_text(encoding="utf-8") == CLEANED
+        assert summary
+        assert (telemetry.sessions, telemetry.turns) == (1, 1)
+        assert telemetry.input_tokens > 0
+
+    def test_chunked_sessions(self, tmp_path):
+        """A chunked run gives every section session its own file to edit."""
+        md_path = _paper(tmp_path, "# A\n\nText  a.\n\n# B\n\nText  b.")
+        backend = ScriptedBackend(transform=_squeeze)
+        with use_backend(backend):
+            asyncio.run(run_chunked_cleanup_agent(md_path, raise_on_error=True))
+        assert md_path.read_text(encoding="utf-8") == "# A\n\nText a.\n\n# B\n\nText b."
+
+    def test_latency_hits_timeout(self, tmp_path):
+        """A session slower than the run's timeout is stopped and the file restored."""
+        md_path = _paper(tmp_path)
+        backend = ScriptedBackend(transform=_squeeze, latency_seconds=5)
+        budget = AgentBudget(timeout_seconds=0.05)
+        with use_backend(backend), pytest.raises(AgentTimeoutError):
+            asyncio.run(run_cleanup_agent(md_path, budget=budget, raise_on_error=True))
+        assert md_path.read_text(encoding="utf-8") == DOC
+
+    def test_injected_failure_retried(self, tmp_path):
+        """An injected rate limit on the first session is retried by the scheduler."""
+        md_path = _paper(tmp_path)
+        backend = ScriptedBackend(transform=_squeeze, fail_sessions=[1])
+
+        async def run():
+            with use_backend(backend):
+                async with AgentScheduler(backoff_seconds=0, write_metrics=False) as scheduler:
+                    task = scheduler.submit(md_path)
+            return task.result()
+
+        outcome = asyncio.run(run())
+        assert (outcome.ok, outcome.attempts) == (True, 2)
+        assert outcome.telemetry.failed_sessions == 1
+        assert md_path.read_text(encoding="utf-8") == CLEANED
+
+    def test_results_cached_per_backend(self, tmp_path):
+        """A second run on the same input is a cache hit, without a session."""
+        cache = AgentCache(tmp_path / "cache")
+        backend = ScriptedBackend(transform=_squeeze)
+        for name in ("a", "b"):
+            doc_dir = tmp_path / name
+            doc_dir.mkdir()
+            with use_backend(backend):
+                asyncio.run(run_cleanup_agent(_paper(doc_dir), cache=cache))
+        assert backend.sessions == 1
+
+
+class TestTranscripts:
+    """Tests for recording sessions and replaying them offline."""
+
+    def test_record_and_replay(self, tmp_path):
+        """A recorded run replays in another directory with the same edits and answer."""
+        transcript = tmp_path / "runs.jsonl"
+        first = tmp_path / "first"
+        second = tmp_path / "second"
+        first.mkdir()
+        second.mkdir()
+
+        recorder = RecordingBackend(ScriptedBackend(transform=_squeeze), transcript)
+        with use_backend(recorder):
+            recorded = asyncio.run(run_cleanup_agent(_paper(first)))
+
+        md_path = _paper(second)
+        with use_backend(ScriptedBackend(transcript=transcript)):
+            replayed = asyncio.run(run_cleanup_agent(md_path))
+        assert replayed == recorded
+        assert md_path.read_text(encoding="utf-8") == CLEANED
+
+    def test_unrecorded_prompt_fails(self, tmp_path):
+        """A prompt missing from the transcript is a failed run."""
+        transcript = tmp_path / "runs.jsonl"
+        transcript.write_text("", encoding="utf-8")
+        md_path = _paper(tmp_path)
+        with use_backend(ScriptedBackend(transcript=transcript)):
+            assert asyncio.run(run_cleanup_agent(md_path)) is None
+        assert md_path.read_text(encoding="utf-8") == DOC
+
+
+class TestBackendHelpers:
+    """Tests for line edits and backend specs."""
+
+    def test_line_edits(self):
+        """Replacements, deletions and insertions become non-overlapping line ranges."""
+        old = ["a", "b", "c", "d"]
+        new = ["a", "B", "c", "c2", "d"]
+        edits = line_edits(old, new, first_line=10)
+        assert [(e["start"], e["end"], e["replacement"]) for e in edits] == [
+            (11, 11, "B"),
+            (12, 12, "c\nc2"),
+        ]
+
+    def test_load_backend(self, tmp_path):
+        """Specs select the backend and its options; bad specs are refused."""
+        assert isinstance(load_backend("claude"), ClaudeBackend)
+        backend = load_backend("scripted:latency=0.1-0.2,failure_rate=0.5,fail_sessions=1+3,seed=7")
+        assert backend.latency_seconds == (0.1, 0.2)
+        assert backend.failure_rate == 0.5
+        assert backend.fail_sessions == {1, 3}
+        assert isinstance(load_backend(f"record:{tmp_path / 'runs.jsonl'}"), RecordingBackend)
+        for spec in ("gpt", "scripted:speed=2", "scripted:failure=boom", "record"):
+            with pytest.raises(ValueError):
+                load_backend(spec)
@@ -0,0 +1,90 @@
+"""Unit tests for batch post-processing."""
+
+import json
+import os
+
+from pdf2md.extraction import furniture
+from pdf2md.postprocess.batch import (
+    postprocess_file,
+    postprocess_files,
+    rule_sources,
+    sidecar_path,
+)
+
+SAMPLE = "# Paper\n\nSee Fig. 1 and [2].\n\nFig. 1. Overview.\n\n## References\n\n[2] A. Author.\n"
+
+
+def _document(root, name="paper"):
+    doc_dir = root / name
+    (doc_dir / "img").mkdir(parents=True)
+    (doc_dir / "img" / "figure1.png").write_bytes(b"png")
+    md_path = doc_dir / f"{name}.md"
+    md_path.write_text(SAMPLE, encoding="utf-8")
+    return md_path
+
+
+class TestPostprocessFile:
+    """Tests for single-document processing and sidecar skipping."""
+
+    def test_processes_with_document_images(self, tmp_path):
+        """The document's img/ folder is discovered and figures are embedded."""
+        md_path = _document(tmp_path)
+        result = postprocess_file(md_path)
+        assert result.status == "processed"
+        assert result.images == 1
+        assert "![Figure 1](./img/figure1.png)" in md_path.read_text(encoding="utf-8")
+        assert sidecar_path(md_path).exists()
+
+    def test_unchanged_file_skipped(self, tmp_path):
+        """A second in-place run with the same rules is skipped."""
+        md_path = _document(tmp_path)
+        postprocess_file(md_path)
+        assert postprocess_file(md_path).status == "skipped"
+        assert postprocess_file(md_path, force=True).status == "processed"
+
+    def test_edited_file_reprocessed(self, tmp_path):
+        """Editing the markdown invalidates the sidecar."""
+        md_path = _document(tmp_path)
+        postprocess_file(md_path)
+        md_path.write_text(SAMPLE + "\nNew text [2].\n", encoding="utf-8")
+        assert postprocess_file(md_path).status == "processed"
+
+    def test_rules_change_reprocessed(self, tmp_path):
+        """A sidecar written by different rules does not skip the file."""
+        md_path = _document(tmp_path)
+        postprocess_file(md_path)
+        record = json.loads(sidecar_path(md_path).read_text(encoding="utf-8"))
+        record["rules"] = "older"
+        sidecar_path(md_path).write_text(json.dumps(record), encoding="utf-8")
+        assert postprocess_file(md_path).status == "processed"
+
+    def test_pdf_change_reprocessed(self, tmp_path, monkeypatch):
+        """Another or a modified source PDF invalidates the sidecar."""
+        monkeypatch.setattr(furniture, "detect_running_lines_from_pdf", lambda path: [])
+        md_path = _document(tmp_path)
+        first, second = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        first.write_bytes(b"%PDF-1")
+        second.write_bytes(b"%PDF-2")
+        postprocess_file(md_path, pdf_path=first)
+        assert postprocess_file(md_path, pdf_path=first).status == "skipped"
+        assert postprocess_file(md_path, pdf_path=second).status == "processed"
+        stat = second.stat()
+        os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert postprocess_file(md_path, pdf_path=second).status == "processed"
+
+    def test_furniture_in_rules_version(self):
+        """Running header detection is part of the rules fingerprint."""
+        assert "furniture.py" in [path.name for path in rule_sources()]
+
+
+class TestPostprocessFiles:
+    """Tests for processing many documents."""
+
+    def test_pool_processes_all_files(self, tmp_path):
+        """Every file gets a result, and failures do not stop the batch."""
+        files = [_document(tmp_path, f"paper{i}") for i in range(3)]
+        missing = tmp_path / "missing.md"
+        results = postprocess_files([*files, missing], jobs=2)
+        statuses = {r.path: r.status for r in results}
+        assert [statuses[f] for f in files] == ["processed"] * 3
+        assert statuses[missing] == "failed"
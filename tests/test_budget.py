@@ -0,0 +1,146 @@
+"""Unit tests for agent budgets, timeouts and restoring the pre-agent markdown."""
+
+import asyncio
+
+import pytest
+
+from pdf2md.agent import chunked, cleanup
+from pdf2md.agent.budget import (
+    AgentBudget,
+    AgentError,
+    AgentRun,
+    AgentTimeoutError,
+    BudgetExceededError,
+    current_run,
+)
+from pdf2md.agent.chunked import run_chunked_cleanup_agent, split_into_chunks
+from pdf2md.agent.cleanup import run_cleanup_agent
+
+DOC = "# Paper\n\nBroken  text."
+
+
+def _paper(tmp_path, content=DOC):
+    md_path = tmp_path / "paper.md"
+    md_path.write_text(content, encoding="utf-8")
+    return md_path
+
+
+class TestAgentRun:
+    """Tests for counting a run's spend."""
+
+    def test_turn_and_token_budgets(self):
+        """Going over either limit raises; unlimited budgets never do."""
+        run = AgentRun(AgentBudget(max_turns=10, max_tokens=1000))
+        run.add_turns(6)
+        assert run.remaining_turns() == 4
+        with pytest.raises(BudgetExceededError):
+            run.add_turns(5)
+        run.add_tokens(1000)
+        with pytest.raises(BudgetExceededError):
+            run.add_tokens(1)
+
+        unlimited = AgentRun()
+        unlimited.add_turns(10**6)
+        unlimited.add_tokens(10**9)
+        assert unlimited.remaining_turns() is None
+
+
+class TestRunGuarded:
+    """Tests for failure handling of run_cleanup_agent, with fake sessions."""
+
+    def test_failure_restores_and_raises(self, tmp_path, monkeypatch):
+        """A failed session's partial edits are undone; the session error is raised."""
+        md_path = _paper(tmp_path)
+
+        async def failing_session(prompt, cwd, *, model=None, verbose=False):
+            md_path.write_text("half-edited", encoding="utf-8")
+            current_run().record_error(AgentError("overloaded", transient=True))
+            return None
+
+        monkeypatch.setattr(cleanup, "run_agent_session", failing_session)
+        assert asyncio.run(run_cleanup_agent(md_path)) is None
+        assert md_path.read_text(encoding="utf-8") == DOC
+
+        with pytest.raises(AgentError) as excinfo:
+            asyncio.run(run_cleanup_agent(md_path, raise_on_error=True))
+        assert excinfo.value.transient
+        assert md_path.read_text(encoding="utf-8") == DOC
+
+    def test_silent_success_keeps_edits(self, tmp_path, monkeypatch):
+        """A session that edits the file but gives no final text still succeeded."""
+        md_path = _paper(tmp_path)
+
+        async def tool_only_session(prompt, cwd, *, model=None, verbose=False):
+            md_path.write_text("cleaned", encoding="utf-8")
+            return None
+
+        monkeypatch.setattr(cleanup, "run_agent_session", tool_only_session)
+        assert asyncio.run(run_cleanup_agent(md_path, raise_on_error=True)) == ""
+        assert md_path.read_text(encoding="utf-8") == "cleaned"
+
+    def test_timeout(self, tmp_path, monkeypatch):
+        """A session that runs past the timeout is stopped and its edits undone."""
+        md_path = _paper(tmp_path)
+
+        async def stuck_session(prompt, cwd, *, model=None, verbose=False):
+            md_path.write_text("half-edited", encoding="utf-8")
+            await asyncio.sleep(60)
+
+        monkeypatch.setattr(cleanup, "run_agent_session", stuck_session)
+        budget = AgentBudget(timeout_seconds=0.05)
+        with pytest.raises(AgentTimeoutError):
+            asyncio.run(run_cleanup_agent(md_path, budget=budget, raise_on_error=True))
+        assert md_path.read_text(encoding="utf-8") == DOC
+
+    def test_cancellation_restores(self, tmp_path, monkeypatch):
+        """Cancelling a run leaves the markdown as it was before the agent."""
+        md_path = _paper(tmp_path)
+        started = asyncio.Event()
+
+        async def slow_session(prompt, cwd, *, model=None, verbose=False):
+            md_path.write_text("half-edited", encoding="utf-8")
+            started.set()
+            await asyncio.sleep(60)
+
+        async def cancel_midway():
+            task = asyncio.ensure_future(run_cleanup_agent(md_path))
+            await started.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        monkeypatch.setattr(cleanup, "run_agent_session", slow_session)
+        asyncio.run(cancel_midway())
+        assert md_path.read_text(encoding="utf-8") == DOC
+
+    def test_chunked_budget_cancels_other_sections(self, tmp_path, monkeypatch):
+        """Sections share the token budget; going over it stops every section."""
+        content = "# A\n\nText a.\n\n# B\n\nText b.\n\n# C\n\nText c."
+        md_path = _paper(tmp_path, content)
+        cancelled = []
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            if "Text a." in prompt:
+                await asyncio.sleep(0)
+                current_run().add_tokens(600)
+                return "a"
+            try:
+                current_run().add_tokens(300)
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(prompt)
+                raise
+
+        monkeypatch.setattr(chunked, "run_agent_session", fake_session)
+        monkeypatch.setattr(
+            chunked,
+            "split_into_chunks",
+            lambda content, overlap_lines: split_into_chunks(
+                content, overlap_lines=overlap_lines, min_chunk_chars=0
+            ),
+        )
+        budget = AgentBudget(max_tokens=1000)
+        with pytest.raises(BudgetExceededError):
+            asyncio.run(run_chunked_cleanup_agent(md_path, budget=budget, raise_on_error=True))
+        assert len(cancelled) == 2
+        assert md_path.read_text(encoding="utf-8") == content
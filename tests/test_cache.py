@@ -0,0 +1,157 @@
+"""Unit tests for the agent result cache."""
+
+import asyncio
+import json
+import os
+
+from pdf2md.agent import cleanup, patches
+from pdf2md.agent.budget import AgentError, current_run
+from pdf2md.agent.cache import AgentCache, CachedResult, cache_key, default_cache_dir
+from pdf2md.agent.cleanup import run_cleanup_agent
+from pdf2md.agent.patches import patch_record_path
+
+
+def _key(**overrides):
+    parts = dict(content="# Paper", prompt="prompt", model=None, tools=("Read",), mode="edit")
+    parts.update(overrides)
+    return cache_key(
+        parts["content"],
+        parts["prompt"],
+        model=parts["model"],
+        tools=parts["tools"],
+        mode=parts["mode"],
+        backend=parts.get("backend", "claude"),
+    )
+
+
+class TestCacheKey:
+    """Tests for what the key depends on."""
+
+    def test_every_input_changes_key(self):
+        """Content, prompt, model, tools, mode and backend all change the key."""
+        base = _key()
+        assert _key() == base
+        for change in (
+            {"content": "# Other"},
+            {"prompt": "prompt v2"},
+            {"model": "claude-x"},
+            {"tools": ()},
+            {"mode": "patch"},
+            {"backend": "scripted"},
+        ):
+            assert _key(**change) != base, change
+
+    def test_tool_order_ignored(self):
+        """The tool set, not its order, is part of the key."""
+        assert _key(tools=("Read", "Edit")) == _key(tools=("Edit", "Read"))
+
+    def test_default_dir(self, monkeypatch, tmp_path):
+        """$PDF2MD_CACHE_DIR wins over $XDG_CACHE_HOME."""
+        monkeypatch.delenv("PDF2MD_CACHE_DIR", raising=False)
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert default_cache_dir() == tmp_path / "pdf2md" / "agent"
+        monkeypatch.setenv("PDF2MD_CACHE_DIR", str(tmp_path / "c"))
+        assert default_cache_dir() == tmp_path / "c"
+
+
+class TestAgentCache:
+    """Tests for storage and eviction."""
+
+    def test_round_trip(self, tmp_path):
+        """A stored result is returned by key; other keys miss."""
+        cache = AgentCache(tmp_path)
+        cache.put(_key(), CachedResult("clean", "summary", None))
+        assert cache.get(_key()) == CachedResult("clean", "summary", None)
+        assert cache.get(_key(content="other")) is None
+
+    def test_corrupt_entry_dropped(self, tmp_path):
+        """An unreadable entry is a miss and is removed."""
+        cache = AgentCache(tmp_path)
+        cache.put(_key(), CachedResult("clean", "summary"))
+        path = next(tmp_path.glob("*/*.json"))
+        path.write_text("{not json", encoding="utf-8")
+        assert cache.get(_key()) is None
+        assert not path.exists()
+
+    def test_lru_eviction(self, tmp_path):
+        """Over the size limit, the least recently used entries go first."""
+        cache = AgentCache(tmp_path, max_bytes=10**9)
+        keys = [_key(content=str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, CachedResult("x" * 1000, "s"))
+            path = next(tmp_path.glob(f"*/{key}.json"))
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        # Using the oldest entry makes the second one least recently used
+        assert cache.get(keys[0]) is not None
+
+        cache.max_bytes = 2500
+        assert cache.evict() == 1
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+class TestCachedAgentRun:
+    """Tests for cached runs of the cleanup agent, with a fake session."""
+
+    def test_rerun_restores_without_session(self, tmp_path, monkeypatch):
+        """The second run on the same input starts no session."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text("Broken  text", encoding="utf-8")
+        calls = []
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            calls.append(model)
+            md_path.write_text("Clean text", encoding="utf-8")
+            return "fixed spacing"
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        cache = AgentCache(tmp_path / "cache")
+
+        assert asyncio.run(run_cleanup_agent(md_path, cache=cache)) == "fixed spacing"
+        md_path.write_text("Broken  text", encoding="utf-8")
+        assert asyncio.run(run_cleanup_agent(md_path, cache=cache)) == "fixed spacing"
+        assert md_path.read_text(encoding="utf-8") == "Clean text"
+        assert calls == [None]
+
+        # Another model is another key
+        md_path.write_text("Broken  text", encoding="utf-8")
+        asyncio.run(run_cleanup_agent(md_path, model="claude-x", cache=cache))
+        assert calls == [None, "claude-x"]
+
+    def test_failure_not_cached(self, tmp_path, monkeypatch):
+        """A failed run is retried next time."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text("text", encoding="utf-8")
+        calls = []
+
+        async def failing_session(prompt, cwd, *, model=None, verbose=False):
+            calls.append(prompt)
+            current_run().record_error(AgentError("overloaded"))
+            return None
+
+        monkeypatch.setattr(cleanup, "run_agent_session", failing_session)
+        cache = AgentCache(tmp_path / "cache")
+        for _ in range(2):
+            assert asyncio.run(run_cleanup_agent(md_path, cache=cache)) is None
+        assert len(calls) == 2
+
+    def test_patch_record_restored(self, tmp_path, monkeypatch):
+        """In patch mode, a hit also restores the patch record."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text("a\n\n0 20 40\n\nb", encoding="utf-8")
+
+        async def fake_session(prompt, cwd, *, allowed_tools=(), model=None, verbose=False):
+            return json.dumps({"edits": [{"start": 3, "end": 4, "replacement": ""}]})
+
+        monkeypatch.setattr(patches, "run_agent_session", fake_session)
+        cache = AgentCache(tmp_path / "cache")
+        asyncio.run(run_cleanup_agent(md_path, mode="patch", cache=cache))
+        record = patch_record_path(md_path).read_text(encoding="utf-8")
+
+        patch_record_path(md_path).unlink()
+        md_path.write_text("a\n\n0 20 40\n\nb", encoding="utf-8")
+        monkeypatch.setattr(patches, "run_agent_session", None)
+        summary = asyncio.run(run_cleanup_agent(md_path, mode="patch", cache=cache))
+        assert summary.startswith("Applied 1 edits")
+        assert md_path.read_text(encoding="utf-8") == "a\n\nb"
+        assert patch_record_path(md_path).read_text(encoding="utf-8") == record
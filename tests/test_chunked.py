@@ -0,0 +1,174 @@
+"""Unit tests for section-chunked agent cleanup."""
+
+import asyncio
+
+from pdf2md.agent import chunked
+from pdf2md.agent.budget import AgentError, current_run
+from pdf2md.agent.chunked import (
+    CHUNK_PROMPT,
+    FINAL_PROMPT,
+    merge_chunks,
+    run_chunked_cleanup_agent,
+    split_into_chunks,
+)
+from pdf2md.agent.cleanup import CLEANUP_PROMPT
+
+PAPER = """# A Paper
+
+Author One, University
+
+## Abstract
+
+Abstract text.
+
+## 1. Introduction
+
+Intro text.
+
+### 1.1 Motivation
+
+More text.
+
+## 2. Design
+
+```
+## not a header
+```
+
+Design text.
+
+## References
+
+[1] A. Author, "Paper," 2020."""
+
+
+class TestSplitIntoChunks:
+    """Tests for splitting at top-level headers."""
+
+    def test_splits_at_top_level(self):
+        """Chunks start at '##' headers; the '#' title stays in the front matter."""
+        chunks = split_into_chunks(PAPER, min_chunk_chars=0)
+        assert [c.title for c in chunks] == [
+            "A Paper",
+            "Abstract",
+            "1. Introduction",
+            "2. Design",
+            "References",
+        ]
+
+    def test_round_trip(self):
+        """Joining the chunks gives the original content."""
+        chunks = split_into_chunks(PAPER, min_chunk_chars=0)
+        assert "\n".join(c.text for c in chunks) == PAPER
+        assert merge_chunks(chunks, [None] * len(chunks)) == PAPER
+
+    def test_headers_in_code_ignored(self):
+        """A '##' line inside a code fence does not start a chunk."""
+        chunks = split_into_chunks(PAPER, min_chunk_chars=0)
+        assert "## not a header" in chunks[3].text
+
+    def test_overlap_context(self):
+        """Each chunk carries the lines around it as context."""
+        chunks = split_into_chunks(PAPER, min_chunk_chars=0, overlap_lines=2)
+        assert chunks[2].context_before == "Abstract text.\n"
+        assert chunks[2].context_after == "## 2. Design\n"
+        assert chunks[0].context_before == ""
+
+    def test_short_sections_merged(self):
+        """Sections below the minimum size are merged with their neighbours."""
+        chunks = split_into_chunks(PAPER, min_chunk_chars=60)
+        assert len(chunks) < 5
+        assert "\n".join(c.text for c in chunks) == PAPER
+
+    def test_no_headers(self):
+        """A document without headers is one chunk."""
+        chunks = split_into_chunks("Just text.\n\nMore.")
+        assert len(chunks) == 1 and chunks[0].title == "Front matter"
+
+
+class TestMergeChunks:
+    """Tests for merging edited chunks."""
+
+    def test_edits_applied_and_separators_kept(self):
+        """Edited text replaces its chunk; blank lines between chunks survive."""
+        chunks = split_into_chunks(PAPER, min_chunk_chars=0)
+        edited = [None] * len(chunks)
+        edited[2] = "## 1. Introduction\n\nFixed intro."
+        merged = merge_chunks(chunks, edited)
+        assert "Fixed intro.\n\n## 2. Design" in merged
+        assert "Motivation" not in merged
+
+
+class TestPrompts:
+    """Tests for the task split between section and final sessions."""
+
+    def test_full_prompt_has_every_task(self):
+        """The single-session prompt still numbers all six tasks."""
+        assert "### 6. General Cleanup" in CLEANUP_PROMPT
+
+    def test_cross_section_tasks_only_in_final_pass(self):
+        """Figure placement and authors are reserved for the final pass."""
+        assert "Check Figure Placement" not in CHUNK_PROMPT
+        assert "Format Authors Section" not in CHUNK_PROMPT
+        assert "### 1. Check Figure Placement" in FINAL_PROMPT
+        assert "### 2. Format Authors Section" in FINAL_PROMPT
+
+
+class TestRunChunked:
+    """Tests for the concurrent orchestration, with a fake agent session."""
+
+    def test_sections_cleaned_concurrently_then_final_pass(self, tmp_path, monkeypatch):
+        """Sessions run under the semaphore; the final pass sees the merged file."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(PAPER, encoding="utf-8")
+        running = 0
+        peak = 0
+        final_inputs = []
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            nonlocal running, peak
+            path = next(
+                line.split(":** ", 1)[1] for line in prompt.splitlines() if "**Markdown" in line
+            )
+            if "finishing the cleanup" in prompt:
+                final_inputs.append(md_path.read_text(encoding="utf-8"))
+                return "final"
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            text = open(path, encoding="utf-8").read()
+            open(path, "w", encoding="utf-8").write(text.replace(" text.", " TEXT."))
+            running -= 1
+            return "done"
+
+        monkeypatch.setattr(chunked, "run_agent_session", fake_session)
+        # One session per section, so there are more sessions than slots
+        monkeypatch.setattr(
+            chunked,
+            "split_into_chunks",
+            lambda content, overlap_lines: split_into_chunks(
+                content, overlap_lines=overlap_lines, min_chunk_chars=0
+            ),
+        )
+
+        summary = asyncio.run(run_chunked_cleanup_agent(md_path, max_concurrency=2))
+
+        assert peak == 2
+        result = md_path.read_text(encoding="utf-8")
+        assert "Intro TEXT." in result and "Design TEXT." in result
+        assert final_inputs == [result]
+        assert summary.count("done") == 5 and summary.endswith("final")
+        assert not any(p.name.startswith(".agent-chunks-") for p in tmp_path.iterdir())
+
+    def test_failed_section_keeps_original(self, tmp_path, monkeypatch):
+        """A section whose session fails is merged back unchanged."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(PAPER, encoding="utf-8")
+
+        async def failing_session(prompt, cwd, *, model=None, verbose=False):
+            current_run().record_error(AgentError("overloaded"))
+            return None
+
+        monkeypatch.setattr(chunked, "run_agent_session", failing_session)
+        assert asyncio.run(run_chunked_cleanup_agent(md_path)) is None
+        assert md_path.read_text(encoding="utf-8") == PAPER
@@ -0,0 +1,32 @@
+"""Unit tests for general text cleanup."""
+
+from pdf2md.postprocess.cleanup import cleanup_text
+
+
+class TestCharacterNormalization:
+    """Tests for the single-pass translation table."""
+
+    def test_ligatures_and_dashes(self):
+        """Ligatures are expanded and en-dashes become hyphens; em-dashes stay."""
+        assert cleanup_text("eﬃcient ﬁle 1–2 a—b") == "efficient file 1-2 a—b"
+
+    def test_spaces_and_invisible_characters(self):
+        """Non-breaking spaces become spaces; zero-width characters are dropped."""
+        assert cleanup_text("a\u00a0b\u200bc\ufeff") == "a bc"
+
+    def test_math_alphanumerics(self):
+        """Math-alphanumeric glyphs are mapped to plain letters and digits."""
+        assert cleanup_text("𝑥 + 𝐲 = 𝟏") == "x + y = 1"
+
+    def test_smart_quotes_configurable(self):
+        """Smart quotes are kept by default and replaced on request."""
+        assert cleanup_text("“a” ‘b’") == "“a” ‘b’"
+        assert cleanup_text("“a” ‘b’", normalize_quotes=True) == "\"a\" 'b'"
+
+
+class TestWhitespace:
+    """Tests for the blank-line and trailing-whitespace loop."""
+
+    def test_blank_lines_collapsed_and_trailing_removed(self):
+        """Runs of blank (or whitespace-only) lines collapse to one."""
+        assert cleanup_text("A  \n\n   \n\n\nB\t\nC") == "A\n\nB\nC"
@@ -1,12 +1,20 @@
 """Unit tests for figures.py postprocessing."""
 
+from pathlib import Path
+
 import pytest
 from pdf2md.postprocess.figures import (
     process_figures,
     _build_figure_map,
     _embed_figures_at_captions,
+    index_captions,
+    parse_caption,
     find_unembedded_figures,
+    relocate_figures,
 )
+from pdf2md.extraction.docling import _save_assets, assign_asset_numbers, picture_numbers
+from pdf2md.extraction.enrichments import _extract_from_document
+from pdf2md.postprocess.stream import _embed_figures
 
 
 class TestBuildFigureMap:
@@ -92,6 +100,150 @@ class TestEmbedFiguresAtCaptions:
         assert "![Figure 5]" not in result
 
 
+class TestCaptionIndex:
+    """Tests for the shared figure/table/algorithm caption index."""
+
+    def test_parse_kinds(self):
+        """One pattern recognizes every caption kind."""
+        assert parse_caption("Fig. 3. Overview") == ("figure", 3)
+        assert parse_caption("Table 2: Results") == ("table", 2)
+        assert parse_caption("**Algorithm 1:** Placement") == ("algorithm", 1)
+        assert parse_caption("Listing 4. Kernel") == ("listing", 4)
+
+    def test_roman_table_numbers(self):
+        """IEEE-style Roman table numbers are converted."""
+        assert parse_caption("TABLE IV") == ("table", 4)
+        assert parse_caption("TABLE IX: Summary") == ("table", 9)
+        assert parse_caption("TABLE IIII") is None
+
+    def test_table_mention_in_text_ignored(self):
+        """'Table 2 shows' is a reference, not a caption."""
+        assert parse_caption("Table 2 shows the results.") is None
+        assert parse_caption("as listed in Table 2.") is None
+
+    def test_first_caption_per_kind_and_number(self):
+        """The index keeps the first line of each (kind, number)."""
+        lines = ["Fig. 1. A", "Table 1. B", "Fig. 1 again", "TABLE II", "Table 1."]
+        index = [(c.kind, c.number, c.line) for c in index_captions(lines)]
+        assert index == [("figure", 1, 0), ("table", 1, 1), ("table", 2, 3)]
+
+
+class TestEmbedTables:
+    """Tests for table and algorithm image embedding."""
+
+    def test_table_image_embedded(self):
+        """A table caption without a markdown table gets its image."""
+        content = "Text.\n\nTABLE I: Parameters\n\nMore text."
+        result = process_figures(content, ["table1.png"])
+        assert "![Table 1](./img/table1.png)\n\nTABLE I: Parameters" in result
+
+    def test_markdown_table_not_duplicated(self):
+        """A table already extracted as markdown keeps no image."""
+        content = "Table 1. Parameters\n\n| a | b |\n|---|---|\n| 1 | 2 |"
+        assert process_figures(content, ["table1.png"]) == content
+
+    def test_figure_and_table_same_number(self):
+        """Figure 1 and Table 1 are separate assets."""
+        content = "Fig. 1. A figure.\n\nTable 1. A table.\n\nText."
+        result = process_figures(content, ["figure1.png", "table1.png"])
+        assert "![Figure 1](./img/figure1.png)" in result
+        assert "![Table 1](./img/table1.png)" in result
+
+    def test_algorithm_image_embedded(self):
+        """Algorithm images are embedded above their captions."""
+        result = process_figures("Algorithm 2: Scheduling", ["algorithm2.png"])
+        assert result.startswith("![Algorithm 2](./img/algorithm2.png)")
+
+    def test_stream_matches_whole_document(self):
+        """The streaming pipeline embeds the same images."""
+        content = "TABLE I\n\nText.\n\nTable 2. X\n\n| a |\n|---|\n\nFig. 1. Y"
+        images = ["table1.png", "table2.png", "figure1.png"]
+        streamed = "\n".join(_embed_figures(content.split("\n"), images))
+        assert streamed == process_figures(content, images)
+
+
+class TestAssignAssetNumbers:
+    """Tests for stable image names at extraction."""
+
+    def test_caption_numbers_used(self):
+        """Items are named after their caption number."""
+        assert assign_asset_numbers([2, 1, 3]) == [2, 1, 3]
+
+    def test_uncaptioned_items_fill_gaps(self):
+        """Items without a caption take numbers no caption claims."""
+        assert assign_asset_numbers([None, 1, None, 3]) == [2, 1, 4, 3]
+
+    def test_duplicate_caption_number(self):
+        """A repeated caption number falls back to a free number."""
+        assert assign_asset_numbers([1, 1]) == [1, 2]
+
+
+class _FakeImage:
+    def __init__(self, width, height):
+        self.size = (width, height)
+
+
+class _FakePicture:
+    def __init__(self, caption, width=400, height=300):
+        self.caption = caption
+        self.image = _FakeImage(width, height)
+
+    def get_image(self, document):
+        return self.image
+
+    def caption_text(self, document):
+        return self.caption
+
+
+class _BrokenImage(_FakeImage):
+    def save(self, path, fmt):
+        raise OSError("disk full")
+
+
+class TestSaveAssets:
+    """Tests for writing extracted images."""
+
+    def test_unsavable_image_skipped(self, tmp_path):
+        """An image that fails to save is skipped; the others are still written."""
+        good = _FakeImage(400, 300)
+        good.save = lambda path, fmt: Path(path).write_bytes(b"png")
+        items = [_FakePicture("Fig. 1. A"), _FakePicture("Fig. 2. B")]
+        paths = _save_assets(tmp_path, "figure", items, [_BrokenImage(400, 300), good], None)
+        assert [p.name for p in paths] == ["figure2.png"]
+
+
+class TestPictureNumbers:
+    """Tests for the figure numbers enrichments share with extraction."""
+
+    def test_filtered_and_captionless_pictures(self):
+        """Logos are skipped; captionless and duplicate figures get the numbers files got."""
+        document = type("Doc", (), {})()
+        document.pictures = [
+            _FakePicture("", width=50, height=50),  # Logo, dropped by the size filter
+            _FakePicture(""),  # No caption: first number no caption claims
+            _FakePicture("Fig. 1. Overview"),
+            _FakePicture("Figure 1: Repeated number"),
+            _FakePicture("Fig. 3. Results"),
+        ]
+        assert picture_numbers(document) == {1: 2, 2: 1, 3: 4, 4: 3}
+
+    def test_enrichment_figure_ids(self, tmp_path):
+        """Enrichments skip filtered pictures and point each figure at its image file."""
+        document = type("Doc", (), {})()
+        document.pictures = [
+            _FakePicture("", width=50, height=50),
+            _FakePicture(""),
+            _FakePicture("Fig. 1. Overview"),
+        ]
+        result = type("Result", (), {"document": document})()
+        enrichments = _extract_from_document(result, tmp_path / "paper.pdf")
+        assert [(f.figure_id, f.image_path) for f in enrichments.figures] == [
+            (2, "./img/figure2.png"),
+            (1, "./img/figure1.png"),
+        ]
+        assert enrichments.metadata["num_figures"] == 2
+
+
 class TestProcessFigures:
     """Integration tests for figure processing."""
 
@@ -170,3 +322,110 @@ class TestNoDeadCode:
         assert not hasattr(figures, 'MIN_IMAGE_WIDTH')
         assert not hasattr(figures, 'MIN_IMAGE_HEIGHT')
         assert not hasattr(figures, 'MIN_IMAGE_AREA')
+
+
+class TestRelocateFigures:
+    """Tests for moving figures to the section that first references them."""
+
+    def test_code_comments_are_not_sections(self):
+        """A '# comment' inside a fenced code block does not receive figures."""
+        content = """# Title
+
+![Figure 1](./img/figure1.png)
+
+## Design
+
+```python
+# See Fig. 1 for the layout
+x = 1
+```
+
+As shown in Fig. 1, the layout is simple."""
+        result, moves = relocate_figures(content)
+
+        assert [m.section for m in moves] == ["Design"]
+        assert result.index("![Figure 1]") < result.index("```python")
+        assert "```python\n# See Fig. 1 for the layout\nx = 1\n```" in result
+
+    def test_moves_image_and_caption_together(self):
+        """Image and caption move to the start of the referencing section."""
+        content = """# Title
+
+![Figure 2](./img/figure2.png)
+
+## Introduction
+
+Intro text.
+
+## Methodology
+
+As shown in Fig. 2, the system has layers.
+
+Fig. 2. Architecture overview
+
+<!-- image -->
+
+More text."""
+        result, moves = relocate_figures(content)
+
+        expected = """# Title
+
+## Introduction
+
+Intro text.
+
+## Methodology
+
+![Figure 2](./img/figure2.png)
+
+Fig. 2. Architecture overview
+
+As shown in Fig. 2, the system has layers.
+
+More text."""
+        assert result == expected
+        assert len(moves) == 1
+        assert moves[0].figure == 2
+        assert moves[0].from_line == 3
+        assert moves[0].section == "Methodology"
+
+    def test_already_in_referencing_section(self):
+        """Figures already in their first referencing section are not moved."""
+        content = "## Results\n\n![Figure 1](./img/figure1.png)\n\nFig. 1. Plot\n\nSee Fig. 1."
+        result, moves = relocate_figures(content)
+        assert result == content
+        assert moves == []
+
+    def test_unreferenced_figure_stays(self):
+        """Figures never referenced in the text stay where they are."""
+        content = "## A\n\n![Figure 1](./img/figure1.png)\n\nFig. 1. Plot\n\n## B\n\nText."
+        result, moves = relocate_figures(content)
+        assert result == content
+        assert moves == []
+
+    def test_placeholders_removed(self):
+        """Leftover image placeholders are dropped."""
+        content = "## A\n\n<!-- image -->\n\nText."
+        result, _ = relocate_figures(content)
+        assert "<!-- image -->" not in result
+
+    def test_multiple_figures_same_section(self):
+        """Several figures moved into one section keep numeric order."""
+        content = """## A
+
+![Figure 2](./img/figure2.png)
+
+Figure 2: Second
+
+![Figure 1](./img/figure1.png)
+
+Figure 1: First
+
+## B
+
+Figures 1 and Figure 2 compare things."""
+        result, moves = relocate_figures(content)
+        assert [m.figure for m in moves] == [1, 2]
+        section_b = result.split("## B")[1]
+        assert section_b.index("![Figure 1]") < section_b.index("![Figure 2]")
+        assert section_b.index("Figure 1: First") < section_b.index("![Figure 2]")
@@ -0,0 +1,89 @@
+"""Unit tests for running header/footer detection."""
+
+from types import SimpleNamespace
+
+from pdf2md.extraction.furniture import (
+    find_running_items,
+    find_running_lines,
+    normalize_line,
+    strip_running_lines,
+)
+
+
+def _item(text, page, top, bottom, label="text"):
+    origin = SimpleNamespace(name="TOPLEFT")
+    bbox = SimpleNamespace(l=50, t=top, r=550, b=bottom, coord_origin=origin)
+    return SimpleNamespace(text=text, label=label, prov=[SimpleNamespace(page_no=page, bbox=bbox)])
+
+
+def _document(texts, pages=6):
+    size = SimpleNamespace(width=600, height=800)
+    page_map = {p: SimpleNamespace(size=size) for p in range(1, pages + 1)}
+    return SimpleNamespace(pages=page_map, texts=texts)
+
+
+class TestNormalizeLine:
+    """Tests for running line normalization."""
+
+    def test_page_numbers_collapse(self):
+        """Lines differing only in page number normalize to the same key."""
+        assert normalize_line("Page 3 of 12") == normalize_line("page 10 of 12")
+
+
+class TestFindRunningLines:
+    """Tests for the repetition counter."""
+
+    def test_repeated_line_detected(self):
+        """A line on most pages is running; a one-off line is not."""
+        lines = [(p, "top", "proceedings of sc'#") for p in range(10)]
+        lines.append((0, "top", "a unique line"))
+        assert find_running_lines(lines, 10) == {("top", "proceedings of sc'#")}
+
+    def test_band_must_match(self):
+        """The same text split across top and bottom bands does not add up."""
+        lines = [(p, "top" if p % 2 else "bottom", "x") for p in range(4)]
+        assert find_running_lines(lines, 4) == set()
+
+    def test_page_numbers_not_running_lines(self):
+        """Letterless keys such as "#" are dropped unless matched by position."""
+        lines = [(p, "bottom", "#") for p in range(10)]
+        assert find_running_lines(lines, 10) == set()
+        assert find_running_lines(lines, 10, allow_numbers=True) == {("bottom", "#")}
+
+
+class TestFindRunningItems:
+    """Tests for detecting running items in a Docling document."""
+
+    def test_running_header_and_page_numbers_found(self):
+        """Venue headers and page numbers are found; body text and the title are kept."""
+        title = _item("Proceedings of SC'24", 1, 20, 40, label="title")
+        headers = [_item("Proceedings of SC'24", p, 20, 40) for p in range(2, 7)]
+        numbers = [_item(str(p), p, 770, 790) for p in range(1, 7)]
+        body = [_item("Body paragraph.", p, 300, 400) for p in range(1, 7)]
+        document = _document([title, *headers, *numbers, *body])
+
+        found = find_running_items(document)
+        assert found == headers + numbers
+
+    def test_short_documents_need_three_pages(self):
+        """Two pages with the same header are not enough evidence."""
+        headers = [_item("Running title", p, 20, 40) for p in (1, 2)]
+        assert find_running_items(_document(headers, pages=2)) == []
+
+
+class TestStripRunningLines:
+    """Tests for removing running lines from markdown."""
+
+    def test_lines_removed_headers_kept(self):
+        """Matching body lines are removed with their blank line; headers are kept."""
+        content = "# A Paper\n\nText.\n\nA Paper\n\nMore text.\n\n12\n\nEnd."
+        result, removed = strip_running_lines(content, {"a paper", "#"})
+        assert result == "# A Paper\n\nText.\n\nMore text.\n\nEnd."
+        assert removed == 2
+
+    def test_code_and_tables_kept(self):
+        """Lines inside code fences and table rows are never removed."""
+        content = "Text.\n\n```\n42\n```\n\n| 3 |\n|---|\n\n42\n\nEnd."
+        result, removed = strip_running_lines(content, {"#"})
+        assert result == "Text.\n\n```\n42\n```\n\n| 3 |\n|---|\n\nEnd."
+        assert removed == 1
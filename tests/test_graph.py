@@ -0,0 +1,140 @@
+"""Unit tests for the cross-paper citation graph."""
+
+import pytest
+
+from pdf2md.references.graph import CitationGraph
+from pdf2md.references.normalize import fingerprint, guess_title, title_fingerprint
+
+HERMES_IEEE = (
+    'A. Kougkas, H. Devarajan, and X.-H. Sun, "Hermes: A heterogeneous-aware '
+    'multi-tiered distributed I/O buffering system," in Proc. HPDC, 2018.'
+)
+HERMES_ACM = (
+    "Anthony Kougkas, Hariharan Devarajan, and Xian-He Sun. 2018. Hermes: A "
+    "Heterogeneous-Aware Multi-Tiered Distributed I/O Buffering System. In HPDC. 219-230."
+)
+HERMES_LNCS = (
+    "Kougkas, A., Devarajan, H., Sun, X.H.: Hermes: a heterogeneous-aware multi-tiered "
+    "distributed I/O buffering system. In: HPDC (2018)"
+)
+
+
+def _paper(title: str, references: list[str]) -> str:
+    entries = "\n\n".join(
+        f'<a id="ref-{i}"></a>[{i}] {text}' for i, text in enumerate(references, 1)
+    )
+    return f"# {title}\n\nBody text.\n\n## References\n\n{entries}\n"
+
+
+class TestFingerprint:
+    """Tests for cited-work fingerprints."""
+
+    def test_guess_title_styles(self):
+        """Titles are recovered from IEEE, ACM and LNCS entries."""
+        for text in (HERMES_IEEE, HERMES_ACM, HERMES_LNCS):
+            assert guess_title(text).lower().startswith("hermes: a heterogeneous-aware")
+
+    def test_same_work_same_fingerprint(self):
+        """The same work cited in different styles shares a fingerprint."""
+        assert fingerprint(HERMES_IEEE) == fingerprint(HERMES_ACM) == fingerprint(HERMES_LNCS)
+
+    def test_title_fingerprint_matches_reference(self):
+        """A paper's own title fingerprint matches references to it."""
+        title = "Hermes: A Heterogeneous-Aware Multi-Tiered Distributed I/O Buffering System"
+        assert title_fingerprint(title) == fingerprint(HERMES_IEEE)
+
+    def test_short_title_has_no_fingerprint(self):
+        """Very short titles are too ambiguous to fingerprint."""
+        assert title_fingerprint("Notes") is None
+
+
+class TestCitationGraph:
+    """Tests for building and querying the graph."""
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        papers = {
+            "a": _paper("Paper A", [HERMES_IEEE, 'J. Doe, "Lustre file system internals," 2010.']),
+            "b": _paper("Paper B", [HERMES_ACM]),
+            "c": _paper("Paper C", [HERMES_LNCS, 'J. Doe, "Lustre file system internals," 2010.']),
+        }
+        paths = []
+        for name, content in papers.items():
+            path = tmp_path / name / f"{name}.md"
+            path.parent.mkdir()
+            path.write_text(content, encoding="utf-8")
+            paths.append(path)
+        return paths
+
+    def test_most_cited(self, tmp_path, corpus):
+        """Works are deduplicated across papers and ranked by citing papers."""
+        with CitationGraph(tmp_path / "graph.sqlite") as graph:
+            stats = graph.update(corpus)
+            top = graph.most_cited(2)
+
+        assert stats.added == 3
+        assert top[0].cited_by == 3
+        assert top[0].title.lower().startswith("hermes")
+        assert top[1].cited_by == 2
+
+    def test_who_cites(self, tmp_path, corpus):
+        """Citing papers are found from a title query."""
+        with CitationGraph(tmp_path / "graph.sqlite") as graph:
+            graph.update(corpus)
+            works = graph.find_works("Lustre file system")
+            citing = graph.cited_by(works[0].fingerprint)
+
+        assert [title for _, title in citing] == ["Paper A", "Paper C"]
+
+    def test_incremental_update(self, tmp_path, corpus):
+        """Unchanged papers are skipped and modified papers replace their rows."""
+        db = tmp_path / "graph.sqlite"
+        with CitationGraph(db) as graph:
+            graph.update(corpus)
+
+        corpus[1].write_text(_paper("Paper B", ['J. Doe, "Lustre file system internals," 2010.']))
+        with CitationGraph(db) as graph:
+            stats = graph.update(corpus)
+            top = graph.most_cited(2)
+
+        assert (stats.added, stats.updated, stats.unchanged) == (0, 1, 2)
+        assert {(w.title.split()[0], w.cited_by) for w in top} == {("Hermes:", 2), ("Lustre", 3)}
+
+    def test_prune_removed_papers(self, tmp_path, corpus):
+        """Papers missing from the input are pruned on request."""
+        with CitationGraph(tmp_path / "graph.sqlite") as graph:
+            graph.update(corpus)
+            stats = graph.update(corpus[:1], prune=True)
+            assert stats.removed == 2
+            assert graph.paper_count() == 1
+
+    def test_duplicate_reference_counted_once(self, tmp_path):
+        """A work listed twice by one paper is one citation in the stats."""
+        path = tmp_path / "a.md"
+        path.write_text(_paper("Paper A", [HERMES_IEEE, HERMES_ACM]), encoding="utf-8")
+        with CitationGraph(tmp_path / "graph.sqlite") as graph:
+            assert graph.update([path]).citations == 1
+
+    def test_orphaned_works_dropped(self, tmp_path, corpus):
+        """Works only a pruned or rewritten paper cited are removed."""
+        with CitationGraph(tmp_path / "graph.sqlite") as graph:
+            graph.update(corpus)
+            assert graph.work_count() == 2
+            stats = graph.update(corpus[1:2], prune=True)
+            assert stats.orphaned_works == 1
+            assert [w.title.split()[0] for w in graph.most_cited()] == ["Hermes:"]
+            assert graph.work_count() == 1
+
+    def test_cited_work_in_corpus(self, tmp_path, corpus):
+        """A cited work that is itself a converted paper links to its markdown."""
+        hermes = tmp_path / "hermes" / "hermes.md"
+        hermes.parent.mkdir()
+        title = "Hermes: A Heterogeneous-Aware Multi-Tiered Distributed I/O Buffering System"
+        hermes.write_text(_paper(title, []), encoding="utf-8")
+        with CitationGraph(tmp_path / "graph.sqlite") as graph:
+            graph.update([*corpus, hermes])
+            top = graph.most_cited(2)
+            (found,) = graph.find_works("Lustre file system")
+
+        assert top[0].corpus_path == str(hermes.resolve())
+        assert top[1].corpus_path is None and found.corpus_path is None
@@ -0,0 +1,60 @@
+"""Unit tests for dictionary-backed hyphenation repair."""
+
+from pdf2md.postprocess.cleanup import fix_hyphenated_words
+from pdf2md.postprocess.hyphenation import load_lexicon, repair_hyphenation
+
+
+class TestLexicon:
+    """Tests for the packaged lexicon."""
+
+    def test_lexicon_loaded_once(self):
+        """The lexicon is cached and contains common and domain words."""
+        lexicon = load_lexicon()
+        assert lexicon is load_lexicon()
+        assert {"document", "scheduling", "metadata"} <= lexicon
+
+
+class TestRepairHyphenation:
+    """Tests for joined-vs-compound decisions."""
+
+    def test_broken_word_joined(self):
+        """A word split across a line break is rejoined."""
+        result, fixes = repair_hyphenation("The docu- ment and the sched-\nuling policy.")
+        assert result == "The document and the scheduling policy."
+        assert len(fixes) == 2
+
+    def test_compound_kept(self):
+        """Two known words with an unknown joined form keep their hyphen."""
+        result, _ = repair_hyphenation("An energy- efficient design.")
+        assert result == "An energy-efficient design."
+
+    def test_document_vocabulary_wins(self):
+        """A form used elsewhere in the document overrides the lexicon."""
+        lexicon = frozenset({"data", "set", "dataset"})
+        content = "The data- set is large. Each data-set row is small."
+        result, _ = repair_hyphenation(content, lexicon)
+        assert result.startswith("The data-set is large.")
+
+    def test_suspended_hyphen_untouched(self):
+        """Suspended hyphens such as "pre- and post-" are left alone."""
+        content = "Both pre- and post-processing."
+        assert repair_hyphenation(content) == (content, [])
+
+    def test_capitalization_preserved(self):
+        """The first half keeps its capitalization when joined."""
+        result, _ = repair_hyphenation("Multi- threaded runtimes.")
+        assert result == "Multithreaded runtimes."
+
+    def test_inner_hyphen_chain_untouched(self):
+        """Hyphens inside an existing compound are not treated as breaks."""
+        content = "A state-of- the-art system."
+        assert repair_hyphenation(content)[0] == content
+
+    def test_code_blocks_skipped(self):
+        """Fenced code keeps its hyphens and line breaks."""
+        content = "```\nx = a-\nb\n```\n\nThe docu- ment."
+        assert repair_hyphenation(content)[0] == "```\nx = a-\nb\n```\n\nThe document."
+
+    def test_cleanup_wrapper(self):
+        """cleanup.fix_hyphenated_words returns only the repaired text."""
+        assert fix_hyphenated_words("docu-\nment") == "document"
@@ -0,0 +1,158 @@
+"""Unit tests for the pre-computed agent issue report."""
+
+import asyncio
+
+from pdf2md.agent import chunked, cleanup
+from pdf2md.agent.chunked import run_chunked_cleanup_agent, split_into_chunks
+from pdf2md.agent.cleanup import TASKS_HEADING, insert_issue_report, run_cleanup_agent
+from pdf2md.postprocess.issues import find_issues, format_issue_report
+
+PAPER = """# A Paper
+
+## 1. Introduction
+
+Logs are everywhere, as Fig. 2 shows. More importantly, a log
+
+entry is the smallest unit of addressing.
+
+A. Metadata management
+
+Text here.
+
+### B. We conducted experiments on the cluster with many nodes and it went well.
+
+## 2. Design
+
+0 20 40
+Throughput
+![Figure 2](./img/figure2.png)
+
+Fig. 2. Throughput over time.
+
+Fig. 3. Architecture.
+
+```
+A. Not a header
+```
+
+## References
+
+A. Smith, "Logs," 2020."""
+
+
+def _by_kind(issues, kind):
+    return [(issue.line, issue.detail) for issue in issues if issue.kind == kind]
+
+
+class TestFindIssues:
+    """Tests for the deterministic checks."""
+
+    def test_lettered_headers(self):
+        """Unconverted lettered lines and sentence headers are reported, code and references not."""
+        headers = _by_kind(find_issues(PAPER), "lettered_header")
+        assert [line for line, _ in headers] == [9, 13]
+        assert "not a header" in headers[0][1]
+        assert "looks like a sentence" in headers[1][1]
+
+    def test_figures(self):
+        """Each figure lists its image, caption and first reference."""
+        figures = _by_kind(find_issues(PAPER), "figure")
+        assert figures[0] == (
+            19,
+            'Figure 2: image L19, caption L21, first reference L5 (in "1. Introduction")'
+            " - image outside the first referencing section",
+        )
+        assert figures[1] == (23, "Figure 3: caption L23 - no image; never referenced")
+
+    def test_placed_figure_has_no_problems(self):
+        """A figure right after its caption in the referencing section is listed without flags."""
+        content = "## Results\n\nAs Fig. 1 shows.\n\n![Figure 1](./img/figure1.png)\n\nFig. 1. A."
+        figures = _by_kind(find_issues(content), "figure")
+        assert figures == [(5, 'Figure 1: image L5, caption L7, first reference L3 (in "Results")')]
+
+    def test_fragments_above_caption(self):
+        """Short lines above a caption's image are reported; headings stop the search."""
+        fragments = _by_kind(find_issues(PAPER), "ocr_fragment")
+        assert [line for line, _ in fragments] == [17, 18]
+
+    def test_split_paragraph(self):
+        """A paragraph ending mid-sentence before a blank line is reported."""
+        splits = _by_kind(find_issues(PAPER), "split_paragraph")
+        assert [line for line, _ in splits] == [5]
+        assert "continues at L7" in splits[0][1]
+
+    def test_kind_filter(self):
+        """Only the requested kinds are returned."""
+        assert {i.kind for i in find_issues(PAPER, ["figure"])} == {"figure"}
+
+
+class TestFormatIssueReport:
+    """Tests for the prompt section."""
+
+    def test_sections_and_offset(self):
+        """Issues are grouped by kind; an offset renumbers every line reference."""
+        issues = find_issues(PAPER, ["ocr_fragment"])
+        report = format_issue_report(issues, line_offset=14)
+        assert report.startswith("## Pre-computed Issues")
+        assert '- L3: "0 20 40" above caption L7' in report
+
+    def test_empty(self):
+        """No issues, no section."""
+        assert format_issue_report([]) == ""
+
+    def test_inserted_before_tasks(self):
+        """The report goes before the last task heading of the prompt."""
+        prompt = f"intro {TASKS_HEADING}doc\n{TASKS_HEADING}tasks"
+        result = insert_issue_report(prompt, "REPORT\n")
+        assert result == f"intro {TASKS_HEADING}doc\nREPORT\n{TASKS_HEADING}tasks"
+
+
+class TestPromptInjection:
+    """Tests that the agent prompts carry the report, with a fake session."""
+
+    def test_single_session(self, tmp_path, monkeypatch):
+        """The single-session prompt has the report; issues=False leaves it out."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(PAPER, encoding="utf-8")
+        prompts = []
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            prompts.append(prompt)
+            return "done"
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        asyncio.run(run_cleanup_agent(md_path))
+        asyncio.run(run_cleanup_agent(md_path, issues=False))
+        assert "- L9: " in prompts[0]
+        assert prompts[0].index("Pre-computed Issues") < prompts[0].index(TASKS_HEADING)
+        assert "Pre-computed Issues" not in prompts[1]
+
+    def test_chunked_sessions(self, tmp_path, monkeypatch):
+        """Section sessions get their own issues numbered from 1; the final pass gets figures."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(PAPER, encoding="utf-8")
+        prompts = {}
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            if "finishing the cleanup" in prompt:
+                prompts["final"] = prompt
+            else:
+                prompts.setdefault("sections", []).append(prompt)
+            return "done"
+
+        monkeypatch.setattr(chunked, "run_agent_session", fake_session)
+        monkeypatch.setattr(
+            chunked,
+            "split_into_chunks",
+            lambda content, overlap_lines: split_into_chunks(
+                content, overlap_lines=overlap_lines, min_chunk_chars=0
+            ),
+        )
+        asyncio.run(run_chunked_cleanup_agent(md_path))
+
+        design = next(p for p in prompts["sections"] if '"0 20 40"' in p)
+        # "## 2. Design" is line 15 of the paper, so line 17 is line 3 of its section
+        assert '- L3: "0 20 40" above caption L7' in design
+        assert "### Figures" not in design
+        assert "Figure 2: image L19" in prompts["final"]
+        assert "Section headers" not in prompts["final"]
@@ -0,0 +1,126 @@
+"""Unit tests for paragraphs.py postprocessing."""
+
+import pytest
+
+from pdf2md.postprocess import process_markdown
+from pdf2md.postprocess.paragraphs import (
+    PAGE_BREAK_MARKER,
+    _should_merge,
+    merge_page_break_paragraphs,
+    strip_page_break_markers,
+)
+
+
+class TestShouldMerge:
+    """Tests for the continuation heuristic."""
+
+    def test_lowercase_continuation(self):
+        """Unterminated text followed by lowercase continues."""
+        assert _should_merge("More importantly, a log", "entry is the smallest unit")
+
+    def test_terminated_sentence(self):
+        """A sentence ending with a period is not merged."""
+        assert not _should_merge("This ends here.", "and this starts lowercase")
+
+    def test_uppercase_after_function_word(self):
+        """Capitalized continuation after 'by' is mid-phrase."""
+        assert _should_merge("as proposed by", "Smith et al. in their work")
+
+    def test_uppercase_new_paragraph(self):
+        """Capitalized text after a content word is a new paragraph."""
+        assert not _should_merge("We evaluate the system", "Results are shown below.")
+
+
+class TestMergePageBreakParagraphs:
+    """Tests for merging across page-break markers."""
+
+    def test_simple_merge(self):
+        """A split paragraph is rejoined and the marker removed."""
+        content = f"Data is written, a log\n\n{PAGE_BREAK_MARKER}\n\nentry is the unit.\n\nNext."
+        result, merges = merge_page_break_paragraphs(content)
+        assert result == "Data is written, a log entry is the unit.\n\nNext."
+        assert len(merges) == 1
+        assert merges[0].line == 1
+
+    def test_merge_across_figure(self):
+        """Figures floated between the halves stay after the merged paragraph."""
+        content = (
+            f"The system stores\n\n{PAGE_BREAK_MARKER}\n\n"
+            "![Figure 1](./img/figure1.png)\n\nFig. 1. Overview\n\n"
+            "metadata in memory.\n\nNext."
+        )
+        result, _ = merge_page_break_paragraphs(content)
+        assert result == (
+            "The system stores metadata in memory.\n\n"
+            "![Figure 1](./img/figure1.png)\n\nFig. 1. Overview\n\nNext."
+        )
+
+    def test_no_merge_after_sentence_end(self):
+        """Complete paragraphs are left apart, markers still removed."""
+        content = f"First paragraph.\n\n{PAGE_BREAK_MARKER}\n\nSecond paragraph."
+        result, merges = merge_page_break_paragraphs(content)
+        assert result == "First paragraph.\n\nSecond paragraph."
+        assert merges == []
+
+    @pytest.mark.parametrize(
+        "before, after",
+        [
+            ("## Header without period", "lowercase text"),
+            ("- list item without period", "lowercase text"),
+            ("| table | row", "lowercase text"),
+            ("Paragraph without period", "- list item"),
+            ("Paragraph without period", "| a | b |"),
+        ],
+    )
+    def test_structural_lines_excluded(self, before, after):
+        """Headers, lists and tables are never merged."""
+        content = f"{before}\n\n{PAGE_BREAK_MARKER}\n\n{after}"
+        result, merges = merge_page_break_paragraphs(content)
+        assert merges == []
+        assert result == f"{before}\n\n{after}"
+
+    @pytest.mark.parametrize(
+        "header, after",
+        [
+            ("II. DESIGN", "entry is the smallest unit"),
+            ("A. Overview", "the system has three parts."),
+            ("3.1 System Design", "the log is replicated."),
+        ],
+    )
+    def test_plain_text_headers_excluded(self, header, after):
+        """Unconverted Roman, lettered and numbered headers keep their own line."""
+        content = f"{header}\n\n{PAGE_BREAK_MARKER}\n\n{after}"
+        result, merges = merge_page_break_paragraphs(content)
+        assert merges == []
+        assert result == f"{header}\n\n{after}"
+
+    def test_plain_text_header_through_pipeline(self):
+        """The section pass still sees the header after the page-break merge."""
+        content = (
+            "I. INTRODUCTION\n\nLogs matter.\n\n"
+            f"II. DESIGN\n\n{PAGE_BREAK_MARKER}\n\nentry is the smallest unit."
+        )
+        result = process_markdown(content, [])
+        assert "DESIGN entry" not in result
+        assert "entry is the smallest unit." in result
+
+    def test_code_blocks_excluded(self):
+        """Text inside code fences is never merged."""
+        content = f"```\ncode line\n```\n\n{PAGE_BREAK_MARKER}\n\nlowercase text"
+        _, merges = merge_page_break_paragraphs(content)
+        assert merges == []
+
+    def test_no_markers_unchanged(self):
+        """Content without page breaks is returned untouched."""
+        content = "A paragraph without end\n\ncontinues here"
+        assert merge_page_break_paragraphs(content) == (content, [])
+
+
+class TestStripPageBreakMarkers:
+    """Tests for removing markers without merging."""
+
+    def test_markers_removed(self):
+        """Markers and their trailing blank line go; code blocks are kept as is."""
+        code = f"```\n{PAGE_BREAK_MARKER}\n```"
+        content = f"first part\n\n{PAGE_BREAK_MARKER}\n\nsecond part\n\n{code}"
+        assert strip_page_break_markers(content) == f"first part\n\nsecond part\n\n{code}"
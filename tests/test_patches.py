@@ -0,0 +1,218 @@
+"""Unit tests for the patch-returning agent mode."""
+
+import asyncio
+import json
+
+import pytest
+
+from pdf2md.agent import chunked, patches
+from pdf2md.agent.chunked import run_chunked_cleanup_agent, split_into_chunks
+from pdf2md.agent.cleanup import run_cleanup_agent
+from pdf2md.agent.patches import (
+    LineEdit,
+    apply_edits,
+    number_lines,
+    parse_patch_response,
+    patch_record_path,
+    replay_patches,
+    validate_edits,
+)
+
+DOC = """## 1. Introduction
+
+Logs are used widely [[3]](#ref-3) and grow by 10% a year.
+
+0 20 40
+
+60 80
+
+![Figure 1](./img/figure1.png)
+
+Fig. 1. Overview
+
+## 2. Design
+
+Design text."""
+
+LINES = DOC.split("\n")
+
+
+class TestNumberLines:
+    """Tests for the numbered prompt listing."""
+
+    def test_numbers_aligned(self):
+        """Numbers are right-aligned to the widest one."""
+        assert number_lines(["a", "b"], start=9) == " 9| a\n10| b"
+
+
+class TestParsePatchResponse:
+    """Tests for parsing the agent's JSON answer."""
+
+    def test_fenced_json(self):
+        """JSON inside a code fence, with prose around it, is parsed."""
+        text = (
+            "Here are the edits:\n```json\n"
+            '{"edits": [{"start": 5, "end": 7, "replacement": "", "reason": "axis labels"}],'
+            ' "summary": "Removed OCR text"}\n```'
+        )
+        edits, summary = parse_patch_response(text)
+        assert edits == [LineEdit(5, 7, "", "axis labels")]
+        assert summary == "Removed OCR text"
+
+    def test_malformed(self):
+        """A response without an edit list is an error."""
+        with pytest.raises(ValueError):
+            parse_patch_response("I fixed everything.")
+        with pytest.raises(ValueError):
+            parse_patch_response('{"edits": [{"start": "x"}]}')
+
+
+class TestValidateEdits:
+    """Tests for refusing unsafe edits."""
+
+    def test_artifact_deletion_accepted(self):
+        """Deleting short stray lines may drop their numbers."""
+        accepted, rejected = validate_edits(LINES, [LineEdit(5, 7, "")])
+        assert accepted == [LineEdit(5, 7, "")] and rejected == []
+
+    def test_dropped_citation_refused(self):
+        """An edit that loses a citation is refused."""
+        edit = LineEdit(3, 3, "Logs are used widely and grow by 10% a year.")
+        accepted, rejected = validate_edits(LINES, [edit])
+        assert accepted == []
+        assert rejected[0].reason == "drops citations 3"
+
+    def test_dropped_number_refused(self):
+        """A rewrite that loses a number is refused."""
+        edit = LineEdit(3, 3, "Logs are used widely [[3]](#ref-3) and grow quickly.")
+        _, rejected = validate_edits(LINES, [edit])
+        assert rejected[0].reason == "drops numbers 10"
+
+    def test_figure_deletion_refused(self):
+        """Image and caption lines are never stray fragments."""
+        _, rejected = validate_edits(LINES, [LineEdit(9, 11, "")])
+        assert rejected[0].reason.startswith("drops numbers")
+
+    def test_move_accepted(self):
+        """Deleting a figure and inserting it elsewhere keeps its numbers."""
+        edits = [
+            LineEdit(9, 11, ""),
+            LineEdit(2, 2, "\n![Figure 1](./img/figure1.png)\n\nFig. 1. Overview\n"),
+        ]
+        accepted, rejected = validate_edits(LINES, edits)
+        assert len(accepted) == 2 and rejected == []
+
+    def test_half_move_refused(self):
+        """If the insertion is refused, the matching deletion is refused too."""
+        edits = [
+            LineEdit(9, 11, ""),
+            LineEdit(2, 2, "\n![Figure 1](./img/figure1.png)\n\nFig. 1. Overview\n"),
+            # Overlaps the insertion, which is refused first
+            LineEdit(1, 2, "## 1. Introduction"),
+        ]
+        accepted, rejected = validate_edits(LINES, edits)
+        assert accepted == [LineEdit(1, 2, "## 1. Introduction")]
+        assert [r.reason for r in rejected] == ["overlaps lines 1-2", "drops numbers 1"]
+
+    def test_bounds_and_overlap(self):
+        """Ranges outside the allowed lines or overlapping another edit are refused."""
+        edits = [LineEdit(5, 6, ""), LineEdit(6, 7, ""), LineEdit(40, 41, "x")]
+        accepted, rejected = validate_edits(LINES, edits)
+        assert accepted == [LineEdit(5, 6, "")]
+        assert sorted(r.reason.split()[0] for r in rejected) == ["outside", "overlaps"]
+        _, rejected = validate_edits(LINES, [LineEdit(5, 6, "")], first_line=13)
+        assert rejected[0].reason == "outside lines 13-15"
+
+
+class TestApplyAndReplay:
+    """Tests for one-step application and the replay record."""
+
+    def test_apply_bottom_up(self):
+        """Line numbers of all edits refer to the original document."""
+        result = apply_edits(["a", "b", "c", "d"], [LineEdit(1, 1, "x\ny"), LineEdit(3, 4, "")])
+        assert result == ["x", "y", "b"]
+
+    def test_run_and_replay(self, tmp_path, monkeypatch):
+        """A patch run writes a record that re-applies the same edits."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(DOC, encoding="utf-8")
+        answer = {
+            "edits": [
+                {"start": 5, "end": 7, "replacement": "", "reason": "axis labels"},
+                {"start": 3, "end": 3, "replacement": "Logs [[3]](#ref-3) grow.", "reason": ""},
+            ],
+            "summary": "Removed OCR text",
+        }
+        prompts = []
+
+        async def fake_session(prompt, cwd, *, allowed_tools=(), model=None, verbose=False):
+            prompts.append((prompt, tuple(allowed_tools)))
+            return json.dumps(answer)
+
+        monkeypatch.setattr(patches, "run_agent_session", fake_session)
+        summary = asyncio.run(run_cleanup_agent(md_path, mode="patch"))
+
+        assert prompts[0][1] == ()
+        assert " 3| Logs are used widely" in prompts[0][0]
+        assert "Applied 1 edits, refused 1." in summary
+        assert "refused lines 3-3: drops numbers 10" in summary
+        patched = md_path.read_text(encoding="utf-8")
+        assert "0 20 40" not in patched and "10%" in patched
+
+        record = json.loads(patch_record_path(md_path).read_text(encoding="utf-8"))
+        assert [e["start"] for e in record["rounds"][0]["edits"]] == [5]
+
+        md_path.write_text(DOC, encoding="utf-8")
+        assert replay_patches(md_path) == 1
+        assert md_path.read_text(encoding="utf-8") == patched
+        assert replay_patches(md_path) == 0
+
+        md_path.write_text("changed", encoding="utf-8")
+        with pytest.raises(ValueError):
+            replay_patches(md_path)
+
+    def test_unknown_mode(self, tmp_path):
+        """An unknown mode is an error."""
+        with pytest.raises(ValueError):
+            asyncio.run(run_cleanup_agent(tmp_path / "paper.md", mode="rewrite"))
+
+
+class TestChunkedPatches:
+    """Tests for patch mode of the section-chunked agent."""
+
+    def test_sections_patched_in_one_step(self, tmp_path, monkeypatch):
+        """Section edits are limited to their section and recorded with the final round."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(DOC, encoding="utf-8")
+
+        async def fake_session(prompt, cwd, *, allowed_tools=(), model=None, verbose=False):
+            if "finishing the cleanup" in prompt:
+                return '{"edits": [], "summary": "nothing left"}'
+            if "Below are lines 1-12" in prompt:
+                # The second edit reaches into the next section
+                edits = [
+                    {"start": 5, "end": 7, "replacement": ""},
+                    {"start": 12, "end": 13, "replacement": ""},
+                ]
+            else:
+                edits = [{"start": 15, "end": 15, "replacement": "Design text, fixed."}]
+            return json.dumps({"edits": edits, "summary": "ok"})
+
+        monkeypatch.setattr(patches, "run_agent_session", fake_session)
+        monkeypatch.setattr(
+            chunked,
+            "split_into_chunks",
+            lambda content, overlap_lines: split_into_chunks(
+                content, overlap_lines=overlap_lines, min_chunk_chars=0
+            ),
+        )
+
+        summary = asyncio.run(run_chunked_cleanup_agent(md_path, mode="patch"))
+
+        patched = md_path.read_text(encoding="utf-8")
+        assert "0 20 40" not in patched and "Design text, fixed." in patched
+        assert "## 2. Design" in patched
+        assert "refused lines 12-13: outside lines 1-12" in summary
+        record = json.loads(patch_record_path(md_path).read_text(encoding="utf-8"))
+        assert len(record["rounds"]) == 2
+        assert record["rounds"][1]["summary"] == "nothing left"
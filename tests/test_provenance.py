@@ -0,0 +1,90 @@
+"""Unit tests for provenance-based figure text detection."""
+
+from types import SimpleNamespace
+
+from pdf2md.extraction.provenance import (
+    Box,
+    PageIndex,
+    find_text_inside_pictures,
+    item_boxes,
+)
+
+
+def _bbox(left, top, right, bottom, origin="BOTTOMLEFT"):
+    return SimpleNamespace(
+        l=left, t=top, r=right, b=bottom, coord_origin=SimpleNamespace(name=origin)
+    )
+
+
+def _item(page, bbox, label="text", ref="#/texts/0", parent="#/body"):
+    return SimpleNamespace(
+        prov=[SimpleNamespace(page_no=page, bbox=bbox)],
+        label=label,
+        self_ref=ref,
+        parent=SimpleNamespace(cref=parent),
+    )
+
+
+def _document(texts):
+    pages = {1: SimpleNamespace(size=SimpleNamespace(width=600, height=800))}
+    return SimpleNamespace(pages=pages, texts=texts)
+
+
+class TestItemBoxes:
+    """Tests for provenance box normalization."""
+
+    def test_bottom_left_converted(self):
+        """Bottom-left boxes are flipped to a top-left origin."""
+        item = _item(1, _bbox(10, 700, 110, 650))
+        assert item_boxes(item, {1: 800.0}) == [Box(1, 10, 100, 110, 150)]
+
+    def test_top_left_unchanged(self):
+        """Top-left boxes are kept as-is."""
+        item = _item(1, _bbox(10, 100, 110, 150, origin="TOPLEFT"))
+        assert item_boxes(item, {}) == [Box(1, 10, 100, 110, 150)]
+
+
+class TestPageIndex:
+    """Tests for the grid spatial index."""
+
+    def test_query_finds_overlapping_cells_only(self):
+        """Only boxes sharing grid cells on the same page are returned."""
+        index = PageIndex(cell_size=50)
+        index.insert(Box(1, 0, 0, 40, 40), "a")
+        index.insert(Box(1, 300, 300, 400, 400), "b")
+        index.insert(Box(2, 0, 0, 40, 40), "c")
+        found = [value for _, value in index.query(Box(1, 10, 10, 20, 20))]
+        assert found == ["a"]
+
+
+class TestFindTextInsidePictures:
+    """Tests for detecting OCR text inside figure regions."""
+
+    def test_text_inside_picture_found(self):
+        """Axis labels inside the picture box are detected; body text is not."""
+        picture = _item(1, _bbox(100, 700, 500, 400), label="picture", ref="#/pictures/0")
+        picture.captions = [SimpleNamespace(cref="#/texts/2")]
+        axis_label = _item(1, _bbox(150, 600, 200, 590), ref="#/texts/0")
+        body = _item(1, _bbox(100, 300, 500, 200), ref="#/texts/1")
+        caption = _item(1, _bbox(100, 420, 500, 405), ref="#/texts/2")
+        document = _document([axis_label, body, caption])
+
+        assert find_text_inside_pictures(document, [picture]) == [axis_label]
+
+    def test_caption_label_kept(self):
+        """Items labelled as captions are never dropped, even inside the box."""
+        picture = _item(1, _bbox(100, 700, 500, 400), label="picture", ref="#/pictures/0")
+        caption = _item(1, _bbox(150, 600, 200, 590), label="caption", ref="#/texts/0")
+        assert find_text_inside_pictures(_document([caption]), [picture]) == []
+
+    def test_children_of_pictures_skipped(self):
+        """Text already nested under a picture is left to Docling."""
+        picture = _item(1, _bbox(100, 700, 500, 400), label="picture", ref="#/pictures/0")
+        child = _item(1, _bbox(150, 600, 200, 590), parent="#/pictures/0")
+        assert find_text_inside_pictures(_document([child]), [picture]) == []
+
+    def test_partial_overlap_kept(self):
+        """Text mostly outside the picture region is kept."""
+        picture = _item(1, _bbox(100, 700, 500, 400), label="picture", ref="#/pictures/0")
+        straddling = _item(1, _bbox(400, 500, 600, 490))
+        assert find_text_inside_pictures(_document([straddling]), [picture]) == []
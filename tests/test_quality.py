@@ -0,0 +1,84 @@
+"""Unit tests for the post-processing quality score."""
+
+from pdf2md.postprocess.quality import DEFECT_KINDS, QualityScore, score_markdown
+
+CLEAN = """# A Paper
+
+## 1. Introduction
+
+Logs are everywhere [[1]](#ref-1), as Fig. 1 shows.
+
+![Figure 1](./img/figure1.png)
+
+Fig. 1. Throughput over time.
+
+## References
+
+<a id="ref-1"></a>[1] A. Smith, "Logs," 2020."""
+
+DEFECTIVE = """# A Paper
+
+#### 1. Introduction
+
+Logs are everywhere [1], [2, 3] and [[4]](#ref-4). More importantly, a log
+
+entry is the smallest unit of addressing.
+
+0 20 40 60
+%% ## --
+Fig. 1. Throughput over time.
+
+```
+[5] not a citation
+```
+
+## References
+
+<a id="ref-1"></a>[1] A. Smith, "Logs," 2020."""
+
+
+class TestScoreMarkdown:
+    """Tests for counting defects left after post-processing."""
+
+    def test_clean_document(self):
+        """A linked, embedded, well-nested document scores zero."""
+        quality = score_markdown(CLEAN, ["figure1.png"])
+        assert quality.score == 0
+        assert not quality.needs_agent()
+
+    def test_defects_counted(self):
+        """Each defect kind is counted once per occurrence, outside code blocks."""
+        quality = score_markdown(DEFECTIVE, ["figure1.png"])
+        assert quality.defects == {
+            "unlinked_citations": 3,
+            "unembedded_figures": 1,
+            "header_gaps": 1,
+            "split_paragraphs": 1,
+            "junk_lines": 2,
+        }
+        assert quality.score == 6.5
+        assert quality.needs_agent(5.0)
+        assert not quality.needs_agent(7.0)
+
+    def test_dangling_links_need_anchors(self):
+        """Links to missing anchors only count when the bibliography has anchors."""
+        content = "# Paper\n\nSee [[4]](#ref-4)."
+        assert score_markdown(content).defects["unlinked_citations"] == 0
+
+    def test_figures_need_images(self):
+        """Without an image list, unembedded figures are not counted."""
+        assert score_markdown(DEFECTIVE).defects["unembedded_figures"] == 0
+
+
+class TestQualityScore:
+    """Tests for the score's metrics and console forms."""
+
+    def test_to_dict(self):
+        """The dict has the rounded score, the line count and every defect kind."""
+        quality = QualityScore(lines=12)
+        quality.defects["junk_lines"] = 3
+        data = quality.to_dict()
+        assert data["score"] == 1.5
+        assert data["lines"] == 12
+        assert set(DEFECT_KINDS) <= set(data)
+        assert quality.describe().startswith("score 1.5 (")
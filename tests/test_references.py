@@ -0,0 +1,134 @@
+"""Unit tests for reference matching against BibTeX stores."""
+
+import pytest
+
+from pdf2md.postprocess.bibliography import extract_reference_entries
+from pdf2md.references import BibIndex, match_references, parse_bibtex
+from pdf2md.references.normalize import char_ngrams, extract_doi, normalize_text
+
+BIBTEX = """
+@comment{exported by a citation manager}
+
+@inproceedings{kougkas2018hermes,
+  title = {Hermes: A Heterogeneous-Aware Multi-Tiered Distributed {I/O} Buffering System},
+  author = {Kougkas, Anthony and Devarajan, Hariharan and Sun, Xian-He},
+  booktitle = {HPDC},
+  year = 2018,
+  doi = {10.1145/3208040.3208059}
+}
+
+@article{kougkas2020chronolog,
+  title = "ChronoLog: A Distributed Shared Tiered Log Store with Time-based Data Ordering",
+  author = {Kougkas, Anthony and others},
+  year = {2020}
+}
+
+@misc{short,
+  title = {Notes}
+}
+"""
+
+
+class TestParseBibtex:
+    """Tests for the BibTeX reader."""
+
+    def test_parses_entries(self):
+        """Records are parsed, comments are skipped."""
+        entries = parse_bibtex(BIBTEX)
+        assert [e.key for e in entries] == ["kougkas2018hermes", "kougkas2020chronolog", "short"]
+
+    def test_braced_and_quoted_fields(self):
+        """Braced, quoted and bare values are all read."""
+        hermes, chronolog, _ = parse_bibtex(BIBTEX)
+        assert hermes.title.startswith("Hermes: A Heterogeneous-Aware")
+        assert "I/O" in hermes.title
+        assert hermes.year == "2018"
+        assert chronolog.title.startswith("ChronoLog:")
+        assert chronolog.year == "2020"
+
+    def test_doi_normalized(self):
+        """DOIs are normalized to bare lowercase form."""
+        entries = parse_bibtex("@article{a, title={T}, doi={https://doi.org/10.1145/ABC.1}}")
+        assert entries[0].doi == "10.1145/abc.1"
+
+
+class TestNormalize:
+    """Tests for text normalization helpers."""
+
+    def test_normalize_text(self):
+        """Accents, LaTeX commands and punctuation are removed."""
+        assert normalize_text(r"{\em Caf\'e}: Multi-Tiered I/O") == "cafe multi tiered i o"
+
+    def test_ngrams_ignore_spaces(self):
+        """Split words produce the same n-grams as joined words."""
+        assert char_ngrams("multi- tiered") == char_ngrams("multitiered")
+
+    def test_extract_doi(self):
+        """DOIs embedded in reference text are found."""
+        text = "A. Author, Title, 2020. doi: 10.1109/CLUSTER.2020.00012."
+        assert extract_doi(text) == "10.1109/cluster.2020.00012"
+
+
+class TestExtractReferenceEntries:
+    """Tests for pulling reference entries out of processed markdown."""
+
+    def test_extracts_anchored_entries(self):
+        """Anchored entries are extracted with their numbers."""
+        content = """# Paper
+
+Body text [[1]](#ref-1).
+
+## References
+
+<a id="ref-1"></a>[1] A. Kougkas, "Hermes," in HPDC, 2018.
+
+<a id="ref-2"></a>[2] B. Author, "Another paper,"
+in Proc. SC, 2020.
+"""
+        entries = extract_reference_entries(content)
+        assert entries[0] == (1, 'A. Kougkas, "Hermes," in HPDC, 2018.')
+        assert entries[1] == (2, 'B. Author, "Another paper," in Proc. SC, 2020.')
+
+    def test_no_references_section(self):
+        """Documents without a bibliography yield no entries."""
+        assert extract_reference_entries("# Title\n\n[1] Not a bibliography.") == []
+
+
+class TestMatchReferences:
+    """Tests for fuzzy matching against the index."""
+
+    @pytest.fixture
+    def index(self):
+        return BibIndex(parse_bibtex(BIBTEX))
+
+    def test_title_match_ieee_style(self, index):
+        """An IEEE-style entry with OCR noise matches on title n-grams."""
+        entries = [
+            (
+                3,
+                'A. Kougkas, H. Devarajan, and X.-H. Sun, "Hermes: a heterogeneous-aware '
+                'multi- tiered distributed I/O buffering system," in Proc. HPDC, 2018.',
+            )
+        ]
+        matches = match_references(entries, index)
+        assert len(matches) == 1
+        assert matches[0].key == "kougkas2018hermes"
+        assert matches[0].doi == "10.1145/3208040.3208059"
+        assert matches[0].method == "title"
+
+    def test_doi_match(self, index):
+        """A DOI in the reference resolves directly."""
+        entries = [(1, "Some garbled text. https://doi.org/10.1145/3208040.3208059")]
+        matches = match_references(entries, index)
+        assert matches[0].key == "kougkas2018hermes"
+        assert matches[0].method == "doi"
+
+    def test_unrelated_reference_not_matched(self, index):
+        """References to works outside the store are not matched."""
+        entries = [(7, 'J. Doe, "Deep learning for protein folding," Nature, 2021.')]
+        assert match_references(entries, index) == []
+
+    def test_short_titles_not_matched_by_words(self, index):
+        """Records with uninformative titles never match on title alone."""
+        entries = [(2, "Some Notes on a topic, 2020.")]
+        assert match_references(entries, index) == []
@@ -0,0 +1,94 @@
+"""Unit tests for the post-processing pass registry."""
+
+import pytest
+
+from pdf2md.postprocess import process_markdown
+from pdf2md.postprocess.registry import (
+    count_changed_lines,
+    disabled_passes,
+    resolve_passes,
+    run_passes,
+)
+
+
+class TestResolvePasses:
+    """Tests for pass ordering and toggles."""
+
+    def test_default_order_respects_dependencies(self):
+        """Every pass runs after the passes it declares."""
+        order = [p.name for p in resolve_passes()]
+        for pass_ in resolve_passes():
+            for dep in pass_.after:
+                assert order.index(dep) < order.index(pass_.name)
+        assert order[:2] == ["rules", "page_breaks"] and order[-1] == "cleanup"
+
+    def test_disabled_pass_removed(self):
+        """A disabled pass is skipped; dependents still run."""
+        order = [p.name for p in resolve_passes(["bullet_subsections"])]
+        assert "bullet_subsections" not in order
+        assert "section_hierarchy" in order
+
+    def test_unknown_pass_rejected(self):
+        """Unknown names raise with the list of available passes."""
+        with pytest.raises(ValueError, match="Available"):
+            resolve_passes(["nope"])
+
+
+class TestRunPasses:
+    """Tests for metrics and disabling in a real run."""
+
+    def test_metrics_recorded(self):
+        """Each pass reports its time and the lines it changed."""
+        content, metrics = run_passes("See [1].\n\n## References\n\n[1] A. Author.")
+        by_name = {m.name: m for m in metrics}
+        assert by_name["citations"].changed_lines == 2
+        assert by_name["figures"].changed_lines == 0
+        assert all(m.seconds >= 0 for m in metrics)
+        assert "[[1]](#ref-1)" in content
+
+    def test_figure_moves_noted(self):
+        """figure_relocation reports each move in its metrics."""
+        content = (
+            "# Title\n\n![Figure 1](./img/figure1.png)\n\nFig. 1. Overview\n\n"
+            "## Design\n\nAs shown in Fig. 1, it works."
+        )
+        _, metrics = run_passes(content)
+        by_name = {m.name: m for m in metrics}
+        assert by_name["figure_relocation"].notes == ["Moved Figure 1 (line 3) to section 'Design'"]
+        assert by_name["figure_relocation"].to_dict()["notes"]
+        assert "notes" not in by_name["citations"].to_dict()
+
+    def test_disabled_pass_does_not_fire(self):
+        """Disabling bullet_subsections keeps '- 1)' bullets untouched."""
+        content = "- 1) Buffering policy:\n\nWe buffer things."
+        assert process_markdown(content).startswith("### 1) Buffering policy")
+        result = process_markdown(content, disabled=["bullet_subsections"])
+        assert result.startswith("- 1) Buffering policy:")
+
+    def test_disabled_page_breaks_still_strip_markers(self):
+        """With page_breaks disabled, its fallback removes the markers without merging."""
+        content = "A paragraph that\n\n<!-- page-break -->\n\ncontinues here."
+        result, metrics = run_passes(content, disabled=["page_breaks"])
+        assert result == "A paragraph that\n\ncontinues here."
+        assert "page_breaks:fallback" in [m.name for m in metrics]
+
+
+class TestHelpers:
+    """Tests for change counting and config loading."""
+
+    def test_count_changed_lines(self):
+        """Edited lines count once; moved lines do not count."""
+        assert count_changed_lines("a\nb\nc", "a\nc\nb") == 0
+        assert count_changed_lines("a\nb", "a\nB\nx") == 2
+
+    def test_enable_overrides_disable(self, tmp_path):
+        """Enabled passes win over disabled ones, from the CLI or the config."""
+        config = tmp_path / "pdf2md.toml"
+        config.write_text(
+            '[postprocess]\ndisable = ["figures", "figure_relocation"]\nenable = ["figures"]\n',
+            encoding="utf-8",
+        )
+        assert disabled_passes(config=config) == ("figure_relocation",)
+        assert disabled_passes(["citations"], ["figure_relocation"], config) == ("citations",)
+        with pytest.raises(ValueError, match="Available"):
+            disabled_passes(enable=["nope"])
@@ -0,0 +1,91 @@
+"""Unit tests for model and prompt routing."""
+
+import asyncio
+
+import pytest
+
+from pdf2md.agent import cleanup
+from pdf2md.agent.chunked import chunk_prompts
+from pdf2md.agent.cleanup import PROMPT_TASKS, run_cleanup_agent
+from pdf2md.agent.routing import LARGE_DOC_CHARS, route_document
+from pdf2md.agent.telemetry import collect_telemetry
+
+SHORT = """# A Paper
+
+## Authors
+
+- **A. Smith**, University
+
+## 1. Introduction
+
+Logs are everywhere. More importantly, a log
+
+entry is the smallest unit of addressing."""
+
+
+class TestRouteDocument:
+    """Tests for picking the tier and tasks from size and defects."""
+
+    def test_short_paper(self):
+        """A short paper with one defect gets the small tier and only its task."""
+        decision = route_document(SHORT)
+        assert (decision.tier, decision.model) == ("small", "haiku")
+        assert decision.tasks == ("split_paragraphs", "general")
+        assert decision.overrides == []
+        assert any("Authors section" in reason for reason in decision.reasons)
+
+    def test_long_paper(self):
+        """A paper past the size limit gets the large tier."""
+        filler = "\n\n".join(["A complete sentence of body text."] * (LARGE_DOC_CHARS // 30))
+        decision = route_document(f"# Paper\n\n{filler}")
+        assert decision.tier == "large"
+        assert "authors" in decision.tasks
+
+    def test_unembedded_figure(self):
+        """An image without an embed calls for figure placement."""
+        decision = route_document(SHORT, ["figure1.png"])
+        assert "figure_placement" in decision.tasks
+
+    def test_overrides(self):
+        """Tier, model and tasks given by the caller win, and are recorded as overrides."""
+        decision = route_document(SHORT, tier="large", tasks=["general"])
+        assert (decision.tier, decision.model, decision.tasks) == ("large", "opus", ("general",))
+        decision = route_document(SHORT, tier="medium", model="claude-custom")
+        assert (decision.tier, decision.model) == ("medium", "claude-custom")
+        assert decision.overrides == ["tier", "model"]
+        with pytest.raises(ValueError):
+            route_document(SHORT, tier="huge")
+        with pytest.raises(ValueError):
+            route_document(SHORT, tasks=["spelling"])
+
+
+class TestRoutedRun:
+    """Tests for routing inside run_cleanup_agent, with a fake session."""
+
+    def test_routed_prompt_and_model(self, tmp_path, monkeypatch):
+        """The session gets the routed model and a prompt with only the routed tasks."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text(SHORT, encoding="utf-8")
+        calls = []
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            calls.append((prompt, model))
+            return "done"
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        with collect_telemetry() as telemetry:
+            asyncio.run(run_cleanup_agent(md_path, route=True))
+        ((prompt, model),) = calls
+        assert model == "haiku"
+        assert PROMPT_TASKS["split_paragraphs"].title in prompt
+        assert PROMPT_TASKS["authors"].title not in prompt
+        assert telemetry.route["tier"] == "small"
+
+    def test_chunk_prompts(self):
+        """Sections keep general cleanup; the final pass is dropped without its tasks."""
+        chunk_prompt, final_prompt = chunk_prompts("edit", ("split_paragraphs", "general"))
+        assert PROMPT_TASKS["split_paragraphs"].title in chunk_prompt
+        assert PROMPT_TASKS["section_headers"].title not in chunk_prompt
+        assert final_prompt is None
+        _, final_prompt = chunk_prompts("patch", ("authors", "general"))
+        assert PROMPT_TASKS["authors"].title in final_prompt
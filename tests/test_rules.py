@@ -0,0 +1,180 @@
+"""Unit tests for user-defined rule packs."""
+
+import os
+
+import pytest
+
+from pdf2md.postprocess import process_markdown
+from pdf2md.postprocess.rules import (
+    Rule,
+    apply_line_rules,
+    apply_rule_pack,
+    compile_rule_pack,
+    load_rule_pack,
+)
+from pdf2md.postprocess.stream import process_markdown_stream
+
+ARXIV = r"^arXiv:\d{4}\.\d{4,5}v\d+ \[[\w.-]+\] \d{1,2} \w{3} \d{4}$"
+
+TOML_PACK = """
+[[rules]]
+name = "arxiv-watermark"
+pattern = '^arXiv:\\d{4}\\.\\d{4,5}v\\d+ \\[[\\w.-]+\\] \\d{1,2} \\w{3} \\d{4}$'
+
+[[rules]]
+name = "acm-copyright"
+pattern = '^Permission to make digital or hard copies.*?\\n\\n'
+scope = "document"
+"""
+
+YAML_PACK = """
+rules:
+  - name: ieee-note
+    pattern: '^Authorized licensed use limited to:.*$'
+    replacement: ''
+  - name: ccs
+    pattern: 'CCS CONCEPTS'
+    replacement: 'CCS Concepts'
+    ignore_case: true
+"""
+
+
+class TestCompileRulePack:
+    """Tests for combining line rules into one scanner."""
+
+    def test_line_rules_combined(self):
+        """Plain line rules share one scanner."""
+        pack = compile_rule_pack([Rule("a", "foo"), Rule("b", "(bar)")])
+        assert len(pack.scanners) == 1
+        assert not pack.fallback_rules
+
+    def test_case_insensitive_rules_scanned_separately(self):
+        """Case-insensitive rules get their own scanner."""
+        pack = compile_rule_pack([Rule("a", "foo"), Rule("b", "bar", ignore_case=True)])
+        assert len(pack.scanners) == 2
+
+    def test_captures_removed_from_scanner(self):
+        """The scanner has no capturing groups; classes and escapes are kept."""
+        pack = compile_rule_pack([Rule("a", r"(?P<n>\d+)([(\]])\(x\)")])
+        assert pack.scanners[0].pattern.groups == 0
+        assert apply_line_rules("12](x)", pack) == ""
+
+    def test_backreference_falls_back(self):
+        """Rules with backreferences are matched on their own."""
+        pack = compile_rule_pack([Rule("dup", r"\b(\w+) \1\b", r"\1"), Rule("b", "bar")])
+        assert [r.name for r, _ in pack.fallback_rules] == ["dup"]
+        assert apply_line_rules("the the bar", pack) == "the "
+
+    def test_uncombinable_set_falls_back(self):
+        """A set whose alternation does not compile is matched rule by rule."""
+        pack = compile_rule_pack([Rule("a", "(?m)^ab"), Rule("b", "cd")])
+        assert not pack.scanners
+        assert apply_line_rules("ab cd", pack) == " "
+
+    def test_invalid_pattern_rejected(self):
+        """An invalid pattern names the rule in the error."""
+        with pytest.raises(ValueError, match="broken"):
+            compile_rule_pack([Rule("broken", "(")])
+
+    def test_unknown_scope_rejected(self):
+        """Only line and document scopes exist."""
+        with pytest.raises(ValueError, match="scope"):
+            compile_rule_pack([Rule("a", "x", scope="page")])
+
+
+class TestApplyRules:
+    """Tests for applying rule packs."""
+
+    def test_groups_numbered_per_rule(self):
+        """Replacement groups refer to the rule's own pattern, not the alternation."""
+        pack = compile_rule_pack(
+            [Rule("a", r"(\d+) apples", r"\1 pears"), Rule("b", r"(\w+)@(\w+)", r"\2 at \1")]
+        )
+        assert apply_line_rules("3 apples, me@host", pack) == "3 pears, host at me"
+
+    def test_first_rule_wins_at_same_position(self):
+        """Rules earlier in the pack take precedence."""
+        pack = compile_rule_pack([Rule("a", "abc", "1"), Rule("b", "ab", "2")])
+        assert apply_line_rules("abc", pack) == "1"
+
+    def test_ignore_case_per_rule(self):
+        """ignore_case applies only to its own rule."""
+        pack = compile_rule_pack([Rule("a", "draft", "", ignore_case=True), Rule("b", "x", "y")])
+        assert apply_line_rules("DRAFT X x", pack) == " X y"
+
+    def test_arxiv_watermark_removed(self):
+        """A whole-line rule empties the line."""
+        pack = compile_rule_pack([Rule("arxiv", ARXIV)])
+        content = "Text.\narXiv:2101.01234v2 [cs.DC] 3 Jan 2021\nMore."
+        assert apply_rule_pack(content, pack) == ("Text.\n\nMore.", 1)
+
+    def test_document_rule_spans_lines(self):
+        """Document rules run over the whole text in MULTILINE mode."""
+        pack = compile_rule_pack([Rule("block", r"^BEGIN\n.*?\nEND\n", "", scope="document")])
+        assert apply_rule_pack("a\nBEGIN\nx\nEND\nb", pack)[0] == "a\nb"
+
+
+class TestLoadRulePack:
+    """Tests for reading packs from TOML and YAML."""
+
+    def test_toml(self, tmp_path):
+        """A TOML pack loads both scopes."""
+        path = tmp_path / "arxiv.toml"
+        path.write_text(TOML_PACK, encoding="utf-8")
+        pack = load_rule_pack(path)
+        assert len(pack.scanners) == 1 and len(pack.document_rules) == 1
+
+    def test_yaml(self, tmp_path):
+        """A YAML pack loads with PyYAML."""
+        pytest.importorskip("yaml")
+        path = tmp_path / "ieee.yaml"
+        path.write_text(YAML_PACK, encoding="utf-8")
+        pack = load_rule_pack(path)
+        assert apply_line_rules("ccs concepts", pack) == "CCS Concepts"
+
+    def test_cached_until_modified(self, tmp_path):
+        """The compiled pack is reused until the file changes."""
+        path = tmp_path / "pack.toml"
+        path.write_text(TOML_PACK, encoding="utf-8")
+        assert load_rule_pack(path) is load_rule_pack(path)
+        first = load_rule_pack(path)
+        path.write_text('[[rules]]\npattern = "x"\n', encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_rule_pack(path) is not first
+
+    def test_missing_rules_list_rejected(self, tmp_path):
+        """A file without a rules list is an error."""
+        path = tmp_path / "bad.toml"
+        path.write_text('name = "x"\n', encoding="utf-8")
+        with pytest.raises(ValueError, match="rules"):
+            load_rule_pack(path)
+
+    def test_unknown_key_rejected(self, tmp_path):
+        """Typos in rule keys are reported."""
+        path = tmp_path / "bad.toml"
+        path.write_text('[[rules]]\npattern = "x"\nreplace = "y"\n', encoding="utf-8")
+        with pytest.raises(ValueError, match="replace"):
+            load_rule_pack(path)
+
+
+class TestPipelineIntegration:
+    """Tests for rule packs in the post-processing pipelines."""
+
+    def test_process_markdown_runs_rules_first(self):
+        """Rules run before page-break merging sees the text."""
+        pack = compile_rule_pack([Rule("arxiv", ARXIV)])
+        content = "The system is\n\narXiv:2101.01234v2 [cs.DC] 3 Jan 2021\n\nfast."
+        result = process_markdown(content, rule_packs=[pack])
+        assert "arXiv" not in result
+
+    def test_stream_applies_line_rules(self):
+        """The streaming pipeline applies line rules."""
+        pack = compile_rule_pack([Rule("draft", "DRAFT ", "")])
+        assert list(process_markdown_stream(["DRAFT Text."], rule_packs=[pack]))[0] == "Text."
+
+    def test_stream_rejects_document_rules(self):
+        """Document rules need the whole document."""
+        pack = compile_rule_pack([Rule("a", "x", scope="document")])
+        with pytest.raises(ValueError, match="document"):
+            list(process_markdown_stream(["x"], rule_packs=[pack]))
@@ -0,0 +1,220 @@
+"""Scaling benchmarks for the post-processing passes.
+
+Synthetic papers are generated at increasing sizes and every registered pass
+is timed on each. A pass must scale near-linearly and stay within a time
+budget per megabyte; adversarial long lines (tables exported as one line,
+long whitespace runs) must not trigger regex backtracking.
+
+The default run uses small sizes (10 KB - 160 KB) so it stays fast, and only
+checks growth between sizes, which does not depend on the machine. Set
+PDF2MD_BENCH=1 to run the full 10 KB - 50 MB range and the absolute time
+budgets as well.
+"""
+
+import os
+import random
+import time
+
+import pytest
+
+from pdf2md.postprocess.figures import process_figures
+from pdf2md.postprocess.guards import MAX_RULE_LINE_LENGTH, is_oversized
+from pdf2md.postprocess.registry import PassContext, resolve_passes
+from pdf2md.postprocess.rules import Rule, apply_rule_pack, compile_rule_pack
+from pdf2md.postprocess.sections import process_sections
+
+FULL_BENCH = os.environ.get("PDF2MD_BENCH") == "1"
+SIZES = (
+    [10_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+    if FULL_BENCH
+    else [10_000, 40_000, 160_000]
+)
+
+# Allowed super-linearity: t(large) <= SLACK * (size ratio) * t(small) + noise
+SLACK = 3.0
+NOISE_SECONDS = 0.05
+
+# Time budget per pass and megabyte of input
+BUDGET_SECONDS_PER_MB = 1.0
+
+# Length of each adversarial line
+ADVERSARIAL_LENGTH = 100_000
+ADVERSARIAL_BUDGET_SECONDS = 0.25
+
+# Absolute time budgets vary with the machine and its load
+bench_only = pytest.mark.skipif(not FULL_BENCH, reason="time budgets run with PDF2MD_BENCH=1")
+
+WORDS = (
+    "data storage buffering hierarchical metadata runtime workflow the of and in to "
+    "a is for we our system performance memory tier placement scheduling"
+).split()
+
+
+def generate_markdown(size: int, seed: int = 0) -> str:
+    """Generate a synthetic paper of about ``size`` characters."""
+    rng = random.Random(seed)
+    parts = ["# A Synthetic Paper", "", "Abstract -We study synthetic things.", ""]
+    length = sum(len(p) + 1 for p in parts)
+    section = 0
+    figure = 0
+
+    while length < size:
+        section += 1
+        block = [f"## {section}. Section {section}", ""]
+        for sub in range(1, 3):
+            block += [f"{section}.{sub} Subsection title", ""]
+            for letter in "AB":
+                block += [f"{letter}. Lettered part {letter}", ""]
+                words = " ".join(rng.choice(WORDS) for _ in range(60))
+                block += [f"{words} [{rng.randint(1, 40)}]-[{rng.randint(41, 60)}] stor- age.", ""]
+        figure += 1
+        block += [
+            f"As Fig. {figure} shows, the system is fast and the docu-",
+            "",
+            "<!-- page-break -->",
+            "",
+            "ment continues here.",
+            "",
+            "<!-- image -->",
+            f"Fig. {figure}. A figure caption.",
+            "",
+            "| a | b | c |",
+            "|---|---|---|",
+            "| 1 | 2 | 3 |",
+            "",
+            "- 1) Bullet subsection:",
+            "",
+            "Following paragraph text.",
+            "",
+        ]
+        parts += block
+        length += sum(len(p) + 1 for p in block)
+
+    parts += ["## References", ""]
+    parts += [f'[{i}] A. Author, "Paper {i}," in Proc. SC, 2020.' for i in range(1, 61)]
+    return "\n".join(parts)
+
+
+def adversarial_lines(length: int) -> dict[str, str]:
+    """Single lines that are known to be hard for naive patterns."""
+    return {
+        "table_row": "| " + " | ".join(["cell 12.5"] * (length // 12)) + " |",
+        "numbered_whitespace": "1.1 A" + " " * length + "x",
+        "numbered_words": "1.1 A" + " x" * (length // 2) + ".y",
+        "dotted_numbers": "1." * (length // 2) + " A",
+        "caption_whitespace": "Fig" + " " * length,
+        "repeated_captions": "Fig. 1 " * (length // 7),
+        "citations": "[1]" * (length // 3),
+        "hyphens": "a- " * (length // 3),
+        "brackets": "[" * length,
+        "lettered": "A. " + "B" * length,
+    }
+
+
+def _adversarial_document(kind: str, length: int) -> str:
+    line = adversarial_lines(length)[kind]
+    return f"# Title\n\nSome text.\n\n{line}\n\nMore text.\n"
+
+
+def _time_pass(pass_, content: str, context: PassContext, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pass_.func(content, context)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.fixture(scope="module")
+def timings() -> dict[str, list[float]]:
+    """Time every pass at every size (computed once for the module)."""
+    context = PassContext(images=[f"figure{i}.png" for i in range(1, 50)])
+    documents = [generate_markdown(size) for size in SIZES]
+    repeats = 1 if FULL_BENCH else 3
+    return {
+        pass_.name: [_time_pass(pass_, doc, context, repeats) for doc in documents]
+        for pass_ in resolve_passes()
+    }
+
+
+class TestScaling:
+    """Near-linear scaling and per-pass time budgets."""
+
+    def test_generator_sizes(self):
+        """The generator produces documents of roughly the requested size."""
+        for size in SIZES[:3]:
+            assert size <= len(generate_markdown(size)) < size * 1.5 + 5_000
+
+    @pytest.mark.parametrize("name", [p.name for p in resolve_passes()])
+    def test_pass_scales_near_linearly(self, name, timings):
+        """Each pass's time grows at most SLACK times faster than its input."""
+        times = timings[name]
+        for (small, t_small), (large, t_large) in zip(zip(SIZES, times), zip(SIZES[1:], times[1:])):
+            limit = SLACK * (large / small) * t_small + NOISE_SECONDS
+            assert t_large <= limit, f"{name}: {t_small:.4f}s @ {small} -> {t_large:.4f}s @ {large}"
+
+    @bench_only
+    @pytest.mark.parametrize("name", [p.name for p in resolve_passes()])
+    def test_pass_within_budget(self, name, timings):
+        """Each pass stays within BUDGET_SECONDS_PER_MB on the largest input."""
+        size_mb = SIZES[-1] / 1_000_000
+        assert timings[name][-1] <= BUDGET_SECONDS_PER_MB * size_mb + NOISE_SECONDS
+
+    @bench_only
+    def test_rule_pack_within_budget(self):
+        """A 50-rule pack costs one scan, not 50, on the largest input."""
+        pack = compile_rule_pack(
+            [Rule(f"r{i}", rf"\bwatermark{i}-(\d+)\b", r"\1") for i in range(50)]
+        )
+        content = generate_markdown(SIZES[-1])
+        start = time.perf_counter()
+        apply_rule_pack(content, pack)
+        elapsed = time.perf_counter() - start
+        assert elapsed <= BUDGET_SECONDS_PER_MB * SIZES[-1] / 1_000_000 + NOISE_SECONDS
+
+
+class TestAdversarialLines:
+    """Pathological single lines finish quickly in every pass."""
+
+    @pytest.mark.parametrize("kind", list(adversarial_lines(10)))
+    def test_long_line_scales_linearly(self, kind):
+        """No pass backtracks: time on a 4x longer line grows at most SLACK x 4."""
+        short, long = (
+            _adversarial_document(kind, length)
+            for length in (ADVERSARIAL_LENGTH // 4, ADVERSARIAL_LENGTH)
+        )
+        context = PassContext(images=["figure1.png"])
+        for pass_ in resolve_passes():
+            t_short = _time_pass(pass_, short, context)
+            t_long = _time_pass(pass_, long, context)
+            limit = SLACK * 4 * t_short + NOISE_SECONDS
+            assert t_long <= limit, f"{pass_.name}: {t_short:.4f}s -> {t_long:.4f}s"
+
+    @bench_only
+    @pytest.mark.parametrize("kind", list(adversarial_lines(10)))
+    def test_long_line_within_budget(self, kind):
+        """Every pass finishes a long adversarial line within its budget."""
+        content = _adversarial_document(kind, ADVERSARIAL_LENGTH)
+        context = PassContext(images=["figure1.png"])
+        for pass_ in resolve_passes():
+            elapsed = _time_pass(pass_, content, context, repeats=1)
+            assert elapsed < ADVERSARIAL_BUDGET_SECONDS, f"{pass_.name} took {elapsed:.2f}s"
+
+
+class TestOversizedLineGuard:
+    """Line-level rules skip lines longer than MAX_RULE_LINE_LENGTH."""
+
+    def test_short_line_not_oversized(self):
+        """Ordinary lines pass the guard."""
+        assert not is_oversized("3.1 Design", "test")
+
+    def test_long_numbered_title_not_converted(self):
+        """A numbered title padded past the limit is left as text."""
+        line = "3.1 Design" + " x" * MAX_RULE_LINE_LENGTH
+        assert is_oversized(line, "test")
+        assert process_sections(f"{line}\n\nText.") == f"{line}\n\nText."
+
+    def test_long_caption_not_embedded(self):
+        """A caption line past the limit does not get an image."""
+        line = "Fig. 1. Caption" + " x" * MAX_RULE_LINE_LENGTH
+        assert "![" not in process_figures(line, ["figure1.png"])
@@ -0,0 +1,87 @@
+"""Unit tests for the concurrent agent scheduler."""
+
+import asyncio
+import json
+
+from pdf2md.agent import cleanup
+from pdf2md.agent.budget import AgentError, current_run
+from pdf2md.agent.scheduler import AgentScheduler
+
+
+def _papers(tmp_path, count):
+    paths = []
+    for i in range(count):
+        doc_dir = tmp_path / f"paper{i}"
+        doc_dir.mkdir()
+        md_path = doc_dir / f"paper{i}.md"
+        md_path.write_text(f"# Paper {i}", encoding="utf-8")
+        paths.append(md_path)
+    return paths
+
+
+async def _run_all(paths, **options):
+    async with AgentScheduler(backoff_seconds=0, **options) as scheduler:
+        tasks = [scheduler.submit(path) for path in paths]
+    return [task.result() for task in tasks]
+
+
+class TestAgentScheduler:
+    """Tests for concurrency, retries and metrics, with fake sessions."""
+
+    def test_bounded_concurrency(self, tmp_path, monkeypatch):
+        """No more than max_concurrency documents are cleaned at once."""
+        running = []
+        peak = []
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            running.append(cwd)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(cwd)
+            return "done"
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        outcomes = asyncio.run(_run_all(_papers(tmp_path, 5), max_concurrency=2, issues=False))
+        assert all(outcome.ok for outcome in outcomes)
+        assert max(peak) == 2
+
+    def test_transient_failure_retried(self, tmp_path, monkeypatch):
+        """A rate-limited run is retried; a permanent failure is not."""
+        calls = []
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            calls.append(cwd.name)
+            transient = cwd.name == "paper0"
+            if transient and calls.count(cwd.name) > 1:
+                return "done"
+            current_run().record_error(AgentError("failed", transient=transient))
+            return None
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        first, second = asyncio.run(_run_all(_papers(tmp_path, 2), issues=False))
+        assert (first.ok, first.attempts) == (True, 2)
+        assert (second.ok, second.attempts, second.error) == (False, 1, "failed")
+
+    def test_retries_exhausted(self, tmp_path, monkeypatch):
+        """A document that keeps failing transiently gives up after the retries."""
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            current_run().record_error(AgentError("overloaded", transient=True))
+            return None
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        (outcome,) = asyncio.run(_run_all(_papers(tmp_path, 1), retries=2, issues=False))
+        assert (outcome.ok, outcome.attempts) == (False, 3)
+
+    def test_metrics_written(self, tmp_path, monkeypatch):
+        """Each document's metrics.json gets its attempts and error."""
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            return "done"
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        (md_path,) = _papers(tmp_path, 1)
+        asyncio.run(_run_all([md_path], issues=False))
+        metrics = json.loads((md_path.parent / "metrics.json").read_text(encoding="utf-8"))
+        assert metrics["agent"]["attempts"] == 1
+        assert metrics["agent"]["error"] is None
@@ -8,6 +8,7 @@ from pdf2md.postprocess.sections import (
     _fix_hierarchical_sections,
     _determine_header_level,
     _is_section_title,
+    _fix_section_hierarchy,
 )
 
 
@@ -174,13 +175,13 @@ More text.
 
 
 class TestLetteredSectionsNotProcessed:
-    """Verify lettered sections are NOT processed by sections.py (delegated to agent)."""
+    """Verify isolated lettered lines are NOT converted without sequence evidence."""
 
     def test_lettered_section_unchanged(self):
         """Lettered sections like 'A. Background' should NOT be converted."""
         content = "A. Background\n\nSome text here."
         result = process_sections(content)
-        # Should remain unchanged - agent handles these
+        # Should remain unchanged - a lone "A." is not a sequence
         assert "A. Background" in result
         assert "#####" not in result  # Should NOT be converted to header
 
@@ -190,3 +191,109 @@ class TestLetteredSectionsNotProcessed:
         result = process_sections(content)
         assert "A. We conducted" in result
         assert "#####" not in result
+
+
+class TestFixSectionHierarchy:
+    """Tests for the lettered/Roman/mixed section hierarchy engine."""
+
+    def test_ieee_lettered_under_roman(self):
+        """Lettered runs under Roman sections become level 3."""
+        content = """## I. INTRODUCTION
+
+Intro text.
+
+A. Background
+
+Background text.
+
+B. Motivation
+
+Motivation text.
+
+## II. DESIGN
+
+A. Overview
+
+Overview text.
+
+B. Details
+
+Details text."""
+        result = _fix_section_hierarchy(content)
+        assert "## I. INTRODUCTION" in result
+        assert "### A. Background" in result
+        assert "### B. Motivation" in result
+        assert "## II. DESIGN" in result
+        assert "### A. Overview" in result
+        assert "### B. Details" in result
+
+    def test_docling_headers_relevelled(self):
+        """Docling marks every heading as ##; letters are moved below Roman."""
+        content = "## I. INTRODUCTION\n\nText.\n\n## A. Background\n\nText.\n\n## B. Goals\n\nText."
+        result = _fix_section_hierarchy(content)
+        assert "### A. Background" in result
+        assert "### B. Goals" in result
+        assert "## I. INTRODUCTION" in result
+
+    def test_plain_roman_sections(self):
+        """A Roman run on plain lines becomes level-2 headers."""
+        content = "I. INTRODUCTION\n\nText.\n\nII. RELATED WORK\n\nMore text."
+        result = _fix_section_hierarchy(content)
+        assert "## I. INTRODUCTION" in result
+        assert "## II. RELATED WORK" in result
+
+    def test_run_in_titles_split(self):
+        """Run-in lettered headings are split into header and body."""
+        content = (
+            "### 3.1 Design\n\n"
+            "A. RAM management. The runtime keeps hot data in memory.\n\n"
+            "B. Metadata management: Metadata is sharded across nodes."
+        )
+        result = _fix_section_hierarchy(content)
+        assert "#### A. RAM management\n\nThe runtime keeps hot data in memory." in result
+        assert "#### B. Metadata management\n\nMetadata is sharded across nodes." in result
+
+    def test_sentences_not_converted(self):
+        """Sentences starting with letters are not headers, even in sequence."""
+        content = (
+            "A. We conducted experiments on the cluster.\n\n"
+            "B. In our evaluation, we found that latency dropped."
+        )
+        assert _fix_section_hierarchy(content) == content
+
+    def test_broken_sequence_not_converted(self):
+        """A lone 'B.' without an 'A.' is not a header."""
+        content = "## II. DESIGN\n\nB. Something short\n\nText."
+        assert "### B." not in _fix_section_hierarchy(content)
+
+    def test_paren_subsections_nest_below_letters(self):
+        """'1) Title' headings inside a lettered section go one level deeper."""
+        content = """## I. INTRODUCTION
+
+A. Background
+
+Text.
+
+### 1) Details
+
+Paragraph.
+
+B. Other
+
+Text."""
+        result = _fix_section_hierarchy(content)
+        assert "### A. Background" in result
+        assert "#### 1) Details" in result
+        assert "### B. Other" in result
+
+    def test_mixed_numbering(self):
+        """Mixed '1.A' numbering forms its own run."""
+        content = "## 1 Introduction\n\n1.A Overview\n\nText.\n\n1.B Scope\n\nText."
+        result = _fix_section_hierarchy(content)
+        assert "### 1.A. Overview" in result
+        assert "### 1.B. Scope" in result
+
+    def test_references_section_ignored(self):
+        """Author initials in the bibliography are never treated as sections."""
+        content = "## References\n\nA. Smith and B. Jones\n\nB. Jones, Title, 2020."
+        assert _fix_section_hierarchy(content) == content
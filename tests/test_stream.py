@@ -0,0 +1,79 @@
+"""Unit tests for streaming post-processing."""
+
+import io
+from itertools import chain, islice, repeat
+
+from pdf2md.postprocess import process_markdown
+from pdf2md.postprocess.stream import process_markdown_stream
+
+SAMPLE = """# A Paper
+
+Abstract -We study things [1]-[3] in docu- ment form.
+
+## 1. Introduction
+
+Data is written into the log in indivisible entries, rather than bytes. More importantly, a log
+
+<!-- page-break -->
+
+Fig. 1. Overview of the system.
+
+entry is the smallest unit of addressing [4], [5].
+
+3.1 Design overview.
+Hermes is designed.
+
+- 1) Buffering policy:
+
+We buffer things.
+
+- 2) short item
+
+ﬁle with trailing spaces\x20\x20\x20
+
+## References
+
+- [1] A. Author, "Paper one," 2020.
+[2] B. Author, "Paper two," 2021.
+continued line
+[3] C. Author.
+"""
+
+
+def _run(content, images=None):
+    return "".join(f"{line}\n" for line in process_markdown_stream(io.StringIO(content), images))
+
+
+class TestProcessMarkdownStream:
+    """Tests for the streaming pipeline."""
+
+    def test_matches_process_markdown(self):
+        """Line-local passes give the same output as the whole-document pipeline."""
+        images = ["figure1.png"]
+        assert _run(SAMPLE, images) == process_markdown(SAMPLE, images)
+
+    def test_accepts_plain_lines(self):
+        """Lines without trailing newlines are accepted."""
+        lines = ["Text [7].", "", "References", "[7] A. Author."]
+        result = list(process_markdown_stream(lines))
+        assert result[0] == "Text [[7]](#ref-7)."
+        assert result[-1] == '<a id="ref-7"></a>[7] A. Author.'
+
+    def test_citations_not_linked_in_references(self):
+        """After the references heading only anchors are added."""
+        lines = ["## References", "[1] See also [2]."]
+        assert list(process_markdown_stream(lines))[-1] == '<a id="ref-1"></a>[1] See also [2].'
+
+    def test_page_break_merged_across_stream(self):
+        """A paragraph split at a page break is rejoined."""
+        lines = ["The first half of", "", "<!-- page-break -->", "", "the sentence."]
+        assert list(process_markdown_stream(lines))[0] == "The first half of the sentence."
+
+    def test_output_is_lazy(self):
+        """Lines are produced before the input is exhausted (bounded memory)."""
+        endless = chain(["# Title", ""], repeat("Body text line."))
+        assert list(islice(process_markdown_stream(endless), 3)) == [
+            "# Title",
+            "",
+            "Body text line.",
+        ]
@@ -0,0 +1,117 @@
+"""Unit tests for agent usage telemetry."""
+
+import asyncio
+import json
+from dataclasses import dataclass
+
+from pdf2md.agent import cleanup
+from pdf2md.agent.cache import AgentCache
+from pdf2md.agent.cleanup import run_cleanup_agent
+from pdf2md.agent.telemetry import (
+    AgentTelemetry,
+    collect_telemetry,
+    current_telemetry,
+    write_agent_metrics,
+)
+
+
+@dataclass
+class FakeResultMessage:
+    """The fields of the SDK's ResultMessage that telemetry reads."""
+
+    num_turns: int
+    duration_api_ms: int
+    is_error: bool = False
+    total_cost_usd: float | None = None
+    usage: dict | None = None
+
+
+class TestAgentTelemetry:
+    """Tests for accumulating session results."""
+
+    def test_result_messages_add_up(self):
+        """Turns, tokens, cost and API time from several sessions are summed."""
+        telemetry = AgentTelemetry()
+        usage = {
+            "input_tokens": 100,
+            "output_tokens": 20,
+            "cache_read_input_tokens": 5000,
+            "cache_creation_input_tokens": 300,
+        }
+        telemetry.record_result(FakeResultMessage(7, 12500, total_cost_usd=0.05, usage=usage))
+        # Older CLI versions may omit usage and cost
+        telemetry.record_result(FakeResultMessage(3, 2000))
+        assert telemetry.turns == 10
+        assert telemetry.api_seconds == 14.5
+        assert telemetry.cost_usd == 0.05
+        assert (telemetry.input_tokens, telemetry.cache_read_tokens) == (100, 5000)
+        assert telemetry.total_tokens == 5420
+
+    def test_to_dict(self):
+        """Tool calls are sorted by count and the token total is included."""
+        telemetry = AgentTelemetry(input_tokens=10, output_tokens=5)
+        for name in ("Read", "Edit", "Read", "Grep", "Read", "Edit"):
+            telemetry.record_tool_call(name)
+        telemetry.record_session(1.23456)
+        telemetry.record_session(2.0, failed=True)
+        data = telemetry.to_dict()
+        assert list(data["tool_calls"].items()) == [("Read", 3), ("Edit", 2), ("Grep", 1)]
+        assert data["total_tokens"] == 15
+        assert (data["sessions"], data["failed_sessions"]) == (2, 1)
+        assert data["session_seconds"] == 3.23
+        json.dumps(data)
+
+
+class TestCollectTelemetry:
+    """Tests for the collector of a block of agent runs."""
+
+    def test_parallel_tasks_share_collector(self):
+        """Sessions in tasks under asyncio.run record into the enclosing collector."""
+
+        async def session(turns):
+            await asyncio.sleep(0)
+            current_telemetry().record_result(FakeResultMessage(turns, 0))
+
+        async def run():
+            await asyncio.gather(*(session(turns) for turns in (1, 2, 3)))
+
+        assert current_telemetry() is None
+        with collect_telemetry() as telemetry:
+            asyncio.run(run())
+        assert telemetry.turns == 6
+        assert telemetry.wall_seconds > 0
+        assert current_telemetry() is None
+
+    def test_cache_hit_counted(self, tmp_path, monkeypatch):
+        """A run restored from the cache counts as a hit, not a session."""
+        md_path = tmp_path / "paper.md"
+        md_path.write_text("Broken  text", encoding="utf-8")
+
+        async def fake_session(prompt, cwd, *, model=None, verbose=False):
+            current_telemetry().record_session(0.5)
+            md_path.write_text("Clean text", encoding="utf-8")
+            return "fixed spacing"
+
+        monkeypatch.setattr(cleanup, "run_agent_session", fake_session)
+        cache = AgentCache(tmp_path / "cache")
+        with collect_telemetry() as first:
+            asyncio.run(run_cleanup_agent(md_path, cache=cache))
+        md_path.write_text("Broken  text", encoding="utf-8")
+        with collect_telemetry() as second:
+            asyncio.run(run_cleanup_agent(md_path, cache=cache))
+        assert (first.sessions, first.cache_hits) == (1, 0)
+        assert (second.sessions, second.cache_hits) == (0, 1)
+
+
+class TestMetricsFile:
+    """Tests for writing telemetry to metrics.json."""
+
+    def test_merged_with_pass_metrics(self, tmp_path):
+        """The agent entry is added next to the post-processing metrics."""
+        metrics_path = tmp_path / "metrics.json"
+        metrics_path.write_text(json.dumps({"postprocess": {"sections": {}}}), encoding="utf-8")
+        write_agent_metrics(tmp_path, AgentTelemetry(turns=4), attempts=2)
+        metrics = json.loads(metrics_path.read_text(encoding="utf-8"))
+        assert metrics["postprocess"] == {"sections": {}}
+        assert metrics["agent"]["turns"] == 4
+        assert metrics["agent"]["attempts"] == 2